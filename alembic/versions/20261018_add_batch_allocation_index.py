@@ -0,0 +1,34 @@
+"""Add the batch availability index on batch_master
+
+Revision ID: batch_allocation_index_001
+Revises: putaway_tasks_001
+Create Date: 2026-10-18
+
+Index created:
+- ix_batch_master_allocation: (warehouse_id, product_id, expiry_date,
+  manufacturing_date) over pickable batches only (UNRESTRICTED with
+  quantity_available > 0). FEFO/FIFO allocation for many products reads
+  it in pick order; batches leave it as soon as they are fully reserved
+  or issued, so it stays small for spares with many exhausted batches.
+"""
+
+revision = 'batch_allocation_index_001'
+down_revision = 'putaway_tasks_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_batch_master_allocation',
+        'batch_master',
+        ['warehouse_id', 'product_id', 'expiry_date', 'manufacturing_date'],
+        postgresql_where=sa.text("batch_status = 'UNRESTRICTED' AND quantity_available > 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_batch_master_allocation', table_name='batch_master')
@@ -0,0 +1,69 @@
+"""Add daily_demand_facts table (shared demand-history feature store)
+
+Revision ID: daily_demand_facts_001
+Revises: vi_expense_lines_001
+Create Date: 2026-10-18
+
+Table created:
+- daily_demand_facts: Daily demand per product x warehouse x channel x region x dealer x order status
+
+Populate after upgrade with: python scripts/backfill_demand_facts.py --days 730
+"""
+
+revision = 'daily_demand_facts_001'
+down_revision = 'vi_expense_lines_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_demand_facts',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True,
+                  server_default=sa.text('gen_random_uuid()')),
+        sa.Column('demand_date', sa.Date(), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('warehouse_id', postgresql.UUID(as_uuid=True), nullable=False,
+                  comment='Nil UUID when order has no warehouse'),
+        sa.Column('channel', sa.String(50), nullable=False, server_default='',
+                  comment='Order source'),
+        sa.Column('region_id', postgresql.UUID(as_uuid=True), nullable=False,
+                  comment='Nil UUID when order has no region'),
+        sa.Column('dealer_id', postgresql.UUID(as_uuid=True), nullable=False,
+                  comment='Nil UUID when order has no dealer'),
+        sa.Column('order_status', sa.String(50), nullable=False),
+        sa.Column('quantity', sa.Numeric(15, 2), nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Numeric(15, 2), nullable=False, server_default='0'),
+        sa.Column('order_lines', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('order_count', sa.Integer(), nullable=False, server_default='0',
+                  comment='Orders counted once, on their first line'),
+        sa.Column('order_value', sa.Numeric(15, 2), nullable=False, server_default='0',
+                  comment='Order total counted once, on the first line'),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text('now()')),
+        sa.UniqueConstraint(
+            'demand_date', 'product_id', 'warehouse_id', 'channel', 'region_id', 'dealer_id', 'order_status',
+            name='uq_daily_demand_facts_cell'
+        ),
+    )
+
+    op.create_index(
+        'ix_daily_demand_facts_product_date',
+        'daily_demand_facts',
+        ['product_id', 'demand_date'],
+    )
+    op.create_index(
+        'ix_daily_demand_facts_date',
+        'daily_demand_facts',
+        ['demand_date'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_daily_demand_facts_date', table_name='daily_demand_facts')
+    op.drop_index('ix_daily_demand_facts_product_date', table_name='daily_demand_facts')
+    op.drop_table('daily_demand_facts')
@@ -0,0 +1,40 @@
+"""Add demand_forecast_snapshots table (stored dashboard forecasts)
+
+Revision ID: demand_forecast_snapshots_001
+Revises: daily_demand_facts_001
+Create Date: 2026-10-18
+
+Table created:
+- demand_forecast_snapshots: Per-product demand forecast with the demand watermark it was computed from
+"""
+
+revision = 'demand_forecast_snapshots_001'
+down_revision = 'daily_demand_facts_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def upgrade() -> None:
+    op.create_table(
+        'demand_forecast_snapshots',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True,
+                  server_default=sa.text('gen_random_uuid()')),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('lookback_days', sa.Integer(), nullable=False),
+        sa.Column('horizon_days', sa.Integer(), nullable=False),
+        sa.Column('forecast_date', sa.Date(), nullable=False, comment='Last day of history used'),
+        sa.Column('demand_watermark', sa.String(100), nullable=False, server_default=''),
+        sa.Column('forecast', postgresql.JSONB(), nullable=False, server_default='{}'),
+        sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text('now()')),
+        sa.UniqueConstraint('product_id', 'lookback_days', 'horizon_days',
+                            name='uq_demand_forecast_snapshots_product'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('demand_forecast_snapshots')
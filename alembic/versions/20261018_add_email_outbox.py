@@ -0,0 +1,51 @@
+"""Add email_outbox table (queued transactional email)
+
+Revision ID: email_outbox_001
+Revises: demand_forecast_snapshots_001
+Create Date: 2026-10-18
+
+Table created:
+- email_outbox: Rendered outbound emails with delivery status, attempts and retry schedule
+"""
+
+revision = 'email_outbox_001'
+down_revision = 'demand_forecast_snapshots_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def upgrade() -> None:
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True,
+                  server_default=sa.text('gen_random_uuid()')),
+        sa.Column('email_type', sa.String(50), nullable=False, server_default='GENERIC'),
+        sa.Column('from_email', sa.String(255), nullable=False),
+        sa.Column('from_name', sa.String(255), nullable=True),
+        sa.Column('to_email', sa.String(255), nullable=False),
+        sa.Column('subject', sa.String(500), nullable=False),
+        sa.Column('html_content', sa.Text(), nullable=False),
+        sa.Column('text_content', sa.Text(), nullable=True),
+        sa.Column('attachments', postgresql.JSONB(), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='PENDING'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text('now()')),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text('now()')),
+    )
+    op.create_index('ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'])
+    op.create_index('ix_email_outbox_created', 'email_outbox', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_created', table_name='email_outbox')
+    op.drop_index('ix_email_outbox_status_next_attempt', table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,99 @@
+"""Add inventory_ledger (append-only inventory deltas folded into summaries)
+
+Revision ID: inventory_ledger_001
+Revises: stock_receipt_bulk_001
+Create Date: 2026-10-18
+
+Table created:
+- inventory_ledger: one row per inventory quantity change for a warehouse /
+  product / variant cell (channel_id set for channel_inventory cells), with
+  applied_at set once the fold job has added it to the summary row
+
+Index created:
+- uq_channel_inventory_no_variant: unique (channel_id, warehouse_id,
+  product_id) WHERE variant_id IS NULL, the fold's upsert target for channel
+  rows without a variant. Duplicate variant-less channel rows are merged
+  into one of them (lowest id) first.
+"""
+
+revision = 'inventory_ledger_001'
+down_revision = 'stock_receipt_bulk_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def upgrade() -> None:
+    op.create_table(
+        'inventory_ledger',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('warehouse_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('variant_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('channel_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('total_delta', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('available_delta', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('reserved_delta', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('allocated_delta', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('damaged_delta', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('in_transit_delta', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('value_delta', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('source', sa.String(50), nullable=False),
+        sa.Column('reference_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('reference_number', sa.String(100), nullable=True),
+        sa.Column('applied_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        'ix_inventory_ledger_pending', 'inventory_ledger', ['id'],
+        postgresql_where=sa.text('applied_at IS NULL'),
+    )
+    op.create_index(
+        'ix_inventory_ledger_cell_time', 'inventory_ledger', ['warehouse_id', 'product_id', 'occurred_at'],
+    )
+
+    op.execute("""
+        WITH ranked AS (
+            SELECT id,
+                   first_value(id) OVER (
+                       PARTITION BY channel_id, warehouse_id, product_id ORDER BY id
+                   ) AS keep_id
+            FROM channel_inventory
+            WHERE variant_id IS NULL
+        ),
+        extra AS (
+            SELECT r.keep_id,
+                   COALESCE(sum(c.allocated_quantity), 0) AS allocated_quantity,
+                   COALESCE(sum(c.reserved_quantity), 0) AS reserved_quantity
+            FROM ranked r JOIN channel_inventory c ON c.id = r.id
+            WHERE r.id <> r.keep_id
+            GROUP BY r.keep_id
+        )
+        UPDATE channel_inventory t SET
+            allocated_quantity = COALESCE(t.allocated_quantity, 0) + e.allocated_quantity,
+            reserved_quantity = COALESCE(t.reserved_quantity, 0) + e.reserved_quantity
+        FROM extra e
+        WHERE t.id = e.keep_id
+    """)
+    op.execute("""
+        DELETE FROM channel_inventory c
+        USING channel_inventory k
+        WHERE c.variant_id IS NULL AND k.variant_id IS NULL
+          AND c.channel_id = k.channel_id AND c.warehouse_id = k.warehouse_id
+          AND c.product_id = k.product_id AND k.id < c.id
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_channel_inventory_no_variant
+        ON channel_inventory (channel_id, warehouse_id, product_id)
+        WHERE variant_id IS NULL
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_channel_inventory_no_variant")
+    op.drop_index('ix_inventory_ledger_cell_time', table_name='inventory_ledger')
+    op.drop_index('ix_inventory_ledger_pending', table_name='inventory_ledger')
+    op.drop_table('inventory_ledger')
@@ -0,0 +1,47 @@
+"""Add job_runs table (background job run history)
+
+Revision ID: job_runs_001
+Revises: email_outbox_001
+Create Date: 2026-10-18
+
+Table created:
+- job_runs: One row per scheduled job execution with duration, rows processed and errors
+
+The APScheduler job store table (apscheduler_jobs) is created by the
+scheduler itself on first start with SCHEDULER_JOBSTORE=database.
+"""
+
+revision = 'job_runs_001'
+down_revision = 'email_outbox_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job_runs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True,
+                  server_default=sa.text('gen_random_uuid()')),
+        sa.Column('job_id', sa.String(100), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='RUNNING'),
+        sa.Column('host', sa.String(255), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.text('now()')),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('rows_processed', sa.Integer(), nullable=True),
+        sa.Column('result', postgresql.JSONB(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+    )
+    op.create_index('ix_job_runs_job_started', 'job_runs', ['job_id', 'started_at'])
+    op.create_index('ix_job_runs_started', 'job_runs', ['started_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_runs_started', table_name='job_runs')
+    op.drop_index('ix_job_runs_job_started', table_name='job_runs')
+    op.drop_table('job_runs')
@@ -0,0 +1,64 @@
+"""Add pick_waves (wave planning) and picklists.wave_id
+
+Revision ID: pick_waves_001
+Revises: inventory_ledger_001
+Create Date: 2026-10-18
+
+Table created:
+- pick_waves: a batch of orders released together by wave planning (same
+  warehouse and carrier cutoff, sized to picker capacity)
+
+Column added:
+- picklists.wave_id: the wave a picklist was released for (NULL for
+  picklists generated directly from order_ids)
+"""
+
+revision = 'pick_waves_001'
+down_revision = 'inventory_ledger_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pick_waves',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('wave_number', sa.String(30), nullable=False),
+        sa.Column('warehouse_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('warehouses.id', ondelete='RESTRICT'), nullable=False),
+        sa.Column('status', sa.String(50), nullable=False, server_default='PLANNED'),
+        sa.Column('carrier', sa.String(100), nullable=True),
+        sa.Column('cutoff_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('zone_codes', sa.Text(), nullable=True),
+        sa.Column('total_orders', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_lines', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_quantity', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('picker_count', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('released_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_pick_waves_wave_number', 'pick_waves', ['wave_number'], unique=True)
+    op.create_index('ix_pick_waves_warehouse_id', 'pick_waves', ['warehouse_id'])
+    op.create_index('ix_pick_waves_status', 'pick_waves', ['status'])
+    op.create_index('ix_pick_waves_created_at', 'pick_waves', ['created_at'])
+
+    op.add_column('picklists', sa.Column('wave_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'fk_picklists_wave_id', 'picklists', 'pick_waves', ['wave_id'], ['id'], ondelete='SET NULL',
+    )
+    op.create_index('ix_picklists_wave_id', 'picklists', ['wave_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_picklists_wave_id', table_name='picklists')
+    op.drop_constraint('fk_picklists_wave_id', 'picklists', type_='foreignkey')
+    op.drop_column('picklists', 'wave_id')
+    op.drop_index('ix_pick_waves_created_at', table_name='pick_waves')
+    op.drop_index('ix_pick_waves_status', table_name='pick_waves')
+    op.drop_index('ix_pick_waves_warehouse_id', table_name='pick_waves')
+    op.drop_index('ix_pick_waves_wave_number', table_name='pick_waves')
+    op.drop_table('pick_waves')
@@ -0,0 +1,63 @@
+"""Add po_serial_ranges (range-encoded PO serials)
+
+Revision ID: po_serial_ranges_001
+Revises: audit_logs_partitioned_001
+Create Date: 2026-10-18
+
+Table created:
+- po_serial_ranges: one row per generated serial range (start/end serial and
+  barcode, quantity, range status) instead of one po_serials row per unit
+
+Column added:
+- po_serials.range_id: set on exception rows, i.e. units of a range whose
+  state diverged from it (scanned, assigned, sold). po_serials rows without
+  range_id are per-unit serials generated before ranges.
+"""
+
+revision = 'po_serial_ranges_001'
+down_revision = 'audit_logs_partitioned_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade() -> None:
+    op.create_table(
+        'po_serial_ranges',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('po_id', sa.String(36), sa.ForeignKey('purchase_orders.id'), nullable=False),
+        sa.Column('po_item_id', sa.String(36), sa.ForeignKey('purchase_order_items.id'), nullable=True),
+        sa.Column('product_id', sa.String(36), sa.ForeignKey('products.id'), nullable=True),
+        sa.Column('product_sku', sa.String(50), nullable=True),
+        sa.Column('model_code', sa.String(10), nullable=False),
+        sa.Column('item_type', sa.String(10), nullable=False, server_default='FG'),
+        sa.Column('brand_prefix', sa.String(2), nullable=False, server_default='AP'),
+        sa.Column('supplier_code', sa.String(2), nullable=False),
+        sa.Column('year_code', sa.String(2), nullable=False),
+        sa.Column('month_code', sa.String(1), nullable=False),
+        sa.Column('start_serial', sa.Integer(), nullable=False),
+        sa.Column('end_serial', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('barcode_prefix', sa.String(12), nullable=False),
+        sa.Column('start_barcode', sa.String(20), nullable=False),
+        sa.Column('end_barcode', sa.String(20), nullable=False),
+        sa.Column('status', sa.String(30), nullable=False, server_default='GENERATED'),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_po_serial_ranges_po_id', 'po_serial_ranges', ['po_id'])
+    op.create_index('ix_po_serial_ranges_lookup', 'po_serial_ranges', ['barcode_prefix', 'start_serial'])
+
+    op.add_column('po_serials', sa.Column('range_id', sa.String(36), sa.ForeignKey('po_serial_ranges.id'), nullable=True))
+    op.create_index('ix_po_serials_range_id', 'po_serials', ['range_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_po_serials_range_id', table_name='po_serials')
+    op.drop_column('po_serials', 'range_id')
+    op.drop_index('ix_po_serial_ranges_lookup', table_name='po_serial_ranges')
+    op.drop_index('ix_po_serial_ranges_po_id', table_name='po_serial_ranges')
+    op.drop_table('po_serial_ranges')
@@ -0,0 +1,63 @@
+"""Add putaway_tasks (GRN putaway plans)
+
+Revision ID: putaway_tasks_001
+Revises: pick_waves_001
+Create Date: 2026-10-18
+
+Table created:
+- putaway_tasks: one bin assignment from a GRN putaway plan; PLANNED tasks
+  hold bin capacity until the plan is executed or the GRN is re-planned
+
+Index created:
+- ix_putaway_tasks_warehouse_status: planned capacity per warehouse, read
+  by every putaway plan and suggestion
+"""
+
+revision = 'putaway_tasks_001'
+down_revision = 'pick_waves_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def upgrade() -> None:
+    op.create_table(
+        'putaway_tasks',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('warehouse_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('warehouses.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('grn_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('goods_receipt_notes.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('grn_item_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('grn_items.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('products.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('bin_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('warehouse_bins.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('rule_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('putaway_rules.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('weight_kg', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(50), nullable=False, server_default='PLANNED'),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_putaway_tasks_warehouse_id', 'putaway_tasks', ['warehouse_id'])
+    op.create_index('ix_putaway_tasks_grn_id', 'putaway_tasks', ['grn_id'])
+    op.create_index('ix_putaway_tasks_bin_id', 'putaway_tasks', ['bin_id'])
+    op.create_index('ix_putaway_tasks_status', 'putaway_tasks', ['status'])
+    op.create_index('ix_putaway_tasks_warehouse_status', 'putaway_tasks', ['warehouse_id', 'status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_putaway_tasks_warehouse_status', table_name='putaway_tasks')
+    op.drop_index('ix_putaway_tasks_status', table_name='putaway_tasks')
+    op.drop_index('ix_putaway_tasks_bin_id', table_name='putaway_tasks')
+    op.drop_index('ix_putaway_tasks_grn_id', table_name='putaway_tasks')
+    op.drop_index('ix_putaway_tasks_warehouse_id', table_name='putaway_tasks')
+    op.drop_table('putaway_tasks')
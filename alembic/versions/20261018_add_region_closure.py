@@ -0,0 +1,78 @@
+"""Add region_closure table (materialized region hierarchy)
+
+Revision ID: region_closure_001
+Revises: job_runs_001
+Create Date: 2026-10-18
+
+Table created:
+- region_closure: (ancestor, descendant, depth) for every pair in the region tree, incl. self at depth 0
+
+Maintained by a statement-level trigger on regions (insert, delete, parent change)
+that rebuilds the closure, so region writes from SQL scripts are covered too.
+"""
+
+revision = 'region_closure_001'
+down_revision = 'job_runs_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+CLOSURE_SELECT = """
+    WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+        SELECT id, id, 0 FROM regions
+        UNION ALL
+        SELECT t.ancestor_id, r.id, t.depth + 1
+        FROM tree t
+        JOIN regions r ON r.parent_id = t.descendant_id
+        WHERE t.depth < 32
+    )
+    SELECT ancestor_id, descendant_id, min(depth)
+    FROM tree
+    GROUP BY ancestor_id, descendant_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'region_closure',
+        sa.Column('ancestor_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('regions.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('descendant_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('regions.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('depth', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_region_closure_descendant', 'region_closure', ['descendant_id'])
+
+    # Full rebuild per statement: the region tree is small and changes rarely.
+    # The advisory lock serializes concurrent rebuilds.
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION refresh_region_closure()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('region_closure'));
+            DELETE FROM region_closure;
+            INSERT INTO region_closure (ancestor_id, descendant_id, depth)
+            {CLOSURE_SELECT};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_regions_refresh_closure
+            AFTER INSERT OR DELETE OR UPDATE OF parent_id ON regions
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION refresh_region_closure();
+    """)
+
+    op.execute(f"INSERT INTO region_closure (ancestor_id, descendant_id, depth) {CLOSURE_SELECT}")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_regions_refresh_closure ON regions")
+    op.execute("DROP FUNCTION IF EXISTS refresh_region_closure()")
+    op.drop_index('ix_region_closure_descendant', table_name='region_closure')
+    op.drop_table('region_closure')
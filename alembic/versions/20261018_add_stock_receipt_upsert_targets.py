@@ -0,0 +1,83 @@
+"""Add upsert target for variant-less inventory summaries and a movement number sequence
+
+Revision ID: stock_receipt_bulk_001
+Revises: po_serial_ranges_001
+Create Date: 2026-10-18
+
+Index created:
+- uq_inventory_summary_no_variant: unique (warehouse_id, product_id) WHERE
+  variant_id IS NULL. uq_inventory_summary treats NULL variants as distinct,
+  so it cannot serve as the ON CONFLICT target for products without variants.
+  Duplicate variant-less summaries left by the old read-then-insert path are
+  merged into one of them (lowest id) first.
+
+Sequence created:
+- stock_movement_number_seq: movement numbers for InventoryService, started
+  past the current stock_movements row count so it cannot reuse a number
+  handed out by the old per-day COUNT scheme.
+"""
+
+revision = 'stock_receipt_bulk_001'
+down_revision = 'po_serial_ranges_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+
+
+def upgrade() -> None:
+    op.execute("""
+        WITH ranked AS (
+            SELECT id, warehouse_id, product_id,
+                   first_value(id) OVER (
+                       PARTITION BY warehouse_id, product_id ORDER BY id
+                   ) AS keep_id
+            FROM inventory_summary
+            WHERE variant_id IS NULL
+        ),
+        extra AS (
+            SELECT r.keep_id,
+                   COALESCE(sum(s.total_quantity), 0) AS total_quantity,
+                   COALESCE(sum(s.available_quantity), 0) AS available_quantity,
+                   COALESCE(sum(s.reserved_quantity), 0) AS reserved_quantity,
+                   COALESCE(sum(s.allocated_quantity), 0) AS allocated_quantity,
+                   COALESCE(sum(s.damaged_quantity), 0) AS damaged_quantity,
+                   COALESCE(sum(s.in_transit_quantity), 0) AS in_transit_quantity,
+                   COALESCE(sum(s.total_value), 0) AS total_value
+            FROM ranked r JOIN inventory_summary s ON s.id = r.id
+            WHERE r.id <> r.keep_id
+            GROUP BY r.keep_id
+        )
+        UPDATE inventory_summary t SET
+            total_quantity = COALESCE(t.total_quantity, 0) + e.total_quantity,
+            available_quantity = COALESCE(t.available_quantity, 0) + e.available_quantity,
+            reserved_quantity = COALESCE(t.reserved_quantity, 0) + e.reserved_quantity,
+            allocated_quantity = COALESCE(t.allocated_quantity, 0) + e.allocated_quantity,
+            damaged_quantity = COALESCE(t.damaged_quantity, 0) + e.damaged_quantity,
+            in_transit_quantity = COALESCE(t.in_transit_quantity, 0) + e.in_transit_quantity,
+            total_value = COALESCE(t.total_value, 0) + e.total_value
+        FROM extra e
+        WHERE t.id = e.keep_id
+    """)
+    op.execute("""
+        DELETE FROM inventory_summary s
+        USING inventory_summary k
+        WHERE s.variant_id IS NULL AND k.variant_id IS NULL
+          AND s.warehouse_id = k.warehouse_id AND s.product_id = k.product_id
+          AND k.id < s.id
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_inventory_summary_no_variant
+        ON inventory_summary (warehouse_id, product_id)
+        WHERE variant_id IS NULL
+    """)
+
+    op.execute("CREATE SEQUENCE IF NOT EXISTS stock_movement_number_seq")
+    op.execute("""
+        SELECT setval('stock_movement_number_seq', GREATEST((SELECT count(*) FROM stock_movements), 0) + 1, false)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP SEQUENCE IF EXISTS stock_movement_number_seq")
+    op.execute("DROP INDEX IF EXISTS uq_inventory_summary_no_variant")
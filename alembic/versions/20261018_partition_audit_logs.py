@@ -0,0 +1,111 @@
+"""Partition audit_logs by month on created_at
+
+Revision ID: audit_logs_partitioned_001
+Revises: region_closure_001
+Create Date: 2026-10-18
+
+Table rebuilt:
+- audit_logs: Range-partitioned by month on created_at (primary key becomes
+  (id, created_at)), with a DEFAULT partition and monthly partitions from the
+  oldest existing row through three months ahead. Existing rows are copied.
+
+Later partitions are created by the ensure_audit_partitions scheduled job
+(app.services.audit_writer.ensure_audit_log_partitions).
+"""
+
+revision = 'audit_logs_partitioned_001'
+down_revision = 'region_closure_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+
+
+COLUMNS = (
+    "id, user_id, action, entity_type, entity_id, old_values, new_values, "
+    "description, ip_address, user_agent, created_at"
+)
+
+
+def _create_audit_logs(partitioned: bool) -> None:
+    op.execute(f"""
+        CREATE TABLE audit_logs (
+            id UUID NOT NULL DEFAULT gen_random_uuid(),
+            user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50) NOT NULL,
+            entity_id UUID,
+            old_values JSONB,
+            new_values JSONB,
+            description TEXT,
+            ip_address VARCHAR(50),
+            user_agent VARCHAR(500),
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            {'PRIMARY KEY (id, created_at)' if partitioned else 'PRIMARY KEY (id)'}
+        ){' PARTITION BY RANGE (created_at)' if partitioned else ''}
+    """)
+    op.execute("CREATE INDEX ix_audit_logs_action ON audit_logs (action)")
+    op.execute("CREATE INDEX ix_audit_logs_entity_type ON audit_logs (entity_type)")
+    op.execute("CREATE INDEX ix_audit_logs_created_at ON audit_logs (created_at)")
+    if partitioned:
+        op.execute("CREATE INDEX ix_audit_logs_entity ON audit_logs (entity_type, entity_id, created_at)")
+        op.execute("CREATE INDEX ix_audit_logs_user_created ON audit_logs (user_id, created_at)")
+
+
+def _move_aside_old_table() -> None:
+    """Rename audit_logs out of the way, freeing its index and constraint names."""
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_old")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_action")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_entity_type")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_created_at")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_entity")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_user_created")
+    op.execute("""
+        DO $$
+        DECLARE c record;
+        BEGIN
+            FOR c IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = 'audit_logs_old'::regclass AND conname LIKE 'audit_logs%'
+            LOOP
+                EXECUTE format('ALTER TABLE audit_logs_old RENAME CONSTRAINT %I TO %I',
+                               c.conname, replace(c.conname, 'audit_logs', 'audit_logs_old'));
+            END LOOP;
+        END $$;
+    """)
+
+
+def upgrade() -> None:
+    _move_aside_old_table()
+    _create_audit_logs(partitioned=True)
+
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+    op.execute("""
+        DO $$
+        DECLARE
+            m date;
+            last_month date := date_trunc('month', now() + interval '3 months')::date;
+        BEGIN
+            SELECT coalesce(date_trunc('month', min(created_at)), date_trunc('month', now()))::date
+            INTO m FROM audit_logs_old;
+            WHILE m <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                    'audit_logs_y' || to_char(m, 'YYYY') || 'm' || to_char(m, 'MM'),
+                    m, (m + interval '1 month')::date
+                );
+                m := (m + interval '1 month')::date;
+            END LOOP;
+        END $$;
+    """)
+
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_old")
+    op.execute("DROP TABLE audit_logs_old")
+
+
+def downgrade() -> None:
+    _move_aside_old_table()
+    _create_audit_logs(partitioned=False)
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_old")
+    # Drops the partitions with it
+    op.execute("DROP TABLE audit_logs_old")
@@ -0,0 +1,62 @@
+"""Add pick_wave_allocations and pick wave completion timestamps
+
+Revision ID: pick_wave_allocations_001
+Revises: batch_allocation_index_001
+Create Date: 2026-10-19
+
+Table created:
+- pick_wave_allocations: quantity of a wave picklist item reserved FEFO
+  from one batch at release; issued when the picklist is picked, released
+  back to the batch when the picklist or wave is cancelled
+
+Columns added:
+- pick_waves.completed_at: when the wave's last picklist was settled
+- pick_waves.cancelled_at: when the wave was cancelled
+"""
+
+revision = 'pick_wave_allocations_001'
+down_revision = 'batch_allocation_index_001'
+branch_labels = None
+depends_on = None
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+def upgrade() -> None:
+    op.add_column('pick_waves', sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('pick_waves', sa.Column('cancelled_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        'pick_wave_allocations',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('wave_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('pick_waves.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('picklist_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('picklists.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('picklist_item_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('picklist_items.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('batch_id', postgresql.UUID(as_uuid=True),
+                  sa.ForeignKey('batch_master.id', ondelete='RESTRICT'), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('quantity_issued', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(20), nullable=False, server_default='RESERVED'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('settled_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_pick_wave_allocations_wave_id', 'pick_wave_allocations', ['wave_id'])
+    op.create_index('ix_pick_wave_allocations_picklist_id', 'pick_wave_allocations', ['picklist_id'])
+    op.create_index('ix_pick_wave_allocations_batch_id', 'pick_wave_allocations', ['batch_id'])
+    op.create_index('ix_pick_wave_allocations_status', 'pick_wave_allocations', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pick_wave_allocations_status', table_name='pick_wave_allocations')
+    op.drop_index('ix_pick_wave_allocations_batch_id', table_name='pick_wave_allocations')
+    op.drop_index('ix_pick_wave_allocations_picklist_id', table_name='pick_wave_allocations')
+    op.drop_index('ix_pick_wave_allocations_wave_id', table_name='pick_wave_allocations')
+    op.drop_table('pick_wave_allocations')
+    op.drop_column('pick_waves', 'cancelled_at')
+    op.drop_column('pick_waves', 'completed_at')
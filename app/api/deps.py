@@ -1,7 +1,7 @@
 from typing import Annotated, Optional, Set
 import uuid
 
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, HTTPException, status, Request, WebSocket
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload, joinedload
@@ -68,6 +68,27 @@ async def get_current_user(
     return user
 
 
+async def get_websocket_user(websocket: WebSocket, db: AsyncSession) -> Optional[User]:
+    """
+    Authenticate a websocket from its ?token= query parameter (browsers and
+    most scanner apps cannot set an Authorization header on a websocket).
+    Returns None for a missing/invalid token or an inactive user.
+    """
+    user_id = verify_access_token(websocket.query_params.get("token", ""))
+    if user_id is None:
+        return None
+    try:
+        user_uuid = uuid.UUID(user_id)
+    except ValueError:
+        return None
+
+    result = await db.execute(select(User).where(User.id == user_uuid))
+    user = result.scalar_one_or_none()
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
 async def get_user_permissions(
     user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
@@ -87,13 +87,27 @@ async def get_demand_dashboard(
 
     Shows:
     - Overall sales forecast
-    - Top product forecasts
+    - Forecasts for every product sold in the last 30 days (stored daily)
     - Stockout risks
     """
     service = DemandForecastingService(db)
     return await service.get_demand_dashboard()
 
 
+@router.post("/forecast/demand/dashboard/refresh")
+async def refresh_demand_dashboard(
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Store today's dashboard forecasts now instead of waiting for the daily job.
+
+    Only products whose demand changed since their last snapshot are recomputed.
+    """
+    service = DemandForecastingService(db)
+    refreshed = await service.refresh_dashboard_forecasts()
+    return {"products_forecast": refreshed}
+
+
 @router.get("/forecast/demand/product/{product_id}")
 async def get_product_demand_forecast(
     product_id: UUID,
@@ -333,6 +347,7 @@ async def get_ai_capabilities():
                 "description": "Predict future demand using time-series analysis",
                 "endpoints": [
                     "/api/v1/ai/forecast/demand/dashboard",
+                    "/api/v1/ai/forecast/demand/dashboard/refresh",
                     "/api/v1/ai/forecast/demand/product/{id}",
                     "/api/v1/ai/forecast/demand/category/{id}",
                     "/api/v1/ai/forecast/demand/all"
@@ -209,11 +209,21 @@ async def get_audit_log(
     log_id: UUID,
     db: DB,
     current_user: User = Depends(get_current_user),
+    created_at: Optional[datetime] = None,
 ):
-    """Get a specific audit log entry."""
+    """
+    Get a specific audit log entry.
+
+    Pass the entry's created_at (as returned by the list endpoints) so the
+    lookup only touches that month's partition instead of every one.
+    """
     query = select(AuditLog).options(selectinload(AuditLog.user)).where(
         AuditLog.id == log_id
     )
+    if created_at:
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        query = query.where(AuditLog.created_at == created_at)
     result = await db.execute(query)
     log = result.scalar_one_or_none()
 
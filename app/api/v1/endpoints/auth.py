@@ -189,7 +189,7 @@ async def forgot_password(
     reset_url = f"{frontend_url}/reset-password?token={reset_token}"
 
     # Try to send email
-    email_service = get_email_service()
+    email_service = get_email_service(db)
     user_name = user.first_name or user.email.split('@')[0]
     email_sent = email_service.send_password_reset_email(
         to_email=user.email,
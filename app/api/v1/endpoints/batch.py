@@ -72,6 +72,21 @@ class BatchIssueRequest(BaseModel):
     issues: List[BatchIssueItem]
 
 
+class BatchAllocationLine(BaseModel):
+    line_id: Optional[str] = None  # Caller's order line reference; defaults to the line's position
+    product_id: UUID
+    quantity: int
+
+
+class BatchAllocateRequest(BaseModel):
+    warehouse_id: UUID
+    lines: List[BatchAllocationLine]
+    strategy: str = "FEFO"  # FEFO or FIFO
+    action: Optional[str] = None  # RESERVE or ISSUE applies the allocation; None only recommends
+    reference_type: Optional[str] = None
+    reference_id: Optional[UUID] = None
+
+
 # ==================== Endpoints ====================
 
 @router.post("")
@@ -642,6 +657,65 @@ async def pick_batches(
     }
 
 
+@router.post("/allocate")
+async def allocate_batches(
+    payload: BatchAllocateRequest,
+    db: DB,
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Allocate FEFO/FIFO batches for many order lines in one call, optionally
+    reserving or issuing the whole allocation with one set-based update.
+    """
+    action = payload.action.upper() if payload.action else None
+    if action not in (None, "RESERVE", "ISSUE"):
+        raise HTTPException(status_code=400, detail="action must be RESERVE or ISSUE")
+
+    service = BatchPickingService(db)
+    lines = [
+        (line.line_id or str(position), line.product_id, line.quantity)
+        for position, line in enumerate(payload.lines)
+    ]
+    try:
+        allocations, short = await service.allocate_lines(payload.warehouse_id, lines, payload.strategy)
+        batches_updated = 0
+        if action == "RESERVE":
+            batches_updated = await service.reserve_allocations(allocations)
+        elif action == "ISSUE":
+            batches_updated = await service.issue_allocations(
+                allocations,
+                user_id=current_user.id,
+                reference_type=payload.reference_type or "batch_issue",
+                reference_id=payload.reference_id,
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    today = date.today()
+    picks_by_line = {}
+    for allocation in allocations:
+        picks_by_line.setdefault(allocation.line_id, []).append(service.pick_to_dict(allocation, today))
+
+    total_allocated = sum(a.quantity for a in allocations)
+    return {
+        "strategy": payload.strategy.upper(),
+        "action": action,
+        "lines": [
+            {
+                "line_id": line_id,
+                "product_id": str(product_id),
+                "quantity_needed": quantity,
+                "shortfall": short.get(line_id, 0),
+                "picks": picks_by_line.get(line_id, []),
+            }
+            for line_id, product_id, quantity in lines
+        ],
+        "total_allocated": total_allocated,
+        "total_shortfall": sum(short.values()),
+        "batches_updated": batches_updated,
+    }
+
+
 @router.post("/reserve")
 async def reserve_batches(
     payload: BatchReserveRequest,
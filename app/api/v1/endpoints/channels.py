@@ -49,6 +49,7 @@ from app.schemas.channel import (
 )
 from app.api.deps import DB, CurrentUser, get_current_user, require_permissions
 from app.services.audit_service import AuditService
+from app.services.inventory_ledger import InventoryLedgerService
 from app.config import settings
 
 router = APIRouter()
@@ -576,7 +577,10 @@ async def sync_single_inventory(
 
     # In a real implementation, this would call the marketplace API
     # For now, we simulate sync by updating marketplace_quantity to match available
-    available = max(0, (inventory.allocated_quantity or 0) - (inventory.buffer_quantity or 0) - (inventory.reserved_quantity or 0))
+    # (allocated / reserved include unfolded inventory ledger entries)
+    cell = (inventory.warehouse_id, inventory.product_id, inventory.variant_id, inventory.channel_id)
+    level = (await InventoryLedgerService(db).levels([cell]))[cell]
+    available = max(0, level["allocated_quantity"] - (inventory.buffer_quantity or 0) - level["reserved_quantity"])
     inventory.marketplace_quantity = available
     inventory.last_synced_at = datetime.now(timezone.utc)
     inventory.is_active = True
@@ -1388,9 +1392,12 @@ async def sync_channel_inventory(
     inventory_list = result.scalars().all()
 
     # TODO: Integrate with actual marketplace APIs
+    cells = {inv.id: (inv.warehouse_id, inv.product_id, inv.variant_id, inv.channel_id) for inv in inventory_list}
+    levels = await InventoryLedgerService(db).levels(cells.values())
     synced_count = 0
     for inv in inventory_list:
-        available = max(0, (inv.allocated_quantity or 0) - (inv.buffer_quantity or 0) - (inv.reserved_quantity or 0))
+        level = levels[cells[inv.id]]
+        available = max(0, level["allocated_quantity"] - (inv.buffer_quantity or 0) - level["reserved_quantity"])
         inv.marketplace_quantity = available
         inv.last_synced_at = datetime.now(timezone.utc)
         synced_count += 1
@@ -1949,12 +1956,13 @@ async def trigger_channel_replenishment(
 @router.post("/inventory/run-auto-replenish-job")
 async def run_auto_replenish_job_endpoint(
     db: DB,
+    dry_run: bool = Query(False, description="Return the replenishment plan without applying it"),
     current_user: User = Depends(get_current_user),
 ):
     """Manually trigger the auto-replenish job for all channels."""
     from app.jobs.auto_replenish import run_auto_replenish_job
 
-    result = await run_auto_replenish_job(db)
+    result = await run_auto_replenish_job(db, dry_run=dry_run)
 
     return result
 
@@ -1446,7 +1446,9 @@ async def _handle_inventory_level_changed_event(db: DB, data: dict) -> None:
     Payload:
       skuCode, warehouseCode, quantity, reservedQty, availableQty, reason, timestamp
     """
-    from app.models.inventory import InventorySummary, StockMovement
+    from app.models.inventory import StockMovement
+    from app.services.inventory_service import InventoryService
+    from app.services.inventory_ledger import InventoryLedgerService
     from app.models.product import Product
     from app.models.warehouse import Warehouse
 
@@ -1484,52 +1486,23 @@ async def _handle_inventory_level_changed_event(db: DB, data: dict) -> None:
         logger.warning("inventory.level_changed: warehouse %s not found in ERP", warehouse_code)
         return
 
-    # Upsert inventory_summary
-    result = await db.execute(
-        select(InventorySummary).where(
-            InventorySummary.product_id == product_id,
-            InventorySummary.warehouse_id == warehouse_id,
-            InventorySummary.variant_id.is_(None),
-        )
+    # Bring inventory_summary to the OMS quantities through the ledger
+    entry = await InventoryLedgerService(db).set_levels(
+        (warehouse_id, product_id, None, None),
+        source="cjdquick_webhook",
+        reference_number=f"CJDQ-{reason}",
+        total_quantity=on_hand,
+        available_quantity=available,
+        reserved_quantity=reserved,
     )
-    summary = result.scalar_one_or_none()
-
-    old_qty = 0
-    if summary:
-        old_qty = summary.total_quantity or 0
-        summary.total_quantity = on_hand
-        summary.available_quantity = available
-        summary.reserved_quantity = reserved
-        summary.last_stock_in_date = datetime.now(timezone.utc)
-    else:
-        summary = InventorySummary(
-            warehouse_id=warehouse_id,
-            product_id=product_id,
-            variant_id=None,
-            total_quantity=on_hand,
-            available_quantity=available,
-            reserved_quantity=reserved,
-            allocated_quantity=0,
-            damaged_quantity=0,
-            in_transit_quantity=0,
-            last_stock_in_date=datetime.now(timezone.utc),
-        )
-        db.add(summary)
 
     # Create stock movement if quantity changed
-    qty_diff = on_hand - old_qty
+    qty_diff = entry.total_delta if entry else 0
+    old_qty = on_hand - qty_diff
     if qty_diff != 0:
-        from sqlalchemy import func as sa_func
-
         now = datetime.now(timezone.utc)
         date_prefix = now.strftime("%Y%m%d")
-        count_result = await db.execute(
-            select(sa_func.count(StockMovement.id)).where(
-                StockMovement.movement_number.like(f"MOV-{date_prefix}-%")
-            )
-        )
-        count = count_result.scalar() or 0
-        movement_number = f"MOV-{date_prefix}-{count + 1:04d}"
+        movement_number = await InventoryService(db)._generate_movement_number()
 
         movement = StockMovement(
             movement_number=movement_number,
@@ -10,7 +10,7 @@ Provides AI-powered intelligence for the Dealer Management System:
 - POST /dms-ai/chat                 — natural language DMS queries
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -31,14 +31,19 @@ class ChatRequest(BaseModel):
 
 
 @router.get("/command-center", summary="DMS Command Centre — all agents")
-async def get_dms_command_center(db: AsyncSession = Depends(get_db)):
+async def get_dms_command_center(
+    refresh: bool = Query(False, description="Recompute all agents instead of using cached snapshots"),
+):
     """
     Run all 4 DMS AI agents in parallel and return a unified command centre view.
 
     Includes dealer performance, demand sensing, scheme effectiveness,
     and collection optimizer results along with aggregated alerts.
+
+    Served from agent snapshots refreshed in the background; `refreshed_at`
+    gives each agent's snapshot time and `data_as_of` the oldest of them.
     """
-    return await DMSCommandCenterAgent(db).run()
+    return await DMSCommandCenterAgent().run(use_cache=not refresh)
 
 
 @router.get("/dealer-performance", summary="DMS Dealer Performance Agent")
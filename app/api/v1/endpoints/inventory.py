@@ -20,6 +20,7 @@ from app.schemas.inventory import (
     InventorySummaryResponse,
     InventorySummaryDetail,
     InventorySummaryListResponse,
+    StockAsOfResponse,
     InventoryThresholdUpdate,
     StockMovementResponse,
     StockMovementDetail,
@@ -34,6 +35,7 @@ from app.schemas.inventory import (
     BulkStockVerificationResponse,
 )
 from app.services.inventory_service import InventoryService
+from app.services.inventory_ledger import InventoryLedgerService
 from app.services.audit_service import AuditService
 
 
@@ -717,7 +719,7 @@ async def bulk_receive_stock(
     """
     service = InventoryService(db)
 
-    items = await service.bulk_receive_stock(
+    items_count = await service.bulk_receive_stock(
         warehouse_id=data.warehouse_id,
         grn_number=data.grn_number,
         items=[item.model_dump() for item in data.items],
@@ -729,15 +731,15 @@ async def bulk_receive_stock(
     await AuditService(db).log(
         action="BULK_RECEIVE", entity_type="StockItem", entity_id=data.warehouse_id,
         user_id=current_user.id,
-        new_values={"grn_number": data.grn_number, "items_count": len(items), "warehouse_id": str(data.warehouse_id)},
-        description=f"Bulk received {len(items)} stock items (GRN: {data.grn_number})",
+        new_values={"grn_number": data.grn_number, "items_count": items_count, "warehouse_id": str(data.warehouse_id)},
+        description=f"Bulk received {items_count} stock items (GRN: {data.grn_number})",
     )
     await db.commit()
 
     return BulkStockReceiptResponse(
-        message=f"Successfully received {len(items)} stock items",
+        message=f"Successfully received {items_count} stock items",
         grn_number=data.grn_number,
-        items_count=len(items),
+        items_count=items_count,
     )
 
 
@@ -873,6 +875,37 @@ async def get_inventory_summary(
     )
 
 
+@router.get(
+    "/summary/as-of",
+    response_model=StockAsOfResponse,
+    dependencies=[Depends(require_permissions("inventory:view"))]
+)
+async def get_stock_as_of(
+    db: DB,
+    warehouse_id: uuid.UUID = Query(...),
+    product_id: uuid.UUID = Query(...),
+    variant_id: Optional[uuid.UUID] = Query(None),
+    as_of: datetime = Query(..., description="Point in time (ISO 8601)"),
+):
+    """
+    Get stock quantities of a product in a warehouse as of a point in time,
+    replayed from the inventory ledger.
+    Requires: inventory:view permission
+    """
+    if as_of.tzinfo is None:
+        as_of = as_of.replace(tzinfo=timezone.utc)
+    levels = await InventoryLedgerService(db).stock_as_of(
+        warehouse_id, product_id, as_of, variant_id=variant_id,
+    )
+    return StockAsOfResponse(
+        warehouse_id=warehouse_id,
+        product_id=product_id,
+        variant_id=variant_id,
+        as_of=as_of,
+        **levels,
+    )
+
+
 @router.get(
     "/low-stock",
     response_model=InventorySummaryListResponse,
@@ -1423,7 +1456,17 @@ async def approve_physical_count(
                 db.add(movement)
                 movements_created += 1
 
-                # Update InventorySummary
+                # Update InventorySummary through the inventory ledger
+                InventoryLedgerService(db).record(
+                    count.warehouse_id,
+                    item.product_id,
+                    source="physical_count",
+                    variant_id=item.variant_id,
+                    total=item.variance,
+                    available=item.variance,
+                    reference_id=count.id,
+                    reference_number=count.count_number,
+                )
                 inv_query = select(InventorySummary).where(
                     and_(
                         InventorySummary.warehouse_id == count.warehouse_id,
@@ -1433,8 +1476,6 @@ async def approve_physical_count(
                 inv_result = await db.execute(inv_query)
                 inv_summary = inv_result.scalars().first()
                 if inv_summary:
-                    inv_summary.total_quantity = (inv_summary.total_quantity or 0) + item.variance
-                    inv_summary.available_quantity = (inv_summary.available_quantity or 0) + item.variance
                     inv_summary.last_audit_date = datetime.now(timezone.utc)
 
     # Update count
@@ -1462,7 +1503,6 @@ async def approve_physical_count(
 # ==================== ATP - Available to Promise (SAP CO09) ====================
 
 from app.models.purchase import PurchaseOrder, PurchaseOrderItem
-from app.models.product import Product
 
 
 class ATPWarehouseDetail(BaseModel):
@@ -0,0 +1,33 @@
+"""Background Jobs API endpoints (scheduler status and run history)."""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import DB, require_role_level
+from app.models.role import RoleLevel
+from app.jobs.job_runs import get_job_runs
+from app.jobs.scheduler import get_scheduler_overview
+
+router = APIRouter(dependencies=[Depends(require_role_level(RoleLevel.SUPER_ADMIN))])
+
+
+@router.get("")
+async def list_jobs(db: DB):
+    """
+    Scheduled jobs with next run time and last run.
+
+    Also reports the scheduler mode, job store and whether the process
+    answering holds scheduler leadership.
+    """
+    return await get_scheduler_overview(db)
+
+
+@router.get("/runs")
+async def list_job_runs(
+    db: DB,
+    job_id: Optional[str] = None,
+    status: Optional[str] = Query(None, description="RUNNING, SUCCESS, FAILED, SKIPPED"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Job run history (newest first): host, duration, rows processed and errors."""
+    return {"items": await get_job_runs(db, job_id=job_id, status=status, limit=limit)}
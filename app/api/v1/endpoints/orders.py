@@ -951,7 +951,8 @@ async def create_d2c_order(
         # ── ORDER CONFIRMATION EMAIL ────────────────────────────────────────
         # Send immediately after order creation — best practice (Amazon/Flipkart
         # send within 30 seconds of order placement).
-        # Non-blocking: any email failure must NOT fail the order response.
+        # Queued in the email outbox on this request's session and committed
+        # here; any email failure must NOT fail the order response.
         if data.customer_email:
             try:
                 from app.services.email_service import send_order_notifications
@@ -973,8 +974,7 @@ async def create_d2c_order(
                     for oi in order_items_with_products
                 ]
 
-                import asyncio as _asyncio
-                _asyncio.ensure_future(send_order_notifications(
+                await send_order_notifications(
                     order_number=order_number,
                     customer_email=data.customer_email,
                     customer_phone=data.customer_phone,
@@ -990,7 +990,9 @@ async def create_d2c_order(
                     },
                     payment_method=data.payment_method.upper(),
                     expected_delivery="5-7 business days",
-                ))
+                    db=db,
+                )
+                await db.commit()
             except Exception as email_err:
                 import logging as _log
                 _log.warning(f"D2C order {order_number}: email notification error — {email_err}")
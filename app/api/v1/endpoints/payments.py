@@ -501,7 +501,7 @@ async def _handle_payment_captured(db: DB, payload: dict):
         )
         items = [dict(row._mapping) for row in items_result.fetchall()]
 
-        # Send notifications asynchronously (don't block webhook response)
+        # Queue notification email with the payment update (committed below)
         if order_data:
             try:
                 from decimal import Decimal
@@ -519,7 +519,8 @@ async def _handle_payment_captured(db: DB, payload: dict):
                     total_amount=Decimal(str(order_data.total_amount)),
                     items=items,
                     shipping_address=shipping_address,
-                    payment_method=order_data.payment_method or "Online Payment"
+                    payment_method=order_data.payment_method or "Online Payment",
+                    db=db
                 )
                 logger.info(f"Notifications sent for order {order_data.order_number}")
             except Exception as e:
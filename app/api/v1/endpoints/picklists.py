@@ -1,5 +1,5 @@
 """Picklist API endpoints for warehouse picking operations."""
-from typing import Optional
+from typing import List, Optional
 import uuid
 from math import ceil
 from datetime import datetime, timezone
@@ -12,8 +12,6 @@ from app.api.deps import DB, CurrentUser, require_permissions
 from app.models.picklist import Picklist, PicklistItem, PicklistStatus, PicklistType
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.warehouse import Warehouse
-from app.models.inventory import StockItem
-from app.models.wms import WarehouseBin
 from app.schemas.picklist import (
     PicklistGenerateRequest,
     PicklistCreate,
@@ -30,20 +28,13 @@ from app.schemas.picklist import (
     PickCompleteRequest,
     PickCompleteResponse,
 )
+from app.services.picklist_service import PicklistService
+from app.services.wave_planning_service import WavePlanningService
 
 
 router = APIRouter()
 
 
-def generate_picklist_number() -> str:
-    """Generate unique picklist number."""
-    from datetime import datetime, timezone
-    import random
-    date_str = datetime.now().strftime("%Y%m%d")
-    random_suffix = random.randint(1000, 9999)
-    return f"PL-{date_str}-{random_suffix}"
-
-
 # ==================== PICKLIST CRUD ====================
 
 @router.get(
@@ -149,105 +140,65 @@ async def generate_picklist(
 ):
     """
     Generate picklist from orders.
-    Collects all items from selected orders and creates picking tasks.
+    Collects all items from selected orders and creates picking tasks,
+    one stop per bin, sequenced along the warehouse walking route.
     """
-    # Verify warehouse exists
-    wh_query = select(Warehouse).where(Warehouse.id == data.warehouse_id)
-    wh_result = await db.execute(wh_query)
-    if not wh_result.scalar_one_or_none():
+    await _get_warehouse_or_404(db, data.warehouse_id)
+
+    try:
+        picklist = await PicklistService(db).generate_picklist(data, created_by=current_user.id)
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Warehouse not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
 
-    # Get orders
-    orders_query = select(Order).where(
-        and_(
-            Order.id.in_(data.order_ids),
-            Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.ALLOCATED]),
-        )
-    ).options(selectinload(Order.items))
+    return await _picklist_detail(db, picklist.id)
 
-    orders_result = await db.execute(orders_query)
-    orders = orders_result.scalars().all()
 
-    if not orders:
+@router.post(
+    "/generate/by-zone",
+    response_model=List[PicklistDetailResponse],
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(require_permissions("orders:create"))]
+)
+async def generate_zone_picklists(
+    data: PicklistGenerateRequest,
+    db: DB,
+    current_user: CurrentUser,
+):
+    """
+    Generate one picklist per warehouse zone from orders.
+    Each zone's picks get their own route so zones can be picked in parallel.
+    """
+    await _get_warehouse_or_404(db, data.warehouse_id)
+
+    try:
+        picklists = await PicklistService(db).generate_zone_picklists(data, created_by=current_user.id)
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No valid orders found for picklist generation"
+            detail=str(e)
         )
 
-    # Create picklist
-    picklist = Picklist(
-        picklist_number=generate_picklist_number(),
-        warehouse_id=data.warehouse_id,
-        status=PicklistStatus.PENDING,
-        picklist_type=data.picklist_type,
-        priority=data.priority,
-        total_orders=len(orders),
-        notes=data.notes,
-        created_by=current_user.id,
-    )
+    return [await _picklist_detail(db, picklist.id) for picklist in picklists]
 
-    db.add(picklist)
-    await db.flush()
-
-    # Create picklist items from order items
-    total_items = 0
-    total_quantity = 0
-    pick_sequence = 0
-
-    for order in orders:
-        for item in order.items:
-            # Find bin location for product
-            bin_query = (
-                select(WarehouseBin)
-                .join(StockItem, StockItem.bin_id == WarehouseBin.id)
-                .where(
-                    and_(
-                        StockItem.product_id == item.product_id,
-                        StockItem.warehouse_id == data.warehouse_id,
-                        WarehouseBin.is_pickable == True,
-                    )
-                )
-                .order_by(WarehouseBin.pick_sequence.asc())
-            )
-            bin_result = await db.execute(bin_query)
-            bin_location = bin_result.scalar_one_or_none()
-
-            picklist_item = PicklistItem(
-                picklist_id=picklist.id,
-                order_id=order.id,
-                order_item_id=item.id,
-                product_id=item.product_id,
-                variant_id=item.variant_id,
-                sku=item.product_sku,
-                product_name=item.product_name,
-                variant_name=item.variant_name,
-                bin_id=bin_location.id if bin_location else None,
-                bin_location=bin_location.bin_code if bin_location else None,
-                quantity_required=item.quantity,
-                pick_sequence=pick_sequence,
-            )
-            db.add(picklist_item)
-
-            total_items += 1
-            total_quantity += item.quantity
-            pick_sequence += 1
-
-        # Update order status
-        order.status = OrderStatus.PICKLIST_CREATED.value
-
-    picklist.total_items = total_items
-    picklist.total_quantity = total_quantity
 
-    await db.commit()
-    await db.refresh(picklist)
+async def _get_warehouse_or_404(db, warehouse_id: uuid.UUID) -> Warehouse:
+    wh_result = await db.execute(select(Warehouse).where(Warehouse.id == warehouse_id))
+    warehouse = wh_result.scalar_one_or_none()
+    if not warehouse:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Warehouse not found"
+        )
+    return warehouse
+
 
-    # Get full picklist with items
+async def _picklist_detail(db, picklist_id: uuid.UUID) -> PicklistDetailResponse:
     query = (
         select(Picklist)
-        .where(Picklist.id == picklist.id)
+        .where(Picklist.id == picklist_id)
         .options(selectinload(Picklist.items))
     )
     result = await db.execute(query)
@@ -603,6 +554,9 @@ async def complete_picklist(
         if order:
             order.status = OrderStatus.PICKED.value
 
+    if picklist.wave_id:
+        await WavePlanningService(db).settle_picklist(picklist, current_user.id)
+
     await db.commit()
     await db.refresh(picklist)
 
@@ -649,6 +603,9 @@ async def cancel_picklist(
     picklist.cancelled_at = datetime.now(timezone.utc)
     picklist.cancellation_reason = reason
 
+    if picklist.wave_id:
+        await WavePlanningService(db).settle_picklist(picklist, current_user.id)
+
     await db.commit()
     await db.refresh(picklist)
 
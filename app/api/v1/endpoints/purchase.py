@@ -22,7 +22,7 @@ from app.models.purchase import (
     RestockDecision, PickupStatus, ResolutionType,
 )
 from app.models.vendor import Vendor, VendorLedger, VendorTransactionType
-from app.models.inventory import StockItem, StockItemStatus, InventorySummary, StockMovement, StockMovementType
+from app.models.inventory import StockItem, StockItemStatus, StockMovement, StockMovementType
 from app.models.product import Product
 from app.models.warehouse import Warehouse
 from app.models.user import User
@@ -62,6 +62,7 @@ from app.schemas.purchase import (
 )
 from app.api.deps import DB, CurrentUser, get_current_user, require_permissions, Permissions
 from app.services.audit_service import AuditService
+from app.services.inventory_ledger import InventoryLedgerService
 from app.services.po_state_machine import (
     POStatus as POStat,  # Use alias to avoid conflict with model enum
     can_submit, can_approve, can_reject, can_send_to_vendor,
@@ -70,6 +71,7 @@ from app.services.po_state_machine import (
 )
 from app.services.approval_service import ApprovalService
 from app.services.document_sequence_service import DocumentSequenceService
+from app.services.serialization import PO_SERIAL_COUNT_SQL
 from app.models.approval import ApprovalEntityType
 
 router = APIRouter()
@@ -2335,7 +2337,7 @@ async def approve_purchase_order(
 
             # Check if serials already exist (using fresh transaction)
             existing_serials = await db.execute(
-                text("SELECT COUNT(*) FROM po_serials WHERE po_id = :po_id"),
+                text(PO_SERIAL_COUNT_SQL),
                 {"po_id": po_data_for_serials["po_id"]}
             )
             existing_count = existing_serials.scalar() or 0
@@ -2852,7 +2854,7 @@ async def send_po_to_vendor(
 
     # Check if serials already exist for this PO - use raw SQL for VARCHAR/UUID mismatch
     existing_serials = await db.execute(
-        text("SELECT COUNT(*) FROM po_serials WHERE po_id = :po_id"),
+        text(PO_SERIAL_COUNT_SQL),
         {"po_id": str(po.id)}
     )
     existing_count = existing_serials.scalar() or 0
@@ -2962,7 +2964,7 @@ async def send_po_to_vendor(
                 # Generate PO HTML document (adapted from scripts/generate_po_pdf.py)
                 po_html_bytes = _generate_po_html(po, vendor)
 
-                email_service = get_email_service()
+                email_service = get_email_service(db)
                 po_date_str = po.po_date.strftime('%d-%b-%Y') if po.po_date else 'N/A'
                 delivery_date_str = po.expected_delivery_date.strftime('%d-%b-%Y') if po.expected_delivery_date else 'N/A'
                 contact = vendor.contact_person if vendor else None
@@ -3782,29 +3784,18 @@ async def process_grn_putaway(
                 )
                 db.add(stock_item)
 
-            # Update inventory summary
-            summary_result = await db.execute(
-                select(InventorySummary).where(
-                    and_(
-                        InventorySummary.product_id == item.product_id,
-                        InventorySummary.warehouse_id == grn.warehouse_id,
-                    )
-                )
+            # Update inventory summary through the inventory ledger
+            InventoryLedgerService(db).record(
+                grn.warehouse_id,
+                item.product_id,
+                source="grn",
+                variant_id=item.variant_id,
+                total=item.quantity_accepted,
+                available=item.quantity_accepted,
+                value=item.quantity_accepted * float(item.unit_price or 0),
+                reference_id=grn.id,
+                reference_number=grn.grn_number,
             )
-            summary = summary_result.scalar_one_or_none()
-
-            if summary:
-                summary.total_quantity += item.quantity_accepted
-                summary.available_quantity += item.quantity_accepted
-            else:
-                summary = InventorySummary(
-                    product_id=item.product_id,
-                    variant_id=item.variant_id,
-                    warehouse_id=grn.warehouse_id,
-                    total_quantity=item.quantity_accepted,
-                    available_quantity=item.quantity_accepted,
-                )
-                db.add(summary)
 
             # Create stock movement record
             movement = StockMovement(
@@ -4759,6 +4750,10 @@ async def fix_and_test_po(
         text("DELETE FROM po_serials WHERE po_id = :po_id"),
         {"po_id": str(po.id)}
     )
+    await db.execute(
+        text("DELETE FROM po_serial_ranges WHERE po_id = :po_id"),
+        {"po_id": str(po.id)}
+    )
     steps.append({"step": 2, "action": "Deleted existing serials", "result": "Done"})
 
     # Step 3: Reset to DRAFT then APPROVE
@@ -4848,18 +4843,15 @@ async def fix_and_test_po(
 
     # Step 7: Verify serials in database
     verify_result = await db.execute(
-        text("SELECT COUNT(*) FROM po_serials WHERE po_id = :po_id"),
+        text(PO_SERIAL_COUNT_SQL),
         {"po_id": str(po.id)}
     )
     final_count = verify_result.scalar() or 0
     steps.append({"step": 7, "action": "Verified serials in DB", "result": f"{final_count} serials"})
 
     # Step 8: Get sample barcodes
-    sample_result = await db.execute(
-        text("SELECT barcode, model_code FROM po_serials WHERE po_id = :po_id LIMIT 5"),
-        {"po_id": str(po.id)}
-    )
-    samples = [{"barcode": r[0], "model_code": r[1]} for r in sample_result.all()]
+    sample_serials = await SerializationService(db).get_serials_by_po(str(po.id), limit=5)
+    samples = [{"barcode": sr.barcode, "model_code": sr.model_code} for sr in sample_serials]
     steps.append({"step": 8, "action": "Sample barcodes", "result": samples})
 
     return {
@@ -4901,17 +4893,18 @@ async def verify_serials(po_id: UUID, db: DB):
 
     # Count serials
     count_result = await db.execute(
-        text("SELECT COUNT(*) FROM po_serials WHERE po_id = :po_id"),
+        text(PO_SERIAL_COUNT_SQL),
         {"po_id": str(po.id)}
     )
     count = count_result.scalar() or 0
 
     # Get sample barcodes
-    samples_result = await db.execute(
-        text("SELECT barcode, model_code, supplier_code FROM po_serials WHERE po_id = :po_id ORDER BY serial_number LIMIT 10"),
-        {"po_id": str(po.id)}
-    )
-    samples = [{"barcode": r[0], "model_code": r[1], "supplier_code": r[2]} for r in samples_result.all()]
+    from app.services.serialization import SerializationService
+    sample_serials = await SerializationService(db).get_serials_by_po(str(po.id), limit=10)
+    samples = [
+        {"barcode": sr.barcode, "model_code": sr.model_code, "supplier_code": sr.supplier_code}
+        for sr in sample_serials
+    ]
 
     return {
         "po_number": po.po_number,
@@ -4946,6 +4939,10 @@ async def reset_po_to_draft(
         text("DELETE FROM po_serials WHERE po_id = :po_id"),
         {"po_id": str(po.id)}
     )
+    await db.execute(
+        text("DELETE FROM po_serial_ranges WHERE po_id = :po_id"),
+        {"po_id": str(po.id)}
+    )
 
     # Reset PO to DRAFT
     po.status = POStatus.DRAFT.value
@@ -4993,7 +4990,7 @@ async def manually_generate_serials(
 
     # Check if serials already exist (po_serials.po_id is VARCHAR)
     existing_result = await db.execute(
-        text("SELECT COUNT(*) FROM po_serials WHERE po_id = :po_id"),
+        text(PO_SERIAL_COUNT_SQL),
         {"po_id": str(po.id)}
     )
     existing_count = existing_result.scalar() or 0
@@ -5107,7 +5104,7 @@ async def diagnose_po_serials(
 
     # Check serials
     serials_result = await db.execute(
-        text("SELECT COUNT(*) as count FROM po_serials WHERE po_id = :po_id"),
+        text(PO_SERIAL_COUNT_SQL),
         {"po_id": str(po.id)}
     )
     serial_count = serials_result.scalar() or 0
@@ -5115,11 +5112,11 @@ async def diagnose_po_serials(
     # Get sample serials if any
     sample_serials = []
     if serial_count > 0:
-        sample_result = await db.execute(
-            text("SELECT barcode, model_code, item_type FROM po_serials WHERE po_id = :po_id LIMIT 5"),
-            {"po_id": str(po.id)}
-        )
-        sample_serials = [{"barcode": r[0], "model_code": r[1], "item_type": r[2]} for r in sample_result.all()]
+        from app.services.serialization import SerializationService
+        sample_serials = [
+            {"barcode": sr.barcode, "model_code": sr.model_code, "item_type": sr.item_type}
+            for sr in await SerializationService(db).get_serials_by_po(str(po.id), limit=5)
+        ]
 
     # Check supplier code for vendor
     supplier_code_info = None
@@ -5209,11 +5206,21 @@ async def download_purchase_order(
         logging.info(f"PDF DOWNLOAD: Fetching serials for PO {po.po_number} (id={po.id})")
         serials_result = await db.execute(
             text("""
-                SELECT model_code, item_type, product_sku, count(id) as quantity,
-                       min(serial_number) as start_serial, max(serial_number) as end_serial,
-                       min(barcode) as start_barcode, max(barcode) as end_barcode
-                FROM po_serials
-                WHERE po_id = :po_id
+                SELECT model_code, item_type, product_sku, sum(quantity) as quantity,
+                       min(start_serial) as start_serial, max(end_serial) as end_serial,
+                       min(start_barcode) as start_barcode, max(end_barcode) as end_barcode
+                FROM (
+                    SELECT model_code, item_type, product_sku, 1 as quantity,
+                           serial_number as start_serial, serial_number as end_serial,
+                           barcode as start_barcode, barcode as end_barcode
+                    FROM po_serials
+                    WHERE po_id = :po_id AND range_id IS NULL
+                    UNION ALL
+                    SELECT model_code, item_type, product_sku, quantity,
+                           start_serial, end_serial, start_barcode, end_barcode
+                    FROM po_serial_ranges
+                    WHERE po_id = :po_id
+                ) serials
                 GROUP BY model_code, item_type, product_sku
                 ORDER BY model_code
             """),
@@ -8180,29 +8187,17 @@ async def process_srn_putaway(
                     )
                     db.add(stock_item)
 
-                # Update inventory summary
-                summary_result = await db.execute(
-                    select(InventorySummary).where(
-                        and_(
-                            InventorySummary.product_id == item.product_id,
-                            InventorySummary.warehouse_id == srn.warehouse_id,
-                        )
-                    )
+                # Update inventory summary through the inventory ledger
+                InventoryLedgerService(db).record(
+                    srn.warehouse_id,
+                    item.product_id,
+                    source="srn",
+                    variant_id=item.variant_id,
+                    total=item.quantity_accepted,
+                    available=item.quantity_accepted,
+                    reference_id=srn.id,
+                    reference_number=srn.srn_number,
                 )
-                summary = summary_result.scalar_one_or_none()
-
-                if summary:
-                    summary.total_quantity += item.quantity_accepted
-                    summary.available_quantity += item.quantity_accepted
-                else:
-                    summary = InventorySummary(
-                        product_id=item.product_id,
-                        variant_id=item.variant_id,
-                        warehouse_id=srn.warehouse_id,
-                        total_quantity=item.quantity_accepted,
-                        available_quantity=item.quantity_accepted,
-                    )
-                    db.add(summary)
 
             # Create stock movement record for all accepted items
             movement = StockMovement(
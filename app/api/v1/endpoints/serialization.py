@@ -9,17 +9,21 @@ Endpoints for:
 - Exporting serials as CSV
 """
 
+import asyncio
+import json
 from datetime import datetime, timezone
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, String, and_
+from sqlalchemy import select, func
 
-from app.api.deps import get_db, get_current_user, Permissions
+from app.api.deps import get_db, get_current_user, get_websocket_user, Permissions
+from app.config import settings
+from app.database import async_session_factory
 from app.models.user import User
 from app.models.serialization import (
     SerialSequence,
-    POSerial,
     ModelCodeReference,
     SupplierCode,
     SerialStatus,
@@ -563,44 +567,19 @@ async def list_all_serials(
     """
     List all serial numbers with pagination and filtering.
 
-    This endpoint lists all po_serials (generated barcodes) across all POs.
+    This endpoint lists all generated barcodes (po_serials rows and
+    po_serial_ranges units) across all POs.
     Use this for the Serial Numbers tab in Serialization section.
     """
-    # Build query
-    query = select(POSerial)
-    count_query = select(func.count(POSerial.id))
-
-    # Apply filters
-    filters = []
-
-    if item_type:
-        filters.append(POSerial.item_type == item_type.upper())
-
-    if status:
-        filters.append(func.upper(POSerial.status) == status.upper())
-
-    if search:
-        search_filter = f"%{search}%"
-        filters.append(
-            (POSerial.barcode.ilike(search_filter)) |
-            (POSerial.serial_number.cast(String).ilike(search_filter))
-        )
-
-    if filters:
-        query = query.where(and_(*filters))
-        count_query = count_query.where(and_(*filters))
-
-    # Get total count
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-
-    # Apply pagination and ordering
+    service = SerializationService(db)
     offset = (page - 1) * size
-    query = query.order_by(POSerial.created_at.desc()).offset(offset).limit(size)
-
-    # Execute query
-    result = await db.execute(query)
-    serials = result.scalars().all()
+    total, serials = await service.list_serials(
+        item_type=item_type,
+        status=status,
+        search=search,
+        offset=offset,
+        limit=size,
+    )
 
     # Calculate pages
     pages = (total + size - 1) // size if total > 0 else 0
@@ -647,30 +626,41 @@ async def export_po_serials(
     """
     Export serials for a PO as CSV/TXT file.
 
-    This can be sent to the vendor for barcode printing.
+    This can be sent to the vendor for barcode printing. The file is
+    streamed in batches from its own session, so large POs are never held
+    in memory.
     """
     service = SerializationService(db)
-    serials = await service.get_serials_by_po(po_id, limit=100000)
+    counts = await service.get_serials_count_by_po(po_id)
 
-    if not serials:
+    if not counts.get("total"):
         raise HTTPException(status_code=404, detail="No serials found for this PO")
 
     if format == "csv":
-        # Generate CSV
-        lines = ["Barcode,Model,Serial,Status"]
-        for s in serials:
-            lines.append(f"{s.barcode},{s.model_code},{s.serial_number},{s.status}")
-        content = "\n".join(lines)
         media_type = "text/csv"
         filename = f"serials_{po_id}.csv"
     else:
-        # Generate plain text (one barcode per line)
-        content = "\n".join([s.barcode for s in serials])
         media_type = "text/plain"
         filename = f"serials_{po_id}.txt"
 
-    return Response(
-        content=content,
+    async def content():
+        async with async_session_factory() as session:
+            first = True
+            if format == "csv":
+                # Generate CSV
+                yield "Barcode,Model,Serial,Status"
+                first = False
+            async for batch in SerializationService(session).iter_po_serial_values(po_id):
+                if format == "csv":
+                    lines = [f"{barcode},{model},{serial},{status}" for barcode, model, serial, status in batch]
+                else:
+                    # Generate plain text (one barcode per line)
+                    lines = [barcode for barcode, _, _, _ in batch]
+                yield ("" if first else "\n") + "\n".join(lines)
+                first = False
+
+    return StreamingResponse(
+        content(),
         media_type=media_type,
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -723,6 +713,7 @@ async def bulk_scan_serials(
         barcodes=data.barcodes,
         grn_id=data.grn_id,
         user_id=current_user.id,
+        grn_item_id=data.grn_item_id,
     )
 
     valid_count = sum(1 for r in results if r.is_valid)
@@ -736,6 +727,94 @@ async def bulk_scan_serials(
     )
 
 
+def _scan_stream_message(message: str) -> Tuple[List[str], bool, Optional[str]]:
+    """(barcodes, flush requested, error) from a scan stream message."""
+    message = message.strip()
+    if not message.startswith(("{", "[")):
+        # Plain text: one or more barcodes separated by whitespace/newlines
+        return message.split(), False, None
+    try:
+        payload = json.loads(message)
+    except ValueError:
+        return [], False, "Invalid JSON message"
+    if not isinstance(payload, dict):
+        return [], False, "JSON message must be an object"
+    barcodes = payload.get("barcodes") or ([payload["barcode"]] if payload.get("barcode") else [])
+    if not isinstance(barcodes, list):
+        return [], False, '"barcodes" must be a list'
+    return [str(barcode) for barcode in barcodes], payload.get("action") == "flush", None
+
+
+@router.websocket("/scan/stream")
+async def scan_serial_stream(
+    websocket: WebSocket,
+    grn_id: str,
+    grn_item_id: Optional[str] = None,
+):
+    """
+    Continuous GRN scanning for handheld scanners.
+
+    Connect with ?grn_id=...&token=<access token>. Send barcodes as text
+    (one or more per message) or JSON {"barcodes": [...]} / {"barcode": ...};
+    {"action": "flush"} commits immediately; a malformed JSON message is
+    answered with {"type": "error", "detail": ...}. Scans are buffered and committed
+    through the bulk scan engine every SERIAL_SCAN_STREAM_BATCH_SIZE barcodes
+    or SERIAL_SCAN_STREAM_FLUSH_SECONDS after the last one; each commit is
+    answered with a BulkScanResponse ({"type": "results", ...}). Buffered
+    scans are still committed if the scanner disconnects.
+    """
+    async with async_session_factory() as db:
+        user = await get_websocket_user(websocket, db)
+    if user is None:
+        await websocket.close(code=1008)  # policy violation
+        return
+    await websocket.accept()
+
+    pending: List[str] = []
+
+    async def flush(reply: bool = True):
+        if not pending:
+            return
+        batch = pending[:]
+        pending.clear()
+        # Fresh session per batch: no connection is held while the scanner is idle
+        async with async_session_factory() as db:
+            results = await SerializationService(db).bulk_scan_serials(
+                barcodes=batch,
+                grn_id=grn_id,
+                user_id=user.id,
+                grn_item_id=grn_item_id,
+            )
+        if reply:
+            valid_count = sum(1 for r in results if r.is_valid)
+            response = BulkScanResponse(
+                grn_id=grn_id,
+                total_scanned=len(results),
+                valid_count=valid_count,
+                invalid_count=len(results) - valid_count,
+                results=results,
+            )
+            await websocket.send_json({"type": "results", **response.model_dump(mode="json")})
+
+    try:
+        while True:
+            timeout = settings.SERIAL_SCAN_STREAM_FLUSH_SECONDS if pending else None
+            try:
+                message = await asyncio.wait_for(websocket.receive_text(), timeout)
+            except asyncio.TimeoutError:
+                await flush()
+                continue
+            barcodes, flush_now, error = _scan_stream_message(message)
+            if error:
+                await websocket.send_json({"type": "error", "detail": error})
+                continue
+            pending.extend(barcodes)
+            if flush_now or len(pending) >= settings.SERIAL_SCAN_STREAM_BATCH_SIZE:
+                await flush()
+    except WebSocketDisconnect:
+        await flush(reply=False)
+
+
 # ==================== Serial Lookup ====================
 
 @router.get("/lookup/{barcode}", response_model=SerialLookupResponse)
@@ -893,17 +972,12 @@ async def serialization_dashboard(
 ):
     """Get serialization dashboard stats"""
 
-    # Total serials by status
-    status_result = await db.execute(
-        select(
-            POSerial.status,
-            func.count(POSerial.id).label("count")
-        ).group_by(POSerial.status)
-    )
-    status_counts = {row.status: row.count for row in status_result}
+    # Total serials by status (ranges included)
+    service = SerializationService(db)
+    status_counts = await service.count_serials_by_status()
+    total_serials = status_counts.pop("total")
 
     # Total by month (current year)
-    service = SerializationService(db)
     current_year_code = service.get_year_code()
 
     monthly_result = await db.execute(
@@ -925,11 +999,8 @@ async def serialization_dashboard(
         select(func.count(ModelCodeReference.id)).where(ModelCodeReference.is_active == True)
     )
 
-    # Total serials
-    total_serials = await db.execute(select(func.count(POSerial.id)))
-
     return {
-        "total_serials": total_serials.scalar() or 0,
+        "total_serials": total_serials,
         "by_status": status_counts,
         "monthly_generation": monthly_totals,
         "active_supplier_codes": supplier_count.scalar() or 0,
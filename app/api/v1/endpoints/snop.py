@@ -159,6 +159,57 @@ async def generate_forecasts(
     }
 
 
+@router.post("/forecast/generate/batch", status_code=status.HTTP_202_ACCEPTED)
+async def generate_forecasts_batch(
+    request: DemandForecastGenerateRequest,
+    db: DB,
+    current_user: CurrentUser
+):
+    """
+    Generate SKU-level forecasts for many products as a background job.
+
+    Use for full-catalog runs: history is loaded in one query, models are
+    fitted in worker processes and forecasts are bulk-inserted.
+    Poll GET /forecast/jobs/{job_id} for progress.
+    """
+    snop_service = SNOPService(db)
+
+    try:
+        job = await snop_service.start_batch_forecast_job(
+            product_ids=request.product_ids,
+            category_ids=request.category_ids,
+            forecast_level=request.forecast_level,
+            granularity=request.granularity,
+            forecast_start_date=request.forecast_start_date,
+            forecast_horizon_days=request.forecast_horizon_days,
+            algorithm=request.algorithm,
+            lookback_days=request.lookback_days,
+            user_id=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return job
+
+
+@router.get("/forecast/jobs/{job_id}")
+async def get_forecast_job_status(
+    job_id: str,
+    db: DB,
+    current_user: CurrentUser
+):
+    """
+    Get progress of a batch forecast job.
+    """
+    snop_service = SNOPService(db)
+    job = await snop_service.get_batch_forecast_job(job_id)
+
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Forecast job not found")
+
+    return job
+
+
 @router.get("/forecasts")
 async def list_forecasts(
     db: DB,
@@ -531,6 +582,36 @@ async def calculate_inventory_optimization(
     }
 
 
+@router.get("/inventory/safety-stock/batch")
+async def get_safety_stock_recommendations_batch(
+    db: DB,
+    current_user: CurrentUser,
+    product_ids: Optional[List[UUID]] = Query(None),
+    warehouse_ids: Optional[List[UUID]] = Query(None),
+    service_level: float = Query(0.95, ge=0.8, le=0.99),
+    lead_time_days: int = Query(14, ge=1),
+    lookback_days: int = Query(365, ge=30, le=1095)
+):
+    """
+    Get demand statistics, safety stock and reorder points for every
+    product-warehouse combination with demand (optionally filtered).
+    """
+    demand_planner = DemandPlannerService(db)
+
+    results = await demand_planner.calculate_demand_statistics_batch(
+        product_ids=product_ids,
+        warehouse_ids=warehouse_ids,
+        lookback_days=lookback_days,
+        service_level=service_level,
+        lead_time_days=lead_time_days
+    )
+
+    return {
+        "total": len(results),
+        "items": results
+    }
+
+
 @router.get("/inventory/safety-stock/{product_id}/{warehouse_id}")
 async def get_safety_stock_recommendation(
     product_id: UUID,
@@ -18,6 +18,7 @@ from app.models.warehouse import Warehouse
 from app.models.product import Product
 from app.services.document_sequence_service import DocumentSequenceService
 from app.services.audit_service import AuditService
+from app.services.inventory_ledger import InventoryLedgerService
 
 router = APIRouter()
 
@@ -531,28 +532,31 @@ async def approve_adjustment(
             detail=f"Cannot approve adjustment in {adjustment.status} status"
         )
 
-    # Update inventory for each item
-    from app.models.inventory import Inventory
+    # Update inventory for each item through the inventory ledger
+    ledger = InventoryLedgerService(db)
+    cells = {
+        item.id: (adjustment.warehouse_id, item.product_id, item.variant_id, None)
+        for item in adjustment.items
+    }
+    levels = await ledger.levels(cells.values())
 
     for item in adjustment.items:
-        # Find inventory record
-        inv_query = select(Inventory).where(
-            and_(
-                Inventory.product_id == item.product_id,
-                Inventory.warehouse_id == adjustment.warehouse_id
-            )
+        cell = cells[item.id]
+        # Apply adjustment, never taking stock below zero
+        change = max(item.adjustment_quantity, -levels[cell]["total_quantity"])
+        if change == 0:
+            continue
+        ledger.record(
+            adjustment.warehouse_id,
+            item.product_id,
+            source="stock_adjustment",
+            variant_id=item.variant_id,
+            total=change,
+            available=change,
+            reference_id=adjustment.id,
+            reference_number=adjustment.adjustment_number,
         )
-        if item.variant_id:
-            inv_query = inv_query.where(Inventory.variant_id == item.variant_id)
-
-        inv_result = await db.execute(inv_query)
-        inventory = inv_result.scalar_one_or_none()
-
-        if inventory:
-            # Apply adjustment
-            inventory.quantity += item.adjustment_quantity
-            if inventory.quantity < 0:
-                inventory.quantity = 0
+        levels[cell]["total_quantity"] += change
 
     # Update adjustment status
     adjustment.status = "APPROVED"
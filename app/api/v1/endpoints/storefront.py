@@ -16,9 +16,9 @@ from app.models.company import Company
 from app.models.product import Product, ProductImage
 from app.models.category import Category
 from app.models.brand import Brand
-from app.models.inventory import InventorySummary
-from app.models.channel import ChannelInventory, SalesChannel, ChannelPricing
+from app.models.channel import SalesChannel, ChannelPricing
 from app.services.channel_inventory_service import ChannelInventoryService
+from app.services.inventory_ledger import InventoryLedgerService
 from app.schemas.storefront import (
     StorefrontProductImage,
     StorefrontProductVariant,
@@ -44,6 +44,24 @@ from app.services.serviceability_service import ServiceabilityService
 router = APIRouter()
 
 
+async def _shared_stock(db, product_ids) -> dict:
+    """Available quantity per product across all warehouses, including unfolded ledger entries."""
+    stock_map: dict = {}
+    for (_, product_id, _, _), level in (await InventoryLedgerService(db).product_levels(product_ids)).items():
+        stock_map[product_id] = stock_map.get(product_id, 0) + level["available_quantity"]
+    return stock_map
+
+
+async def _channel_stock(db, channel_id, product_ids) -> dict:
+    """Sellable quantity per product in a channel (allocated - buffer - reserved), including unfolded ledger entries."""
+    levels = await InventoryLedgerService(db).product_levels(product_ids, channel_id=channel_id)
+    stock_map: dict = {}
+    for (_, product_id, _, _), level in levels.items():
+        sellable = max(0, level["allocated_quantity"] - level["buffer_quantity"] - level["reserved_quantity"])
+        stock_map[product_id] = stock_map.get(product_id, 0) + sellable
+    return stock_map
+
+
 # ==================== Products Endpoints ====================
 
 @router.get("/products", response_model=PaginatedProductsResponse)
@@ -200,27 +218,7 @@ async def list_products(
     if d2c_channel and getattr(settings, 'CHANNEL_INVENTORY_ENABLED', True):
         # Use channel-specific inventory (new behavior)
         # Available = allocated - buffer - reserved
-        channel_stock_query = (
-            select(
-                ChannelInventory.product_id,
-                func.sum(
-                    func.greatest(
-                        0,
-                        func.coalesce(ChannelInventory.allocated_quantity, 0) -
-                        func.coalesce(ChannelInventory.buffer_quantity, 0) -
-                        func.coalesce(ChannelInventory.reserved_quantity, 0)
-                    )
-                ).label('total_available')
-            )
-            .where(
-                ChannelInventory.channel_id == d2c_channel.id,
-                ChannelInventory.product_id.in_(product_ids),
-                ChannelInventory.is_active == True,
-            )
-            .group_by(ChannelInventory.product_id)
-        )
-        channel_result = await db.execute(channel_stock_query)
-        stock_map = {row.product_id: row.total_available or 0 for row in channel_result.all()}
+        stock_map = await _channel_stock(db, d2c_channel.id, product_ids)
 
         # Fallback: For products NOT in channel inventory, use shared pool (InventorySummary)
         # This enables gradual migration - products without channel allocation use shared pool
@@ -228,29 +226,10 @@ async def list_products(
         products_without_channel_inv = [pid for pid in product_ids if pid not in products_with_channel_inv]
 
         if products_without_channel_inv:
-            fallback_query = (
-                select(
-                    InventorySummary.product_id,
-                    func.sum(InventorySummary.available_quantity).label('total_available')
-                )
-                .where(InventorySummary.product_id.in_(products_without_channel_inv))
-                .group_by(InventorySummary.product_id)
-            )
-            fallback_result = await db.execute(fallback_query)
-            for row in fallback_result.all():
-                stock_map[row.product_id] = row.total_available or 0
+            stock_map.update(await _shared_stock(db, products_without_channel_inv))
     else:
         # Fallback to legacy behavior (shared pool)
-        stock_query = (
-            select(
-                InventorySummary.product_id,
-                func.sum(InventorySummary.available_quantity).label('total_available')
-            )
-            .where(InventorySummary.product_id.in_(product_ids))
-            .group_by(InventorySummary.product_id)
-        )
-        stock_result = await db.execute(stock_query)
-        stock_map = {row.product_id: row.total_available or 0 for row in stock_result.all()}
+        stock_map = await _shared_stock(db, product_ids)
 
     # Fetch channel pricing for D2C channel (price authority = channel pricing)
     channel_pricing_map: dict = {}
@@ -433,44 +412,16 @@ async def get_product_by_slug(slug: str, db: DB, response: Response):
 
     if d2c_channel and getattr(settings, 'CHANNEL_INVENTORY_ENABLED', True):
         # Use channel-specific inventory
-        channel_stock_query = (
-            select(
-                func.sum(
-                    func.greatest(
-                        0,
-                        func.coalesce(ChannelInventory.allocated_quantity, 0) -
-                        func.coalesce(ChannelInventory.buffer_quantity, 0) -
-                        func.coalesce(ChannelInventory.reserved_quantity, 0)
-                    )
-                ).label('total_available')
-            )
-            .where(
-                ChannelInventory.channel_id == d2c_channel.id,
-                ChannelInventory.product_id == product.id,
-                ChannelInventory.is_active == True,
-            )
-        )
-        channel_result = await db.execute(channel_stock_query)
-        channel_qty = channel_result.scalar()
+        channel_qty = (await _channel_stock(db, d2c_channel.id, [product.id])).get(product.id)
 
         if channel_qty is not None and channel_qty > 0:
             stock_qty = channel_qty
         else:
             # Fallback: Product not in channel inventory, use shared pool
-            fallback_query = (
-                select(func.sum(InventorySummary.available_quantity).label('total_available'))
-                .where(InventorySummary.product_id == product.id)
-            )
-            fallback_result = await db.execute(fallback_query)
-            stock_qty = fallback_result.scalar() or 0
+            stock_qty = (await _shared_stock(db, [product.id])).get(product.id, 0)
     else:
         # Fallback to legacy behavior
-        stock_query = (
-            select(func.sum(InventorySummary.available_quantity).label('total_available'))
-            .where(InventorySummary.product_id == product.id)
-        )
-        stock_result = await db.execute(stock_query)
-        stock_qty = stock_result.scalar() or 0
+        stock_qty = (await _shared_stock(db, [product.id])).get(product.id, 0)
 
     # Channel pricing for single product (price authority = channel pricing)
     channel_price_single = None
@@ -1410,19 +1361,7 @@ async def _get_featured_products(db, limit: int = 8):
 
     # Batch get stock
     product_ids = [p.id for p in products]
-    if product_ids:
-        stock_query = (
-            select(
-                InventorySummary.product_id,
-                func.sum(InventorySummary.available_quantity).label('total_available')
-            )
-            .where(InventorySummary.product_id.in_(product_ids))
-            .group_by(InventorySummary.product_id)
-        )
-        stock_result = await db.execute(stock_query)
-        stock_map = {row.product_id: row.total_available or 0 for row in stock_result.all()}
-    else:
-        stock_map = {}
+    stock_map = await _shared_stock(db, product_ids)
 
     return [
         StorefrontProductResponse(
@@ -1473,19 +1412,7 @@ async def _get_bestseller_products(db, limit: int = 8):
     products = result.scalars().all()
 
     product_ids = [p.id for p in products]
-    if product_ids:
-        stock_query = (
-            select(
-                InventorySummary.product_id,
-                func.sum(InventorySummary.available_quantity).label('total_available')
-            )
-            .where(InventorySummary.product_id.in_(product_ids))
-            .group_by(InventorySummary.product_id)
-        )
-        stock_result = await db.execute(stock_query)
-        stock_map = {row.product_id: row.total_available or 0 for row in stock_result.all()}
-    else:
-        stock_map = {}
+    stock_map = await _shared_stock(db, product_ids)
 
     return [
         StorefrontProductResponse(
@@ -1536,19 +1463,7 @@ async def _get_new_arrival_products(db, limit: int = 8):
     products = result.scalars().all()
 
     product_ids = [p.id for p in products]
-    if product_ids:
-        stock_query = (
-            select(
-                InventorySummary.product_id,
-                func.sum(InventorySummary.available_quantity).label('total_available')
-            )
-            .where(InventorySummary.product_id.in_(product_ids))
-            .group_by(InventorySummary.product_id)
-        )
-        stock_result = await db.execute(stock_query)
-        stock_map = {row.product_id: row.total_available or 0 for row in stock_result.all()}
-    else:
-        stock_map = {}
+    stock_map = await _shared_stock(db, product_ids)
 
     return [
         StorefrontProductResponse(
@@ -1990,16 +1905,7 @@ async def compare_products(
         raise HTTPException(status_code=404, detail="Not enough valid products found for comparison")
 
     # Get stock info
-    stock_query = (
-        select(
-            InventorySummary.product_id,
-            func.sum(InventorySummary.available_quantity).label('total_available')
-        )
-        .where(InventorySummary.product_id.in_([p.id for p in products]))
-        .group_by(InventorySummary.product_id)
-    )
-    stock_result = await db.execute(stock_query)
-    stock_map = {row.product_id: row.total_available or 0 for row in stock_result.all()}
+    stock_map = await _shared_stock(db, [p.id for p in products])
 
     # Collect all unique specification keys
     all_spec_keys = set()
@@ -0,0 +1,21 @@
+"""System diagnostics API endpoints (database connection pool)."""
+from fastapi import APIRouter, Depends, Query
+
+from app.api.deps import require_role_level
+from app.models.role import RoleLevel
+from app.core.metrics import pool_metrics
+
+router = APIRouter(dependencies=[Depends(require_role_level(RoleLevel.SUPER_ADMIN))])
+
+
+@router.get("/db-pool")
+async def get_db_pool_status(longest: int = Query(10, ge=1, le=100)):
+    """
+    Connection pool utilisation of the process answering.
+
+    Current checked-out / overflow / idle counts, checkout wait and hold
+    times, pool timeouts, slow checkouts (held longer than
+    DB_SLOW_CHECKOUT_SECONDS), and the longest checkouts currently held
+    with the request holding them.
+    """
+    return pool_metrics.snapshot(longest=longest)
@@ -0,0 +1,155 @@
+"""Pick wave API endpoints: wave planning, batch order release and cancellation."""
+from typing import Optional
+import uuid
+from math import ceil
+
+from fastapi import APIRouter, HTTPException, status, Query, Depends
+from sqlalchemy import select, func
+
+from app.api.deps import DB, CurrentUser, require_permissions
+from app.models.picklist import PickWave, WaveStatus
+from app.schemas.picklist import (
+    WavePlanRequest,
+    WavePlanResponse,
+    WavePlanRunResponse,
+    PickWaveResponse,
+    PickWaveListResponse,
+)
+from app.services.wave_planning_service import WavePlanningService
+
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    response_model=PickWaveListResponse,
+    dependencies=[Depends(require_permissions("orders:view"))]
+)
+async def list_waves(
+    db: DB,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    warehouse_id: Optional[uuid.UUID] = Query(None),
+    status: Optional[WaveStatus] = Query(None),
+):
+    """Get paginated list of pick waves."""
+    query = select(PickWave)
+    count_query = select(func.count(PickWave.id))
+
+    if warehouse_id:
+        query = query.where(PickWave.warehouse_id == warehouse_id)
+        count_query = count_query.where(PickWave.warehouse_id == warehouse_id)
+
+    if status:
+        query = query.where(PickWave.status == status)
+        count_query = count_query.where(PickWave.status == status)
+
+    total = (await db.execute(count_query)).scalar() or 0
+
+    offset = (page - 1) * size
+    query = query.order_by(PickWave.created_at.desc()).offset(offset).limit(size)
+    waves = (await db.execute(query)).scalars().all()
+
+    return PickWaveListResponse(
+        items=[PickWaveResponse.model_validate(w) for w in waves],
+        total=total,
+        page=page,
+        size=size,
+        pages=ceil(total / size) if total > 0 else 1,
+    )
+
+
+@router.post(
+    "/plan",
+    response_model=WavePlanRunResponse,
+    dependencies=[Depends(require_permissions("orders:create"))]
+)
+async def plan_waves(
+    data: WavePlanRequest,
+    db: DB,
+    current_user: CurrentUser,
+):
+    """
+    Group pending orders into pick waves.
+    With release=false this is a preview; with release=true each wave is
+    saved and its picklists (one per zone) are created.
+    """
+    service = WavePlanningService(db)
+    plans, held = await service.plan_waves(
+        warehouse_id=data.warehouse_id,
+        pickers=data.pickers,
+        lines_per_picker=data.lines_per_picker,
+    )
+
+    # release_waves returns one (wave, picklists) pair per plan, in plan order
+    released = await service.release_waves(plans, current_user.id) if data.release else []
+
+    waves = []
+    for index, plan in enumerate(plans):
+        wave, picklists = released[index] if released else (None, [])
+        waves.append(WavePlanResponse(
+            warehouse_id=plan.warehouse_id,
+            carrier=plan.carrier,
+            cutoff_at=plan.cutoff_at,
+            order_ids=[order.id for order in plan.orders],
+            zone_codes=sorted(plan.zone_codes),
+            total_orders=len(plan.orders),
+            total_lines=plan.lines,
+            total_quantity=plan.quantity,
+            picker_count=plan.picker_count,
+            wave_id=wave.id if wave else None,
+            wave_number=wave.wave_number if wave else None,
+            picklist_ids=[p.id for p in picklists],
+        ))
+
+    return WavePlanRunResponse(waves=waves, held_order_ids=held)
+
+
+@router.get(
+    "/{wave_id}",
+    response_model=PickWaveResponse,
+    dependencies=[Depends(require_permissions("orders:view"))]
+)
+async def get_wave(
+    wave_id: uuid.UUID,
+    db: DB,
+):
+    """Get a pick wave."""
+    wave = await db.get(PickWave, wave_id)
+    if not wave:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pick wave not found"
+        )
+    return PickWaveResponse.model_validate(wave)
+
+
+@router.post(
+    "/{wave_id}/cancel",
+    response_model=PickWaveResponse,
+    dependencies=[Depends(require_permissions("orders:delete"))]
+)
+async def cancel_wave(
+    wave_id: uuid.UUID,
+    db: DB,
+    current_user: CurrentUser,
+    reason: str = Query(...),
+):
+    """
+    Cancel a pick wave: its open picklists are cancelled, their orders go
+    back to CONFIRMED and their batch reservations are released.
+    """
+    if not await db.get(PickWave, wave_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pick wave not found"
+        )
+    try:
+        wave = await WavePlanningService(db).cancel_wave(wave_id, reason, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return PickWaveResponse.model_validate(wave)
@@ -12,8 +12,8 @@ from app.api.deps import DB, CurrentUser, require_permissions
 from app.models.wms import WarehouseZone, WarehouseBin, PutAwayRule, ZoneType, BinType
 from app.models.warehouse import Warehouse
 from app.models.inventory import StockItem
-from app.models.product import Product
 from app.services.audit_service import AuditService
+from app.services.wms_service import WMSService
 from app.schemas.wms import (
     ZoneCreate,
     ZoneUpdate,
@@ -40,6 +40,10 @@ from app.schemas.wms import (
     SuggestedBin,
     PutAwayExecuteRequest,
     PutAwayExecuteResponse,
+    PutAwayTaskResponse,
+    UnassignedPutAway,
+    PutAwayPlanResponse,
+    PutAwayPlanExecuteResponse,
     InventoryMoveRequest,
     InventoryMoveResponse,
 )
@@ -863,87 +867,27 @@ async def suggest_putaway(
     Suggest bins for putaway based on rules.
     Returns list of suggested bins in priority order.
     """
-    # Get product info
-    product_query = select(Product).where(Product.id == data.product_id)
-    product_result = await db.execute(product_query)
-    product = product_result.scalar_one_or_none()
-
-    if not product:
+    try:
+        bins, matched_rule = await WMSService(db).suggest_putaway(
+            warehouse_id=data.warehouse_id,
+            product_id=data.product_id,
+            quantity=data.quantity,
+        )
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
-
-    # Find matching putaway rule
-    rule_query = (
-        select(PutAwayRule)
-        .where(
-            and_(
-                PutAwayRule.warehouse_id == data.warehouse_id,
-                PutAwayRule.is_active == True,
-                or_(
-                    PutAwayRule.product_id == data.product_id,
-                    PutAwayRule.category_id == product.category_id,
-                    PutAwayRule.brand_id == product.brand_id,
-                    and_(
-                        PutAwayRule.product_id.is_(None),
-                        PutAwayRule.category_id.is_(None),
-                        PutAwayRule.brand_id.is_(None),
-                    )
-                )
-            )
-        )
-        .options(selectinload(PutAwayRule.target_zone))
-        .order_by(PutAwayRule.priority.asc())
-    )
-    rule_result = await db.execute(rule_query)
-    matched_rule = rule_result.scalars().first()
-
-    # Find available bins
-    bin_query = (
-        select(WarehouseBin)
-        .where(
-            and_(
-                WarehouseBin.warehouse_id == data.warehouse_id,
-                WarehouseBin.is_active == True,
-                WarehouseBin.is_receivable == True,
-                WarehouseBin.is_reserved == False,
-            )
+            detail=str(e)
         )
-        .options(selectinload(WarehouseBin.zone))
-    )
-
-    # Filter by rule's target zone if exists
-    if matched_rule:
-        bin_query = bin_query.where(WarehouseBin.zone_id == matched_rule.target_zone_id)
-        if matched_rule.target_bin_pattern:
-            bin_query = bin_query.where(
-                WarehouseBin.bin_code.ilike(matched_rule.target_bin_pattern.replace("*", "%"))
-            )
-
-    # Order by pick sequence and available capacity
-    bin_query = bin_query.order_by(WarehouseBin.pick_sequence.asc())
-    bin_query = bin_query.limit(10)
 
-    bin_result = await db.execute(bin_query)
-    bins = bin_result.scalars().all()
-
-    suggested = []
-    for bin in bins:
-        # Skip full bins
-        if bin.is_full:
-            continue
-        # Check if has capacity for requested quantity
-        available = bin.available_capacity
-        if available is not None and available < data.quantity:
-            continue
-
-        suggested.append(SuggestedBin(
+    suggested = [
+        SuggestedBin(
             bin=BinBrief.model_validate(bin),
             zone=ZoneBrief.model_validate(bin.zone) if bin.zone else None,
-            available_capacity=available,
+            available_capacity=bin.available_capacity,
             pick_sequence=bin.pick_sequence,
-        ))
+        )
+        for bin in bins
+    ]
 
     return PutAwaySuggestResponse(
         suggested_bins=suggested,
@@ -1030,6 +974,91 @@ async def execute_putaway(
     )
 
 
+@router.post(
+    "/putaway/grn/{grn_id}/plan",
+    response_model=PutAwayPlanResponse,
+    dependencies=[Depends(require_permissions("inventory:create"))]
+)
+async def plan_grn_putaway(
+    grn_id: uuid.UUID,
+    db: DB,
+    current_user: CurrentUser,
+):
+    """
+    Plan putaway for all accepted lines of a GRN.
+    Bins are assigned within capacity and weight limits, keeping SKUs
+    together; the plan holds bin capacity until it is executed.
+    """
+    try:
+        plan = await WMSService(db).plan_grn_putaway(grn_id, created_by=current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return PutAwayPlanResponse(
+        grn_id=plan.grn_id,
+        grn_number=plan.grn_number,
+        warehouse_id=plan.warehouse_id,
+        tasks=[
+            PutAwayTaskResponse(
+                id=task.id,
+                grn_item_id=task.grn_item_id,
+                product_id=task.product_id,
+                bin_id=task.bin_id,
+                bin_code=plan.bin_codes[task.bin_id],
+                quantity=task.quantity,
+                weight_kg=task.weight_kg or 0.0,
+                rule_id=task.rule_id,
+                status=task.status,
+            )
+            for task in plan.tasks
+        ],
+        unassigned=[
+            UnassignedPutAway(grn_item_id=item_id, quantity=quantity)
+            for item_id, quantity in plan.unassigned.items()
+        ],
+        total_planned=sum(task.quantity for task in plan.tasks),
+        total_unassigned=sum(plan.unassigned.values()),
+    )
+
+
+@router.post(
+    "/putaway/grn/{grn_id}/execute",
+    response_model=PutAwayPlanExecuteResponse,
+    dependencies=[Depends(require_permissions("inventory:create"))]
+)
+async def execute_grn_putaway(
+    grn_id: uuid.UUID,
+    db: DB,
+    current_user: CurrentUser,
+):
+    """Execute a GRN's planned putaway - move its stock items into the planned bins."""
+    service = WMSService(db)
+    try:
+        result = await service.execute_putaway_plan(grn_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    await AuditService(db).log(
+        action="PUTAWAY", entity_type="GRN", entity_id=result["grn_id"],
+        user_id=current_user.id,
+        new_values={"units_moved": result["units_moved"], "units_pending": result["units_pending"]},
+        description=f"Put away {result['units_moved']} units from GRN {result['grn_number']}",
+    )
+    await db.commit()
+
+    return PutAwayPlanExecuteResponse(
+        success=True,
+        message=f"{result['units_moved']} units put away",
+        **result,
+    )
+
+
 @router.post(
     "/inventory/move",
     response_model=InventoryMoveResponse,
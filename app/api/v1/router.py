@@ -78,6 +78,7 @@ from app.api.v1.endpoints import (
     transporters,
     wms,
     picklists,
+    waves,
     shipments,
     manifests,
     serviceability,  # Pincode Serviceability & Order Allocation
@@ -125,6 +126,10 @@ from app.api.v1.endpoints import (
     amc,
     # Audit Logs
     audit_logs,
+    # Background Jobs
+    jobs,
+    # System Diagnostics
+    system,
     # Dashboard Charts
     dashboard_charts,
     # Community Partners (Meesho-style)
@@ -342,6 +347,11 @@ api_router.include_router(
     prefix="/picklists",
     tags=["Picklists (Order Picking)"]
 )
+api_router.include_router(
+    waves.router,
+    prefix="/waves",
+    tags=["Pick Waves (Wave Planning)"]
+)
 api_router.include_router(
     shipments.router,
     prefix="/shipments",
@@ -613,6 +623,20 @@ api_router.include_router(
     tags=["Audit Logs"]
 )
 
+# ==================== Background Jobs ====================
+api_router.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["Background Jobs"]
+)
+
+# ==================== System Diagnostics ====================
+api_router.include_router(
+    system.router,
+    prefix="/system",
+    tags=["System"]
+)
+
 # ==================== Dashboard Charts ====================
 api_router.include_router(
     dashboard_charts.router,
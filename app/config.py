@@ -16,6 +16,8 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 20  # Extra connections allowed beyond pool_size
     DB_POOL_TIMEOUT: int = 30  # Seconds to wait for connection from pool
     DB_POOL_RECYCLE: int = 1800  # Recycle connections after 30 minutes
+    DB_SLOW_CHECKOUT_SECONDS: float = 5.0  # Warn when a connection is held longer than this
+    DB_RELEASE_CONNECTION_DURING_IO: bool = True  # release_connection() hands the connection back before slow outbound calls
 
     # JWT Settings
     SECRET_KEY: str
@@ -49,6 +51,31 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""  # Gmail App Password
     SMTP_FROM_EMAIL: str = ""  # Sender email (defaults to SMTP_USER)
     SMTP_FROM_NAME: str = "Aquapurite ERP"
+    SMTP_USE_TLS: bool = True  # STARTTLS after connecting (disable only for local debug servers)
+    SMTP_TIMEOUT: int = 30  # Seconds for SMTP connect/commands
+    SMTP_IDLE_TIMEOUT: int = 60  # NOOP-check a pooled SMTP session idle longer than this
+
+    # Email Outbox (queued delivery by a background worker)
+    EMAIL_OUTBOX_ENABLED: bool = True  # Queue emails instead of sending inline on the request path
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50  # Messages claimed and sent per worker cycle
+    EMAIL_OUTBOX_POLL_INTERVAL: float = 5.0  # Seconds between polls for due/retried messages
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5  # Attempts before a message is marked FAILED
+    EMAIL_OUTBOX_RETRY_BACKOFF: int = 60  # Seconds before the first retry (doubles per attempt)
+    EMAIL_OUTBOX_CLAIM_TIMEOUT: int = 600  # Seconds before a SENDING claim is considered abandoned
+
+    # Audit Writer (batched audit_logs / document_sequence_audit inserts)
+    AUDIT_WRITER_ENABLED: bool = True  # Write audit rows in background batches after commit
+    AUDIT_WRITER_BATCH_SIZE: int = 500  # Rows per INSERT batch
+    AUDIT_WRITER_FLUSH_INTERVAL: float = 1.0  # Max seconds an event waits in memory
+    AUDIT_WRITER_COPY_THRESHOLD: int = 200  # Batches this large use COPY instead of executemany
+    AUDIT_WRITER_MAX_BUFFER: int = 50000  # Beyond this (database unreachable) rows spill to the spool file
+    AUDIT_SPOOL_PATH: str = "/tmp/erp-audit-spool.jsonl"  # Durable fallback, replayed on next start
+    AUDIT_PARTITION_MONTHS_AHEAD: int = 3  # Monthly audit_logs partitions created in advance
+
+    # Request Metrics (/metrics)
+    METRICS_ENABLED: bool = True  # Per-route latency / SQL query metrics
+    METRICS_TOKEN: str = ""  # Bearer token required to read /metrics (open when empty)
+    METRICS_QUERY_WARN_THRESHOLD: int = 50  # Log the repeated statements of requests running more queries
 
     # Frontend URL for email links
     FRONTEND_URL: str = "https://erp-woad-eight.vercel.app"
@@ -119,10 +146,61 @@ class Settings(BaseSettings):
     AUTO_REPLENISH_DEFAULT_SAFETY_STOCK: int = 50  # Default safety stock if not configured
     AUTO_REPLENISH_DEFAULT_REORDER_POINT: int = 10  # Default reorder point if not configured
 
+    # Background Job Scheduler
+    SCHEDULER_MODE: str = "embedded"  # embedded (API processes elect one leader), worker (python -m app.jobs.worker), disabled
+    SCHEDULER_JOBSTORE: str = "database"  # database (schedule persisted in apscheduler_jobs) or memory
+    SCHEDULER_LEADER_RETRY_SECONDS: int = 30  # How often followers retry for leadership / the leader checks its lock
+    SCHEDULER_RUN_HISTORY_DAYS: int = 30  # job_runs older than this are pruned nightly
+
     # Marketplace Sync Settings
     MARKETPLACE_SYNC_INTERVAL_MINUTES: int = 30  # How often to sync to marketplaces
     MARKETPLACE_SYNC_BATCH_SIZE: int = 100  # Number of items to sync per batch
 
+    # S&OP Batch Forecasting
+    SNOP_FORECAST_WORKERS: int = 2  # Processes used for model fitting in batch forecast jobs
+    SNOP_FORECAST_CHUNK_SIZE: int = 200  # Products per worker task / insert batch
+
+    # DMS AI Command Centre
+    DMS_AI_SNAPSHOT_REFRESH_MINUTES: int = 15  # Background refresh interval of agent snapshots
+    DMS_AI_SNAPSHOT_MAX_AGE_MINUTES: int = 30  # Older snapshots are recomputed on request
+
+    # Demand History (daily_demand_facts)
+    DEMAND_FACT_REFRESH_DELAY: float = 5.0  # Seconds to batch order changes before refreshing facts
+    DEMAND_FACT_BACKFILL_DAYS: int = 45  # Trailing days recomputed by the nightly backfill
+
+    # Courier Tracking Sync
+    TRACKING_SYNC_PAGE_SIZE: int = 500  # In-transit orders loaded per keyset page
+    TRACKING_SYNC_CONCURRENCY: int = 8  # Courier requests in flight at once
+    SHIPROCKET_TRACKING_RATE: float = 2.0  # Tracking requests per second to Shiprocket
+    SHIPROCKET_TRACKING_BATCH_SIZE: int = 50  # AWBs per Shiprocket batch tracking call
+    CJDQUICK_TRACKING_RATE: float = 1.5  # Tracking requests per second to CJDQuick (OMS limit: 100/min)
+    CJDQUICK_TRACKING_BATCH_SIZE: int = 100  # AWBs per CJDQuick shipments query
+
+    # PO Serials
+    SERIAL_RANGE_STORAGE: bool = True  # Store generated serials as po_serial_ranges rows instead of one po_serials row per unit
+    SERIAL_SCAN_STREAM_BATCH_SIZE: int = 200  # Barcodes per commit on the /serialization/scan/stream websocket
+    SERIAL_SCAN_STREAM_FLUSH_SECONDS: float = 0.5  # Idle time after which buffered websocket scans are committed
+
+    # Inventory Ledger
+    INVENTORY_LEDGER_FOLD_SECONDS: int = 10  # How often pending inventory_ledger entries are folded into summaries
+    INVENTORY_LEDGER_FOLD_BATCH: int = 5000  # Ledger entries claimed per fold transaction
+
+    # Wave Planning
+    WAVE_PLANNING_MINUTES: int = 15  # How often pending orders are grouped into pick waves
+    WAVE_PICKERS: int = 4  # Pickers available per warehouse per wave
+    WAVE_LINES_PER_PICKER: int = 60  # Order lines one picker clears in a wave
+    WAVE_DEFAULT_CUTOFF: str = "17:00"  # Carrier pickup cutoff (HH:MM, Asia/Kolkata) when none is configured
+    WAVE_CARRIER_CUTOFFS: str = ""  # Per-courier cutoffs, e.g. "DELHIVERY=15:00,BLUEDART=18:30"
+    WAVE_MAX_ORDERS: int = 5000  # Oldest pending orders considered per planning run
+
+    # Outbound HTTP (shared integration clients)
+    OUTBOUND_HTTP_MAX_CONNECTIONS: int = 20  # Per integration
+    OUTBOUND_HTTP_MAX_KEEPALIVE: int = 10  # Idle keep-alive connections kept per integration
+    OUTBOUND_HTTP_KEEPALIVE_EXPIRY: float = 60.0  # Seconds an idle connection is kept open
+    OUTBOUND_HTTP2: bool = True  # Use HTTP/2 where the server supports it (requires h2)
+    OUTBOUND_HTTP_RETRIES: int = 2  # Retries for connection failures / retryable idempotent responses
+    OUTBOUND_HTTP_BACKOFF: float = 0.5  # Base backoff in seconds (doubles per retry, with jitter)
+
     # Google Maps / Places API (for address autocomplete)
     GOOGLE_MAPS_API_KEY: str = ""  # Google Maps API key with Places API enabled
     GOOGLE_PLACES_COUNTRY_RESTRICTION: str = "in"  # Restrict to India
@@ -0,0 +1,328 @@
+"""
+Shared outbound HTTP clients for third-party integrations.
+
+One pooled httpx.AsyncClient per integration (GST e-invoice / e-way bill /
+filing, marketplaces, couriers, address lookup, SMS), opened in the FastAPI
+lifespan and reused across requests instead of a new client (TCP + TLS
+handshake) per call:
+- Keep-alive connection pools per host, HTTP/2 when the h2 package is installed
+- Retries with exponential backoff: connection failures for every method
+  (the request was never sent), 429/502/503/504 responses for idempotent
+  methods only, so an IRN or e-way bill is never generated twice
+- Per-integration request, error, retry and latency metrics
+- A process-wide token cache for OAuth / session-token flows
+
+Usage:
+    async with http_client("gst_einvoice", timeout=60.0) as client:
+        response = await client.post(url, json=payload)
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Integrations whose clients are opened at startup
+INTEGRATIONS = (
+    "gst_einvoice",
+    "gst_ewaybill",
+    "gst_filing",
+    "amazon",
+    "flipkart",
+    "shiprocket",
+    "cjdquick",
+    "address",
+    "sms",
+)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+_h2_available = None
+
+
+def _check_h2_available() -> bool:
+    """Check if the h2 package (httpx HTTP/2 support) is available."""
+    global _h2_available
+    if _h2_available is None:
+        try:
+            import h2  # noqa: F401
+            _h2_available = True
+        except ImportError:
+            _h2_available = False
+    return _h2_available
+
+
+class IntegrationMetrics:
+    """Request counters and recent latencies of one integration."""
+
+    def __init__(self, window: int = 500):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.status_counts: Dict[str, int] = {}
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[datetime] = None
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, status_code: Optional[int] = None, error: Optional[str] = None) -> None:
+        self.requests += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self._recent.append(elapsed_ms)
+
+        key = str(status_code) if status_code is not None else "error"
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+        if error or (status_code is not None and status_code >= 500):
+            self.errors += 1
+            self.last_error = error or f"HTTP {status_code}"
+            self.last_error_at = datetime.now(timezone.utc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = sorted(self._recent)
+
+        def percentile(p: float) -> Optional[float]:
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 1)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "avg_ms": round(self.total_ms / self.requests, 1) if self.requests else None,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_ms, 1),
+            "status_counts": dict(self.status_counts),
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at.isoformat() if self.last_error_at else None,
+        }
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Pooled transport with retry/backoff and metrics for one integration."""
+
+    def __init__(self, metrics: IntegrationMetrics, retries: int, backoff: float, **transport_kwargs):
+        self._transport = httpx.AsyncHTTPTransport(**transport_kwargs)
+        self.metrics = metrics
+        self.retries = retries
+        self.backoff = backoff
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), 30.0)
+        return self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as exc:
+                self.metrics.record((time.perf_counter() - start) * 1000, error=f"{type(exc).__name__}: {exc}")
+                if attempt >= self.retries:
+                    raise
+            except httpx.TransportError as exc:
+                self.metrics.record((time.perf_counter() - start) * 1000, error=f"{type(exc).__name__}: {exc}")
+                if not idempotent or attempt >= self.retries:
+                    raise
+            else:
+                self.metrics.record((time.perf_counter() - start) * 1000, status_code=response.status_code)
+                if not (idempotent and response.status_code in RETRY_STATUSES and attempt < self.retries):
+                    return response
+                # Drain the body so the connection goes back to the pool
+                await response.aread()
+                await response.aclose()
+                self.metrics.retries += 1
+                await asyncio.sleep(self._delay(attempt, response))
+                attempt += 1
+                continue
+
+            self.metrics.retries += 1
+            await asyncio.sleep(self._delay(attempt))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class IntegrationClient:
+    """
+    View of a shared client with a per-integration default timeout.
+
+    Exposes the request methods of httpx.AsyncClient; the pooled client
+    itself is owned (and closed) by OutboundHTTP.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, timeout: Optional[float]):
+        self._client = client
+        self.timeout = timeout
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        return await self._client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+
+class OutboundHTTP:
+    """Registry of pooled clients and their metrics, keyed by integration name."""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.metrics: Dict[str, IntegrationMetrics] = {}
+
+    def _create(self, integration: str) -> httpx.AsyncClient:
+        metrics = self.metrics.setdefault(integration, IntegrationMetrics())
+        http2 = settings.OUTBOUND_HTTP2 and _check_h2_available()
+        transport = RetryTransport(
+            metrics,
+            retries=settings.OUTBOUND_HTTP_RETRIES,
+            backoff=settings.OUTBOUND_HTTP_BACKOFF,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.OUTBOUND_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OUTBOUND_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.OUTBOUND_HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        return httpx.AsyncClient(transport=transport, timeout=30.0)
+
+    def get(self, integration: str) -> httpx.AsyncClient:
+        """The pooled client of an integration (created on first use)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not self._loop:
+            # Connections are bound to the loop that opened them (scripts may run several loops)
+            self._clients = {}
+            self._loop = loop
+
+        client = self._clients.get(integration)
+        if client is None or client.is_closed:
+            client = self._clients[integration] = self._create(integration)
+        return client
+
+    def open(self, integrations=INTEGRATIONS) -> None:
+        for integration in integrations:
+            self.get(integration)
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing outbound HTTP client: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: metrics.snapshot() for name, metrics in sorted(self.metrics.items())}
+
+
+class TokenCache:
+    """
+    Process-wide cache of auth tokens, shared by service instances.
+
+    Fetches are serialized per key, so a burst of requests needing a fresh
+    token triggers one login instead of one per request.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[Any, datetime]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._values.get(key)
+        if entry and datetime.now(timezone.utc) < entry[1]:
+            return entry[0]
+        return None
+
+    def set(self, key: str, value: Any, expires_at: datetime) -> None:
+        self._values[key] = (value, expires_at)
+
+    def invalidate(self, key: str, value: Any = None) -> None:
+        """
+        Drop a cached value the remote side rejected. With value, only that
+        value is dropped, so a token another request already refreshed stays.
+        """
+        entry = self._values.get(key)
+        if entry and (value is None or entry[0] == value):
+            del self._values[key]
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Tuple[Any, datetime]]]) -> Any:
+        """Cached value, or the (value, expires_at) returned by fetch()."""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            value = self.get(key)
+            if value is not None:
+                return value
+            value, expires_at = await fetch()
+            self.set(key, value, expires_at)
+            return value
+
+
+outbound_http = OutboundHTTP()
+token_cache = TokenCache()
+
+
+def get_http_client(integration: str, timeout: Optional[float] = None) -> IntegrationClient:
+    """Shared client of an integration with a default timeout."""
+    return IntegrationClient(outbound_http.get(integration), timeout)
+
+
+@asynccontextmanager
+async def http_client(integration: str, timeout: Optional[float] = None):
+    """Drop-in for `async with httpx.AsyncClient(timeout=...) as client` that reuses the pool."""
+    yield get_http_client(integration, timeout)
+
+
+def init_http_clients() -> None:
+    """Open the integration clients (FastAPI lifespan startup)."""
+    outbound_http.open()
+
+
+async def close_http_clients() -> None:
+    """Close all integration clients (FastAPI lifespan shutdown)."""
+    await outbound_http.aclose()
+
+
+def get_http_metrics() -> Dict[str, Any]:
+    """Per-integration request/error/latency metrics."""
+    return outbound_http.snapshot()
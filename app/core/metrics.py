@@ -0,0 +1,314 @@
+"""
+Per-endpoint request metrics.
+
+MetricsMiddleware times every HTTP request and, through the engine's
+before/after_cursor_execute hooks (app.database), counts the SQL statements
+it runs and the time spent in them. Per route template (e.g.
+/api/v1/orders/{order_id}) it keeps:
+- http_requests_total{method, route, status}
+- http_request_duration_seconds histogram
+- http_request_db_queries histogram (statements per request)
+- http_request_db_seconds histogram (DB time per request)
+
+A request running more than METRICS_QUERY_WARN_THRESHOLD statements logs
+a warning with its most repeated statements (the usual N+1 signature).
+
+PoolMetrics instruments the database connection pool (app.database): time
+waiting for a connection, how long connections stay checked out (and by
+which request), pool timeouts, and current checked-out / overflow counts.
+
+Metrics are per process and exposed in Prometheus text format on /metrics.
+Each gunicorn worker is scraped separately.
+"""
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestStats:
+    """SQL statements run while handling one request."""
+
+    __slots__ = ("label", "query_count", "db_seconds", "statements")
+
+    def __init__(self, label: str = ""):
+        self.label = label                  # "METHOD /path", names pool checkouts
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record_query(self, statement: str, elapsed: float) -> None:
+        self.query_count += 1
+        self.db_seconds += elapsed
+        self.statements[statement] += 1
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str = "") -> List[str]:
+        lines = []
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide request metrics keyed by (method, route)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Counter = Counter()                      # (method, route, status)
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.db_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.db_seconds: Dict[Tuple[str, str], Histogram] = {}
+        self.queries_total = 0                                  # incl. background jobs
+        self.query_seconds_total = 0.0
+
+    def record_query(self, elapsed: float) -> None:
+        with self._lock:
+            self.queries_total += 1
+            self.query_seconds_total += elapsed
+
+    def record_request(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, str(status))] += 1
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.db_queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self.db_seconds[key] = Histogram(LATENCY_BUCKETS)
+            self.latency[key].observe(elapsed)
+            self.db_queries[key].observe(stats.query_count)
+            self.db_seconds[key].observe(stats.db_seconds)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            lines.append("# HELP http_requests_total HTTP requests by route and status.")
+            lines.append("# TYPE http_requests_total counter")
+            for (method, route, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {value}')
+
+            for name, help_text, histograms in (
+                ("http_request_duration_seconds", "Request latency.", self.latency),
+                ("http_request_db_queries", "SQL statements per request.", self.db_queries),
+                ("http_request_db_seconds", "Time spent in SQL per request.", self.db_seconds),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), histogram in sorted(histograms.items()):
+                    lines.extend(histogram.render(name, f'method="{method}",route="{_escape(route)}"'))
+
+            lines.append("# HELP db_queries_total SQL statements executed by this process.")
+            lines.append("# TYPE db_queries_total counter")
+            lines.append(f"db_queries_total {self.queries_total}")
+            lines.append("# HELP db_query_seconds_total Time spent in SQL by this process.")
+            lines.append("# TYPE db_query_seconds_total counter")
+            lines.append(f"db_query_seconds_total {self.query_seconds_total:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+class PoolMetrics:
+    """
+    Connection pool instrumentation, fed by the pool class and pool events
+    installed in app.database.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.pool = None
+        self.wait = Histogram(LATENCY_BUCKETS)
+        self.held = Histogram(LATENCY_BUCKETS)
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self._recent_held: Deque[float] = deque(maxlen=window)
+        self._active: Dict[int, Tuple[float, str]] = {}        # id(connection record) -> (since, holder)
+
+    def record_wait(self, elapsed: float) -> None:
+        with self._lock:
+            self.wait.observe(elapsed)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def checked_out(self, record_id: int) -> None:
+        stats = current_request_stats.get()
+        holder = stats.label if stats is not None else "background"
+        with self._lock:
+            self._active[record_id] = (time.perf_counter(), holder)
+
+    def checked_in(self, record_id: int) -> None:
+        with self._lock:
+            entry = self._active.pop(record_id, None)
+            if entry is None:
+                return
+            since, holder = entry
+            held = time.perf_counter() - since
+            self.held.observe(held)
+            self._recent_held.append(held)
+            slow = held > settings.DB_SLOW_CHECKOUT_SECONDS
+            if slow:
+                self.slow_checkouts += 1
+        if slow:
+            logger.warning(f"DB connection held {held:.1f}s by {holder}")
+
+    def _pool_status(self) -> Dict[str, Optional[int]]:
+        status = {}
+        for key, method in (("size", "size"), ("checked_out", "checkedout"), ("overflow", "overflow"), ("idle", "checkedin")):
+            func = getattr(self.pool, method, None)
+            status[key] = func() if func else None
+        return status
+
+    def snapshot(self, longest: int = 10) -> Dict[str, Any]:
+        now = time.perf_counter()
+        with self._lock:
+            recent = sorted(self._recent_held)
+            active = sorted(self._active.values())[:longest]
+            wait_avg = self.wait.sum / self.wait.count if self.wait.count else 0.0
+            snapshot = {
+                "pool": {
+                    **self._pool_status(),
+                    "max_overflow": settings.DB_MAX_OVERFLOW,
+                    "timeout_seconds": settings.DB_POOL_TIMEOUT,
+                },
+                "checkouts": self.held.count,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "wait_avg_ms": round(wait_avg * 1000, 2),
+                "held_p50_ms": round(recent[len(recent) // 2] * 1000, 2) if recent else None,
+                "held_p95_ms": round(recent[int(len(recent) * 0.95)] * 1000, 2) if recent else None,
+                "held_max_ms": round(recent[-1] * 1000, 2) if recent else None,
+                "held_now": [
+                    {"holder": holder, "seconds": round(now - since, 2)} for since, holder in active
+                ],
+            }
+        return snapshot
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            status = self._pool_status()
+            for key, help_text in (
+                ("size", "Configured pool size."),
+                ("checked_out", "Connections currently checked out."),
+                ("overflow", "Overflow connections currently open (negative: unused pool slots)."),
+                ("idle", "Idle connections in the pool."),
+            ):
+                if status[key] is not None:
+                    lines.append(f"# HELP db_pool_{key} {help_text}")
+                    lines.append(f"# TYPE db_pool_{key} gauge")
+                    lines.append(f"db_pool_{key} {status[key]}")
+            lines.append("# HELP db_pool_wait_seconds Time waiting to check out a connection.")
+            lines.append("# TYPE db_pool_wait_seconds histogram")
+            lines.extend(self.wait.render("db_pool_wait_seconds"))
+            lines.append("# HELP db_pool_checkout_seconds How long connections stay checked out.")
+            lines.append("# TYPE db_pool_checkout_seconds histogram")
+            lines.extend(self.held.render("db_pool_checkout_seconds"))
+            lines.append("# HELP db_pool_timeouts_total Checkouts that hit pool_timeout.")
+            lines.append("# TYPE db_pool_timeouts_total counter")
+            lines.append(f"db_pool_timeouts_total {self.timeouts}")
+        return "\n".join(lines) + "\n"
+
+
+pool_metrics = PoolMetrics()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+metrics = MetricsRegistry()
+
+
+def record_query(statement: str, elapsed: float) -> None:
+    """Called from the engine's after_cursor_execute hook."""
+    metrics.record_query(elapsed)
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.record_query(statement, elapsed)
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and SQL usage per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(f"{scope['method']} {scope['path']}")
+        token = current_request_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Replaces the handler-level X-Response-Time some storefront endpoints set
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"x-response-time"]
+                headers.append((b"x-response-time", f"{(time.perf_counter() - start) * 1000:.2f}ms".encode()))
+                headers.append((b"x-db-queries", str(stats.query_count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            route = _route_template(scope)
+            metrics.record_request(scope["method"], route, status_code, elapsed, stats)
+
+            if stats.query_count > settings.METRICS_QUERY_WARN_THRESHOLD:
+                top = "; ".join(
+                    f"{count}x {_WHITESPACE.sub(' ', statement)[:200]}"
+                    for statement, count in stats.statements.most_common(3)
+                )
+                logger.warning(
+                    f"{scope['method']} {route} ran {stats.query_count} queries "
+                    f"({stats.db_seconds * 1000:.0f}ms in DB, {elapsed * 1000:.0f}ms total). Most repeated: {top}"
+                )
@@ -1,17 +1,20 @@
 import json
+import time
 from decimal import Decimal
 from datetime import datetime, date
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Iterable, Sequence
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import DateTime, event
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy import DateTime, event, exc as sa_exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from sqlalchemy.dialects.postgresql import JSONB
 import psycopg
 from psycopg.types.json import set_json_dumps, set_json_loads
 
 from app.config import settings
+from app.core.metrics import pool_metrics, record_query
 
 
 # Custom JSON encoder that handles Decimal, datetime, UUID, etc.
@@ -47,6 +50,21 @@ if database_url.startswith("postgresql+asyncpg://"):
 elif database_url.startswith("postgresql://"):
     database_url = database_url.replace("postgresql://", "postgresql+psycopg://")
 
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait time and pool timeouts."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa_exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        finally:
+            pool_metrics.record_wait(time.perf_counter() - start)
+
+
 # Create async engine with appropriate settings
 if is_sqlite:
     engine = create_async_engine(
@@ -60,6 +78,7 @@ else:
         database_url,
         echo=settings.DEBUG,
         future=True,
+        poolclass=InstrumentedQueuePool,  # Pool wait / timeout metrics
         pool_pre_ping=True,  # Check connection health before use
         pool_size=settings.DB_POOL_SIZE,  # Base pool size (default: 10)
         max_overflow=settings.DB_MAX_OVERFLOW,  # Extra connections beyond pool_size (default: 20)
@@ -70,6 +89,43 @@ else:
         },
     )
 
+
+# Unpooled engine for connections held for a long time (per-job advisory
+# locks in app.jobs.job_runs), so they never take a request pool slot
+lock_engine = None if is_sqlite else create_async_engine(
+    database_url,
+    future=True,
+    poolclass=NullPool,
+    connect_args={"prepare_threshold": None},
+)
+
+
+# Per-request SQL statement counts and DB time (app.core.metrics)
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    record_query(statement, elapsed)
+
+
+# How long connections stay checked out, and by which request (app.core.metrics)
+pool_metrics.pool = engine.sync_engine.pool
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_metrics.checked_out(id(connection_record))
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    pool_metrics.checked_in(id(connection_record))
+
+
 # Create async session factory
 async_session_factory = async_sessionmaker(
     engine,
@@ -117,6 +173,73 @@ async def get_db_session():
             raise
 
 
+# Sessions whose current transaction has written something (see release_connection)
+SESSION_WRITES_KEY = "has_pending_writes"
+
+# Audit rows buffered on a session until commit (see app.services.audit_writer)
+PENDING_AUDIT_KEY = "pending_audit_rows"
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement_writes(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[SESSION_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush_writes(session, flush_context):
+    session.info[SESSION_WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_writes(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(SESSION_WRITES_KEY, None)
+
+
+async def release_connection(session: AsyncSession) -> bool:
+    """
+    Hand the session's connection back to the pool before slow non-DB work
+    (outbound HTTP to GST portals, couriers, marketplaces).
+
+    Only a read-only transaction is ended (committed, so loaded objects stay
+    usable with expire_on_commit=False); the session checks out a connection
+    again on its next query. A transaction with writes keeps its connection
+    so the request stays atomic; buffered audit rows count as writes, since
+    committing would hand them to the audit writer even if the request later
+    rolls back. Returns True if the connection was released.
+    """
+    if not settings.DB_RELEASE_CONNECTION_DURING_IO or not session.in_transaction():
+        return False
+    if session.info.get(SESSION_WRITES_KEY) or session.info.get(PENDING_AUDIT_KEY):
+        return False
+    if session.new or session.dirty or session.deleted:
+        return False
+    await session.commit()
+    return True
+
+
+async def copy_rows(session: AsyncSession, table_name: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """
+    Bulk-load rows with PostgreSQL COPY on the session's connection (inside
+    its transaction). dict/list values are written as JSON. Returns the
+    number of rows written.
+    """
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    session.info[SESSION_WRITES_KEY] = True
+    count = 0
+    async with raw.driver_connection.cursor() as cursor:
+        async with cursor.copy(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                await copy.write_row([
+                    custom_json_dumps(value) if isinstance(value, (dict, list)) else value
+                    for value in row
+                ])
+                count += 1
+    return count
+
+
 async def init_db() -> None:
     """Initialize database tables."""
     # Import all models to register them with Base.metadata
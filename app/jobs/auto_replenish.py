@@ -14,28 +14,37 @@ import logging
 from typing import List, Dict, Any
 from datetime import datetime, timezone
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.channel import ChannelInventory, SalesChannel, ProductChannelSettings
 from app.models.inventory import InventorySummary
 from app.services.channel_inventory_service import ChannelInventoryService
+from app.services.channel_replenishment_service import ChannelReplenishmentPlanner
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 
-async def run_auto_replenish_job(db: AsyncSession) -> Dict[str, Any]:
+async def run_auto_replenish_job(db: AsyncSession, dry_run: bool = False) -> Dict[str, Any]:
     """
     Main job to check and auto-replenish all channel inventory.
 
+    Plans replenishment for every channel x product at once (see
+    ChannelReplenishmentPlanner) and applies it in one transaction.
+
+    Args:
+        db: Database session
+        dry_run: Return the planned replenishments without applying them
+
     Returns:
-        Summary of replenishment actions taken
+        Summary of replenishment actions taken (or planned)
     """
-    logger.info("Starting auto-replenish job...")
+    logger.info(f"Starting auto-replenish job{' (dry run)' if dry_run else ''}...")
 
     results = {
         "started_at": datetime.now(timezone.utc).isoformat(),
+        "dry_run": dry_run,
         "channels_processed": 0,
         "products_checked": 0,
         "replenishments": [],
@@ -43,11 +52,12 @@ async def run_auto_replenish_job(db: AsyncSession) -> Dict[str, Any]:
     }
 
     try:
-        service = ChannelInventoryService(db)
-
-        # Get all channel inventory records with auto_replenish enabled
-        query = (
-            select(ChannelInventory)
+        # Count channel inventory records with auto_replenish enabled
+        count_result = await db.execute(
+            select(
+                func.count(ChannelInventory.id),
+                func.count(distinct(ChannelInventory.channel_id))
+            )
             .where(
                 and_(
                     ChannelInventory.is_active == True,
@@ -57,62 +67,33 @@ async def run_auto_replenish_job(db: AsyncSession) -> Dict[str, Any]:
                 )
             )
         )
-
-        result = await db.execute(query)
-        channel_inventories = result.scalars().all()
-
-        logger.info(f"Found {len(channel_inventories)} channel inventory records with auto-replenish enabled")
-
-        for channel_inv in channel_inventories:
-            results["products_checked"] += 1
-
-            try:
-                # Calculate current available
-                current_available = max(0,
-                    (channel_inv.allocated_quantity or 0) -
-                    (channel_inv.buffer_quantity or 0) -
-                    (channel_inv.reserved_quantity or 0)
-                )
-
-                # Check if below reorder point
-                if current_available < channel_inv.reorder_point:
-                    logger.info(
-                        f"Channel {channel_inv.channel_id}, Product {channel_inv.product_id}: "
-                        f"Available ({current_available}) below reorder point ({channel_inv.reorder_point})"
-                    )
-
-                    # Trigger replenishment
-                    replenish_result = await service.check_and_replenish(
-                        channel_id=channel_inv.channel_id,
-                        product_id=channel_inv.product_id,
-                        safety_stock=channel_inv.safety_stock,
-                        reorder_point=channel_inv.reorder_point
-                    )
-
-                    if replenish_result.get("replenished"):
-                        results["replenishments"].append({
-                            "channel_id": str(channel_inv.channel_id),
-                            "product_id": str(channel_inv.product_id),
-                            "warehouse_id": str(channel_inv.warehouse_id),
-                            "quantity_replenished": replenish_result.get("quantity_replenished", 0),
-                            "new_available": replenish_result.get("new_available", 0),
-                            "details": replenish_result.get("details", []),
-                        })
-                        logger.info(
-                            f"Replenished {replenish_result.get('quantity_replenished')} units "
-                            f"for channel {channel_inv.channel_id}, product {channel_inv.product_id}"
-                        )
-
-            except Exception as e:
-                error_msg = f"Error processing channel {channel_inv.channel_id}, product {channel_inv.product_id}: {e}"
-                logger.error(error_msg)
-                results["errors"].append(error_msg)
-
-        # Count unique channels processed
-        channel_ids = set(ci.channel_id for ci in channel_inventories)
-        results["channels_processed"] = len(channel_ids)
+        products_checked, channels_processed = count_result.one()
+        results["products_checked"] = products_checked
+        results["channels_processed"] = channels_processed
+
+        logger.info(f"Found {products_checked} channel inventory records with auto-replenish enabled")
+
+        run = await ChannelReplenishmentPlanner(db).run(dry_run=dry_run)
+
+        for entry in run["plan"]:
+            results["replenishments"].append({
+                "channel_id": str(entry["channel_id"]),
+                "product_id": str(entry["product_id"]),
+                "warehouse_id": str(entry["details"][0]["warehouse_id"]),
+                "quantity_replenished": entry["quantity_replenished"],
+                "new_available": entry["new_available"],
+                "details": [
+                    {
+                        "warehouse_id": str(d["warehouse_id"]),
+                        "quantity": d["quantity"],
+                        "new_allocated": d["new_allocated"],
+                    }
+                    for d in entry["details"]
+                ],
+            })
 
     except Exception as e:
+        await db.rollback()
         error_msg = f"Auto-replenish job failed: {e}"
         logger.error(error_msg)
         results["errors"].append(error_msg)
@@ -121,7 +102,7 @@ async def run_auto_replenish_job(db: AsyncSession) -> Dict[str, Any]:
     results["total_replenished"] = sum(r.get("quantity_replenished", 0) for r in results["replenishments"])
 
     logger.info(
-        f"Auto-replenish job completed: "
+        f"Auto-replenish job completed{' (dry run)' if dry_run else ''}: "
         f"{results['products_checked']} products checked, "
         f"{len(results['replenishments'])} replenishments, "
         f"{results['total_replenished']} total units replenished"
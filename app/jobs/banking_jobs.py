@@ -57,7 +57,7 @@ async def auto_reconcile_bank_transactions():
 
             if not accounts:
                 logger.info("No bank accounts with unreconciled transactions found")
-                return
+                return {"rows_processed": 0, "accounts_processed": 0}
 
             for account in accounts:
                 try:
@@ -91,6 +91,12 @@ async def auto_reconcile_bank_transactions():
             f"{total_skipped} skipped "
             f"in {elapsed:.2f}s"
         )
+        return {
+            "rows_processed": total_matched,
+            "accounts_processed": accounts_processed,
+            "matched": total_matched,
+            "skipped": total_skipped,
+        }
 
     except Exception as e:
         logger.error(f"Auto bank reconciliation failed: {e}")
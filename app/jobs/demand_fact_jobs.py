@@ -0,0 +1,45 @@
+"""
+Demand Fact Background Jobs
+
+Nightly backfill of the daily_demand_facts table:
+- Recomputes the trailing DEMAND_FACT_BACKFILL_DAYS days from orders
+- Picks up order changes the incremental refresh missed (raw SQL updates,
+  sync scripts, failed refreshes)
+"""
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_demand_facts():
+    """
+    Recompute recent daily demand facts.
+
+    Runs daily at 1:30 AM IST.
+    """
+    logger.info("Starting demand fact backfill...")
+    start_time = datetime.now(timezone.utc)
+
+    try:
+        from app.config import settings
+        from app.database import get_db_session
+        from app.services.snop.demand_history import DemandHistoryService
+
+        end_date = date.today()
+        start_date = end_date - timedelta(days=settings.DEMAND_FACT_BACKFILL_DAYS)
+
+        async with get_db_session() as session:
+            written = await DemandHistoryService(session).backfill(start_date, end_date)
+
+        duration = (datetime.now(timezone.utc) - start_time).total_seconds()
+        logger.info(
+            f"Demand fact backfill completed in {duration:.2f}s. "
+            f"{written} facts written for {start_date} to {end_date}"
+        )
+        return {"rows_processed": written, "start_date": str(start_date), "end_date": str(end_date)}
+
+    except Exception as e:
+        logger.error(f"Demand fact backfill failed: {e}")
+        raise
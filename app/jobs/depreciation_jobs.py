@@ -78,7 +78,7 @@ async def run_monthly_depreciation():
 
             if not assets:
                 logger.info("No active assets found. Skipping depreciation.")
-                return
+                return {"rows_processed": 0, "period_date": str(period_date)}
 
             # Get open financial period
             period_r = await db.execute(
@@ -258,6 +258,14 @@ async def run_monthly_depreciation():
                 f"total_depreciation=₹{total_depreciation:,.2f}, "
                 f"gl_posted={gl_posted}, elapsed={elapsed:.1f}s"
             )
+            return {
+                "rows_processed": assets_processed,
+                "period_date": str(period_date),
+                "skipped": assets_skipped,
+                "total_depreciation": float(total_depreciation),
+                "gl_posted": gl_posted,
+            }
 
     except Exception as e:
         logger.error(f"Monthly depreciation failed: {e}", exc_info=True)
+        raise
@@ -0,0 +1,39 @@
+"""
+DMS AI Background Jobs
+
+Refreshes the cached snapshots of the DMS AI agents (dealer performance,
+demand sensing, scheme effectiveness, collection optimizer) so the command
+centre loads from cache.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+async def refresh_dms_snapshots():
+    """
+    Recompute all DMS AI agent snapshots concurrently.
+
+    Runs every DMS_AI_SNAPSHOT_REFRESH_MINUTES.
+    """
+    logger.info("Starting DMS AI snapshot refresh...")
+    start_time = datetime.now(timezone.utc)
+
+    try:
+        from app.services.ai.dms_command_center import refresh_snapshots
+
+        snapshots = await refresh_snapshots()
+        failed = [key for key, s in snapshots.items() if s["result"].get("status") == "error"]
+
+        duration = (datetime.now(timezone.utc) - start_time).total_seconds()
+        logger.info(
+            f"DMS AI snapshot refresh completed in {duration:.2f}s: "
+            f"{len(snapshots) - len(failed)} refreshed, {len(failed)} failed"
+        )
+        return {"rows_processed": len(snapshots) - len(failed), "failed": failed}
+
+    except Exception as e:
+        logger.error(f"DMS AI snapshot refresh failed: {e}")
+        raise
@@ -0,0 +1,38 @@
+"""
+Demand Forecast Background Jobs
+
+Daily precompute of the AI demand dashboard forecasts:
+- Stores a forecast snapshot for every product sold in the last 30 days
+- Runs after the demand fact backfill so snapshots match the nightly facts;
+  the dashboard only recomputes products whose demand changed since
+"""
+
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+async def refresh_demand_forecasts():
+    """
+    Store today's product demand forecasts.
+
+    Runs daily at 2 AM IST.
+    """
+    logger.info("Starting demand forecast refresh...")
+    start_time = datetime.now(timezone.utc)
+
+    try:
+        from app.database import get_db_session
+        from app.services.ai.demand_forecasting import DemandForecastingService
+
+        async with get_db_session() as session:
+            refreshed = await DemandForecastingService(session).refresh_dashboard_forecasts()
+
+        duration = (datetime.now(timezone.utc) - start_time).total_seconds()
+        logger.info(f"Demand forecast refresh completed in {duration:.2f}s. {refreshed} products forecast")
+        return {"rows_processed": refreshed}
+
+    except Exception as e:
+        logger.error(f"Demand forecast refresh failed: {e}")
+        raise
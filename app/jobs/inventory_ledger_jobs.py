@@ -0,0 +1,36 @@
+"""
+Inventory Ledger Background Jobs
+
+Folds pending inventory_ledger entries into inventory_summary and
+channel_inventory every INVENTORY_LEDGER_FOLD_SECONDS.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+async def fold_inventory_ledger():
+    """
+    Apply pending inventory ledger entries to the summary tables.
+
+    Runs every INVENTORY_LEDGER_FOLD_SECONDS.
+    """
+    start_time = datetime.now(timezone.utc)
+
+    try:
+        from app.database import async_session_factory
+        from app.services.inventory_ledger import InventoryLedgerService
+
+        async with async_session_factory() as session:
+            applied = await InventoryLedgerService(session).fold_all()
+
+        if applied:
+            duration = (datetime.now(timezone.utc) - start_time).total_seconds()
+            logger.info(f"Inventory ledger fold applied {applied} entries in {duration:.2f}s")
+        return {"rows_processed": applied}
+
+    except Exception as e:
+        logger.error(f"Inventory ledger fold failed: {e}")
+        raise
@@ -0,0 +1,210 @@
+"""
+Background Job Runner
+
+Every scheduled job runs through run_tracked_job(), which:
+- Takes a Postgres advisory lock for the job, so a job never runs twice at
+  once cluster-wide (e.g. old and new leader during a failover, or a job
+  still running when its next fire time comes round on another process)
+- Records the run in job_runs: host, duration, rows processed (the job's
+  returned summary, when it returns one) and the error if it failed
+
+The scheduler stores jobs as run_tracked_job(job_id); the job's function is
+looked up in JOB_DEFINITIONS, so persisted jobs survive code moves.
+"""
+
+import logging
+import os
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from apscheduler.util import ref_to_obj
+from sqlalchemy import delete, desc, func, select, text, update
+
+from app.config import settings
+from app.database import async_session_factory, is_sqlite, lock_engine
+from app.models.job_run import JobRun
+
+logger = logging.getLogger(__name__)
+
+HOST = f"{socket.gethostname()}:{os.getpid()}"
+
+# Advisory lock namespace for job locks (leader election uses its own key)
+JOB_LOCK_PREFIX = "erp-job:"
+
+
+@asynccontextmanager
+async def advisory_lock(name: str):
+    """
+    Session-level pg_try_advisory_lock on a dedicated connection.
+
+    The connection comes from the unpooled lock_engine, not the app pool, so
+    a long job holding its lock doesn't use up connections requests need.
+    Yields True if the lock was acquired. The lock is released on exit, or
+    by Postgres if the connection dies. SQLite (single process) always
+    acquires.
+    """
+    if is_sqlite:
+        yield True
+        return
+
+    async with lock_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        acquired = (await conn.execute(
+            text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name}
+        )).scalar()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+
+
+async def _start_run(job_id: str, status: str = "RUNNING") -> uuid.UUID:
+    run_id = uuid.uuid4()
+    async with async_session_factory() as session:
+        now = datetime.now(timezone.utc)
+        session.add(JobRun(
+            id=run_id,
+            job_id=job_id,
+            status=status,
+            host=HOST,
+            started_at=now,
+            finished_at=now if status != "RUNNING" else None,
+        ))
+        await session.commit()
+    return run_id
+
+
+async def _finish_run(
+    run_id: uuid.UUID,
+    status: str,
+    duration_ms: int,
+    result: Any = None,
+    error: Optional[str] = None,
+) -> None:
+    summary = result if isinstance(result, dict) else None
+    rows = summary.get("rows_processed") if summary else (result if isinstance(result, int) else None)
+    async with async_session_factory() as session:
+        await session.execute(
+            update(JobRun)
+            .where(JobRun.id == run_id)
+            .values(
+                status=status,
+                finished_at=datetime.now(timezone.utc),
+                duration_ms=duration_ms,
+                rows_processed=rows,
+                result=summary,
+                error=error,
+            )
+        )
+        await session.commit()
+
+
+async def run_tracked_job(job_id: str) -> Any:
+    """Run one job under its advisory lock and record the run."""
+    from app.jobs.scheduler import JOB_DEFINITIONS
+
+    definition = JOB_DEFINITIONS.get(job_id)
+    if definition is None:
+        logger.error(f"Unknown scheduled job {job_id}")
+        return None
+    job_func = ref_to_obj(definition["func"])
+
+    async with advisory_lock(JOB_LOCK_PREFIX + job_id) as acquired:
+        if not acquired:
+            logger.info(f"Job {job_id} is already running on another process, skipping")
+            try:
+                await _start_run(job_id, status="SKIPPED")
+            except Exception:
+                logger.exception(f"Could not record skipped run of {job_id}")
+            return None
+
+        try:
+            run_id = await _start_run(job_id)
+        except Exception:
+            # Run history is best effort; never block the job on it
+            logger.exception(f"Could not record run of {job_id}")
+            run_id = None
+
+        start = time.perf_counter()
+        try:
+            result = await job_func()
+        except Exception as e:
+            if run_id:
+                try:
+                    await _finish_run(
+                        run_id, "FAILED", int((time.perf_counter() - start) * 1000),
+                        error=f"{type(e).__name__}: {e}",
+                    )
+                except Exception:
+                    # Keep the job's own error, not the bookkeeping one
+                    logger.exception(f"Could not record failure of {job_id}")
+            raise
+
+        if run_id:
+            try:
+                await _finish_run(run_id, "SUCCESS", int((time.perf_counter() - start) * 1000), result)
+            except Exception:
+                logger.exception(f"Could not record result of {job_id}")
+        return result
+
+
+async def prune_job_runs() -> Dict[str, int]:
+    """Delete run history older than SCHEDULER_RUN_HISTORY_DAYS."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.SCHEDULER_RUN_HISTORY_DAYS)
+    async with async_session_factory() as session:
+        result = await session.execute(delete(JobRun).where(JobRun.started_at < cutoff))
+        await session.commit()
+    return {"rows_processed": result.rowcount or 0}
+
+
+def _serialize_run(run: JobRun) -> Dict[str, Any]:
+    return {
+        "id": str(run.id),
+        "job_id": run.job_id,
+        "status": run.status,
+        "host": run.host,
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        "duration_ms": run.duration_ms,
+        "rows_processed": run.rows_processed,
+        "result": run.result,
+        "error": run.error,
+    }
+
+
+async def get_job_runs(
+    db,
+    job_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 50,
+) -> List[Dict[str, Any]]:
+    """Most recent runs, newest first."""
+    query = select(JobRun).order_by(desc(JobRun.started_at)).limit(limit)
+    if job_id:
+        query = query.where(JobRun.job_id == job_id)
+    if status:
+        query = query.where(JobRun.status == status.upper())
+    result = await db.execute(query)
+    return [_serialize_run(run) for run in result.scalars().all()]
+
+
+async def get_last_runs(db) -> Dict[str, Dict[str, Any]]:
+    """Latest run of every job, keyed by job id."""
+    latest = (
+        select(JobRun.job_id, func.max(JobRun.started_at).label("started_at"))
+        .where(JobRun.status != "SKIPPED")
+        .group_by(JobRun.job_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(JobRun).join(
+            latest,
+            (JobRun.job_id == latest.c.job_id) & (JobRun.started_at == latest.c.started_at),
+        )
+    )
+    return {run.job_id: _serialize_run(run) for run in result.scalars().all()}
@@ -8,7 +8,6 @@ Background jobs for managing order-related tasks:
 """
 
 import logging
-from typing import List, Dict, Any
 from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
@@ -371,98 +370,34 @@ async def update_order_tracking():
     """
     Update order tracking information from logistics partners.
 
-    This is called by the scheduler to fetch latest tracking updates.
+    This is called by the scheduler to fetch latest tracking updates for
+    every in-transit order (see TrackingSyncService).
     """
     logger.info("Starting order tracking update...")
+    start_time = datetime.now(timezone.utc)
 
     try:
         from app.database import get_db_session
-        from sqlalchemy import text
+        from app.services.tracking_sync_service import TrackingSyncService
 
         async with get_db_session() as session:
-            # Find orders in transit
-            result = await session.execute(
-                text("""
-                    SELECT
-                        id,
-                        order_number,
-                        awb_code,
-                        courier_name
-                    FROM orders
-                    WHERE status IN ('SHIPPED', 'IN_TRANSIT')
-                    AND awb_code IS NOT NULL
-                    LIMIT 50
-                """)
-            )
-            orders = result.fetchall()
-
-            for order in orders:
-                try:
-                    # Call logistics partner API to get tracking update
-                    tracking_info = await fetch_tracking_update(
-                        order.courier_name,
-                        order.awb_code
-                    )
+            summary = await TrackingSyncService(session).run()
 
-                    if tracking_info:
-                        # Normalize tracking status to UPPERCASE before SQL
-                        # (external APIs may return lowercase values)
-                        raw_status = tracking_info.get("status", "")
-                        normalized_status = raw_status.upper() if raw_status else ""
-                        is_delivered = normalized_status == "DELIVERED"
-
-                        await session.execute(
-                            text("""
-                                UPDATE orders
-                                SET
-                                    tracking_status = :tracking_status,
-                                    last_tracking_update = :update_time,
-                                    status = CASE
-                                        WHEN :is_delivered THEN 'DELIVERED'
-                                        ELSE status
-                                    END,
-                                    delivered_at = CASE
-                                        WHEN :is_delivered THEN :update_time
-                                        ELSE delivered_at
-                                    END
-                                WHERE id = :order_id
-                            """),
-                            {
-                                "tracking_status": normalized_status,
-                                "update_time": datetime.now(timezone.utc),
-                                "order_id": order.id,
-                                "is_delivered": is_delivered
-                            }
-                        )
-
-                except Exception as e:
-                    logger.error(
-                        f"Tracking update failed for {order.order_number}: {e}"
-                    )
-
-            await session.commit()
+        duration = (datetime.now(timezone.utc) - start_time).total_seconds()
+        logger.info(
+            f"Order tracking update completed in {duration:.2f}s: "
+            f"{summary['orders_checked']} checked, {summary['orders_updated']} updated, "
+            f"{summary['status_changes']} status changes ({summary['delivered']} delivered), "
+            f"{len(summary['errors'])} errors"
+        )
+        return {
+            "rows_processed": summary["orders_updated"],
+            "orders_checked": summary["orders_checked"],
+            "status_changes": summary["status_changes"],
+            "delivered": summary["delivered"],
+            "errors": len(summary["errors"]),
+        }
 
     except Exception as e:
         logger.error(f"Order tracking update failed: {e}")
-
-
-async def fetch_tracking_update(
-    logistics_partner: str,
-    tracking_number: str
-) -> Dict[str, Any]:
-    """
-    Fetch tracking update from logistics partner.
-
-    Args:
-        logistics_partner: Name of the logistics partner
-        tracking_number: Shipment tracking number
-
-    Returns:
-        Tracking information dict
-    """
-    # This would be replaced with actual API calls to logistics partners
-    # For now, return None as placeholder
-    logger.debug(
-        f"Fetching tracking for {tracking_number} from {logistics_partner}"
-    )
-    return None
+        raise
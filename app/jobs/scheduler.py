@@ -2,18 +2,168 @@
 APScheduler Configuration
 
 Background job scheduler for periodic tasks.
+
+Multi-worker safe:
+- Leader election: processes that may run jobs compete for a Postgres
+  advisory lock; only the holder starts the scheduler, the others retry
+  every SCHEDULER_LEADER_RETRY_SECONDS and take over if the leader dies
+- Job store: SCHEDULER_JOBSTORE=database persists the schedule
+  (apscheduler_jobs), so next run times and misfires survive restarts
+- Every job runs through run_tracked_job (per-job advisory lock + run
+  history in job_runs)
+
+SCHEDULER_MODE:
+- embedded: API processes elect a leader among themselves (default)
+- worker: API processes never run jobs; run `python -m app.jobs.worker`
+- disabled: no scheduled jobs
 """
 
+import asyncio
 import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import text
+
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Job stores
-jobstores = {
-    'default': MemoryJobStore()
+TIMEZONE = 'Asia/Kolkata'
+
+# Advisory lock held by the process running the scheduler
+LEADER_LOCK_NAME = "erp-scheduler-leader"
+
+# Grace time for daily/monthly jobs, so a run missed during a restart still
+# happens once the scheduler is back (interval jobs just wait for the next slot)
+CRON_MISFIRE_GRACE_TIME = 6 * 3600
+
+# Scheduled jobs: id -> definition (func is a textual reference, resolved at run time)
+JOB_DEFINITIONS: Dict[str, Dict[str, Any]] = {
+    # Cache refresh every 15 minutes
+    'refresh_serviceability_cache': {
+        'name': 'Refresh Serviceability Cache',
+        'func': 'app.jobs.cache_jobs:refresh_serviceability_cache',
+        'trigger': 'interval',
+        'trigger_args': {'minutes': 15},
+    },
+    # Warm popular pincodes every 30 minutes
+    'warm_popular_pincodes': {
+        'name': 'Warm Popular Pincodes Cache',
+        'func': 'app.jobs.cache_jobs:warm_popular_pincodes',
+        'trigger': 'interval',
+        'trigger_args': {'minutes': 30},
+    },
+    # Sync inventory cache every 5 minutes
+    'sync_inventory_cache': {
+        'name': 'Sync Inventory Cache',
+        'func': 'app.jobs.cache_jobs:sync_inventory_cache',
+        'trigger': 'interval',
+        'trigger_args': {'minutes': 5},
+    },
+    # Check pending payments every 10 minutes
+    'check_pending_payments': {
+        'name': 'Check Pending Payments',
+        'func': 'app.jobs.order_jobs:check_pending_payments',
+        'trigger': 'interval',
+        'trigger_args': {'minutes': 10},
+    },
+    # Process abandoned carts every hour
+    'process_abandoned_carts': {
+        'name': 'Process Abandoned Carts',
+        'func': 'app.jobs.order_jobs:process_abandoned_carts',
+        'trigger': 'interval',
+        'trigger_args': {'hours': 1},
+    },
+    # Update order tracking every 30 minutes
+    'update_order_tracking': {
+        'name': 'Update Order Tracking',
+        'func': 'app.jobs.order_jobs:update_order_tracking',
+        'trigger': 'interval',
+        'trigger_args': {'minutes': 30},
+    },
+    # Auto-reconcile bank transactions every 2 hours
+    'auto_reconcile_bank_transactions': {
+        'name': 'Auto Reconcile Bank Transactions',
+        'func': 'app.jobs.banking_jobs:auto_reconcile_bank_transactions',
+        'trigger': 'interval',
+        'trigger_args': {'hours': 2},
+    },
+    # Check warranty/AMC expiry daily at 9 AM IST
+    'check_warranty_expiry': {
+        'name': 'Check Warranty/AMC Expiry',
+        'func': 'app.jobs.warranty_jobs:check_warranty_expiry',
+        'trigger': 'cron',
+        'trigger_args': {'hour': 9, 'minute': 0},
+    },
+    # SLA compliance check every 30 minutes
+    'check_sla_compliance': {
+        'name': 'Check SLA Compliance & Auto-Escalate',
+        'func': 'app.jobs.sla_jobs:check_sla_compliance',
+        'trigger': 'interval',
+        'trigger_args': {'minutes': 30},
+    },
+    # Monthly auto-depreciation on 1st of every month at 2 AM IST
+    'run_monthly_depreciation': {
+        'name': 'Monthly Auto-Depreciation (Fixed Assets)',
+        'func': 'app.jobs.depreciation_jobs:run_monthly_depreciation',
+        'trigger': 'cron',
+        'trigger_args': {'day': 1, 'hour': 2, 'minute': 0},
+    },
+    # Demand fact backfill daily at 1:30 AM IST
+    'backfill_demand_facts': {
+        'name': 'Backfill Daily Demand Facts',
+        'func': 'app.jobs.demand_fact_jobs:backfill_demand_facts',
+        'trigger': 'cron',
+        'trigger_args': {'hour': 1, 'minute': 30},
+    },
+    # Demand dashboard forecasts daily at 2 AM IST (after the fact backfill)
+    'refresh_demand_forecasts': {
+        'name': 'Refresh Demand Forecast Snapshots',
+        'func': 'app.jobs.forecast_jobs:refresh_demand_forecasts',
+        'trigger': 'cron',
+        'trigger_args': {'hour': 2, 'minute': 0},
+    },
+    # DMS AI command centre snapshots
+    'refresh_dms_snapshots': {
+        'name': 'Refresh DMS AI Agent Snapshots',
+        'func': 'app.jobs.dms_jobs:refresh_dms_snapshots',
+        'trigger': 'interval',
+        'trigger_args': {'minutes': settings.DMS_AI_SNAPSHOT_REFRESH_MINUTES},
+    },
+    # Create upcoming monthly audit_logs partitions daily at 1:15 AM IST
+    'ensure_audit_partitions': {
+        'name': 'Create Audit Log Partitions',
+        'func': 'app.services.audit_writer:ensure_audit_log_partitions',
+        'trigger': 'cron',
+        'trigger_args': {'hour': 1, 'minute': 15},
+    },
+    # Fold pending inventory ledger entries into inventory / channel summaries
+    'fold_inventory_ledger': {
+        'name': 'Fold Inventory Ledger',
+        'func': 'app.jobs.inventory_ledger_jobs:fold_inventory_ledger',
+        'trigger': 'interval',
+        'trigger_args': {'seconds': settings.INVENTORY_LEDGER_FOLD_SECONDS},
+    },
+    # Group pending orders into pick waves and release their picklists
+    'plan_pick_waves': {
+        'name': 'Plan Pick Waves',
+        'func': 'app.jobs.wave_jobs:plan_pick_waves',
+        'trigger': 'interval',
+        'trigger_args': {'minutes': settings.WAVE_PLANNING_MINUTES},
+    },
+    # Prune job run history daily at 3 AM IST
+    'prune_job_runs': {
+        'name': 'Prune Job Run History',
+        'func': 'app.jobs.job_runs:prune_job_runs',
+        'trigger': 'cron',
+        'trigger_args': {'hour': 3, 'minute': 0},
+    },
 }
 
 # Executors
@@ -28,158 +178,222 @@ job_defaults = {
     'misfire_grace_time': 60,  # Allow 60 seconds grace time for misfires
 }
 
-# Create scheduler
+# Create scheduler (job store is configured on start, see _create_jobstore)
 scheduler = AsyncIOScheduler(
-    jobstores=jobstores,
     executors=executors,
     job_defaults=job_defaults,
-    timezone='Asia/Kolkata'
+    timezone=TIMEZONE,
 )
 
 
-def start_scheduler():
-    """Start the background job scheduler."""
-    if not scheduler.running:
-        # Import jobs here to avoid circular imports
-        from app.jobs.cache_jobs import (
-            refresh_serviceability_cache,
-            warm_popular_pincodes,
-            sync_inventory_cache,
-        )
-        from app.jobs.order_jobs import (
-            check_pending_payments,
-            process_abandoned_carts,
-            update_order_tracking,
-        )
-        from app.jobs.banking_jobs import auto_reconcile_bank_transactions
-        from app.jobs.warranty_jobs import check_warranty_expiry
-        from app.jobs.sla_jobs import check_sla_compliance
-        from app.jobs.depreciation_jobs import run_monthly_depreciation
+def _create_jobstore():
+    """Job store for SCHEDULER_JOBSTORE (database: apscheduler_jobs on the app database)."""
+    from app.database import database_url, is_sqlite
 
-        # Add scheduled jobs
+    # SQLite (local development) is single-process; a second writer would only contend for the file lock
+    if settings.SCHEDULER_JOBSTORE != "database" or is_sqlite:
+        return MemoryJobStore()
 
-        # Cache refresh every 15 minutes
-        scheduler.add_job(
-            refresh_serviceability_cache,
-            'interval',
-            minutes=15,
-            id='refresh_serviceability_cache',
-            name='Refresh Serviceability Cache',
-            replace_existing=True,
-        )
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    from sqlalchemy import create_engine
 
-        # Warm popular pincodes every 30 minutes
-        scheduler.add_job(
-            warm_popular_pincodes,
-            'interval',
-            minutes=30,
-            id='warm_popular_pincodes',
-            name='Warm Popular Pincodes Cache',
-            replace_existing=True,
-        )
+    # APScheduler 3 job stores are synchronous; use the sync flavour of the app URL
+    sync_engine = create_engine(
+        database_url,
+        pool_size=1,
+        max_overflow=1,
+        pool_pre_ping=True,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={"prepare_threshold": None},
+    )
+    return SQLAlchemyJobStore(engine=sync_engine)
 
-        # Sync inventory cache every 5 minutes
-        scheduler.add_job(
-            sync_inventory_cache,
-            'interval',
-            minutes=5,
-            id='sync_inventory_cache',
-            name='Sync Inventory Cache',
-            replace_existing=True,
-        )
 
-        # Check pending payments every 10 minutes
-        scheduler.add_job(
-            check_pending_payments,
-            'interval',
-            minutes=10,
-            id='check_pending_payments',
-            name='Check Pending Payments',
-            replace_existing=True,
-        )
+def _create_trigger(definition: Dict[str, Any]):
+    if definition['trigger'] == 'cron':
+        return CronTrigger(timezone=TIMEZONE, **definition['trigger_args'])
+    return IntervalTrigger(timezone=TIMEZONE, **definition['trigger_args'])
 
-        # Process abandoned carts every hour
-        scheduler.add_job(
-            process_abandoned_carts,
-            'interval',
-            hours=1,
-            id='process_abandoned_carts',
-            name='Process Abandoned Carts',
-            replace_existing=True,
-        )
 
-        # Update order tracking every 30 minutes
-        scheduler.add_job(
-            update_order_tracking,
-            'interval',
-            minutes=30,
-            id='update_order_tracking',
-            name='Update Order Tracking',
-            replace_existing=True,
-        )
+def _sync_jobs() -> None:
+    """
+    Make the job store match JOB_DEFINITIONS.
 
-        # Auto-reconcile bank transactions every 2 hours
-        scheduler.add_job(
-            auto_reconcile_bank_transactions,
-            'interval',
-            hours=2,
-            id='auto_reconcile_bank_transactions',
-            name='Auto Reconcile Bank Transactions',
-            replace_existing=True,
-        )
+    Unchanged persisted jobs are kept as-is, so their next run time (and
+    any misfire to catch up on) survives a restart.
+    """
+    for job in scheduler.get_jobs():
+        if job.id not in JOB_DEFINITIONS:
+            logger.info(f"Removing obsolete scheduled job {job.id}")
+            job.remove()
 
-        # Check warranty/AMC expiry daily at 9 AM IST
-        scheduler.add_job(
-            check_warranty_expiry,
-            'cron',
-            hour=9,
-            minute=0,
-            id='check_warranty_expiry',
-            name='Check Warranty/AMC Expiry',
-            replace_existing=True,
-        )
+    for job_id, definition in JOB_DEFINITIONS.items():
+        trigger = _create_trigger(definition)
+        existing = scheduler.get_job(job_id)
+        if (
+            existing is not None
+            and str(existing.trigger) == str(trigger)
+            and existing.name == definition['name']
+            and existing.args == (job_id,)
+        ):
+            continue
 
-        # SLA compliance check every 30 minutes
         scheduler.add_job(
-            check_sla_compliance,
-            'interval',
-            minutes=30,
-            id='check_sla_compliance',
-            name='Check SLA Compliance & Auto-Escalate',
+            'app.jobs.job_runs:run_tracked_job',
+            trigger=trigger,
+            args=[job_id],
+            id=job_id,
+            name=definition['name'],
             replace_existing=True,
+            **({'misfire_grace_time': CRON_MISFIRE_GRACE_TIME} if definition['trigger'] == 'cron' else {}),
         )
 
-        # Monthly auto-depreciation on 1st of every month at 2 AM IST
-        scheduler.add_job(
-            run_monthly_depreciation,
-            'cron',
-            day=1,
-            hour=2,
-            minute=0,
-            id='run_monthly_depreciation',
-            name='Monthly Auto-Depreciation (Fixed Assets)',
-            replace_existing=True,
-        )
 
-        scheduler.start()
-        logger.info("Background job scheduler started")
+_jobstore_configured = False
+
+
+def _start_local_scheduler() -> None:
+    global _jobstore_configured
+    if scheduler.running:
+        return
+    if not _jobstore_configured:
+        scheduler.add_jobstore(_create_jobstore(), 'default')
+        _jobstore_configured = True
+
+    # Start paused so the store is loaded before jobs are reconciled
+    scheduler.start(paused=True)
+    _sync_jobs()
+    scheduler.resume()
+    logger.info("Background job scheduler started")
 
-        # Log all scheduled jobs
-        jobs = scheduler.get_jobs()
-        for job in jobs:
-            logger.info(f"Scheduled job: {job.name} - Next run: {job.next_run_time}")
+    # Log all scheduled jobs
+    jobs = scheduler.get_jobs()
+    for job in jobs:
+        logger.info(f"Scheduled job: {job.name} - Next run: {job.next_run_time}")
 
 
-def shutdown_scheduler():
-    """Shutdown the scheduler gracefully."""
+def _stop_local_scheduler() -> None:
     if scheduler.running:
-        scheduler.shutdown(wait=True)
+        scheduler.shutdown(wait=False)
         logger.info("Background job scheduler stopped")
 
 
+class SchedulerLeader:
+    """
+    Leader election over a session-level Postgres advisory lock.
+
+    The lock lives on a dedicated connection for as long as this process is
+    leader; if the process or connection dies, Postgres releases it and
+    another process takes over on its next attempt. SQLite (single process)
+    is always leader.
+    """
+
+    def __init__(self):
+        self.is_leader = False
+        self._conn = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self._resign()
+
+    async def _try_acquire(self) -> bool:
+        from app.database import engine, is_sqlite
+
+        if is_sqlite:
+            return True
+        conn = await engine.connect()
+        try:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            acquired = (await conn.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": LEADER_LOCK_NAME}
+            )).scalar()
+        except Exception:
+            await conn.close()
+            raise
+        if not acquired:
+            await conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    async def _still_leader(self) -> bool:
+        if self._conn is None:
+            return True
+        try:
+            await self._conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"Scheduler leader connection lost: {e}")
+            return False
+
+    async def _resign(self) -> None:
+        _stop_local_scheduler()
+        self.is_leader = False
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                await conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": LEADER_LOCK_NAME})
+            except Exception:
+                pass
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self.is_leader:
+                    if await self._try_acquire():
+                        self.is_leader = True
+                        logger.info("Elected scheduler leader")
+                        _start_local_scheduler()
+                elif not await self._still_leader():
+                    await self._resign()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler leader election failed: {e}")
+                await self._resign()
+            await asyncio.sleep(settings.SCHEDULER_LEADER_RETRY_SECONDS)
+
+
+leader = SchedulerLeader()
+
+
+def start_scheduler(role: str = "api"):
+    """
+    Start competing for the scheduler (FastAPI lifespan / job worker startup).
+
+    API processes only run jobs in SCHEDULER_MODE=embedded; the dedicated
+    worker (role="worker") runs them unless the scheduler is disabled.
+    """
+    mode = settings.SCHEDULER_MODE
+    if mode == "disabled" or (role == "api" and mode != "embedded"):
+        logger.info(f"Background job scheduler not started in this process (SCHEDULER_MODE={mode})")
+        return
+    leader.start()
+
+
+async def shutdown_scheduler():
+    """Shutdown the scheduler gracefully and give up leadership."""
+    await leader.stop()
+
+
 def get_job_status():
-    """Get status of all scheduled jobs."""
-    jobs = scheduler.get_jobs()
+    """Get status of all scheduled jobs (as seen by this process)."""
+    jobs = scheduler.get_jobs() if scheduler.running else []
     return [
         {
             'id': job.id,
@@ -189,3 +403,39 @@ def get_job_status():
         }
         for job in jobs
     ]
+
+
+async def get_scheduler_overview(db) -> Dict[str, Any]:
+    """
+    Cluster-wide scheduler view: every defined job with its next run time
+    (from the leader's scheduler or the persisted job store) and last run.
+    """
+    from app.jobs.job_runs import get_last_runs
+
+    next_runs = {job['id']: job['next_run_time'] for job in get_job_status()}
+    if not next_runs and settings.SCHEDULER_JOBSTORE == "database":
+        try:
+            result = await db.execute(text("SELECT id, next_run_time FROM apscheduler_jobs"))
+            next_runs = {
+                row.id: str(datetime.fromtimestamp(row.next_run_time, timezone.utc)) if row.next_run_time else None
+                for row in result
+            }
+        except Exception:
+            await db.rollback()
+
+    last_runs = await get_last_runs(db)
+    return {
+        'mode': settings.SCHEDULER_MODE,
+        'jobstore': settings.SCHEDULER_JOBSTORE,
+        'this_process_is_leader': leader.is_leader,
+        'jobs': [
+            {
+                'id': job_id,
+                'name': definition['name'],
+                'trigger': str(_create_trigger(definition)),
+                'next_run_time': next_runs.get(job_id),
+                'last_run': last_runs.get(job_id),
+            }
+            for job_id, definition in JOB_DEFINITIONS.items()
+        ],
+    }
@@ -135,6 +135,11 @@ async def check_sla_compliance():
             f"{escalated} escalated, {breached} breached "
             f"in {elapsed:.2f}s"
         )
+        return {
+            "rows_processed": len(open_requests),
+            "escalated": escalated,
+            "breached": breached,
+        }
 
     except Exception as e:
         logger.error(f"SLA compliance check failed: {e}")
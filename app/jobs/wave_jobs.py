@@ -0,0 +1,37 @@
+"""
+Wave Planning Background Jobs
+
+Groups pending orders into pick waves and releases their picklists every
+WAVE_PLANNING_MINUTES.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+async def plan_pick_waves():
+    """
+    Plan and release pick waves for all warehouses.
+
+    Runs every WAVE_PLANNING_MINUTES.
+    """
+    start_time = datetime.now(timezone.utc)
+
+    try:
+        from app.database import async_session_factory
+        from app.services.wave_planning_service import WavePlanningService
+
+        async with async_session_factory() as session:
+            released = await WavePlanningService(session).run()
+
+        orders = sum(wave.total_orders for wave, _ in released)
+        if released:
+            duration = (datetime.now(timezone.utc) - start_time).total_seconds()
+            logger.info(f"Wave planning released {len(released)} waves ({orders} orders) in {duration:.2f}s")
+        return {"rows_processed": orders}
+
+    except Exception as e:
+        logger.error(f"Wave planning failed: {e}")
+        raise
@@ -0,0 +1,51 @@
+"""
+Dedicated background job worker.
+
+Runs the scheduled jobs outside the API processes (SCHEDULER_MODE=worker).
+Several worker replicas are safe: they elect one leader via the same
+advisory lock the API processes use in embedded mode.
+
+Usage:
+    python -m app.jobs.worker
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.http_client import close_http_clients, init_http_clients
+from app.jobs.scheduler import shutdown_scheduler, start_scheduler
+from app.services.audit_writer import start_audit_writer, stop_audit_writer
+from app.services.email_outbox import start_email_outbox, stop_email_outbox
+from app.services.snop.batch_forecast import shutdown_forecast_pool
+from app.services.snop.demand_history import register_demand_fact_listeners
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    init_http_clients()
+    register_demand_fact_listeners()
+    start_email_outbox()
+    start_audit_writer()
+    start_scheduler(role="worker")
+    logger.info("Background job worker running")
+
+    await stop.wait()
+
+    await shutdown_scheduler()
+    shutdown_forecast_pool()
+    await stop_email_outbox()
+    await stop_audit_writer()
+    await close_http_clients()
+    logger.info("Background job worker stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
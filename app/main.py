@@ -2,14 +2,22 @@ from contextlib import asynccontextmanager
 import traceback
 import logging
 
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.api.v1.router import api_router
+from app.api.deps import require_role_level
 from app.database import init_db, async_session_factory
+from app.models.role import RoleLevel
+from app.core.http_client import init_http_clients, close_http_clients, get_http_metrics
+from app.core.metrics import MetricsMiddleware, metrics, pool_metrics
 from app.jobs.scheduler import start_scheduler, shutdown_scheduler
+from app.services.snop.batch_forecast import shutdown_forecast_pool
+from app.services.snop.demand_history import register_demand_fact_listeners
+from app.services.audit_writer import start_audit_writer, stop_audit_writer
+from app.services.email_outbox import start_email_outbox, stop_email_outbox
 
 logger = logging.getLogger(__name__)
 
@@ -203,12 +211,23 @@ async def lifespan(app: FastAPI):
     await auto_seed_admin()
     # Auto-link vendors to supplier codes
     await auto_link_vendors_to_supplier_codes()
-    # Start background job scheduler
+    # Pooled clients for outbound integrations (GST portals, marketplaces, couriers)
+    init_http_clients()
+    # Keep daily demand facts in step with order changes
+    register_demand_fact_listeners()
+    # Background delivery of queued transactional email
+    start_email_outbox()
+    # Batched audit log inserts after commit
+    start_audit_writer()
+    # Start background job scheduler (leader election; see SCHEDULER_MODE)
     start_scheduler()
-    print("Background scheduler started")
     yield
     # Shutdown
-    shutdown_scheduler()
+    await shutdown_scheduler()
+    shutdown_forecast_pool()
+    await stop_email_outbox()
+    await stop_audit_writer()
+    await close_http_clients()
     print("Shutting down...")
 
 
@@ -330,6 +349,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency / SQL query metrics (served on /metrics)
+app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router)
 
@@ -398,6 +420,33 @@ async def health_check():
     return health_status
 
 
+@app.get(
+    "/health/integrations",
+    tags=["Health"],
+    dependencies=[Depends(require_role_level(RoleLevel.SUPER_ADMIN))],
+)
+async def integration_health():
+    """
+    Outbound integration metrics: requests, errors, retries and latency per integration.
+
+    Super admins only, like the other diagnostics endpoints (/system, /jobs).
+    """
+    from datetime import datetime, timezone
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "integrations": get_http_metrics(),
+    }
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Per-route request latency, SQL query and connection pool metrics in Prometheus text format."""
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        return PlainTextResponse("Unauthorized", status_code=401)
+    return PlainTextResponse(metrics.render() + pool_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint."""
@@ -1,6 +1,10 @@
 """
 Region-based filtering middleware and utilities.
 Provides attribute-based access control (ABAC) based on user's assigned region.
+
+A region's subtree is resolved from the region_closure table (one indexed
+lookup), and filter_by_region() semi-joins against it instead of binding a
+large IN list.
 """
 
 from typing import Optional, List, Set
@@ -10,7 +14,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
-from app.models.region import Region
+from app.models.region import Region, RegionClosure
 from app.models.role import RoleLevel
 from app.core.permissions import get_level_value
 
@@ -32,6 +36,7 @@ class RegionFilter:
         self.user = user
         self.db = db
         self._allowed_region_ids: Optional[Set[uuid.UUID]] = None
+        self._closure_ready = False
 
     @property
     def has_region(self) -> bool:
@@ -80,26 +85,30 @@ class RegionFilter:
             self._allowed_region_ids = set()
             return self._allowed_region_ids
 
-        # Get user's region and all descendants
-        allowed_ids = {self.user_region_id}
-
-        # Recursively get all child regions
-        async def get_descendants(parent_id: uuid.UUID) -> Set[uuid.UUID]:
-            stmt = select(Region.id).where(Region.parent_id == parent_id)
-            result = await self.db.execute(stmt)
-            child_ids = {row[0] for row in result.all()}
-
-            descendants = child_ids.copy()
-            for child_id in child_ids:
-                descendants.update(await get_descendants(child_id))
+        result = await self.db.execute(
+            select(RegionClosure.descendant_id).where(RegionClosure.ancestor_id == self.user_region_id)
+        )
+        allowed_ids = {row[0] for row in result.all()}
+        self._closure_ready = bool(allowed_ids)
 
-            return descendants
-
-        allowed_ids.update(await get_descendants(self.user_region_id))
+        if not allowed_ids:
+            # Closure not built for this region (e.g. tables created without the migration)
+            allowed_ids = await self._get_subtree_ids()
 
         self._allowed_region_ids = allowed_ids
         return self._allowed_region_ids
 
+    async def _get_subtree_ids(self) -> Set[uuid.UUID]:
+        """User's region and its descendants from the regions table (one recursive query)."""
+        tree = (
+            select(Region.id)
+            .where(Region.id == self.user_region_id)
+            .cte("region_tree", recursive=True)
+        )
+        tree = tree.union(select(Region.id).where(Region.parent_id == tree.c.id))
+        result = await self.db.execute(select(tree.c.id))
+        return {row[0] for row in result.all()}
+
     async def filter_by_region(
         self,
         query,
@@ -126,13 +135,22 @@ class RegionFilter:
             # No regions allowed - return query that matches nothing
             return query.where(False)
 
+        if self._closure_ready:
+            # Semi-join against the closure rather than binding every id
+            allowed = (
+                select(RegionClosure.descendant_id)
+                .where(RegionClosure.ancestor_id == self.user_region_id)
+            )
+        else:
+            allowed = allowed_ids
+
         if allow_null:
             return query.where(
-                (region_column.in_(allowed_ids)) |
+                (region_column.in_(allowed)) |
                 (region_column.is_(None))
             )
         else:
-            return query.where(region_column.in_(allowed_ids))
+            return query.where(region_column.in_(allowed))
 
     async def can_access_region(self, region_id: uuid.UUID) -> bool:
         """
@@ -169,26 +187,29 @@ class RegionFilter:
         if not user_region:
             return []
 
-        async def build_tree(region: Region) -> dict:
-            # Get children
-            stmt = (
-                select(Region)
-                .where(Region.parent_id == region.id)
-                .where(Region.is_active == True)
-                .order_by(Region.name)
-            )
-            result = await self.db.execute(stmt)
-            children = result.scalars().all()
-
+        # Whole subtree in one query, then assemble in memory
+        subtree_ids = await self.get_allowed_region_ids()
+        result = await self.db.execute(
+            select(Region)
+            .where(Region.id.in_(subtree_ids))
+            .where(Region.id != user_region.id)
+            .where(Region.is_active == True)
+            .order_by(Region.name)
+        )
+        children_by_parent = {}
+        for region in result.scalars().all():
+            children_by_parent.setdefault(region.parent_id, []).append(region)
+
+        def build_tree(region: Region) -> dict:
             return {
                 "id": str(region.id),
                 "name": region.name,
                 "code": region.code,
                 "type": region.type,
-                "children": [await build_tree(child) for child in children]
+                "children": [build_tree(child) for child in children_by_parent.get(region.id, [])]
             }
 
-        return [await build_tree(user_region)]
+        return [build_tree(user_region)]
 
 
 async def get_region_filter(user: User, db: AsyncSession) -> RegionFilter:
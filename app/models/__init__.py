@@ -2,7 +2,7 @@ from app.models.user import User, UserRole
 from app.models.role import Role, RoleLevel
 from app.models.permission import Permission, RolePermission
 from app.models.module import Module
-from app.models.region import Region, RegionType
+from app.models.region import Region, RegionClosure, RegionType
 from app.models.audit_log import AuditLog
 from app.models.category import Category
 from app.models.brand import Brand
@@ -105,6 +105,8 @@ from app.models.wms import (
     WarehouseZone,
     WarehouseBin,
     PutAwayRule,
+    PutAwayTask,
+    PutAwayTaskStatus,
     ZoneType,
     BinType,
 )
@@ -113,6 +115,11 @@ from app.models.picklist import (
     PicklistItem,
     PicklistStatus,
     PicklistType,
+    PickRouting,
+    PickWave,
+    PickWaveAllocation,
+    WaveStatus,
+    WaveAllocationStatus,
 )
 from app.models.manifest import (
     Manifest,
@@ -381,6 +388,7 @@ from app.models.franchisee import (
 from app.models.serialization import (
     SerialSequence,
     POSerial,
+    POSerialRange,
     ModelCodeReference,
     SupplierCode,
     SerialStatus,
@@ -448,6 +456,8 @@ from app.models.snop import (
     ExternalFactor,
     InventoryOptimization,
     SNOPMeeting,
+    DailyDemandFact,
+    DemandForecastSnapshot,
     ForecastGranularity,
     ForecastLevel,
     ForecastStatus,
@@ -508,6 +518,12 @@ from app.models.cms import (
 )
 # CJDQuick OMS Sync Log
 from app.models.cjdquick_sync_log import CJDQuickSyncLog
+# Email Outbox
+from app.models.email_outbox import EmailOutboxMessage
+# Background Job Runs
+from app.models.job_run import JobRun
+# Inventory Ledger
+from app.models.inventory_ledger import InventoryLedgerEntry
 # Fulfillment Partners (multi-3PL)
 from app.models.fulfillment_partner import FulfillmentPartner
 # Batch Management (SAP MSC1N)
@@ -541,6 +557,7 @@ __all__ = [
     "RolePermission",
     "Module",
     "Region",
+    "RegionClosure",
     "RegionType",
     "AuditLog",
     # Products
@@ -626,6 +643,8 @@ __all__ = [
     "WarehouseZone",
     "WarehouseBin",
     "PutAwayRule",
+    "PutAwayTask",
+    "PutAwayTaskStatus",
     "ZoneType",
     "BinType",
     # OMS/WMS - Picklist
@@ -633,6 +652,11 @@ __all__ = [
     "PicklistItem",
     "PicklistStatus",
     "PicklistType",
+    "PickRouting",
+    "PickWave",
+    "PickWaveAllocation",
+    "WaveStatus",
+    "WaveAllocationStatus",
     # OMS/WMS - Manifest
     "Manifest",
     "ManifestItem",
@@ -837,6 +861,7 @@ __all__ = [
     # Serialization (Barcode Generation)
     "SerialSequence",
     "POSerial",
+    "POSerialRange",
     "ModelCodeReference",
     "SupplierCode",
     "SerialStatus",
@@ -896,6 +921,8 @@ __all__ = [
     "ExternalFactor",
     "InventoryOptimization",
     "SNOPMeeting",
+    "DailyDemandFact",
+    "DemandForecastSnapshot",
     "ForecastGranularity",
     "ForecastLevel",
     "ForecastStatus",
@@ -938,6 +965,12 @@ __all__ = [
     "CMSAnnouncementType",
     # CJDQuick OMS Sync Log
     "CJDQuickSyncLog",
+    # Email Outbox
+    "EmailOutboxMessage",
+    # Background Job Runs
+    "JobRun",
+    # Inventory Ledger
+    "InventoryLedgerEntry",
     # Fulfillment Partners (multi-3PL)
     "FulfillmentPartner",
     # Community Sales Channel (Meesho-style)
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Optional, Any
 
-from sqlalchemy import String, DateTime, ForeignKey, Text
+from sqlalchemy import DDL, String, DateTime, ForeignKey, Index, Text, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 
@@ -16,8 +16,17 @@ class AuditLog(Base):
     """
     Audit log model for tracking all access control changes.
     Records: role assignments, permission changes, user modifications, etc.
+
+    Range-partitioned by month on created_at (PostgreSQL), so date-range
+    queries only touch the matching partitions. The primary key therefore
+    includes created_at. Rows are written in batches by AuditWriter.
     """
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_entity", "entity_type", "entity_id", "created_at"),
+        Index("ix_audit_logs_user_created", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -57,9 +66,10 @@ class AuditLog(Base):
     ip_address: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     user_agent: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
 
-    # Timestamp
+    # Timestamp (partition key)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         default=lambda: datetime.now(timezone.utc),
         nullable=False,
         index=True
@@ -70,3 +80,14 @@ class AuditLog(Base):
 
     def __repr__(self) -> str:
         return f"<AuditLog(action='{self.action}', entity='{self.entity_type}', id='{self.entity_id}')>"
+
+
+# A partitioned table accepts no rows until it has a partition; monthly
+# partitions are added by ensure_audit_log_partitions()
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT").execute_if(
+        dialect="postgresql"
+    ),
+)
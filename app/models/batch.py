@@ -4,7 +4,7 @@ from datetime import datetime, date, timezone
 from enum import Enum
 from typing import TYPE_CHECKING, Optional, List
 
-from sqlalchemy import String, DateTime, Date, ForeignKey, Integer, Text, Numeric, UniqueConstraint
+from sqlalchemy import String, DateTime, Date, ForeignKey, Integer, Text, Numeric, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -34,6 +34,12 @@ class BatchMaster(Base):
     __tablename__ = "batch_master"
     __table_args__ = (
         UniqueConstraint("batch_number", "product_id", "warehouse_id", name="uq_batch_product_warehouse"),
+        # Batch availability index: pickable batches per warehouse/product in FEFO order
+        Index(
+            "ix_batch_master_allocation",
+            "warehouse_id", "product_id", "expiry_date", "manufacturing_date",
+            postgresql_where=text("batch_status = 'UNRESTRICTED' AND quantity_available > 0"),
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -10,7 +10,7 @@ from typing import TYPE_CHECKING, Optional, List
 from decimal import Decimal
 
 from sqlalchemy import String, Boolean, DateTime, ForeignKey, Integer, Text, Numeric, Float
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -336,6 +336,11 @@ class ChannelInventory(Base):
             "channel_id", "warehouse_id", "product_id", "variant_id",
             name="uq_channel_inventory"
         ),
+        # Upsert target for rows without a variant (NULLs never conflict on uq_channel_inventory)
+        Index(
+            "uq_channel_inventory_no_variant", "channel_id", "warehouse_id", "product_id", unique=True,
+            postgresql_where=text("variant_id IS NULL"), sqlite_where=text("variant_id IS NULL"),
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
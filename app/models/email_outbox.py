@@ -0,0 +1,80 @@
+"""
+Email Outbox Model.
+
+Transactional emails are rendered on the request path and queued here;
+the email outbox worker delivers them over a persistent SMTP session,
+retrying transient failures with backoff.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import String, DateTime, Integer, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+from app.database import Base
+
+
+class EmailOutboxMessage(Base):
+    """A queued outbound email and its delivery state."""
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_email_outbox_created", "created_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+
+    email_type: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False,
+        default="GENERIC",
+        comment="PASSWORD_RESET, ORDER_CONFIRMATION, ORDER_SHIPPED, DEALER_WELCOME, INVOICE, PURCHASE_ORDER, GENERIC",
+    )
+
+    # Rendered message
+    from_email: Mapped[str] = mapped_column(String(255), nullable=False)
+    from_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    to_email: Mapped[str] = mapped_column(String(255), nullable=False)
+    subject: Mapped[str] = mapped_column(String(500), nullable=False)
+    html_content: Mapped[str] = mapped_column(Text, nullable=False)
+    text_content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    attachments: Mapped[Optional[list]] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="[{filename, mime_type, data (base64)}]",
+    )
+
+    # Delivery state
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default="PENDING",
+        comment="PENDING, SENDING, SENT, FAILED",
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="When a worker picked the message up (stale claims are retried)",
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
@@ -2,7 +2,7 @@
 from enum import Enum
 from datetime import datetime, date, timezone
 from sqlalchemy import Column, String, Text, Boolean, ForeignKey, Integer, DateTime, Date, Float, Numeric
-from sqlalchemy import UniqueConstraint, CheckConstraint
+from sqlalchemy import UniqueConstraint, CheckConstraint, Index, Sequence, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -125,6 +125,11 @@ class InventorySummary(Base, TimestampMixin):
     __tablename__ = "inventory_summary"
     __table_args__ = (
         UniqueConstraint("warehouse_id", "product_id", "variant_id", name="uq_inventory_summary"),
+        # NULLs are distinct in uq_inventory_summary; this is the upsert target for rows without a variant
+        Index(
+            "uq_inventory_summary_no_variant", "warehouse_id", "product_id", unique=True,
+            postgresql_where=text("variant_id IS NULL"), sqlite_where=text("variant_id IS NULL"),
+        ),
     )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -186,6 +191,10 @@ class StockMovementType(str, Enum):
     CYCLE_COUNT = "CYCLE_COUNT"
 
 
+# Source of stock movement numbers (MOV-YYYYMMDD-NNNNNN), see InventoryService
+STOCK_MOVEMENT_NUMBER_SEQ = Sequence("stock_movement_number_seq", metadata=Base.metadata)
+
+
 class StockMovement(Base, TimestampMixin):
     """Stock movement history/ledger."""
 
@@ -0,0 +1,84 @@
+"""
+Inventory Ledger Model.
+
+Append-only record of inventory quantity changes. Services append entries
+instead of updating InventorySummary / ChannelInventory rows in place; the
+inventory ledger fold job adds pending entries to the summaries in batches
+(see app.services.inventory_ledger).
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, Float, Index, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class InventoryLedgerEntry(Base):
+    """One inventory delta for a (warehouse, product, variant[, channel]) cell."""
+
+    __tablename__ = "inventory_ledger"
+    __table_args__ = (
+        # Fold job scan: pending entries in id order
+        Index(
+            "ix_inventory_ledger_pending", "id",
+            postgresql_where=text("applied_at IS NULL"), sqlite_where=text("applied_at IS NULL"),
+        ),
+        # Stock-as-of queries per cell
+        Index("ix_inventory_ledger_cell_time", "warehouse_id", "product_id", "occurred_at"),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+
+    occurred_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+    )
+
+    # Cell
+    warehouse_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    variant_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    channel_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="Set for channel_inventory entries, NULL for inventory_summary entries",
+    )
+
+    # Deltas (inventory_summary uses all but buffer; channel_inventory uses allocated / reserved)
+    total_delta: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    available_delta: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    reserved_delta: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    allocated_delta: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    damaged_delta: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    in_transit_delta: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    value_delta: Mapped[float] = mapped_column(
+        Float,
+        nullable=False,
+        default=0,
+        comment="Stock value received (quantity x unit cost), feeds the weighted average cost",
+    )
+
+    # Origin
+    source: Mapped[str] = mapped_column(
+        String(50),
+        nullable=False,
+        comment="grn, manual_receipt, order_allocation, transfer, channel_allocation, channel_order, ...",
+    )
+    reference_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    reference_number: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+
+    # Set by the fold job once the delta is in the summary row
+    applied_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<InventoryLedgerEntry {self.id} {self.source} {self.product_id}>"
@@ -0,0 +1,62 @@
+"""
+Background Job Run Model.
+
+One row per scheduled job execution (or skipped execution), written by the
+job runner so run history survives restarts and is visible from every
+process, not only the one holding the scheduler.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import String, DateTime, Integer, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+from app.database import Base
+
+
+class JobRun(Base):
+    """Run history of background scheduler jobs."""
+
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        Index("ix_job_runs_job_started", "job_id", "started_at"),
+        Index("ix_job_runs_started", "started_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+
+    job_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        default="RUNNING",
+        comment="RUNNING, SUCCESS, FAILED, SKIPPED",
+    )
+    host: Mapped[Optional[str]] = mapped_column(
+        String(255),
+        nullable=True,
+        comment="hostname:pid of the process that ran the job",
+    )
+
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    duration_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    rows_processed: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    result: Mapped[Optional[dict]] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="Summary returned by the job",
+    )
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -15,6 +15,7 @@ if TYPE_CHECKING:
     from app.models.order import Order, OrderItem
     from app.models.product import Product, ProductVariant
     from app.models.user import User
+    from app.models.batch import BatchMaster
 
 
 class PicklistStatus(str, Enum):
@@ -34,6 +35,119 @@ class PicklistType(str, Enum):
     WAVE = "WAVE"                   # Wave picking (by zone/product)
 
 
+class PickRouting(str, Enum):
+    """Pick path routing heuristic."""
+    S_SHAPE = "S_SHAPE"             # Traverse every aisle with a pick end to end
+    LARGEST_GAP = "LARGEST_GAP"     # Enter aisles from both ends, skip the largest gap
+    AUTO = "AUTO"                   # Shorter of S_SHAPE and LARGEST_GAP
+
+
+class WaveStatus(str, Enum):
+    """Pick wave status enumeration."""
+    PLANNED = "PLANNED"           # Orders grouped, picklists not yet created
+    RELEASED = "RELEASED"         # Picklists created for the wave
+    COMPLETED = "COMPLETED"       # All wave picklists completed
+    CANCELLED = "CANCELLED"       # Wave cancelled
+
+
+class WaveAllocationStatus(str, Enum):
+    """Pick wave batch allocation status enumeration."""
+    RESERVED = "RESERVED"         # Held on the batch until the picklist is settled
+    ISSUED = "ISSUED"             # Picked quantity issued from the batch
+    RELEASED = "RELEASED"         # Returned to the batch's available quantity
+
+
+class PickWave(Base):
+    """
+    Pick wave model.
+    A batch of orders released to the floor together: same warehouse and
+    carrier cutoff, sized to picker capacity.
+    """
+    __tablename__ = "pick_waves"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+
+    wave_number: Mapped[str] = mapped_column(
+        String(30),
+        unique=True,
+        nullable=False,
+        index=True,
+        comment="Unique wave number e.g., WV-20240101-0001"
+    )
+
+    warehouse_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("warehouses.id", ondelete="RESTRICT"),
+        nullable=False,
+        index=True
+    )
+
+    status: Mapped[str] = mapped_column(
+        String(50),
+        default="PLANNED",
+        nullable=False,
+        index=True,
+        comment="PLANNED, RELEASED, COMPLETED, CANCELLED"
+    )
+
+    # Planning inputs
+    carrier: Mapped[Optional[str]] = mapped_column(
+        String(100),
+        nullable=True,
+        comment="Courier the wave's orders ship with"
+    )
+    cutoff_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Carrier pickup cutoff the wave must be packed by"
+    )
+    zone_codes: Mapped[Optional[str]] = mapped_column(
+        Text,
+        nullable=True,
+        comment="Comma-separated zones the wave picks from"
+    )
+
+    # Counts
+    total_orders: Mapped[int] = mapped_column(Integer, default=0)
+    total_lines: Mapped[int] = mapped_column(Integer, default=0)
+    total_quantity: Mapped[int] = mapped_column(Integer, default=0)
+    picker_count: Mapped[int] = mapped_column(
+        Integer,
+        default=1,
+        comment="Pickers needed at the configured lines per picker"
+    )
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True
+    )
+    released_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    cancelled_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    warehouse: Mapped["Warehouse"] = relationship("Warehouse")
+    picklists: Mapped[List["Picklist"]] = relationship(
+        "Picklist",
+        back_populates="wave"
+    )
+    allocations: Mapped[List["PickWaveAllocation"]] = relationship(
+        "PickWaveAllocation",
+        back_populates="wave",
+        cascade="all, delete-orphan"
+    )
+
+    def __repr__(self) -> str:
+        return f"<PickWave(number='{self.wave_number}', status='{self.status}')>"
+
+
 class Picklist(Base):
     """
     Picklist model for warehouse picking operations.
@@ -64,6 +178,14 @@ class Picklist(Base):
         index=True
     )
 
+    # Wave (set when released by wave planning)
+    wave_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("pick_waves.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True
+    )
+
     # Status
     status: Mapped[str] = mapped_column(
         String(50),
@@ -139,6 +261,10 @@ class Picklist(Base):
 
     # Relationships
     warehouse: Mapped["Warehouse"] = relationship("Warehouse")
+    wave: Mapped[Optional["PickWave"]] = relationship(
+        "PickWave",
+        back_populates="picklists"
+    )
     assigned_user: Mapped[Optional["User"]] = relationship(
         "User",
         foreign_keys=[assigned_to]
@@ -316,3 +442,71 @@ class PicklistItem(Base):
 
     def __repr__(self) -> str:
         return f"<PicklistItem(sku='{self.sku}', qty={self.quantity_required}, picked={self.quantity_picked})>"
+
+
+class PickWaveAllocation(Base):
+    """
+    Pick wave batch allocation model.
+    Quantity of one picklist item reserved FEFO from one batch when the
+    wave was released; issued when the picklist is picked, released back
+    to the batch when it is cancelled.
+    """
+    __tablename__ = "pick_wave_allocations"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+
+    wave_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("pick_waves.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    picklist_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("picklists.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    picklist_item_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("picklist_items.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    batch_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("batch_master.id", ondelete="RESTRICT"),
+        nullable=False,
+        index=True
+    )
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+
+    # Quantities
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False, comment="Quantity reserved")
+    quantity_issued: Mapped[int] = mapped_column(Integer, default=0)
+
+    status: Mapped[str] = mapped_column(
+        String(20),
+        default="RESERVED",
+        nullable=False,
+        index=True,
+        comment="RESERVED, ISSUED, RELEASED"
+    )
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+    settled_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    wave: Mapped["PickWave"] = relationship("PickWave", back_populates="allocations")
+    batch: Mapped["BatchMaster"] = relationship("BatchMaster")
+
+    def __repr__(self) -> str:
+        return f"<PickWaveAllocation(batch_id={self.batch_id}, qty={self.quantity}, status='{self.status}')>"
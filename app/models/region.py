@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import TYPE_CHECKING, Optional, List
 
-from sqlalchemy import String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import String, Boolean, DateTime, ForeignKey, Integer, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -90,3 +90,30 @@ class Region(Base):
 
     def __repr__(self) -> str:
         return f"<Region(name='{self.name}', type='{self.type}', code='{self.code}')>"
+
+
+class RegionClosure(Base):
+    """
+    Transitive closure of the region hierarchy.
+
+    One row per (ancestor, descendant) pair, including each region with
+    itself at depth 0, so "a region and everything below it" is a single
+    indexed lookup on ancestor_id. Rebuilt by a statement-level trigger on
+    regions (see the region_closure migration).
+    """
+    __tablename__ = "region_closure"
+    __table_args__ = (
+        Index("ix_region_closure_descendant", "descendant_id"),
+    )
+
+    ancestor_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("regions.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    descendant_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("regions.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    depth: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -14,7 +14,7 @@ import enum
 import uuid
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Text, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.database import Base
@@ -156,10 +156,82 @@ class ProductSerialSequence(Base):
         return f"<ProductSerialSequence {self.model_code}: {self.last_serial}/{self.max_serial}>"
 
 
+class POSerialRange(Base):
+    """
+    A contiguous range of serials generated for one PO item.
+
+    Serials are generated as continuous per-model ranges, so a range row
+    stands for every unit start_serial..end_serial with the range's status.
+    Units whose state diverges (scanned in a GRN, assigned, sold) get their
+    own po_serials row pointing back here via range_id; that row wins over
+    the range.
+    """
+    __tablename__ = "po_serial_ranges"
+
+    id: Mapped[str] = mapped_column(
+        String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4())
+    )
+
+    # PO linkage (VARCHAR, like po_serials)
+    po_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("purchase_orders.id"),
+        nullable=False,
+        index=True
+    )
+    po_item_id: Mapped[Optional[str]] = mapped_column(
+        String(36),
+        ForeignKey("purchase_order_items.id"),
+        nullable=True
+    )
+    product_id: Mapped[Optional[str]] = mapped_column(
+        String(36),
+        ForeignKey("products.id"),
+        nullable=True
+    )
+    product_sku: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    model_code: Mapped[str] = mapped_column(String(10), nullable=False)
+    item_type: Mapped[str] = mapped_column(String(10), default="FG", comment="FG, SP, CO")
+
+    # Barcode components shared by every unit in the range
+    brand_prefix: Mapped[str] = mapped_column(String(2), default="AP")
+    supplier_code: Mapped[str] = mapped_column(String(2), nullable=False)
+    year_code: Mapped[str] = mapped_column(String(2), nullable=False)
+    month_code: Mapped[str] = mapped_column(String(1), nullable=False)
+
+    # Range bounds (inclusive)
+    start_serial: Mapped[int] = mapped_column(Integer, nullable=False)
+    end_serial: Mapped[int] = mapped_column(Integer, nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    barcode_prefix: Mapped[str] = mapped_column(String(12), nullable=False, comment="Barcode without the 8-digit serial")
+    start_barcode: Mapped[str] = mapped_column(String(20), nullable=False)
+    end_barcode: Mapped[str] = mapped_column(String(20), nullable=False)
+
+    # Status of the units that have no exception row
+    status: Mapped[str] = mapped_column(String(30), default="GENERATED")
+    notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    # Barcode -> range lookup: the last range with the barcode's prefix starting at or before its serial
+    __table_args__ = (
+        Index("ix_po_serial_ranges_lookup", "barcode_prefix", "start_serial"),
+    )
+
+    def __repr__(self):
+        return f"<POSerialRange {self.start_barcode}..{self.end_barcode} ({self.status})>"
+
+
 class POSerial(Base):
     """
     Individual serial numbers/barcodes generated for Purchase Orders.
     Each row represents one unique barcode that will be applied to one unit.
+
+    Serials generated as ranges (POSerialRange) only get a row here once the
+    unit's state diverges from its range (range_id set).
     """
     __tablename__ = "po_serials"
 
@@ -200,6 +272,14 @@ class POSerial(Base):
     month_code: Mapped[str] = mapped_column(String(1), nullable=False)
     serial_number: Mapped[int] = mapped_column(Integer, nullable=False)
 
+    # Range this unit belongs to (exception row), NULL for per-unit generated serials
+    range_id: Mapped[Optional[str]] = mapped_column(
+        String(36),
+        ForeignKey("po_serial_ranges.id"),
+        nullable=True,
+        index=True
+    )
+
     # Full barcode (computed: APFSZAIEL000001)
     barcode: Mapped[str] = mapped_column(String(20), unique=True, nullable=False, index=True)
 
@@ -711,3 +711,93 @@ class SNOPMeeting(Base):
 
     # Relationships
     created_by: Mapped[Optional["User"]] = relationship("User")
+
+
+class DailyDemandFact(Base):
+    """
+    Precomputed daily demand (product x warehouse x channel x region x dealer x day),
+    split by order status so each consumer can apply its own status filter.
+
+    Maintained from orders by DemandHistoryService (incremental refresh on order
+    changes + nightly backfill); forecasting and dashboards read series from
+    here instead of aggregating orders/order_items.
+
+    Dimension columns are NOT NULL so they can form the upsert key: a missing
+    warehouse/region/dealer is stored as the nil UUID and a missing channel as ''.
+
+    order_count / order_value count each order once, on the row of its first
+    line, so they are exact when summed over order-level dimensions (day,
+    warehouse, channel, region, dealer).
+    """
+    __tablename__ = "daily_demand_facts"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+
+    demand_date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    # Dimensions (FK-less; nil UUID = not set)
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    warehouse_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    channel: Mapped[str] = mapped_column(String(50), nullable=False, default="")
+    region_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    dealer_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    order_status: Mapped[str] = mapped_column(String(50), nullable=False)
+
+    # Line-level measures
+    quantity: Mapped[Decimal] = mapped_column(Numeric(15, 2), default=Decimal("0"))
+    revenue: Mapped[Decimal] = mapped_column(Numeric(15, 2), default=Decimal("0"))
+    order_lines: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Order-level measures (attributed to the order's first line)
+    order_count: Mapped[int] = mapped_column(Integer, default=0)
+    order_value: Mapped[Decimal] = mapped_column(Numeric(15, 2), default=Decimal("0"))
+
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint(
+            "demand_date", "product_id", "warehouse_id", "channel", "region_id", "dealer_id", "order_status",
+            name="uq_daily_demand_facts_cell"
+        ),
+        Index("ix_daily_demand_facts_product_date", "product_id", "demand_date"),
+        Index("ix_daily_demand_facts_date", "demand_date"),
+    )
+
+
+class DemandForecastSnapshot(Base):
+    """
+    Stored product demand forecast (AI demand forecasting dashboard).
+
+    Computed once per product per day by a scheduled job and recomputed on
+    read only when the product's demand facts changed, i.e. when
+    demand_watermark no longer matches the facts in the lookback window.
+    Holds demand-only results; stock-dependent figures are derived on read.
+    """
+    __tablename__ = "demand_forecast_snapshots"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    lookback_days: Mapped[int] = mapped_column(Integer, nullable=False)
+    horizon_days: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # Inputs
+    forecast_date: Mapped[date] = mapped_column(Date, nullable=False, comment="Last day of history used")
+    demand_watermark: Mapped[str] = mapped_column(String(100), nullable=False, default="")
+
+    # Output of DemandForecastingService._forecast_from_history()
+    forecast: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint("product_id", "lookback_days", "horizon_days", name="uq_demand_forecast_snapshots_product"),
+    )
@@ -5,7 +5,7 @@ from enum import Enum
 from typing import TYPE_CHECKING, Optional, List
 
 from sqlalchemy import String, Boolean, DateTime, ForeignKey, Integer, Text, Float
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -15,6 +15,7 @@ if TYPE_CHECKING:
     from app.models.warehouse import Warehouse
     from app.models.category import Category
     from app.models.inventory import StockItem
+    from app.models.purchase import GoodsReceiptNote
 
 
 class ZoneType(str, Enum):
@@ -41,6 +42,13 @@ class BinType(str, Enum):
     BULK = "BULK"                # Bulk storage
 
 
+class PutAwayTaskStatus(str, Enum):
+    """PutAway task status enumeration."""
+    PLANNED = "PLANNED"          # Bin assigned, capacity held, not yet moved
+    COMPLETED = "COMPLETED"      # Units moved into the bin
+    CANCELLED = "CANCELLED"      # Superseded by a re-plan
+
+
 class WarehouseZone(Base):
     """
     Warehouse Zone model.
@@ -387,3 +395,88 @@ class PutAwayRule(Base):
 
     def __repr__(self) -> str:
         return f"<PutAwayRule(name='{self.rule_name}', priority={self.priority})>"
+
+
+class PutAwayTask(Base):
+    """
+    PutAway Task model.
+    One bin assignment from a GRN putaway plan. Planned tasks hold bin
+    capacity until they are executed or the GRN is re-planned.
+    """
+    __tablename__ = "putaway_tasks"
+    __table_args__ = (
+        Index("ix_putaway_tasks_warehouse_status", "warehouse_id", "status"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+
+    warehouse_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("warehouses.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    grn_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("goods_receipt_notes.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    grn_item_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("grn_items.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    product_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("products.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    bin_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("warehouse_bins.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    rule_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("putaway_rules.id", ondelete="SET NULL"),
+        nullable=True,
+        comment="Putaway rule that chose the bin's zone/pattern"
+    )
+
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    weight_kg: Mapped[float] = mapped_column(Float, default=0.0)
+
+    status: Mapped[str] = mapped_column(
+        String(50),
+        default="PLANNED",
+        nullable=False,
+        index=True,
+        comment="PLANNED, COMPLETED, CANCELLED"
+    )
+
+    created_by: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True
+    )
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Relationships
+    grn: Mapped["GoodsReceiptNote"] = relationship("GoodsReceiptNote")
+    bin: Mapped["WarehouseBin"] = relationship("WarehouseBin")
+
+    def __repr__(self) -> str:
+        return f"<PutAwayTask(bin_id='{self.bin_id}', quantity={self.quantity}, status='{self.status}')>"
@@ -163,6 +163,20 @@ class InventorySummaryListResponse(BaseModel):
     pages: int
 
 
+class StockAsOfResponse(BaseModel):
+    """Inventory quantities of one warehouse/product at a point in time (from the inventory ledger)."""
+    warehouse_id: uuid.UUID
+    product_id: uuid.UUID
+    variant_id: Optional[uuid.UUID] = None
+    as_of: datetime
+    total_quantity: int
+    available_quantity: int
+    reserved_quantity: int
+    allocated_quantity: int
+    damaged_quantity: int
+    in_transit_quantity: int
+
+
 class InventoryThresholdUpdate(BaseModel):
     """Update inventory thresholds."""
     reorder_level: Optional[int] = Field(None, ge=0)
@@ -6,7 +6,7 @@ from typing import Optional, List
 from datetime import datetime
 import uuid
 
-from app.models.picklist import PicklistStatus, PicklistType
+from app.models.picklist import PicklistStatus, PicklistType, PickRouting
 
 
 # ==================== PICKLIST ITEM SCHEMAS ====================
@@ -58,6 +58,8 @@ class PicklistGenerateRequest(BaseModel):
     picklist_type: PicklistType = PicklistType.BATCH
     priority: int = Field(5, ge=1, le=10)
     notes: Optional[str] = None
+    routing: PickRouting = PickRouting.AUTO
+    zone_batching: bool = False  # Pick zone by zone (WarehouseZone.sort_order)
 
 
 class PicklistCreate(BaseModel):
@@ -98,6 +100,7 @@ class PicklistResponse(BaseResponseSchema):
     assigned_to: Optional[uuid.UUID] = None
     assigned_at: Optional[datetime] = None
     created_by: Optional[uuid.UUID] = None
+    wave_id: Optional[uuid.UUID] = None
     notes: Optional[str] = None
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
@@ -195,3 +198,61 @@ class WavePicklistResponse(BaseModel):
     picklist: PicklistResponse
     items_by_zone: dict  # zone_code -> List[PicklistItemResponse]
     items_by_product: dict  # sku -> List[PicklistItemResponse]
+
+
+class WavePlanRequest(BaseModel):
+    """Group pending orders into waves; release=True creates the picklists."""
+    warehouse_id: Optional[uuid.UUID] = None  # All warehouses when omitted
+    release: bool = False
+    pickers: Optional[int] = Field(None, ge=1)
+    lines_per_picker: Optional[int] = Field(None, ge=1)
+
+
+class WavePlanResponse(BaseModel):
+    """A planned (or released) wave."""
+    warehouse_id: uuid.UUID
+    carrier: Optional[str] = None
+    cutoff_at: datetime
+    order_ids: List[uuid.UUID]
+    zone_codes: List[str] = []
+    total_orders: int
+    total_lines: int
+    total_quantity: int
+    picker_count: int
+    wave_id: Optional[uuid.UUID] = None
+    wave_number: Optional[str] = None
+    picklist_ids: List[uuid.UUID] = []
+
+
+class WavePlanRunResponse(BaseModel):
+    """Result of a wave planning run."""
+    waves: List[WavePlanResponse]
+    held_order_ids: List[uuid.UUID] = []  # Short of unrestricted batch stock
+
+
+class PickWaveResponse(BaseResponseSchema):
+    """Pick wave response schema."""
+    id: uuid.UUID
+    wave_number: str
+    warehouse_id: uuid.UUID
+    status: str
+    carrier: Optional[str] = None
+    cutoff_at: Optional[datetime] = None
+    zone_codes: Optional[str] = None
+    total_orders: int
+    total_lines: int
+    total_quantity: int
+    picker_count: int
+    created_at: datetime
+    released_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    cancelled_at: Optional[datetime] = None
+
+
+class PickWaveListResponse(BaseModel):
+    """Paginated pick wave list."""
+    items: List[PickWaveResponse]
+    total: int
+    page: int
+    size: int
+    pages: int
@@ -131,6 +131,7 @@ class GenerateSerialsRequest(BaseModel):
     po_id: Union[UUID, str] = Field(..., description="Purchase Order ID")
     supplier_code: str = Field(..., min_length=2, max_length=2, description="2-letter supplier code")
     items: List["GenerateSerialItem"] = Field(..., description="Items to generate serials for")
+    include_barcodes: bool = Field(False, description="Return every generated barcode (large for big POs)")
 
     @field_validator('supplier_code')
     @classmethod
@@ -144,7 +145,7 @@ class GenerateSerialItem(BaseModel):
     product_id: Optional[Union[UUID, str]] = None
     product_sku: Optional[str] = None
     model_code: str = Field(..., description="3-letter model code")
-    quantity: int = Field(..., ge=1, le=10000, description="Number of serials to generate")
+    quantity: int = Field(..., ge=1, le=1000000, description="Number of serials to generate")
     item_type: ItemType = ItemType.FINISHED_GOODS
 
     @field_validator('model_code')
@@ -159,7 +160,7 @@ class GenerateSerialsResponse(BaseResponseSchema):
     supplier_code: str
     total_generated: int
     items: List["GeneratedSerialSummary"]
-    barcodes: List[str]
+    barcodes: List[str] = Field(default_factory=list, description="Only filled when include_barcodes was requested")
 
 
 class GeneratedSerialSummary(BaseModel):
@@ -231,6 +232,7 @@ class BulkScanRequest(BaseModel):
     """Bulk scan multiple barcodes"""
     grn_id: str
     barcodes: List[str]
+    grn_item_id: Optional[str] = None
 
 
 class BulkScanResponse(BaseModel):
@@ -324,6 +324,47 @@ class PutAwayExecuteResponse(BaseModel):
     message: str
 
 
+class PutAwayTaskResponse(BaseModel):
+    """Planned bin assignment for (part of) a GRN line."""
+    id: uuid.UUID
+    grn_item_id: uuid.UUID
+    product_id: uuid.UUID
+    bin_id: uuid.UUID
+    bin_code: str
+    quantity: int
+    weight_kg: float = 0.0
+    rule_id: Optional[uuid.UUID] = None
+    status: str
+
+
+class UnassignedPutAway(BaseModel):
+    """GRN line quantity that found no bin with room."""
+    grn_item_id: uuid.UUID
+    quantity: int
+
+
+class PutAwayPlanResponse(BaseModel):
+    """GRN putaway plan response."""
+    grn_id: uuid.UUID
+    grn_number: str
+    warehouse_id: uuid.UUID
+    tasks: List[PutAwayTaskResponse]
+    unassigned: List[UnassignedPutAway] = []
+    total_planned: int
+    total_unassigned: int
+
+
+class PutAwayPlanExecuteResponse(BaseModel):
+    """GRN putaway plan execution response."""
+    success: bool
+    grn_id: uuid.UUID
+    grn_number: str
+    tasks_completed: int
+    units_moved: int
+    units_pending: int
+    message: str
+
+
 # ==================== INVENTORY MOVE ====================
 
 class InventoryMoveRequest(BaseModel):
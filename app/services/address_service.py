@@ -9,10 +9,10 @@ Provides address lookup functionality for the D2C storefront:
 """
 
 import logging
-import httpx
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
 from app.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -97,7 +97,7 @@ class AddressService:
             if session_token:
                 params["sessiontoken"] = session_token
 
-            async with httpx.AsyncClient() as client:
+            async with http_client("address") as client:
                 response = await client.get(url, params=params, timeout=10.0)
                 data = response.json()
 
@@ -151,7 +151,7 @@ class AddressService:
             if session_token:
                 params["sessiontoken"] = session_token
 
-            async with httpx.AsyncClient() as client:
+            async with http_client("address") as client:
                 response = await client.get(url, params=params, timeout=10.0)
                 data = response.json()
 
@@ -447,7 +447,7 @@ class AddressService:
                 "language": "en",
             }
 
-            async with httpx.AsyncClient() as client:
+            async with http_client("address") as client:
                 response = await client.get(url, params=params, timeout=10.0)
                 data = response.json()
 
@@ -542,7 +542,7 @@ class AddressService:
                 "language": "en",
             }
 
-            async with httpx.AsyncClient() as client:
+            async with http_client("address") as client:
                 response = await client.get(url, params=params, timeout=10.0)
                 data = response.json()
 
@@ -17,12 +17,20 @@ from uuid import UUID
 import math
 from collections import defaultdict
 
-from sqlalchemy import select, func, and_, or_, desc
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product
 from app.models.inventory import InventorySummary
+from app.models.snop import DemandForecastSnapshot
+from app.services.snop.demand_history import DemandHistoryService, BOOKED_STATUSES
+
+# Stored dashboard forecasts (see get_product_forecasts)
+DASHBOARD_HORIZON_DAYS = 7
+DASHBOARD_LOOKBACK_DAYS = 30
+SNAPSHOT_CHUNK_SIZE = 500
 
 
 class DemandForecastingService:
@@ -32,6 +40,7 @@ class DemandForecastingService:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.demand_history = DemandHistoryService(db)
 
     # ==================== Core Forecasting Algorithms ====================
 
@@ -169,50 +178,91 @@ class DemandForecastingService:
         """
         start_date = date.today() - timedelta(days=lookback_days)
 
-        # Get historical sales data
-        query = select(
-            func.date(Order.created_at).label('sale_date'),
-            func.sum(OrderItem.quantity).label('quantity')
-        ).join(
-            OrderItem, Order.id == OrderItem.order_id
-        ).where(
-            and_(
-                OrderItem.product_id == product_id,
-                Order.created_at >= start_date,
-                Order.status.in_([
-                    OrderStatus.DELIVERED,
-                    OrderStatus.SHIPPED,
-                    OrderStatus.CONFIRMED,
-                    OrderStatus.IN_TRANSIT
-                ])
-            )
-        ).group_by(
-            func.date(Order.created_at)
-        ).order_by(
-            func.date(Order.created_at)
+        # Daily sales from the demand history store (missing days are 0)
+        history = await self.demand_history.get_daily_matrix(
+            start_date=start_date,
+            end_date=date.today(),
+            group_by=None,
+            product_ids=[product_id],
+            statuses=BOOKED_STATUSES
         )
+        all_values = history["quantity"].tolist()
+
+        demand = self._forecast_from_history(all_values, days_ahead)
+
+        # Get product info
+        product_query = select(Product).where(Product.id == product_id)
+        product_result = await self.db.execute(product_query)
+        product = product_result.scalar_one_or_none()
 
-        result = await self.db.execute(query)
-        rows = result.all()
-
-        # Build daily sales map
-        daily_sales = {}
-        for row in rows:
-            daily_sales[row.sale_date] = row.quantity or 0
-
-        # Fill in missing days with 0
-        all_values = []
-        current = start_date
-        while current <= date.today():
-            all_values.append(float(daily_sales.get(current, 0)))
-            current += timedelta(days=1)
-
-        # Apply forecasting algorithm
-        fitted, forecasts, confidence = self._triple_exponential_smoothing(
-            all_values,
-            season_length=7,
-            forecast_periods=days_ahead
+        # Get current stock
+        stock_query = select(InventorySummary).where(
+            InventorySummary.product_id == product_id
         )
+        stock_result = await self.db.execute(stock_query)
+        stock = stock_result.scalar_one_or_none()
+        current_stock = stock.available_quantity if stock else 0
+
+        stock_metrics = self._stock_recommendation(demand["historical_avg_daily"], current_stock, days_ahead)
+
+        return {
+            "product_id": str(product_id),
+            "product_name": product.name if product else "Unknown",
+            "sku": product.sku if product else "",
+            "forecast_generated_at": datetime.now().isoformat(),
+            "lookback_days": lookback_days,
+            "forecast_days": days_ahead,
+
+            # Historical metrics
+            "historical_total": demand["historical_total"],
+            "historical_avg_daily": round(demand["historical_avg_daily"], 2),
+
+            # Forecasts
+            "forecasted_total": demand["forecasted_total"],
+            "forecasted_avg_daily": demand["forecasted_avg_daily"],
+            "daily_forecasts": demand["daily_forecasts"],
+
+            # Trend analysis
+            "trend": demand["trend"],
+            "trend_percentage": demand["trend_percentage"],
+
+            # Inventory recommendations
+            **stock_metrics,
+
+            # Confidence
+            "confidence_score": demand["confidence_score"],
+            "model_type": demand["model_type"],
+
+            # Seasonality
+            "seasonality_detected": demand["seasonality_detected"],
+            "peak_days": demand["peak_days"]
+        }
+
+    def _forecast_from_history(
+        self,
+        all_values: List[float],
+        days_ahead: int,
+        base_date: Optional[date] = None
+    ) -> Dict:
+        """
+        Demand-only part of a product forecast (no stock or product lookups).
+
+        `all_values` is the dense daily history ending on base_date (today).
+        """
+        if base_date is None:
+            base_date = date.today()
+
+        # Apply forecasting algorithm (Holt-Winters cannot fit series with zero levels)
+        try:
+            fitted, forecasts, confidence = self._triple_exponential_smoothing(
+                all_values,
+                season_length=7,
+                forecast_periods=days_ahead
+            )
+            model_type = "holt_winters" if len(all_values) >= 14 else "exponential_smoothing"
+        except ZeroDivisionError:
+            fitted, forecasts, confidence = self._simple_forecast(all_values, days_ahead)
+            model_type = "exponential_smoothing"
 
         # Calculate metrics
         total_historical = sum(all_values)
@@ -233,33 +283,10 @@ class DemandForecastingService:
             trend = "insufficient_data"
             trend_pct = 0
 
-        # Get product info
-        product_query = select(Product).where(Product.id == product_id)
-        product_result = await self.db.execute(product_query)
-        product = product_result.scalar_one_or_none()
-
-        # Get current stock
-        stock_query = select(InventorySummary).where(
-            InventorySummary.product_id == product_id
-        )
-        stock_result = await self.db.execute(stock_query)
-        stock = stock_result.scalar_one_or_none()
-        current_stock = stock.available_quantity if stock else 0
-
-        # Calculate days until stockout
-        days_until_stockout = int(current_stock / avg_daily) if avg_daily > 0 else 999
-
-        # Calculate recommended reorder
-        safety_stock_days = 7
-        lead_time_days = 14
-        recommended_qty = max(0, int(
-            (avg_daily * (lead_time_days + safety_stock_days + days_ahead)) - current_stock
-        ))
-
         # Build daily forecasts
         daily_forecasts = []
         for i in range(days_ahead):
-            forecast_date = date.today() + timedelta(days=i+1)
+            forecast_date = base_date + timedelta(days=i+1)
             daily_forecasts.append({
                 "date": forecast_date.isoformat(),
                 "predicted_qty": round(forecasts[i], 1),
@@ -278,39 +305,41 @@ class DemandForecastingService:
             confidence_score = 0.40
 
         return {
-            "product_id": str(product_id),
-            "product_name": product.name if product else "Unknown",
-            "sku": product.sku if product else "",
-            "forecast_generated_at": datetime.now().isoformat(),
-            "lookback_days": lookback_days,
-            "forecast_days": days_ahead,
-
-            # Historical metrics
             "historical_total": int(total_historical),
-            "historical_avg_daily": round(avg_daily, 2),
-
-            # Forecasts
+            "historical_avg_daily": avg_daily,
             "forecasted_total": round(total_forecast, 1),
             "forecasted_avg_daily": round(total_forecast / days_ahead, 2),
             "daily_forecasts": daily_forecasts,
-
-            # Trend analysis
             "trend": trend,
             "trend_percentage": round(trend_pct, 1),
+            "confidence_score": confidence_score,
+            "model_type": model_type,
+            "seasonality_detected": len(all_values) >= 14,
+            "peak_days": self._get_peak_days(all_values) if len(all_values) >= 7 else []
+        }
 
-            # Inventory recommendations
+    def _stock_recommendation(
+        self,
+        avg_daily: float,
+        current_stock: float,
+        days_ahead: int
+    ) -> Dict:
+        """Days of cover, stockout risk and reorder quantity for the current stock."""
+        # Calculate days until stockout
+        days_until_stockout = int(current_stock / avg_daily) if avg_daily > 0 else 999
+
+        # Calculate recommended reorder
+        safety_stock_days = 7
+        lead_time_days = 14
+        recommended_qty = max(0, int(
+            (avg_daily * (lead_time_days + safety_stock_days + days_ahead)) - current_stock
+        ))
+
+        return {
             "current_stock": current_stock,
             "days_until_stockout": days_until_stockout,
             "recommended_reorder_qty": recommended_qty,
             "stockout_risk": "HIGH" if days_until_stockout < 14 else ("MEDIUM" if days_until_stockout < 30 else "LOW"),
-
-            # Confidence
-            "confidence_score": confidence_score,
-            "model_type": "holt_winters" if len(all_values) >= 14 else "exponential_smoothing",
-
-            # Seasonality
-            "seasonality_detected": len(all_values) >= 14,
-            "peak_days": self._get_peak_days(all_values) if len(all_values) >= 7 else []
         }
 
     def _get_peak_days(self, data: List[float]) -> List[str]:
@@ -345,44 +374,16 @@ class DemandForecastingService:
         """
         start_date = date.today() - timedelta(days=lookback_days)
 
-        query = select(
-            func.date(Order.created_at).label('sale_date'),
-            func.sum(OrderItem.quantity).label('quantity'),
-            func.sum(OrderItem.total_price).label('revenue')
-        ).join(
-            OrderItem, Order.id == OrderItem.order_id
-        ).join(
-            Product, OrderItem.product_id == Product.id
-        ).where(
-            and_(
-                Product.category_id == category_id,
-                Order.created_at >= start_date,
-                Order.status != OrderStatus.CANCELLED
-            )
-        ).group_by(
-            func.date(Order.created_at)
-        ).order_by(
-            func.date(Order.created_at)
+        history = await self.demand_history.get_daily_matrix(
+            start_date=start_date,
+            end_date=date.today(),
+            group_by=None,
+            measures=("quantity", "revenue"),
+            category_id=category_id,
+            exclude_statuses=(OrderStatus.CANCELLED,)
         )
-
-        result = await self.db.execute(query)
-        rows = result.all()
-
-        # Build daily data
-        daily_qty = {}
-        daily_revenue = {}
-        for row in rows:
-            daily_qty[row.sale_date] = row.quantity or 0
-            daily_revenue[row.sale_date] = float(row.revenue or 0)
-
-        # Fill missing days
-        qty_values = []
-        revenue_values = []
-        current = start_date
-        while current <= date.today():
-            qty_values.append(float(daily_qty.get(current, 0)))
-            revenue_values.append(daily_revenue.get(current, 0))
-            current += timedelta(days=1)
+        qty_values = history["quantity"].tolist()
+        revenue_values = history["revenue"].tolist()
 
         # Forecast both quantity and revenue
         _, qty_forecasts, qty_conf = self._triple_exponential_smoothing(
@@ -423,83 +424,72 @@ class DemandForecastingService:
     async def get_demand_dashboard(self) -> Dict:
         """
         Get overall demand forecasting dashboard.
+
+        Product forecasts come from stored snapshots (see get_product_forecasts)
+        and cover every product sold in the last 30 days. Read-only: products
+        whose snapshot is stale are forecast in memory and left for the next
+        refresh_dashboard_forecasts() to store.
         """
-        # Get top products by recent sales
-        thirty_days_ago = date.today() - timedelta(days=30)
+        today = date.today()
+        thirty_days_ago = today - timedelta(days=30)
 
-        top_products_query = select(
-            OrderItem.product_id,
-            Product.name,
-            Product.sku,
-            func.sum(OrderItem.quantity).label('total_qty')
-        ).join(
-            Order, OrderItem.order_id == Order.id
-        ).join(
-            Product, OrderItem.product_id == Product.id
-        ).where(
-            and_(
-                Order.created_at >= thirty_days_ago,
-                Order.status != OrderStatus.CANCELLED
-            )
-        ).group_by(
-            OrderItem.product_id, Product.name, Product.sku
-        ).order_by(
-            desc(func.sum(OrderItem.quantity))
-        ).limit(10)
+        # Products with recent sales, by quantity sold
+        sales = await self._recent_product_sales(DASHBOARD_LOOKBACK_DAYS)
+        product_ids = list(sales)
 
-        result = await self.db.execute(top_products_query)
-        top_products = result.all()
+        forecasts = await self.get_product_forecasts(
+            product_ids,
+            days_ahead=DASHBOARD_HORIZON_DAYS,
+            lookback_days=DASHBOARD_LOOKBACK_DAYS
+        )
 
-        # Generate forecasts for top products
-        product_forecasts = []
-        for p in top_products[:5]:  # Limit to top 5 for performance
-            try:
-                forecast = await self.forecast_product_demand(
-                    p.product_id,
-                    days_ahead=7,
-                    lookback_days=30
-                )
-                product_forecasts.append({
-                    "product_id": str(p.product_id),
-                    "product_name": p.name,
-                    "sku": p.sku,
-                    "next_7_days_forecast": forecast["forecasted_total"],
-                    "trend": forecast["trend"],
-                    "stockout_risk": forecast["stockout_risk"],
-                    "days_until_stockout": forecast["days_until_stockout"]
-                })
-            except Exception:
-                continue
+        products_result = await self.db.execute(
+            select(Product.id, Product.name, Product.sku).where(Product.id.in_(product_ids))
+        )
+        products = {p.id: p for p in products_result.all()}
 
-        # Overall sales forecast
-        overall_query = select(
-            func.date(Order.created_at).label('sale_date'),
-            func.sum(Order.total_amount).label('revenue'),
-            func.count(Order.id).label('order_count')
-        ).where(
-            and_(
-                Order.created_at >= thirty_days_ago,
-                Order.status != OrderStatus.CANCELLED
+        stock_result = await self.db.execute(
+            select(
+                InventorySummary.product_id,
+                func.sum(InventorySummary.available_quantity).label("available")
             )
-        ).group_by(
-            func.date(Order.created_at)
-        ).order_by(
-            func.date(Order.created_at)
+            .where(InventorySummary.product_id.in_(product_ids))
+            .group_by(InventorySummary.product_id)
         )
+        stock = {r.product_id: r.available or 0 for r in stock_result.all()}
 
-        result = await self.db.execute(overall_query)
-        daily_data = result.all()
+        product_forecasts = []
+        for product_id in product_ids:
+            product = products.get(product_id)
+            forecast = forecasts.get(product_id)
+            if product is None or forecast is None:
+                continue
+            stock_metrics = self._stock_recommendation(
+                forecast["historical_avg_daily"], stock.get(product_id, 0), DASHBOARD_HORIZON_DAYS
+            )
+            product_forecasts.append({
+                "product_id": str(product_id),
+                "product_name": product.name,
+                "sku": product.sku,
+                "next_7_days_forecast": forecast["forecasted_total"],
+                "trend": forecast["trend"],
+                "stockout_risk": stock_metrics["stockout_risk"],
+                "days_until_stockout": stock_metrics["days_until_stockout"]
+            })
 
-        revenue_values = []
-        order_values = []
-        current = thirty_days_ago
-        daily_map = {d.sale_date: (float(d.revenue or 0), d.order_count or 0) for d in daily_data}
+        risk_order = {"HIGH": 0, "MEDIUM": 1, "LOW": 2}
+        product_forecasts.sort(key=lambda x: (risk_order.get(x["stockout_risk"], 3), x["days_until_stockout"]))
 
-        while current <= date.today():
-            rev, orders = daily_map.get(current, (0, 0))
-            revenue_values.append(rev)
-            order_values.append(float(orders))
-            current += timedelta(days=1)
+        # Overall sales forecast
+        history = await self.demand_history.get_daily_matrix(
+            start_date=thirty_days_ago,
+            end_date=today,
+            group_by=None,
+            measures=("order_value", "order_count"),
+            exclude_statuses=(OrderStatus.CANCELLED,)
+        )
+        revenue_values = history["order_value"].tolist()
+        order_values = history["order_count"].tolist()
 
         _, rev_forecast, _ = self._simple_forecast(revenue_values, 7)
         _, order_forecast, _ = self._simple_forecast(order_values, 7)
@@ -533,6 +523,119 @@ class DemandForecastingService:
             "confidence_level": "GOOD" if len(revenue_values) >= 30 else "MODERATE"
         }
 
+    # ==================== Stored Forecasts ====================
+
+    async def _recent_product_sales(self, lookback_days: int) -> Dict[UUID, float]:
+        """Quantity sold per product (non-cancelled orders), highest first."""
+        sales = await self.demand_history.get_daily_matrix(
+            start_date=date.today() - timedelta(days=lookback_days),
+            end_date=date.today(),
+            group_by="product_id",
+            exclude_statuses=(OrderStatus.CANCELLED,)
+        )
+        totals = {key: float(qty) for key, qty in zip(sales["keys"], sales["quantity"].sum(axis=1))}
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    async def get_product_forecasts(
+        self,
+        product_ids: List[UUID],
+        days_ahead: int = DASHBOARD_HORIZON_DAYS,
+        lookback_days: int = DASHBOARD_LOOKBACK_DAYS,
+        force: bool = False,
+        store: bool = False
+    ) -> Dict[UUID, Dict]:
+        """
+        Demand forecasts for many products, read from stored snapshots.
+
+        A snapshot is reused when it was computed today from the same demand
+        watermark; otherwise the product is recomputed (one history query per
+        chunk of stale products). With store=True the recomputed snapshots are
+        written and committed per chunk; without it nothing is written.
+
+        Returns {product_id: _forecast_from_history() result}.
+        """
+        today = date.today()
+        start_date = today - timedelta(days=lookback_days)
+        forecasts: Dict[UUID, Dict] = {}
+
+        for i in range(0, len(product_ids), SNAPSHOT_CHUNK_SIZE):
+            chunk = product_ids[i:i + SNAPSHOT_CHUNK_SIZE]
+
+            snapshot_result = await self.db.execute(
+                select(DemandForecastSnapshot).where(
+                    and_(
+                        DemandForecastSnapshot.product_id.in_(chunk),
+                        DemandForecastSnapshot.lookback_days == lookback_days,
+                        DemandForecastSnapshot.horizon_days == days_ahead
+                    )
+                )
+            )
+            snapshots = {s.product_id: s for s in snapshot_result.scalars().all()}
+            watermarks = await self.demand_history.get_watermarks(
+                start_date, today, product_ids=chunk, statuses=BOOKED_STATUSES
+            )
+
+            stale = []
+            for product_id in chunk:
+                snapshot = snapshots.get(product_id)
+                if (
+                    not force
+                    and snapshot is not None
+                    and snapshot.forecast_date == today
+                    and snapshot.demand_watermark == watermarks.get(product_id, "")
+                ):
+                    forecasts[product_id] = snapshot.forecast
+                else:
+                    stale.append(product_id)
+
+            if not stale:
+                continue
+
+            history = await self.demand_history.get_daily_matrix(
+                start_date=start_date,
+                end_date=today,
+                keys=stale,
+                product_ids=stale,
+                statuses=BOOKED_STATUSES
+            )
+            rows = []
+            for product_id, values in zip(stale, history["quantity"].tolist()):
+                forecast = self._forecast_from_history(values, days_ahead, base_date=today)
+                forecasts[product_id] = forecast
+                rows.append({
+                    "product_id": product_id,
+                    "lookback_days": lookback_days,
+                    "horizon_days": days_ahead,
+                    "forecast_date": today,
+                    "demand_watermark": watermarks.get(product_id, ""),
+                    "forecast": forecast,
+                    "computed_at": datetime.now(timezone.utc),
+                })
+
+            if not store:
+                continue
+
+            stmt = pg_insert(DemandForecastSnapshot).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_demand_forecast_snapshots_product",
+                set_={
+                    "forecast_date": stmt.excluded.forecast_date,
+                    "demand_watermark": stmt.excluded.demand_watermark,
+                    "forecast": stmt.excluded.forecast,
+                    "computed_at": stmt.excluded.computed_at,
+                }
+            )
+            await self.db.execute(stmt)
+            await self.db.commit()
+
+        return forecasts
+
+    async def refresh_dashboard_forecasts(self) -> int:
+        """Store today's dashboard forecasts for every product with recent sales."""
+        sales = await self._recent_product_sales(DASHBOARD_LOOKBACK_DAYS)
+        forecasts = await self.get_product_forecasts(list(sales), store=True)
+        return len(forecasts)
+
     # ==================== Bulk Forecasting ====================
 
     async def forecast_all_products(
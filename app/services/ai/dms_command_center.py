@@ -1,61 +1,136 @@
 """
 DMS AI Command Centre — Orchestrates all DMS AI agents.
 
-Runs all 4 agents in parallel via asyncio.gather() and combines results
-into a unified command centre view with aggregated alerts.
+Runs all 4 agents concurrently via asyncio.gather() — each on its own
+session from async_session_factory, since an AsyncSession is not safe for
+concurrent use — and combines results into a unified command centre view
+with aggregated alerts.
+
+Agent results are kept as snapshots in the cache service (refreshed every
+DMS_AI_SNAPSHOT_REFRESH_MINUTES by a scheduled job), so the page normally
+loads from cache; snapshots older than DMS_AI_SNAPSHOT_MAX_AGE_MINUTES are
+recomputed on request.
 """
 
-from datetime import datetime, timezone
-from typing import Dict, Any
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
+from app.database import async_session_factory
+from app.services.cache_service import get_cache
 from app.services.ai.dms_dealer_performance import DealerPerformanceAgent
 from app.services.ai.dms_demand_sensing import DemandSensingAgent
 from app.services.ai.dms_scheme_effectiveness import SchemeEffectivenessAgent
 from app.services.ai.dms_collection_optimizer import CollectionOptimizerAgent
 
 
+# Result key -> (agent name, agent class)
+AGENTS = {
+    "dealer_performance": ("dealer-performance", DealerPerformanceAgent),
+    "demand_sensing": ("demand-sensing", DemandSensingAgent),
+    "scheme_effectiveness": ("scheme-effectiveness", SchemeEffectivenessAgent),
+    "collection_optimizer": ("collection-optimizer", CollectionOptimizerAgent),
+}
+
+SNAPSHOT_KEY = "dms_ai:snapshot:{}"
+
+# One computation per agent at a time in this process (concurrent stale requests share it)
+_agent_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _error_result(e: Exception, agent_name: str) -> Dict:
+    return {
+        "agent": agent_name,
+        "status": "error",
+        "error": str(e),
+        "summary": {},
+        "alerts": [],
+    }
+
+
+async def run_agent(key: str) -> Dict[str, Any]:
+    """Run one agent on its own session; errors become an error result."""
+    agent_name, agent_cls = AGENTS[key]
+    try:
+        async with async_session_factory() as session:
+            return await agent_cls(session).run()
+    except Exception as e:
+        return _error_result(e, agent_name)
+
+
+async def get_snapshot(key: str) -> Optional[Dict[str, Any]]:
+    """Cached {"result", "refreshed_at"} of an agent, if any."""
+    return await get_cache().get(SNAPSHOT_KEY.format(key))
+
+
+def _is_fresh(snapshot: Optional[Dict[str, Any]], max_age: timedelta) -> bool:
+    if not snapshot:
+        return False
+    refreshed_at = datetime.fromisoformat(snapshot["refreshed_at"])
+    return datetime.now(timezone.utc) - refreshed_at <= max_age
+
+
+async def refresh_snapshot(key: str, max_age: Optional[timedelta] = None) -> Dict[str, Any]:
+    """
+    Recompute an agent and store its snapshot (error results are returned, not cached).
+    With max_age, a snapshot stored by whoever held the lock before us is
+    reused if it is fresh enough, so concurrent stale requests compute once.
+    """
+    lock = _agent_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        if max_age is not None:
+            snapshot = await get_snapshot(key)
+            if _is_fresh(snapshot, max_age):
+                return snapshot
+        result = jsonable_encoder(await run_agent(key))
+        snapshot = {"result": result, "refreshed_at": datetime.now(timezone.utc).isoformat()}
+        if result.get("status") != "error":
+            # Kept past the max age so a failing refresh still leaves the last good view
+            ttl = settings.DMS_AI_SNAPSHOT_MAX_AGE_MINUTES * 60 * 4
+            await get_cache().set(SNAPSHOT_KEY.format(key), snapshot, ttl=ttl)
+        return snapshot
+
+
+async def refresh_snapshots(
+    keys: Sequence[str] = tuple(AGENTS),
+    max_age: Optional[timedelta] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Recompute the given agents concurrently (see refresh_snapshot for max_age)."""
+    snapshots = await asyncio.gather(*(refresh_snapshot(key, max_age) for key in keys))
+    return dict(zip(keys, snapshots))
+
+
 class DMSCommandCenterAgent:
     """
     Runs all DMS AI agents in parallel and combines their results
     into a unified command centre view.
     """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: Optional[AsyncSession] = None):
+        # Agents use their own sessions; db is kept for API compatibility
         self.db = db
 
-    async def run(self) -> Dict[str, Any]:
-        # Run agents sequentially — AsyncSession is not safe for concurrent use
-        def _safe(r: Any, agent_name: str) -> Dict:
-            if isinstance(r, Exception):
-                return {
-                    "agent": agent_name,
-                    "status": "error",
-                    "error": str(r),
-                    "summary": {},
-                    "alerts": [],
-                }
-            return r
-
-        try:
-            dealer_perf = await DealerPerformanceAgent(self.db).run()
-        except Exception as e:
-            dealer_perf = _safe(e, "dealer-performance")
-
-        try:
-            demand = await DemandSensingAgent(self.db).run()
-        except Exception as e:
-            demand = _safe(e, "demand-sensing")
-
-        try:
-            schemes = await SchemeEffectivenessAgent(self.db).run()
-        except Exception as e:
-            schemes = _safe(e, "scheme-effectiveness")
-
-        try:
-            collections = await CollectionOptimizerAgent(self.db).run()
-        except Exception as e:
-            collections = _safe(e, "collection-optimizer")
+    async def run(self, use_cache: bool = True) -> Dict[str, Any]:
+        max_age = timedelta(minutes=settings.DMS_AI_SNAPSHOT_MAX_AGE_MINUTES)
+
+        snapshots: Dict[str, Dict[str, Any]] = {}
+        if use_cache:
+            cached = await asyncio.gather(*(get_snapshot(key) for key in AGENTS))
+            snapshots = {key: s for key, s in zip(AGENTS, cached) if _is_fresh(s, max_age)}
+
+        stale = [key for key in AGENTS if key not in snapshots]
+        if stale:
+            snapshots.update(await refresh_snapshots(stale, max_age))
+
+        results = {key: snapshots[key]["result"] for key in AGENTS}
+        dealer_perf = results["dealer_performance"]
+        demand = results["demand_sensing"]
+        schemes = results["scheme_effectiveness"]
+        collections = results["collection_optimizer"]
 
         # Combine + deduplicate alerts (top 15), sorted by severity
         all_alerts = []
@@ -90,9 +165,13 @@ class DMSCommandCenterAgent:
             },
         }
 
+        refreshed_at = {key: snapshots[key]["refreshed_at"] for key in AGENTS}
+
         return {
             "agent": "dms-command-center",
             "run_at": datetime.now(timezone.utc).isoformat(),
+            "data_as_of": min(refreshed_at.values()),
+            "refreshed_at": refreshed_at,
             "summary": summary,
             "alerts": all_alerts[:15],
             "dealer_performance": dealer_perf,
@@ -10,12 +10,13 @@ Analyses dealer order trends:
 
 from datetime import date, datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
-from sqlalchemy import select, func, and_, extract
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 import statistics
 
 from app.models.dealer import Dealer
-from app.models.order import Order
+from app.models.snop import ForecastGranularity
+from app.services.snop.demand_history import DemandHistoryService
 
 
 def _weighted_moving_average(values: List[float], alpha: float = 0.3) -> float:
@@ -46,6 +47,7 @@ class DemandSensingAgent:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.demand_history = DemandHistoryService(db)
 
     async def run(self) -> Dict[str, Any]:
         today = date.today()
@@ -64,76 +66,45 @@ class DemandSensingAgent:
 
         dealer_ids = list(dealers.keys())
 
-        # Monthly order aggregates per dealer (last 6 months)
-        monthly_result = await self.db.execute(
-            select(
-                Order.dealer_id,
-                extract('year', Order.created_at).label("year"),
-                extract('month', Order.created_at).label("month"),
-                func.sum(Order.total_amount).label("revenue"),
-                func.count(Order.id).label("order_count")
-            )
-            .where(and_(
-                Order.dealer_id.in_(dealer_ids),
-                func.date(Order.created_at) >= six_months_ago,
-                Order.status.notin_(["CANCELLED"])
-            ))
-            .group_by(
-                Order.dealer_id,
-                extract('year', Order.created_at),
-                extract('month', Order.created_at)
-            )
-            .order_by(
-                Order.dealer_id,
-                extract('year', Order.created_at),
-                extract('month', Order.created_at)
-            )
+        # Monthly order aggregates per dealer (last 6 months), from daily demand facts
+        monthly_rows = await self.demand_history.get_totals(
+            start_date=six_months_ago,
+            end_date=today,
+            granularity=ForecastGranularity.MONTHLY,
+            group_by="dealer_id",
+            measures=("order_value", "order_count"),
+            dealer_ids=dealer_ids,
+            exclude_statuses=("CANCELLED",)
         )
-        monthly_rows = monthly_result.fetchall()
 
         # Build monthly timeline
         dealer_monthly: Dict = {}
+        overall: Dict = {}
         for row in monthly_rows:
-            did = row.dealer_id
+            did = row["dealer_id"]
             if did not in dealer_monthly:
                 dealer_monthly[did] = []
             dealer_monthly[did].append({
-                "year": int(row.year),
-                "month": int(row.month),
-                "revenue": float(row.revenue or 0),
-                "order_count": int(row.order_count),
+                "year": row["date"].year,
+                "month": row["date"].month,
+                "revenue": float(row["order_value"]),
+                "order_count": int(row["order_count"]),
             })
+            month = overall.setdefault(row["date"], {"revenue": 0.0, "orders": 0})
+            month["revenue"] += float(row["order_value"])
+            month["orders"] += int(row["order_count"])
 
         # Last order date per dealer
-        last_order_result = await self.db.execute(
-            select(Order.dealer_id, func.max(func.date(Order.created_at)).label("last_order"))
-            .where(and_(
-                Order.dealer_id.in_(dealer_ids),
-                Order.status.notin_(["CANCELLED"])
-            ))
-            .group_by(Order.dealer_id)
+        last_order = await self.demand_history.get_last_demand_dates(
+            group_by="dealer_id",
+            dealer_ids=dealer_ids,
+            exclude_statuses=("CANCELLED",)
         )
-        last_order = {r.dealer_id: r.last_order for r in last_order_result.fetchall()}
 
         # Overall monthly trend (all dealers combined)
-        overall_monthly_result = await self.db.execute(
-            select(
-                extract('year', Order.created_at).label("year"),
-                extract('month', Order.created_at).label("month"),
-                func.sum(Order.total_amount).label("revenue"),
-                func.count(Order.id).label("orders")
-            )
-            .where(and_(
-                Order.dealer_id.in_(dealer_ids),
-                func.date(Order.created_at) >= six_months_ago,
-                Order.status.notin_(["CANCELLED"])
-            ))
-            .group_by(extract('year', Order.created_at), extract('month', Order.created_at))
-            .order_by(extract('year', Order.created_at), extract('month', Order.created_at))
-        )
-        overall_monthly = [{"year": int(r.year), "month": int(r.month),
-                            "revenue": float(r.revenue or 0), "orders": int(r.orders)}
-                          for r in overall_monthly_result.fetchall()]
+        overall_monthly = [{"year": m.year, "month": m.month,
+                            "revenue": overall[m]["revenue"], "orders": overall[m]["orders"]}
+                          for m in sorted(overall)]
 
         # Per-dealer forecasts
         dealer_forecasts = []
@@ -36,11 +36,12 @@ from app.models.serviceability import (
 )
 from app.models.transporter import Transporter, TransporterServiceability
 from app.models.warehouse import Warehouse
-from app.models.inventory import InventorySummary, StockItem, StockItemStatus
+from app.models.inventory import StockItem, StockItemStatus
 from app.models.order import Order, OrderItem, OrderStatus
-from app.models.channel import ChannelInventory, SalesChannel
+from app.models.channel import SalesChannel
 from app.services.cache_service import get_cache
 from app.services.channel_inventory_service import ChannelInventoryService
+from app.services.inventory_ledger import InventoryLedgerService
 from app.config import settings
 from app.schemas.serviceability import (
     OrderAllocationRequest,
@@ -69,6 +70,7 @@ class AllocationService:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.ledger = InventoryLedgerService(db)
 
     async def allocate_order(
         self,
@@ -495,19 +497,11 @@ class AllocationService:
             if use_channel_inventory:
                 # Check channel-specific inventory
                 logger.info(f"_check_stock: Checking ChannelInventory for channel_id={channel_obj.id}, warehouse_id={warehouse_id}, product_id={pid}")
-                query = select(ChannelInventory).where(
-                    and_(
-                        ChannelInventory.channel_id == channel_obj.id,
-                        ChannelInventory.warehouse_id == warehouse_id,
-                        ChannelInventory.product_id == pid,
-                        ChannelInventory.is_active == True,
-                    )
-                )
-                result = await self.db.execute(query)
-                channel_inv = result.scalar_one_or_none()
-                logger.info(f"_check_stock: ChannelInventory result: {channel_inv.id if channel_inv else 'NOT FOUND'}")
+                # Rows plus unfolded ledger entries: the rows alone lag by one fold
+                channel_levels = await self.ledger.product_levels([pid], warehouse_id, channel_obj.id)
+                logger.info(f"_check_stock: ChannelInventory result: {'FOUND' if channel_levels else 'NOT FOUND'}")
 
-                if not channel_inv:
+                if not channel_levels:
                     # No channel inventory - check fallback strategy
                     fallback = getattr(settings, 'D2C_FALLBACK_STRATEGY', 'SHARED_POOL')
                     logger.info(f"_check_stock: No ChannelInventory, fallback strategy={fallback}")
@@ -517,10 +511,9 @@ class AllocationService:
                 else:
                     # Channel inventory exists - check availability
                     # Available = allocated - buffer - reserved
-                    channel_available = max(0,
-                        (channel_inv.allocated_quantity or 0) -
-                        (channel_inv.buffer_quantity or 0) -
-                        (channel_inv.reserved_quantity or 0)
+                    channel_available = sum(
+                        max(0, level["allocated_quantity"] - level["buffer_quantity"] - level["reserved_quantity"])
+                        for level in channel_levels.values()
                     )
 
                     # Get channel-specific soft reserved
@@ -538,22 +531,15 @@ class AllocationService:
 
             # Legacy/fallback: check InventorySummary (shared pool)
             logger.info(f"_check_stock: Checking InventorySummary for warehouse_id={warehouse_id}, product_id={pid}")
-            query = select(InventorySummary).where(
-                and_(
-                    InventorySummary.warehouse_id == warehouse_id,
-                    InventorySummary.product_id == pid
-                )
-            )
-            result = await self.db.execute(query)
-            inventory = result.scalar_one_or_none()
+            levels = await self.ledger.product_levels([pid], warehouse_id)
 
-            if not inventory:
+            if not levels:
                 logger.warning(f"_check_stock: NO InventorySummary found for warehouse_id={warehouse_id}, product_id={pid} - RETURNING FALSE")
                 return False
 
             # Calculate actual available = DB available - DB reserved - soft reserved
-            db_available = inventory.available_quantity or 0
-            db_reserved = inventory.reserved_quantity or 0
+            db_available = sum(level["available_quantity"] for level in levels.values())
+            db_reserved = sum(level["reserved_quantity"] for level in levels.values())
             soft_reserved = await self._get_soft_reserved(product_id)
 
             actual_available = db_available - db_reserved - soft_reserved
@@ -631,17 +617,10 @@ class AllocationService:
                 result["is_available"] = False
                 continue
 
-            # Get inventory from database
-            query = select(InventorySummary).where(
-                and_(
-                    InventorySummary.warehouse_id == warehouse_id,
-                    InventorySummary.product_id == pid
-                )
-            )
-            db_result = await self.db.execute(query)
-            inventory = db_result.scalar_one_or_none()
+            # Get inventory from database (summary plus unfolded ledger entries)
+            levels = await self.ledger.product_levels([pid], warehouse_id)
 
-            if not inventory:
+            if not levels:
                 result["items"].append({
                     "product_id": product_id,
                     "requested": requested_qty,
@@ -656,8 +635,8 @@ class AllocationService:
                 continue
 
             # Calculate availability
-            db_available = inventory.available_quantity or 0
-            db_reserved = inventory.reserved_quantity or 0
+            db_available = sum(level["available_quantity"] for level in levels.values())
+            db_reserved = sum(level["reserved_quantity"] for level in levels.values())
             soft_reserved = await self._get_soft_reserved(product_id)
 
             actual_available = max(0, db_available - db_reserved - soft_reserved)
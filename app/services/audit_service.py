@@ -6,11 +6,15 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.audit_log import AuditLog
+from app.services.audit_writer import record_audit_row
 
 
 class AuditService:
     """
     Audit service for logging all access control changes.
+
+    Entries are written by the batched audit writer once the caller's
+    transaction commits (see app.services.audit_writer).
     """
 
     def __init__(self, db: AsyncSession):
@@ -45,7 +49,9 @@ class AuditService:
         Returns:
             The created AuditLog entry
         """
-        audit_log = AuditLog(
+        return record_audit_row(
+            self.db,
+            AuditLog,
             action=action,
             entity_type=entity_type,
             entity_id=entity_id,
@@ -56,9 +62,6 @@ class AuditService:
             ip_address=ip_address,
             user_agent=user_agent,
         )
-        self.db.add(audit_log)
-        await self.db.flush()
-        return audit_log
 
     async def log_role_created(
         self,
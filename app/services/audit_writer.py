@@ -0,0 +1,302 @@
+"""
+Batched audit writer.
+
+Audit rows (audit_logs, document_sequence_audit) are no longer inserted on
+the request's hot path:
+
+- record_audit_row() keeps the row on the ORM session (session.info)
+- after_commit hands the session's rows to the in-process AuditWriter;
+  after_rollback drops them, so a rolled-back request leaves no audit trail,
+  exactly as when the rows were part of the request transaction
+- The writer's background task inserts buffered rows in batches: COPY for
+  large PostgreSQL batches, executemany otherwise
+- Rows that cannot be written on shutdown (or that pile up past
+  AUDIT_WRITER_MAX_BUFFER while the database is unreachable) are appended to
+  AUDIT_SPOOL_PATH and replayed on the next start
+
+When the writer is not running (scripts, tests, AUDIT_WRITER_ENABLED=False)
+rows are added to the session as before.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import DateTime, Table, event, insert, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import (
+    PENDING_AUDIT_KEY, Base, async_session_factory, copy_rows, custom_json_dumps, engine, is_sqlite,
+)
+from app.models.audit_log import AuditLog
+from app.models.document_sequence import DocumentSequenceAudit
+
+logger = logging.getLogger(__name__)
+
+
+# Tables written by the audit writer, by name (spool file lines carry the name)
+AUDIT_TABLES: Dict[str, Table] = {
+    model.__table__.name: model.__table__ for model in (AuditLog, DocumentSequenceAudit)
+}
+
+
+def _restore_row(table: Table, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Spooled JSON back to column types (UUIDs and timestamps were written as strings)."""
+    restored = dict(row)
+    for column in table.columns:
+        value = restored.get(column.name)
+        if not isinstance(value, str):
+            continue
+        if isinstance(column.type, UUID):
+            restored[column.name] = uuid.UUID(value)
+        elif isinstance(column.type, DateTime):
+            restored[column.name] = datetime.fromisoformat(value)
+    return restored
+
+
+class AuditWriter:
+    """
+    In-process queue + background batch writer for audit rows.
+
+    enqueue() only appends to a buffer, so it is safe to call from session
+    events and threadpool endpoints.
+    """
+
+    def __init__(self, session_factory=async_session_factory, spool_path: Optional[str] = None):
+        self._session_factory = session_factory
+        self._spool_path = spool_path
+        self._buffer: List[Tuple[str, Dict[str, Any]]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def spool_path(self) -> str:
+        return self._spool_path or settings.AUDIT_SPOOL_PATH
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the writer on the running loop (FastAPI lifespan startup)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer, spooling anything that cannot be written (lifespan shutdown)."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception(f"Could not write {len(self._buffer)} audit rows on shutdown, spooling them")
+            self._spool()
+
+    def enqueue(self, rows: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        self._buffer.extend(rows)
+        if len(self._buffer) >= settings.AUDIT_WRITER_BATCH_SIZE and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def flush(self) -> int:
+        """Write everything buffered; on failure the rows stay buffered."""
+        written = 0
+        while self._buffer:
+            batch = self._buffer[:settings.AUDIT_WRITER_BATCH_SIZE]
+            async with self._session_factory() as session:
+                await self._write(session, batch)
+                await session.commit()
+            del self._buffer[:len(batch)]
+            written += len(batch)
+        return written
+
+    async def _write(self, session: AsyncSession, rows: Sequence[Tuple[str, Dict[str, Any]]]) -> None:
+        by_table: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for table_name, row in rows:
+            by_table[table_name].append(row)
+        for table_name, table_rows in by_table.items():
+            await self._insert(session, AUDIT_TABLES[table_name], table_rows)
+
+    async def _insert(self, session: AsyncSession, table: Table, rows: List[Dict[str, Any]]) -> None:
+        if is_sqlite or len(rows) < settings.AUDIT_WRITER_COPY_THRESHOLD:
+            await session.execute(insert(table), rows)
+            return
+
+        columns = [column.name for column in table.columns]
+        await copy_rows(session, table.name, columns, ([row.get(column) for column in columns] for row in rows))
+
+    def _spool(self) -> None:
+        """Append the buffer to the spool file."""
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for table_name, row in rows:
+                f.write(custom_json_dumps({"table": table_name, "row": row}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        logger.warning(f"Spooled {len(rows)} audit rows to {self.spool_path}")
+
+    async def replay_spool(self) -> int:
+        """Write rows spooled by an earlier shutdown (one transaction), then remove the spool file."""
+        if not os.path.exists(self.spool_path):
+            return 0
+        rows = []
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                table = AUDIT_TABLES[entry["table"]]
+                rows.append((table.name, _restore_row(table, entry["row"])))
+
+        async with self._session_factory() as session:
+            for i in range(0, len(rows), settings.AUDIT_WRITER_BATCH_SIZE):
+                await self._write(session, rows[i:i + settings.AUDIT_WRITER_BATCH_SIZE])
+            await session.commit()
+        os.remove(self.spool_path)
+        logger.info(f"Replayed {len(rows)} spooled audit rows")
+        return len(rows)
+
+    async def _run(self) -> None:
+        spool_pending = True
+        while True:
+            if spool_pending:
+                try:
+                    await self.replay_spool()
+                    spool_pending = False
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Could not replay the audit spool, retrying next cycle")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.AUDIT_WRITER_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                written = await self.flush()
+                if written:
+                    logger.debug(f"Audit writer: {written} rows written")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Audit writer flush failed, {len(self._buffer)} rows buffered")
+                if len(self._buffer) > settings.AUDIT_WRITER_MAX_BUFFER:
+                    self._spool()
+                    spool_pending = True
+
+
+audit_writer = AuditWriter()
+
+
+def record_audit_row(db: AsyncSession, model: Type[Base], **values: Any) -> Base:
+    """
+    Record an audit row as part of the session's transaction.
+
+    With the writer running the row is written in the background after the
+    session commits; otherwise it is added to the session. Returns the
+    (transient, in the first case) model instance.
+    """
+    if not audit_writer.running:
+        obj = model(**values)
+        db.add(obj)
+        return obj
+
+    values.setdefault("id", uuid.uuid4())
+    values.setdefault("created_at", datetime.now(timezone.utc))
+    table = model.__table__
+    row = {column.name: values.get(column.name) for column in table.columns}
+    db.info.setdefault(PENDING_AUDIT_KEY, []).append((table.name, row))
+    return model(**values)
+
+
+def _dispatch_audit_rows(session: Session) -> None:
+    """after_commit: hand the session's audit rows to the writer."""
+    rows = session.info.pop(PENDING_AUDIT_KEY, None)
+    if rows:
+        audit_writer.enqueue(rows)
+
+
+def _discard_audit_rows(session: Session) -> None:
+    session.info.pop(PENDING_AUDIT_KEY, None)
+
+
+def start_audit_writer() -> None:
+    """Register session hooks and start the writer (FastAPI lifespan startup)."""
+    if not settings.AUDIT_WRITER_ENABLED:
+        return
+    if not event.contains(Session, "after_commit", _dispatch_audit_rows):
+        event.listen(Session, "after_commit", _dispatch_audit_rows)
+        event.listen(Session, "after_rollback", _discard_audit_rows)
+    audit_writer.start()
+
+
+async def stop_audit_writer() -> None:
+    """Stop the writer (FastAPI lifespan shutdown)."""
+    await audit_writer.stop()
+
+
+# ==================== Partition maintenance ====================
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+async def ensure_audit_log_partitions(months_ahead: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Create monthly audit_logs partitions from the current month through
+    AUDIT_PARTITION_MONTHS_AHEAD months ahead (idempotent).
+
+    No-op unless audit_logs is a partitioned PostgreSQL table.
+    """
+    if is_sqlite:
+        return {"rows_processed": 0}
+    months_ahead = settings.AUDIT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+
+    created = []
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        partitioned = (await conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('audit_logs')"
+        ))).scalar()
+        if not partitioned:
+            return {"rows_processed": 0}
+
+        month = datetime.now(timezone.utc).date().replace(day=1)
+        for i in range(months_ahead + 1):
+            start, end = _add_months(month, i), _add_months(month, i + 1)
+            name = f"audit_logs_y{start.year}m{start.month:02d}"
+            exists = (await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar()
+            if exists:
+                continue
+            try:
+                await conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF audit_logs "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+                created.append(name)
+            except Exception:
+                # e.g. rows for that month already sit in the default partition
+                logger.exception(f"Could not create audit partition {name}")
+
+    if created:
+        logger.info(f"Created audit_logs partitions: {', '.join(created)}")
+    return {"rows_processed": len(created), "created": created}
@@ -1,71 +1,180 @@
 """Batch Picking Service - FIFO/FEFO logic (SAP equivalent)."""
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import date, datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Hashable, Iterable, Optional, Tuple
 from uuid import UUID
+import uuid as uuid_mod
 
-from sqlalchemy import select, and_
+from sqlalchemy import Integer, select, and_, or_, insert, update, values, column, case, bindparam, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import database
 from app.models.batch import BatchMaster
 from app.models.inventory import StockMovement
 
 
+STRATEGIES = ("FEFO", "FIFO")
+
+
+@dataclass
+class BatchAllocation:
+    """Quantity allocated from one batch to one order line."""
+    line_id: Optional[Hashable]
+    product_id: UUID
+    batch: Any
+    quantity: int
+
+    @property
+    def batch_id(self) -> UUID:
+        return self.batch.id
+
+
+class BatchAvailabilityIndex:
+    """
+    Unrestricted, unexpired batch stock of one warehouse, per product in
+    pick order: FEFO is earliest expiry first, FIFO earliest manufacture
+    first, each then by receipt. Allocating draws the index down in memory,
+    so many order lines can be allocated before anything is written.
+    """
+
+    def __init__(self, batches: Iterable[Any]):
+        # Rows arrive in pick order (see BatchPickingService.load_index)
+        self._batches: Dict[UUID, List[list]] = defaultdict(list)
+        for batch in batches:
+            self._batches[batch.product_id].append([batch, batch.quantity_available])
+
+    def batches(self, product_id: UUID) -> List[Tuple[Any, int]]:
+        """(batch, quantity still unallocated) for a product, in pick order."""
+        return [(batch, left) for batch, left in self._batches.get(product_id, ()) if left > 0]
+
+    def available(self, product_id: UUID) -> int:
+        return sum(left for _, left in self._batches.get(product_id, ()))
+
+    def allocate(
+        self,
+        product_id: UUID,
+        quantity: int,
+        line_id: Optional[Hashable] = None,
+    ) -> Tuple[List[BatchAllocation], int]:
+        """Allocate quantity in pick order. Returns the allocations and the shortfall."""
+        allocations = []
+        remaining = quantity
+        for entry in self._batches.get(product_id, ()):
+            if remaining <= 0:
+                break
+            take = min(entry[1], remaining)
+            if take <= 0:
+                continue
+            entry[1] -= take
+            allocations.append(BatchAllocation(line_id, product_id, entry[0], take))
+            remaining -= take
+        return allocations, remaining
+
+    def allocate_lines(
+        self,
+        lines: Iterable[Tuple[Hashable, UUID, int]],
+    ) -> Tuple[List[BatchAllocation], Dict[Hashable, int]]:
+        """
+        Allocate (line_id, product_id, quantity) lines in the order given.
+        Returns all allocations and the shortfall per short line.
+        """
+        allocations, short = [], {}
+        for line_id, product_id, quantity in lines:
+            allocated, shortfall = self.allocate(product_id, quantity, line_id)
+            allocations.extend(allocated)
+            if shortfall:
+                short[line_id] = shortfall
+        return allocations, short
+
+
 class BatchPickingService:
     """FIFO/FEFO batch picking logic - SAP equivalent."""
 
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def pick_batches_fefo(
+    # ==================== AVAILABILITY INDEX ====================
+
+    async def load_index(
         self,
-        product_id: UUID,
         warehouse_id: UUID,
-        quantity_needed: int,
-    ) -> List[Dict[str, Any]]:
+        product_ids: Iterable[UUID],
+        strategy: str = "FEFO",
+    ) -> BatchAvailabilityIndex:
         """
-        Pick batches using First Expiry First Out (FEFO) strategy.
-        Returns list of {batch, pick_qty} dicts.
+        Load the availability index for products in one warehouse, in one
+        query (served by the ix_batch_master_allocation partial index).
         """
-        today = date.today()
+        strategy = strategy.upper()
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown batch picking strategy: {strategy}")
+        product_ids = set(product_ids)
+        if not product_ids:
+            return BatchAvailabilityIndex([])
+
+        if strategy == "FEFO":
+            order = (
+                BatchMaster.expiry_date.asc().nullslast(),
+                BatchMaster.manufacturing_date.asc().nullslast(),
+            )
+        else:
+            order = (BatchMaster.manufacturing_date.asc().nullslast(),)
+
         query = (
-            select(BatchMaster)
+            select(
+                BatchMaster.id,
+                BatchMaster.product_id,
+                BatchMaster.batch_number,
+                BatchMaster.quantity_available,
+                BatchMaster.expiry_date,
+                BatchMaster.manufacturing_date,
+                BatchMaster.quality_grade,
+            )
             .where(
                 and_(
-                    BatchMaster.product_id == product_id,
                     BatchMaster.warehouse_id == warehouse_id,
+                    BatchMaster.product_id.in_(product_ids),
                     BatchMaster.batch_status == "UNRESTRICTED",
                     BatchMaster.quantity_available > 0,
+                    # Skip expired batches
+                    or_(BatchMaster.expiry_date.is_(None), BatchMaster.expiry_date >= date.today()),
                 )
             )
-            .order_by(BatchMaster.expiry_date.asc().nullslast())
+            .order_by(BatchMaster.product_id, *order, BatchMaster.created_at.asc(), BatchMaster.id)
         )
         result = await self.db.execute(query)
-        batches = result.scalars().all()
-
-        picks = []
-        remaining = quantity_needed
+        return BatchAvailabilityIndex(result.all())
 
-        for batch in batches:
-            if remaining <= 0:
-                break
-            # Skip expired batches
-            if batch.expiry_date and batch.expiry_date < today:
-                continue
-
-            pick_qty = min(batch.quantity_available, remaining)
-            picks.append({
-                "batch_id": str(batch.id),
-                "batch_number": batch.batch_number,
-                "pick_quantity": pick_qty,
-                "quantity_available": batch.quantity_available,
-                "expiry_date": batch.expiry_date.isoformat() if batch.expiry_date else None,
-                "manufacturing_date": batch.manufacturing_date.isoformat() if batch.manufacturing_date else None,
-                "quality_grade": batch.quality_grade,
-                "days_until_expiry": (batch.expiry_date - today).days if batch.expiry_date else None,
-            })
-            remaining -= pick_qty
+    @staticmethod
+    def pick_to_dict(allocation: BatchAllocation, today: date) -> Dict[str, Any]:
+        """Batch pick dict (the shape pick_batches_fefo/fifo return) for an allocation."""
+        batch = allocation.batch
+        return {
+            "batch_id": str(batch.id),
+            "batch_number": batch.batch_number,
+            "pick_quantity": allocation.quantity,
+            "quantity_available": batch.quantity_available,
+            "expiry_date": batch.expiry_date.isoformat() if batch.expiry_date else None,
+            "manufacturing_date": batch.manufacturing_date.isoformat() if batch.manufacturing_date else None,
+            "quality_grade": batch.quality_grade,
+            "days_until_expiry": (batch.expiry_date - today).days if batch.expiry_date else None,
+        }
 
-        return picks
+    async def pick_batches_fefo(
+        self,
+        product_id: UUID,
+        warehouse_id: UUID,
+        quantity_needed: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Pick batches using First Expiry First Out (FEFO) strategy.
+        Returns list of {batch, pick_qty} dicts.
+        """
+        index = await self.load_index(warehouse_id, [product_id], "FEFO")
+        allocations, _ = index.allocate(product_id, quantity_needed)
+        today = date.today()
+        return [self.pick_to_dict(allocation, today) for allocation in allocations]
 
     async def pick_batches_fifo(
         self,
@@ -77,46 +186,10 @@ class BatchPickingService:
         Pick batches using First In First Out (FIFO) strategy.
         ORDER BY manufacturing_date ASC (oldest first).
         """
+        index = await self.load_index(warehouse_id, [product_id], "FIFO")
+        allocations, _ = index.allocate(product_id, quantity_needed)
         today = date.today()
-        query = (
-            select(BatchMaster)
-            .where(
-                and_(
-                    BatchMaster.product_id == product_id,
-                    BatchMaster.warehouse_id == warehouse_id,
-                    BatchMaster.batch_status == "UNRESTRICTED",
-                    BatchMaster.quantity_available > 0,
-                )
-            )
-            .order_by(BatchMaster.manufacturing_date.asc().nullslast())
-        )
-        result = await self.db.execute(query)
-        batches = result.scalars().all()
-
-        picks = []
-        remaining = quantity_needed
-
-        for batch in batches:
-            if remaining <= 0:
-                break
-            # Skip expired batches
-            if batch.expiry_date and batch.expiry_date < today:
-                continue
-
-            pick_qty = min(batch.quantity_available, remaining)
-            picks.append({
-                "batch_id": str(batch.id),
-                "batch_number": batch.batch_number,
-                "pick_quantity": pick_qty,
-                "quantity_available": batch.quantity_available,
-                "expiry_date": batch.expiry_date.isoformat() if batch.expiry_date else None,
-                "manufacturing_date": batch.manufacturing_date.isoformat() if batch.manufacturing_date else None,
-                "quality_grade": batch.quality_grade,
-                "days_until_expiry": (batch.expiry_date - today).days if batch.expiry_date else None,
-            })
-            remaining -= pick_qty
-
-        return picks
+        return [self.pick_to_dict(allocation, today) for allocation in allocations]
 
     async def check_batch_availability(
         self,
@@ -128,35 +201,17 @@ class BatchPickingService:
         Check if enough unrestricted batch stock is available.
         Returns: {available: bool, total_available: int, shortfall: int, batches: [...]}
         """
-        today = date.today()
-        query = (
-            select(BatchMaster)
-            .where(
-                and_(
-                    BatchMaster.product_id == product_id,
-                    BatchMaster.warehouse_id == warehouse_id,
-                    BatchMaster.batch_status == "UNRESTRICTED",
-                    BatchMaster.quantity_available > 0,
-                )
-            )
-            .order_by(BatchMaster.expiry_date.asc().nullslast())
-        )
-        result = await self.db.execute(query)
-        batches = result.scalars().all()
-
-        total_available = 0
-        batch_list = []
-        for batch in batches:
-            # Skip expired
-            if batch.expiry_date and batch.expiry_date < today:
-                continue
-            total_available += batch.quantity_available
-            batch_list.append({
+        index = await self.load_index(warehouse_id, [product_id], "FEFO")
+        batch_list = [
+            {
                 "batch_id": str(batch.id),
                 "batch_number": batch.batch_number,
                 "quantity_available": batch.quantity_available,
                 "expiry_date": batch.expiry_date.isoformat() if batch.expiry_date else None,
-            })
+            }
+            for batch, _ in index.batches(product_id)
+        ]
+        total_available = index.available(product_id)
 
         shortfall = max(0, quantity_needed - total_available)
         return {
@@ -167,6 +222,22 @@ class BatchPickingService:
             "batches": batch_list,
         }
 
+    async def allocate_lines(
+        self,
+        warehouse_id: UUID,
+        lines: List[Tuple[Hashable, UUID, int]],
+        strategy: str = "FEFO",
+    ) -> Tuple[List[BatchAllocation], Dict[Hashable, int]]:
+        """
+        Allocate batches for many (line_id, product_id, quantity) lines with
+        one query. Does NOT modify stock; see reserve_allocations() and
+        issue_allocations().
+        """
+        index = await self.load_index(warehouse_id, {product_id for _, product_id, _ in lines}, strategy)
+        return index.allocate_lines(lines)
+
+    # ==================== RESERVE / ISSUE ====================
+
     async def reserve_batches(
         self,
         reservations: List[Dict[str, Any]],
@@ -237,7 +308,6 @@ class BatchPickingService:
             batch.total_value = remaining_total * float(batch.unit_cost or 0)
 
             # Create stock movement
-            import uuid as uuid_mod
             movement = StockMovement(
                 id=uuid_mod.uuid4(),
                 movement_number=f"BM-ISS-{uuid_mod.uuid4().hex[:8].upper()}",
@@ -266,3 +336,167 @@ class BatchPickingService:
             })
 
         return results
+
+    @staticmethod
+    def _batch_totals(allocations: Iterable[BatchAllocation]) -> Dict[UUID, int]:
+        totals: Dict[UUID, int] = defaultdict(int)
+        for allocation in allocations:
+            totals[allocation.batch_id] += allocation.quantity
+        return totals
+
+    async def _update_batches(self, totals: Dict[UUID, int], build) -> int:
+        """
+        Run one UPDATE over batch_master for {batch_id: quantity}, joined to
+        a VALUES list on PostgreSQL (executemany on SQLite, which has no
+        column aliases for VALUES). build(batch_id, quantity) receives the two
+        column expressions and returns the statement. Returns rows updated.
+        """
+        if database.is_sqlite:
+            stmt = build(bindparam("b_batch_id"), bindparam("b_quantity"))
+            result = await self.db.execute(
+                stmt, [{"b_batch_id": batch_id, "b_quantity": qty} for batch_id, qty in totals.items()]
+            )
+        else:
+            allocation = values(
+                column("batch_id", BatchMaster.__table__.c.id.type),
+                column("quantity", Integer),
+                name="allocation",
+            ).data(list(totals.items()))
+            result = await self.db.execute(build(allocation.c.batch_id, allocation.c.quantity))
+        return result.rowcount
+
+    async def reserve_allocations(
+        self,
+        allocations: Iterable[BatchAllocation],
+    ) -> int:
+        """
+        Reserve allocated quantities with one set-based update.
+        All or nothing: if a batch no longer has the quantity available
+        (taken since the index was loaded), nothing is reserved and
+        ValueError is raised. Returns the number of batches updated.
+        """
+        totals = self._batch_totals(allocations)
+        if not totals:
+            return 0
+
+        batches = BatchMaster.__table__
+        now = datetime.now(timezone.utc)
+
+        def build(batch_id, quantity):
+            return (
+                update(batches)
+                .where(batches.c.id == batch_id, batches.c.quantity_available >= quantity)
+                .values(
+                    quantity_available=batches.c.quantity_available - quantity,
+                    quantity_reserved=batches.c.quantity_reserved + quantity,
+                    updated_at=now,
+                )
+            )
+
+        async with self.db.begin_nested():
+            updated = await self._update_batches(totals, build)
+            if updated != len(totals):
+                raise ValueError("Batch stock changed since allocation; allocate again")
+        return updated
+
+    async def release_allocations(
+        self,
+        allocations: Iterable[BatchAllocation],
+    ) -> int:
+        """
+        Return reserved quantities to available with one set-based update.
+        All or nothing, like reserve_allocations(). Returns the number of
+        batches updated.
+        """
+        totals = self._batch_totals(allocations)
+        if not totals:
+            return 0
+
+        batches = BatchMaster.__table__
+        now = datetime.now(timezone.utc)
+
+        def build(batch_id, quantity):
+            return (
+                update(batches)
+                .where(batches.c.id == batch_id, batches.c.quantity_reserved >= quantity)
+                .values(
+                    quantity_available=batches.c.quantity_available + quantity,
+                    quantity_reserved=batches.c.quantity_reserved - quantity,
+                    updated_at=now,
+                )
+            )
+
+        async with self.db.begin_nested():
+            updated = await self._update_batches(totals, build)
+            if updated != len(totals):
+                raise ValueError("Batch reservation changed since allocation; cannot release")
+        return updated
+
+    async def issue_allocations(
+        self,
+        allocations: Iterable[BatchAllocation],
+        user_id: Optional[UUID] = None,
+        reference_type: str = "batch_issue",
+        reference_id: Optional[UUID] = None,
+    ) -> int:
+        """
+        Issue allocated quantities with one set-based update (reserved
+        first, then available, as issue_batches() does) and one insert of
+        the batch StockMovements. All or nothing, like reserve_allocations().
+        Returns the number of batches updated.
+        """
+        totals = self._batch_totals(allocations)
+        if not totals:
+            return 0
+
+        batches = BatchMaster.__table__
+        now = datetime.now(timezone.utc)
+
+        def build(batch_id, quantity):
+            reserved, available = batches.c.quantity_reserved, batches.c.quantity_available
+            from_reserved = reserved >= quantity
+            return (
+                update(batches)
+                .where(batches.c.id == batch_id, available + reserved >= quantity)
+                .values(
+                    quantity_reserved=case((from_reserved, reserved - quantity), else_=0),
+                    quantity_available=case((from_reserved, available), else_=available - (quantity - reserved)),
+                    quantity_issued=batches.c.quantity_issued + quantity,
+                    total_value=(available + reserved - quantity) * func.coalesce(batches.c.unit_cost, 0),
+                    updated_at=now,
+                )
+            )
+
+        info = (await self.db.execute(
+            select(
+                BatchMaster.id, BatchMaster.warehouse_id, BatchMaster.product_id,
+                BatchMaster.batch_number, BatchMaster.unit_cost,
+            ).where(BatchMaster.id.in_(list(totals)))
+        )).all()
+
+        async with self.db.begin_nested():
+            updated = await self._update_batches(totals, build)
+            if updated != len(totals):
+                raise ValueError("Batch stock changed since allocation; allocate again")
+
+            await self.db.execute(insert(StockMovement.__table__), [
+                {
+                    "id": uuid_mod.uuid4(),
+                    "movement_number": f"BM-ISS-{uuid_mod.uuid4().hex[:8].upper()}",
+                    "movement_type": "ISSUE",
+                    "movement_date": now,
+                    "warehouse_id": batch.warehouse_id,
+                    "product_id": batch.product_id,
+                    "quantity": -totals[batch.id],
+                    "batch_id": batch.id,
+                    "batch_number": batch.batch_number,
+                    "reference_type": reference_type,
+                    "reference_id": reference_id,
+                    "unit_cost": float(batch.unit_cost or 0),
+                    "total_cost": float(batch.unit_cost or 0) * totals[batch.id],
+                    "created_by": user_id,
+                    "notes": f"Batch issue from {batch.batch_number}",
+                }
+                for batch in info
+            ])
+        return updated
@@ -23,6 +23,7 @@ from app.models.channel import SalesChannel, ChannelInventory, ChannelType
 from app.models.inventory import InventorySummary, StockItem
 from app.models.warehouse import Warehouse
 from app.services.cache_service import get_cache
+from app.services.inventory_ledger import Cell, InventoryLedgerService
 from app.config import settings
 
 
@@ -47,6 +48,7 @@ class ChannelInventoryService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.cache = get_cache()
+        self.ledger = InventoryLedgerService(db)
 
     # ==================== Channel Availability ====================
 
@@ -80,31 +82,12 @@ class ChannelInventoryService:
                 "error": f"Channel {channel_code} not found"
             }
 
-        # Query channel inventory
-        query = (
-            select(
-                func.sum(ChannelInventory.allocated_quantity).label('total_allocated'),
-                func.sum(ChannelInventory.buffer_quantity).label('total_buffer'),
-                func.sum(ChannelInventory.reserved_quantity).label('total_reserved'),
-            )
-            .where(
-                and_(
-                    ChannelInventory.channel_id == channel.id,
-                    ChannelInventory.product_id == product_id,
-                    ChannelInventory.is_active == True,
-                )
-            )
-        )
-
-        if warehouse_id:
-            query = query.where(ChannelInventory.warehouse_id == warehouse_id)
+        # Channel rows plus unfolded ledger entries
+        levels = (await self.ledger.product_levels([product_id], warehouse_id, channel.id)).values()
 
-        result = await self.db.execute(query)
-        row = result.first()
-
-        total_allocated = row.total_allocated or 0 if row else 0
-        total_buffer = row.total_buffer or 0 if row else 0
-        total_reserved = row.total_reserved or 0 if row else 0
+        total_allocated = sum(level["allocated_quantity"] for level in levels)
+        total_buffer = sum(level["buffer_quantity"] for level in levels)
+        total_reserved = sum(level["reserved_quantity"] for level in levels)
 
         # Get soft reservations from cache
         soft_reserved = 0
@@ -158,38 +141,16 @@ class ChannelInventoryService:
                 }
             return result
 
-        # Query all channel inventory in one query
-        query = (
-            select(
-                ChannelInventory.product_id,
-                func.sum(ChannelInventory.allocated_quantity).label('total_allocated'),
-                func.sum(ChannelInventory.buffer_quantity).label('total_buffer'),
-                func.sum(ChannelInventory.reserved_quantity).label('total_reserved'),
-            )
-            .where(
-                and_(
-                    ChannelInventory.channel_id == channel.id,
-                    ChannelInventory.product_id.in_(product_ids),
-                    ChannelInventory.is_active == True,
-                )
-            )
-            .group_by(ChannelInventory.product_id)
-        )
-
-        if warehouse_id:
-            query = query.where(ChannelInventory.warehouse_id == warehouse_id)
-
-        db_result = await self.db.execute(query)
-        rows = db_result.all()
+        # All channel rows plus unfolded ledger entries, in two queries
+        levels = await self.ledger.product_levels(product_ids, warehouse_id, channel.id)
 
         # Build map from query results
         inventory_map = {}
-        for row in rows:
-            inventory_map[row.product_id] = {
-                "allocated": row.total_allocated or 0,
-                "buffer": row.total_buffer or 0,
-                "reserved": row.total_reserved or 0,
-            }
+        for cell, level in levels.items():
+            totals = inventory_map.setdefault(cell[1], {"allocated": 0, "buffer": 0, "reserved": 0})
+            totals["allocated"] += level["allocated_quantity"]
+            totals["buffer"] += level["buffer_quantity"]
+            totals["reserved"] += level["reserved_quantity"]
 
         # Get soft reservations for all products
         for pid in product_ids:
@@ -446,18 +407,16 @@ class ChannelInventoryService:
         channel_inv = existing.scalar_one_or_none()
 
         if channel_inv:
-            # Update existing allocation
-            channel_inv.allocated_quantity += quantity
             if buffer_quantity > 0:
                 channel_inv.buffer_quantity = buffer_quantity
         else:
-            # Create new allocation
+            # Create the channel row (quantities arrive through the ledger fold)
             channel_inv = ChannelInventory(
                 channel_id=channel_id,
                 warehouse_id=warehouse_id,
                 product_id=product_id,
                 variant_id=variant_id,
-                allocated_quantity=quantity,
+                allocated_quantity=0,
                 buffer_quantity=buffer_quantity,
                 reserved_quantity=0,
                 marketplace_quantity=0,
@@ -465,8 +424,13 @@ class ChannelInventoryService:
             )
             self.db.add(channel_inv)
 
+        self.ledger.record(
+            warehouse_id, product_id, source="channel_allocation",
+            variant_id=variant_id, channel_id=channel_id, allocated=quantity,
+        )
+        cell = self._cell(channel_inv)
+        levels = (await self.ledger.levels([cell]))[cell]
         await self.db.commit()
-        await self.db.refresh(channel_inv)
 
         return {
             "success": True,
@@ -474,9 +438,9 @@ class ChannelInventoryService:
             "channel_id": str(channel_id),
             "warehouse_id": str(warehouse_id),
             "product_id": str(product_id),
-            "allocated_quantity": channel_inv.allocated_quantity,
+            "allocated_quantity": levels["allocated_quantity"],
             "buffer_quantity": channel_inv.buffer_quantity,
-            "available_quantity": channel_inv.available_quantity,
+            "available_quantity": self._available(channel_inv, levels),
         }
 
     async def deallocate_from_channel(
@@ -519,7 +483,9 @@ class ChannelInventoryService:
             }
 
         # Can only deallocate unreserved inventory
-        max_deallocatable = channel_inv.allocated_quantity - channel_inv.reserved_quantity - channel_inv.buffer_quantity
+        cell = self._cell(channel_inv)
+        levels = (await self.ledger.levels([cell]))[cell]
+        max_deallocatable = levels["allocated_quantity"] - levels["reserved_quantity"] - (channel_inv.buffer_quantity or 0)
 
         if quantity > max_deallocatable:
             return {
@@ -528,7 +494,10 @@ class ChannelInventoryService:
                 "max_deallocatable": max_deallocatable,
             }
 
-        channel_inv.allocated_quantity -= quantity
+        self.ledger.record(
+            warehouse_id, product_id, source="channel_deallocation",
+            variant_id=variant_id, channel_id=channel_id, allocated=-quantity,
+        )
         await self.db.commit()
 
         return {
@@ -536,7 +505,7 @@ class ChannelInventoryService:
             "channel_id": str(channel_id),
             "product_id": str(product_id),
             "deallocated_quantity": quantity,
-            "remaining_allocated": channel_inv.allocated_quantity,
+            "remaining_allocated": levels["allocated_quantity"] - quantity,
         }
 
     # ==================== Auto-Replenishment ====================
@@ -585,7 +554,8 @@ class ChannelInventoryService:
             }
 
         # Calculate total available across all warehouses
-        total_available = sum(ci.available_quantity for ci in channel_invs)
+        levels = await self.ledger.levels(self._cell(ci) for ci in channel_invs)
+        total_available = sum(self._available(ci, levels[self._cell(ci)]) for ci in channel_invs)
 
         if total_available >= reorder_point:
             return {
@@ -611,7 +581,10 @@ class ChannelInventoryService:
                 replenish_qty = min(needed - replenished_total, main_pool["unallocated_quantity"])
 
                 if replenish_qty > 0:
-                    channel_inv.allocated_quantity += replenish_qty
+                    self.ledger.record(
+                        channel_inv.warehouse_id, product_id, source="channel_replenishment",
+                        variant_id=channel_inv.variant_id, channel_id=channel_id, allocated=replenish_qty,
+                    )
                     replenished_total += replenish_qty
 
                     replenish_details.append({
@@ -680,15 +653,23 @@ class ChannelInventoryService:
             channel_inv = result.scalar_one_or_none()
 
             if channel_inv:
-                # Decrease allocated quantity (order is consuming)
-                channel_inv.allocated_quantity = max(0, channel_inv.allocated_quantity - quantity)
-                # Also decrease reserved if it was reserved
-                channel_inv.reserved_quantity = max(0, channel_inv.reserved_quantity - quantity)
+                cell = self._cell(channel_inv)
+                levels = (await self.ledger.levels([cell]))[cell]
+                # Decrease allocated quantity (order is consuming), and reserved if it was reserved
+                new_allocated = max(0, levels["allocated_quantity"] - quantity)
+                new_reserved = max(0, levels["reserved_quantity"] - quantity)
+                self.ledger.record(
+                    warehouse_id, product_id, source="channel_order",
+                    variant_id=channel_inv.variant_id, channel_id=channel.id,
+                    allocated=new_allocated - levels["allocated_quantity"],
+                    reserved=new_reserved - levels["reserved_quantity"],
+                    reference_id=order_id,
+                )
 
                 consumed_items.append({
                     "product_id": str(product_id),
                     "quantity": quantity,
-                    "new_allocated": channel_inv.allocated_quantity,
+                    "new_allocated": new_allocated,
                 })
 
         # Note: Commit is handled by the caller for transaction atomicity
@@ -703,6 +684,16 @@ class ChannelInventoryService:
 
     # ==================== Helper Methods ====================
 
+    @staticmethod
+    def _cell(channel_inv: ChannelInventory) -> Cell:
+        """Inventory ledger cell of a channel inventory row."""
+        return (channel_inv.warehouse_id, channel_inv.product_id, channel_inv.variant_id, channel_inv.channel_id)
+
+    @staticmethod
+    def _available(channel_inv: ChannelInventory, levels: Dict[str, int]) -> int:
+        """ChannelInventory.available_quantity computed from ledger levels."""
+        return max(0, levels["allocated_quantity"] - (channel_inv.buffer_quantity or 0) - levels["reserved_quantity"])
+
     async def _get_channel_by_code(self, channel_code: str) -> Optional[SalesChannel]:
         """Get channel by code."""
         result = await self.db.execute(
@@ -742,37 +733,24 @@ class ChannelInventoryService:
 
         Unallocated = InventorySummary.available - sum(ChannelInventory.allocated)
         """
-        # Get main pool inventory
-        summary_result = await self.db.execute(
-            select(InventorySummary).where(
-                and_(
-                    InventorySummary.warehouse_id == warehouse_id,
-                    InventorySummary.product_id == product_id,
-                )
-            )
-        )
-        summary = summary_result.scalar_one_or_none()
-
-        if not summary:
-            return {
-                "total_available": 0,
-                "allocated_to_channels": 0,
-                "unallocated_quantity": 0,
-            }
-
-        total_available = summary.available_quantity or 0
-
-        # Get total allocated to all channels
-        allocated_result = await self.db.execute(
-            select(func.sum(ChannelInventory.allocated_quantity)).where(
+        # Main pool and channel allocations, including pending ledger entries
+        channel_cells = (await self.db.execute(
+            select(
+                ChannelInventory.warehouse_id, ChannelInventory.product_id,
+                ChannelInventory.variant_id, ChannelInventory.channel_id,
+            ).where(
                 and_(
                     ChannelInventory.warehouse_id == warehouse_id,
                     ChannelInventory.product_id == product_id,
                     ChannelInventory.is_active == True,
                 )
             )
-        )
-        allocated_to_channels = allocated_result.scalar() or 0
+        )).all()
+        pool_cell = (warehouse_id, product_id, None, None)
+        levels = await self.ledger.levels([pool_cell, *(tuple(cell) for cell in channel_cells)])
+
+        total_available = levels[pool_cell]["available_quantity"]
+        allocated_to_channels = sum(levels[tuple(cell)]["allocated_quantity"] for cell in channel_cells)
 
         return {
             "total_available": total_available,
@@ -837,7 +815,10 @@ class ChannelInventoryService:
         channel_inv = result.scalars().first()
 
         if channel_inv:
-            channel_inv.reserved_quantity += quantity
+            self.ledger.record(
+                channel_inv.warehouse_id, product_id, source="channel_reservation",
+                variant_id=channel_inv.variant_id, channel_id=channel_id, reserved=quantity,
+            )
             await self.db.commit()
             return True
 
@@ -0,0 +1,305 @@
+"""
+Channel Replenishment Planner.
+
+Set-based auto-replenishment of channel inventory from the main pool:
+1. One windowed query loads every channel x product below its reorder point
+   (with all of its warehouse rows)
+2. One grouped query loads unallocated main-pool stock per warehouse x product
+3. A global allocation plan is computed in memory, so channels competing for
+   the same warehouse stock never over-allocate it
+4. The plan is applied in one transaction as one batch of inventory ledger
+   entries (or returned unchanged in dry-run mode)
+
+Both queries add the unfolded inventory ledger entries to the rows they read,
+so the plan is made from current levels, not the last fold.
+
+Replaces the per-row ChannelInventoryService.check_and_replenish() loop in
+the auto-replenish job.
+"""
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.channel import ChannelInventory
+from app.models.inventory import InventorySummary
+from app.models.inventory_ledger import InventoryLedgerEntry
+from app.services.inventory_ledger import InventoryLedgerService
+
+
+@dataclass
+class ChannelRow:
+    """One active channel inventory row of a channel x product needing stock."""
+    id: uuid.UUID
+    warehouse_id: uuid.UUID
+    variant_id: Optional[uuid.UUID]
+    allocated_quantity: int
+    safety_stock: int
+    reorder_point: int
+    replenish_enabled: bool
+
+
+@dataclass
+class ChannelNeed:
+    """A channel x product below its reorder point."""
+    channel_id: uuid.UUID
+    product_id: uuid.UUID
+    available: int
+    rows: List[ChannelRow] = field(default_factory=list)
+
+    @property
+    def reorder_point(self) -> int:
+        return max((r.reorder_point for r in self.rows if r.replenish_enabled), default=0)
+
+    @property
+    def target(self) -> int:
+        """Strictest safety stock among enabled rows whose reorder point was crossed."""
+        return max(
+            (r.safety_stock for r in self.rows if r.replenish_enabled and self.available < r.reorder_point),
+            default=0
+        )
+
+
+def build_replenishment_plan(
+    needs: List[ChannelNeed],
+    unallocated: Dict[Tuple[uuid.UUID, uuid.UUID], int]
+) -> List[Dict[str, Any]]:
+    """
+    Allocate main-pool stock to channel needs.
+
+    Needs are served most urgent first (lowest available / reorder point),
+    each from the channel's warehouses with the most unallocated stock
+    first. `unallocated` ({(warehouse_id, product_id): qty}) is consumed as
+    stock is allocated, so competing channels share the same pool.
+
+    Returns one entry per replenished channel x product with per-row details.
+    """
+    remaining = dict(unallocated)
+    plan = []
+
+    ordered = sorted(
+        needs,
+        key=lambda n: (n.available / n.reorder_point if n.reorder_point else 1.0, -(n.target - n.available))
+    )
+    for need in ordered:
+        needed = need.target - need.available
+        if needed <= 0:
+            continue
+
+        rows = sorted(
+            need.rows,
+            key=lambda r: remaining.get((r.warehouse_id, need.product_id), 0),
+            reverse=True
+        )
+        details = []
+        replenished = 0
+        for row in rows:
+            pool_key = (row.warehouse_id, need.product_id)
+            quantity = min(needed - replenished, remaining.get(pool_key, 0))
+            if quantity <= 0:
+                continue
+            remaining[pool_key] -= quantity
+            replenished += quantity
+            details.append({
+                "channel_inventory_id": row.id,
+                "warehouse_id": row.warehouse_id,
+                "variant_id": row.variant_id,
+                "quantity": quantity,
+                "new_allocated": row.allocated_quantity + quantity,
+            })
+            if replenished >= needed:
+                break
+
+        if replenished:
+            plan.append({
+                "channel_id": need.channel_id,
+                "product_id": need.product_id,
+                "available": need.available,
+                "reorder_point": need.reorder_point,
+                "safety_stock": need.target,
+                "quantity_needed": needed,
+                "quantity_replenished": replenished,
+                "new_available": need.available + replenished,
+                "details": details,
+            })
+
+    return plan
+
+
+class ChannelReplenishmentPlanner:
+    """Plans and applies channel auto-replenishment for all channels at once."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.ledger = InventoryLedgerService(db)
+
+    async def load_needs(self, channel_id: Optional[uuid.UUID] = None) -> List[ChannelNeed]:
+        """Every channel x product whose available quantity is below its reorder point."""
+        enabled = and_(
+            ChannelInventory.auto_replenish_enabled == True,
+            ChannelInventory.safety_stock > 0,
+            ChannelInventory.reorder_point > 0,
+        )
+        group = (ChannelInventory.channel_id, ChannelInventory.product_id)
+        pending = self.ledger.pending_subquery(InventoryLedgerEntry.channel_id.is_not(None))
+        allocated_now = (
+            func.coalesce(ChannelInventory.allocated_quantity, 0) + func.coalesce(pending.c.allocated_delta, 0)
+        )
+        row_available = func.greatest(
+            allocated_now
+            - func.coalesce(ChannelInventory.buffer_quantity, 0)
+            - func.coalesce(ChannelInventory.reserved_quantity, 0)
+            - func.coalesce(pending.c.reserved_delta, 0),
+            0
+        )
+
+        rows = (
+            select(
+                ChannelInventory.id,
+                ChannelInventory.channel_id,
+                ChannelInventory.product_id,
+                ChannelInventory.warehouse_id,
+                ChannelInventory.variant_id,
+                allocated_now.label("allocated_quantity"),
+                func.coalesce(ChannelInventory.safety_stock, 0).label("safety_stock"),
+                func.coalesce(ChannelInventory.reorder_point, 0).label("reorder_point"),
+                case((enabled, True), else_=False).label("replenish_enabled"),
+                func.sum(row_available).over(partition_by=group).label("channel_available"),
+                func.max(case((enabled, ChannelInventory.reorder_point), else_=0)).over(partition_by=group).label("trigger_point"),
+            )
+            .outerjoin(pending, self.ledger.pending_join(ChannelInventory, pending))
+            .where(ChannelInventory.is_active == True)
+        )
+        if channel_id:
+            rows = rows.where(ChannelInventory.channel_id == channel_id)
+        rows = rows.subquery()
+
+        result = await self.db.execute(
+            select(rows)
+            .where(rows.c.channel_available < rows.c.trigger_point)
+            .order_by(rows.c.channel_id, rows.c.product_id)
+        )
+
+        needs: Dict[Tuple[uuid.UUID, uuid.UUID], ChannelNeed] = {}
+        for r in result.all():
+            key = (r.channel_id, r.product_id)
+            if key not in needs:
+                needs[key] = ChannelNeed(channel_id=r.channel_id, product_id=r.product_id, available=int(r.channel_available))
+            needs[key].rows.append(ChannelRow(
+                id=r.id,
+                warehouse_id=r.warehouse_id,
+                variant_id=r.variant_id,
+                allocated_quantity=r.allocated_quantity,
+                safety_stock=r.safety_stock,
+                reorder_point=r.reorder_point,
+                replenish_enabled=r.replenish_enabled,
+            ))
+
+        return list(needs.values())
+
+    async def load_unallocated(self, product_ids: List[uuid.UUID]) -> Dict[Tuple[uuid.UUID, uuid.UUID], int]:
+        """
+        Unallocated main-pool stock per (warehouse_id, product_id).
+
+        Unallocated = InventorySummary.available - sum(active ChannelInventory.allocated),
+        each including unfolded ledger entries. Stock only in the ledger so
+        far (no summary row yet) waits for the next fold.
+        """
+        if not product_ids:
+            return {}
+
+        unallocated: Dict[Tuple[uuid.UUID, uuid.UUID], int] = {}
+        for i in range(0, len(product_ids), 5000):
+            chunk = product_ids[i:i + 5000]
+            pending = self.ledger.pending_subquery(InventoryLedgerEntry.product_id.in_(chunk))
+            pool = (
+                select(
+                    InventorySummary.warehouse_id,
+                    InventorySummary.product_id,
+                    func.sum(
+                        func.coalesce(InventorySummary.available_quantity, 0)
+                        + func.coalesce(pending.c.available_delta, 0)
+                    ).label("available")
+                )
+                .outerjoin(
+                    pending,
+                    and_(self.ledger.pending_join(InventorySummary, pending), pending.c.channel_id.is_(None))
+                )
+                .where(InventorySummary.product_id.in_(chunk))
+                .group_by(InventorySummary.warehouse_id, InventorySummary.product_id)
+                .subquery()
+            )
+            allocated = (
+                select(
+                    ChannelInventory.warehouse_id,
+                    ChannelInventory.product_id,
+                    func.sum(
+                        func.coalesce(ChannelInventory.allocated_quantity, 0)
+                        + func.coalesce(pending.c.allocated_delta, 0)
+                    ).label("allocated")
+                )
+                .outerjoin(pending, self.ledger.pending_join(ChannelInventory, pending))
+                .where(and_(ChannelInventory.is_active == True, ChannelInventory.product_id.in_(chunk)))
+                .group_by(ChannelInventory.warehouse_id, ChannelInventory.product_id)
+                .subquery()
+            )
+            result = await self.db.execute(
+                select(
+                    pool.c.warehouse_id,
+                    pool.c.product_id,
+                    (func.coalesce(pool.c.available, 0) - func.coalesce(allocated.c.allocated, 0)).label("unallocated")
+                )
+                .outerjoin(
+                    allocated,
+                    and_(
+                        allocated.c.warehouse_id == pool.c.warehouse_id,
+                        allocated.c.product_id == pool.c.product_id
+                    )
+                )
+            )
+            for r in result.all():
+                unallocated[(r.warehouse_id, r.product_id)] = max(0, int(r.unallocated))
+
+        return unallocated
+
+    async def plan(self, channel_id: Optional[uuid.UUID] = None) -> List[Dict[str, Any]]:
+        """Compute the replenishment plan without changing anything."""
+        needs = await self.load_needs(channel_id=channel_id)
+        unallocated = await self.load_unallocated(list({n.product_id for n in needs}))
+        return build_replenishment_plan(needs, unallocated)
+
+    async def apply(self, plan: List[Dict[str, Any]]) -> int:
+        """Apply a plan in one transaction; returns the number of rows replenished."""
+        entries = [
+            {
+                "warehouse_id": detail["warehouse_id"],
+                "product_id": entry["product_id"],
+                "variant_id": detail["variant_id"],
+                "channel_id": entry["channel_id"],
+                "allocated_delta": detail["quantity"],
+                "source": "channel_replenishment",
+            }
+            for entry in plan
+            for detail in entry["details"]
+        ]
+        if not entries:
+            return 0
+
+        await self.ledger.record_many(entries)
+        await self.db.commit()
+
+        return len(entries)
+
+    async def run(self, dry_run: bool = False, channel_id: Optional[uuid.UUID] = None) -> Dict[str, Any]:
+        """Plan (and unless dry_run, apply) replenishment for all channels."""
+        plan = await self.plan(channel_id=channel_id)
+        rows_updated = 0 if dry_run else await self.apply(plan)
+
+        return {
+            "dry_run": dry_run,
+            "plan": plan,
+            "rows_updated": rows_updated,
+            "total_replenished": sum(entry["quantity_replenished"] for entry in plan),
+        }
@@ -20,9 +20,11 @@ Rate limit: 100 req/min (standard), 10 req/min (bulk)
 import httpx
 import logging
 import time
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any
 
 from app.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -49,11 +51,22 @@ class CJDQuickService:
         email: Optional[str] = None,
         password: Optional[str] = None,
         api_key: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
     ):
         self.base_url = (base_url or settings.CJDQUICK_BASE_URL).rstrip("/")
         self.email = email or settings.CJDQUICK_EMAIL
         self.password = password or settings.CJDQUICK_PASSWORD
         self._api_key = api_key or settings.CJDQUICK_API_KEY
+        self._client = client
+
+    @asynccontextmanager
+    async def _http(self, timeout: float):
+        """Client passed in (e.g. by the tracking poller), else the shared CJDQuick pool."""
+        if self._client is not None:
+            yield self._client
+        else:
+            async with http_client("cjdquick", timeout=timeout) as client:
+                yield client
 
     def _get_cache_key(self) -> str:
         """Cache key based on base_url + email for multi-tenant support."""
@@ -101,11 +114,12 @@ class CJDQuickService:
 
         url = f"{self.base_url}/auth/login"
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with self._http(15.0) as client:
                 response = await client.post(
                     url,
                     json={"email": self.email, "password": self.password},
                     headers={"Content-Type": "application/json"},
+                    timeout=15.0,
                 )
             if response.status_code >= 400:
                 raise CJDQuickAPIError(
@@ -123,13 +137,14 @@ class CJDQuickService:
         """Refresh the JWT token."""
         token = current_token or CJDQuickService._token_cache.get(self._get_cache_key(), {}).get("token")
         url = f"{self.base_url}/auth/refresh"
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with self._http(15.0) as client:
             response = await client.post(
                 url,
                 headers={
                     "Authorization": f"Bearer {token}",
                     "Content-Type": "application/json",
                 },
+                timeout=15.0,
             )
         if response.status_code >= 400:
             raise CJDQuickAPIError(
@@ -158,13 +173,14 @@ class CJDQuickService:
         logger.info("CJDQuick API %s %s", method.upper(), url)
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with self._http(30.0) as client:
                 response = await client.request(
                     method=method.upper(),
                     url=url,
                     json=data,
                     params=params,
                     headers=headers,
+                    timeout=30.0,
                 )
 
             # If 401, clear cached token and retry once
@@ -173,13 +189,14 @@ class CJDQuickService:
                 CJDQuickService._token_cache.pop(self._get_cache_key(), None)
                 token = await self._get_token()
                 headers["Authorization"] = f"Bearer {token}"
-                async with httpx.AsyncClient(timeout=30.0) as client:
+                async with self._http(30.0) as client:
                     response = await client.request(
                         method=method.upper(),
                         url=url,
                         json=data,
                         params=params,
                         headers=headers,
+                        timeout=30.0,
                     )
 
             if response.status_code >= 400:
@@ -249,13 +266,14 @@ class CJDQuickService:
         logger.info("CJDQuick Integration API %s %s", method.upper(), url)
 
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
+            async with self._http(timeout) as client:
                 response = await client.request(
                     method=method.upper(),
                     url=url,
                     json=data,
                     params=params,
                     headers=headers,
+                    timeout=timeout,
                 )
 
             # 207 Multi-Status is valid for bulk (partial success)
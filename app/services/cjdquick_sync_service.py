@@ -1167,8 +1167,6 @@ class CJDQuickSyncService:
 
     async def get_sync_stats(self) -> dict:
         """Get sync health statistics."""
-        from sqlalchemy import func
-
         result = await self.db.execute(
             select(
                 CJDQuickSyncLog.entity_type,
@@ -1223,10 +1221,12 @@ class CJDQuickSyncService:
         1. GET /inventory from CJDQuick → list of stock records
         2. Map skuCode → product_id via products table
         3. Map locationCode → warehouse_id via warehouses table
-        4. Upsert inventory_summary with real quantities
+        4. Record the inventory ledger entry that brings the summary to the real quantities
         5. Create stock movements for any changes
         """
-        from app.models.inventory import InventorySummary, StockMovement
+        from app.models.inventory import StockMovement
+        from app.services.inventory_service import InventoryService
+        from app.services.inventory_ledger import InventoryLedgerService
         from app.models.warehouse import Warehouse
 
         client = CJDQuickService()
@@ -1273,6 +1273,7 @@ class CJDQuickSyncService:
             if wh_id:
                 warehouse_map[settings.CJDQUICK_WAREHOUSE_CODE] = wh_id
 
+        date_prefix = datetime.now(timezone.utc).strftime("%Y%m%d")
         for item in inventory_items:
             sku_code = item.get("skuCode")
             location_code = item.get("locationCode", settings.CJDQUICK_WAREHOUSE_CODE)
@@ -1293,51 +1294,22 @@ class CJDQuickSyncService:
                 continue
 
             try:
-                # Upsert inventory_summary
-                existing = await self.db.execute(
-                    select(InventorySummary).where(
-                        InventorySummary.product_id == product_id,
-                        InventorySummary.warehouse_id == warehouse_id,
-                        InventorySummary.variant_id.is_(None),
-                    )
+                # Bring inventory_summary to the OMS quantities through the ledger
+                entry = await InventoryLedgerService(self.db).set_levels(
+                    (warehouse_id, product_id, None, None),
+                    source="cjdquick_sync",
+                    reference_number=f"CJDQ-INV-SYNC-{date_prefix}",
+                    total_quantity=on_hand,
+                    available_quantity=available,
+                    reserved_quantity=reserved,
                 )
-                summary = existing.scalar_one_or_none()
-
-                old_qty = 0
-                if summary:
-                    old_qty = summary.total_quantity or 0
-                    summary.total_quantity = on_hand
-                    summary.available_quantity = available
-                    summary.reserved_quantity = reserved
-                    summary.last_stock_in_date = datetime.now(timezone.utc)
-                else:
-                    summary = InventorySummary(
-                        warehouse_id=warehouse_id,
-                        product_id=product_id,
-                        variant_id=None,
-                        total_quantity=on_hand,
-                        available_quantity=available,
-                        reserved_quantity=reserved,
-                        allocated_quantity=0,
-                        damaged_quantity=0,
-                        in_transit_quantity=0,
-                        last_stock_in_date=datetime.now(timezone.utc),
-                    )
-                    self.db.add(summary)
 
                 # Create stock movement if quantity changed
-                qty_diff = on_hand - old_qty
+                qty_diff = entry.total_delta if entry else 0
+                old_qty = on_hand - qty_diff
                 if qty_diff != 0:
                     # Generate movement number
-                    now = datetime.now(timezone.utc)
-                    date_prefix = now.strftime("%Y%m%d")
-                    count_result = await self.db.execute(
-                        select(func.count(StockMovement.id)).where(
-                            StockMovement.movement_number.like(f"MOV-{date_prefix}-%")
-                        )
-                    )
-                    count = count_result.scalar() or 0
-                    movement_number = f"MOV-{date_prefix}-{count + 1:04d}"
+                    movement_number = await InventoryService(self.db)._generate_movement_number()
 
                     movement = StockMovement(
                         movement_number=movement_number,
@@ -83,7 +83,7 @@ class DealerOrchestrationService:
         except Exception as e:
             logger.error(f"Error reading brochure: {e}")
 
-        email_service = get_email_service()
+        email_service = get_email_service(self.db)
 
         contact_person = dealer.contact_person or dealer.name
         dealer_type = dealer.dealer_type if isinstance(dealer.dealer_type, str) else dealer.dealer_type.value
@@ -31,6 +31,7 @@ from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.document_sequence import DocumentSequence, DocumentSequenceAudit, DocumentType
+from app.services.audit_writer import record_audit_row
 
 
 # Document type metadata
@@ -93,7 +94,9 @@ class DocumentSequenceService:
     ):
         """Log an audit record for sequence operations."""
         import uuid as uuid_module
-        audit = DocumentSequenceAudit(
+        record_audit_row(
+            self.db,
+            DocumentSequenceAudit,
             document_type=document_type,
             financial_year=financial_year,
             operation=operation,
@@ -104,7 +107,6 @@ class DocumentSequenceService:
             user_id=uuid_module.UUID(self.user_id) if self.user_id else None,
             ip_address=self.ip_address,
         )
-        self.db.add(audit)
 
     async def get_next_number(
         self,
@@ -0,0 +1,451 @@
+"""
+Email Outbox
+
+Non-blocking transactional email:
+- EmailService.send_email() renders the message on the request path and adds
+  an email_outbox row to the caller's session instead of talking SMTP inline,
+  so the email is queued if and only if the business change commits
+- A background worker delivers pending rows in batches over one persistent,
+  authenticated SMTP session (run in a worker thread, so the event loop is
+  never blocked); a commit that queued email wakes it
+- Transient failures are retried with exponential backoff up to
+  EMAIL_OUTBOX_MAX_ATTEMPTS; permanent rejections (5xx) fail immediately
+- Rows are claimed with FOR UPDATE SKIP LOCKED, so every app process can run
+  a worker without sending a message twice
+"""
+
+import asyncio
+import base64
+import logging
+import smtplib
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, bindparam, event, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import async_session_factory
+from app.models.email_outbox import EmailOutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the SMTP session itself is unusable (retry on a fresh connection)
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+# Set on a session whose transaction queued email (wake the worker on commit)
+QUEUED_EMAIL_KEY = "queued_email"
+
+
+def build_mime_message(
+    from_email: str,
+    from_name: Optional[str],
+    to_email: str,
+    subject: str,
+    html_content: str,
+    text_content: Optional[str] = None,
+    attachments: Optional[Sequence[Tuple[str, bytes, str]]] = None,
+) -> MIMEMultipart:
+    """MIME message with an html (+ optional text) body and file attachments."""
+    sender = f"{from_name} <{from_email}>" if from_name else from_email
+
+    # Use 'mixed' when there are attachments, 'alternative' otherwise
+    if attachments:
+        msg = MIMEMultipart('mixed')
+        body_part = MIMEMultipart('alternative')
+        if text_content:
+            body_part.attach(MIMEText(text_content, 'plain'))
+        body_part.attach(MIMEText(html_content, 'html'))
+        msg.attach(body_part)
+
+        for filename, data, mime_type in attachments:
+            attachment = MIMEApplication(data, Name=filename)
+            attachment['Content-Disposition'] = f'attachment; filename="{filename}"'
+            msg.attach(attachment)
+    else:
+        msg = MIMEMultipart('alternative')
+        if text_content:
+            msg.attach(MIMEText(text_content, 'plain'))
+        msg.attach(MIMEText(html_content, 'html'))
+
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = to_email
+    return msg
+
+
+def is_permanent_smtp_error(exc: Exception) -> bool:
+    """5xx rejections of a message (bad recipient, rejected content) will not succeed on retry."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError)):
+        return exc.smtp_code >= 500
+    return False
+
+
+@dataclass
+class DeliveryResult:
+    message_id: uuid.UUID
+    error: Optional[str] = None
+    permanent: bool = False
+
+    @property
+    def sent(self) -> bool:
+        return self.error is None
+
+
+class SMTPSender:
+    """
+    Persistent SMTP session (connect, STARTTLS and login once, then reuse).
+
+    Not thread-safe: the outbox worker uses it from one thread at a time.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        timeout: float = 30,
+        idle_timeout: float = 60,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.connections = 0
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connections += 1
+        return server
+
+    def _session(self) -> smtplib.SMTP:
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            # Servers drop idle sessions; check before reusing
+            try:
+                if self._server.noop()[0] != 250:
+                    self.close()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def send(self, msg: MIMEMultipart, from_email: str, to_email: str) -> None:
+        """Send one message, reconnecting once if the session was dropped."""
+        for attempt in range(2):
+            server = self._session()
+            try:
+                server.sendmail(from_email, to_email, msg.as_string())
+                self._last_used = time.monotonic()
+                return
+            except CONNECTION_ERRORS:
+                self.close()
+                if attempt:
+                    raise
+
+    def send_batch(self, messages: Sequence[EmailOutboxMessage]) -> List[DeliveryResult]:
+        """Deliver claimed outbox rows; one result per row."""
+        results: List[DeliveryResult] = []
+        for index, message in enumerate(messages):
+            try:
+                msg = build_mime_message(
+                    message.from_email,
+                    message.from_name,
+                    message.to_email,
+                    message.subject,
+                    message.html_content,
+                    message.text_content,
+                    decode_attachments(message.attachments),
+                )
+                self.send(msg, message.from_email, message.to_email)
+                results.append(DeliveryResult(message.id))
+            except (smtplib.SMTPAuthenticationError, smtplib.SMTPConnectError) as e:
+                self._fail_rest(results, messages[index:], e)
+                break
+            except smtplib.SMTPException as e:
+                results.append(DeliveryResult(message.id, f"{type(e).__name__}: {e}", is_permanent_smtp_error(e)))
+            except OSError as e:
+                self._fail_rest(results, messages[index:], e)
+                break
+            except Exception as e:
+                results.append(DeliveryResult(message.id, f"{type(e).__name__}: {e}"))
+        return results
+
+    def _fail_rest(self, results: List[DeliveryResult], messages: Sequence[EmailOutboxMessage], exc: Exception) -> None:
+        """Session can't be established: the rest of the batch would fail the same way."""
+        error = f"{type(exc).__name__}: {exc}"
+        results.extend(DeliveryResult(m.id, error) for m in messages)
+        self.close()
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                server.close()
+
+
+def encode_attachments(attachments: Optional[Sequence[Tuple[str, bytes, str]]]) -> Optional[List[Dict[str, str]]]:
+    if not attachments:
+        return None
+    return [
+        {"filename": filename, "mime_type": mime_type, "data": base64.b64encode(data).decode("ascii")}
+        for filename, data, mime_type in attachments
+    ]
+
+
+def decode_attachments(attachments: Optional[List[Dict[str, str]]]) -> Optional[List[Tuple[str, bytes, str]]]:
+    if not attachments:
+        return None
+    return [(a["filename"], base64.b64decode(a["data"]), a["mime_type"]) for a in attachments]
+
+
+def get_smtp_sender() -> SMTPSender:
+    return SMTPSender(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        user=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        use_tls=settings.SMTP_USE_TLS,
+        timeout=settings.SMTP_TIMEOUT,
+        idle_timeout=settings.SMTP_IDLE_TIMEOUT,
+    )
+
+
+class EmailOutbox:
+    """
+    Queue + background delivery worker for transactional email.
+
+    enqueue() adds the email_outbox row to the caller's session, so it is
+    written (or rolled back) with the caller's transaction; committing wakes
+    the worker. Messages written by other processes are picked up on the
+    next poll.
+    """
+
+    def __init__(self, sender_factory=get_smtp_sender, session_factory=async_session_factory):
+        self._sender_factory = sender_factory
+        self._session_factory = session_factory
+        self._sender: Optional[SMTPSender] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the worker on the running loop (FastAPI lifespan startup)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker (lifespan shutdown); undelivered rows wait in email_outbox."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._sender is not None:
+            await asyncio.to_thread(self._sender.close)
+            self._sender = None
+
+    def wake(self) -> None:
+        """Have the worker poll now instead of at the next interval."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def enqueue(
+        self,
+        session: AsyncSession,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+        attachments: Optional[Sequence[Tuple[str, bytes, str]]] = None,
+        from_email: str = "",
+        from_name: Optional[str] = None,
+        email_type: str = "GENERIC",
+    ) -> EmailOutboxMessage:
+        """Add a PENDING message to the session; it is queued when the session commits."""
+        now = datetime.now(timezone.utc)
+        message = EmailOutboxMessage(
+            id=uuid.uuid4(),
+            email_type=email_type,
+            from_email=from_email,
+            from_name=from_name,
+            to_email=to_email,
+            subject=subject,
+            html_content=html_content,
+            text_content=text_content,
+            attachments=encode_attachments(attachments),
+            status="PENDING",
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now,
+        )
+        session.add(message)
+        session.info[QUEUED_EMAIL_KEY] = True
+        return message
+
+    async def claim(self, session, limit: int) -> List[EmailOutboxMessage]:
+        """Mark up to `limit` due messages as SENDING (skipping rows other workers hold)."""
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+        due = (
+            select(EmailOutboxMessage.id)
+            .where(or_(
+                and_(EmailOutboxMessage.status == "PENDING", EmailOutboxMessage.next_attempt_at <= now),
+                and_(EmailOutboxMessage.status == "SENDING", EmailOutboxMessage.claimed_at < stale),
+            ))
+            .order_by(EmailOutboxMessage.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(
+            update(EmailOutboxMessage)
+            .where(EmailOutboxMessage.id.in_(due.scalar_subquery()))
+            .values(
+                status="SENDING",
+                claimed_at=now,
+                attempts=EmailOutboxMessage.attempts + 1,
+            )
+            .returning(EmailOutboxMessage)
+            .execution_options(synchronize_session=False)
+        )
+        messages = list(result.scalars().all())
+        await session.commit()
+        return messages
+
+    async def record(self, session, messages: Sequence[EmailOutboxMessage], results: Sequence[DeliveryResult]) -> None:
+        """Write delivery outcomes in one executemany UPDATE."""
+        now = datetime.now(timezone.utc)
+        attempts = {m.id: m.attempts for m in messages}
+        params = []
+        for result in results:
+            if result.sent:
+                status, next_attempt_at = "SENT", now
+            elif result.permanent or attempts[result.message_id] >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                status, next_attempt_at = "FAILED", now
+            else:
+                backoff = settings.EMAIL_OUTBOX_RETRY_BACKOFF * (2 ** (attempts[result.message_id] - 1))
+                status, next_attempt_at = "PENDING", now + timedelta(seconds=backoff)
+            params.append({
+                "b_id": result.message_id,
+                "b_status": status,
+                "b_next_attempt_at": next_attempt_at,
+                "b_last_error": result.error,
+                "b_sent_at": now if result.sent else None,
+            })
+        if not params:
+            return
+
+        table = EmailOutboxMessage.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                status=bindparam("b_status"),
+                next_attempt_at=bindparam("b_next_attempt_at"),
+                last_error=bindparam("b_last_error"),
+                sent_at=bindparam("b_sent_at"),
+                claimed_at=None,
+            ),
+            params,
+        )
+        await session.commit()
+
+    async def deliver_batch(self) -> int:
+        """Claim and send one batch of due messages; returns the number claimed."""
+        async with self._session_factory() as session:
+            messages = await self.claim(session, settings.EMAIL_OUTBOX_BATCH_SIZE)
+            if not messages:
+                return 0
+
+            if self._sender is None:
+                self._sender = self._sender_factory()
+            results = await asyncio.to_thread(self._sender.send_batch, messages)
+            await self.record(session, messages, results)
+
+        sent = sum(1 for r in results if r.sent)
+        if sent < len(results):
+            logger.warning(f"Email outbox: {sent}/{len(results)} sent, last error: {results[-1].error}")
+        else:
+            logger.debug(f"Email outbox: {sent} sent")
+        return len(messages)
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                claimed = await self.deliver_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email outbox cycle failed")
+                claimed = 0
+
+            if claimed >= settings.EMAIL_OUTBOX_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.EMAIL_OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+
+email_outbox = EmailOutbox()
+
+
+def _wake_after_commit(session: Session) -> None:
+    """after_commit: deliver the email the transaction queued."""
+    if session.info.pop(QUEUED_EMAIL_KEY, None):
+        email_outbox.wake()
+
+
+def _discard_queued_flag(session: Session) -> None:
+    session.info.pop(QUEUED_EMAIL_KEY, None)
+
+
+def start_email_outbox() -> None:
+    """Register the session hooks and start the delivery worker (FastAPI lifespan startup)."""
+    if not settings.EMAIL_OUTBOX_ENABLED:
+        return
+    if not event.contains(Session, "after_commit", _wake_after_commit):
+        event.listen(Session, "after_commit", _wake_after_commit)
+        event.listen(Session, "after_rollback", _discard_queued_flag)
+    email_outbox.start()
+
+
+async def stop_email_outbox() -> None:
+    """Stop the delivery worker (FastAPI lifespan shutdown)."""
+    await email_outbox.stop()
@@ -1,17 +1,27 @@
+import asyncio
 import smtplib
 import httpx
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
 from typing import Optional, Dict, List, Tuple
 from decimal import Decimal
 import logging
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.email_outbox import EmailOutbox, SMTPSender, build_mime_message, email_outbox
+
 logger = logging.getLogger(__name__)
 
 
 class EmailService:
-    """Email service for sending transactional emails via Gmail SMTP."""
+    """
+    Email service for sending transactional emails via Gmail SMTP.
+
+    With an outbox attached and the caller's session (get_email_service(db)
+    when the outbox worker runs), send_email() only adds the rendered message
+    to the session; once it commits the worker delivers it over a persistent
+    SMTP session. Without them it sends inline (async callers run that in a
+    worker thread, see send_async()).
+    """
 
     def __init__(
         self,
@@ -20,7 +30,11 @@ class EmailService:
         smtp_user: str = "",
         smtp_password: str = "",
         from_email: str = "",
-        from_name: str = "Aquapurite ERP"
+        from_name: str = "Aquapurite ERP",
+        use_tls: bool = True,
+        timeout: int = 30,
+        outbox: Optional[EmailOutbox] = None,
+        session: Optional[AsyncSession] = None,
     ):
         self.smtp_host = smtp_host
         self.smtp_port = smtp_port
@@ -28,6 +42,25 @@ class EmailService:
         self.smtp_password = smtp_password
         self.from_email = from_email or smtp_user
         self.from_name = from_name
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.outbox = outbox
+        self.session = session
+
+    @property
+    def queues_to_outbox(self) -> bool:
+        """True when send_email() queues to the outbox instead of sending inline."""
+        return self.outbox is not None and self.outbox.running and self.session is not None
+
+    async def send_async(self, send, **kwargs) -> bool:
+        """
+        Call one of the send_* methods from async code: directly when it only
+        queues to the outbox (the session is not thread-safe), otherwise in a
+        worker thread so inline SMTP does not block the event loop.
+        """
+        if self.queues_to_outbox:
+            return send(**kwargs)
+        return await asyncio.to_thread(send, **kwargs)
 
     def send_email(
         self,
@@ -36,9 +69,10 @@ class EmailService:
         html_content: str,
         text_content: Optional[str] = None,
         attachments: Optional[List[Tuple[str, bytes, str]]] = None,
+        email_type: str = "GENERIC",
     ) -> bool:
         """
-        Send an email using Gmail SMTP.
+        Send an email using Gmail SMTP (queued to the outbox when one is running).
 
         Args:
             to_email: Recipient email address
@@ -46,49 +80,44 @@ class EmailService:
             html_content: HTML body of the email
             text_content: Plain text body (optional fallback)
             attachments: List of (filename, data, mime_type) tuples
+            email_type: Outbox message type (for monitoring)
 
         Returns:
-            True if email sent successfully, False otherwise
+            True if email was queued (delivered once the session commits)
+            or sent successfully, False otherwise
         """
         if not self.smtp_user or not self.smtp_password:
             logger.warning("Email not configured. SMTP credentials missing.")
             return False
 
+        if self.queues_to_outbox:
+            self.outbox.enqueue(
+                self.session,
+                to_email,
+                subject,
+                html_content,
+                text_content,
+                attachments,
+                from_email=self.from_email,
+                from_name=self.from_name,
+                email_type=email_type,
+            )
+            logger.info(f"Email queued for {to_email}")
+            return True
+
+        sender = SMTPSender(
+            self.smtp_host,
+            self.smtp_port,
+            self.smtp_user,
+            self.smtp_password,
+            use_tls=self.use_tls,
+            timeout=self.timeout,
+        )
         try:
-            # Use 'mixed' when there are attachments, 'alternative' otherwise
-            if attachments:
-                msg = MIMEMultipart('mixed')
-                msg['Subject'] = subject
-                msg['From'] = f"{self.from_name} <{self.from_email}>"
-                msg['To'] = to_email
-
-                # Wrap text/html in an 'alternative' sub-part
-                body_part = MIMEMultipart('alternative')
-                if text_content:
-                    body_part.attach(MIMEText(text_content, 'plain'))
-                body_part.attach(MIMEText(html_content, 'html'))
-                msg.attach(body_part)
-
-                # Attach files
-                for filename, data, mime_type in attachments:
-                    attachment = MIMEApplication(data, Name=filename)
-                    attachment['Content-Disposition'] = f'attachment; filename="{filename}"'
-                    msg.attach(attachment)
-            else:
-                msg = MIMEMultipart('alternative')
-                msg['Subject'] = subject
-                msg['From'] = f"{self.from_name} <{self.from_email}>"
-                msg['To'] = to_email
-
-                if text_content:
-                    msg.attach(MIMEText(text_content, 'plain'))
-                msg.attach(MIMEText(html_content, 'html'))
-
-            # Connect and send with timeout
-            with smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.sendmail(self.from_email, to_email, msg.as_string())
+            msg = build_mime_message(
+                self.from_email, self.from_name, to_email, subject, html_content, text_content, attachments
+            )
+            sender.send(msg, self.from_email, to_email)
 
             logger.info(f"Email sent successfully to {to_email}")
             return True
@@ -108,6 +137,8 @@ class EmailService:
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
             return False
+        finally:
+            sender.close()
 
     def send_password_reset_email(
         self,
@@ -199,7 +230,7 @@ class EmailService:
         Aquapurite ERP Team
         """
 
-        return self.send_email(to_email, subject, html_content, text_content)
+        return self.send_email(to_email, subject, html_content, text_content, email_type="PASSWORD_RESET")
 
 
     # ==================== D2C ORDER NOTIFICATIONS ====================
@@ -379,7 +410,7 @@ Thank you for shopping with Aquapurite!
 Questions? Contact us at support@aquapurite.com
         """
 
-        return self.send_email(to_email, subject, html_content, text_content)
+        return self.send_email(to_email, subject, html_content, text_content, email_type="ORDER_CONFIRMATION")
 
     def send_order_shipped_email(
         self,
@@ -449,7 +480,7 @@ Track your shipment: {tracking_url or f'{d2c_url}/track?order={order_number}'}
 Thank you for shopping with Aquapurite!
         """
 
-        return self.send_email(to_email, subject, html_content, text_content)
+        return self.send_email(to_email, subject, html_content, text_content, email_type="ORDER_SHIPPED")
 
 
     # ==================== DEALER WELCOME EMAIL ====================
@@ -685,7 +716,7 @@ Aquapurite Private Limited
         if brochure_bytes:
             attachments = [("Aquapurite_Brochure.pdf", brochure_bytes, "application/pdf")]
 
-        return self.send_email(to_email, subject, html_content, text_content, attachments=attachments)
+        return self.send_email(to_email, subject, html_content, text_content, attachments=attachments, email_type="DEALER_WELCOME")
 
     # ==================== INVOICE GENERATED EMAIL ====================
 
@@ -792,7 +823,7 @@ Aquapurite Private Limited
             f"Regards,\nAquapurite Team"
         )
 
-        return self.send_email(to_email, subject, html_content, text_content)
+        return self.send_email(to_email, subject, html_content, text_content, email_type="INVOICE")
 
     # ==================== PURCHASE ORDER EMAIL ====================
 
@@ -945,7 +976,7 @@ Aquapurite Private Limited
 
         attachments = [(f"{po_number}.html", po_html_bytes, "text/html")]
 
-        return self.send_email(to_email, subject, html_content, text_content, attachments=attachments)
+        return self.send_email(to_email, subject, html_content, text_content, attachments=attachments, email_type="PURCHASE_ORDER")
 
 
 # ==================== SMS SERVICE (MSG91) ====================
@@ -1072,8 +1103,13 @@ class SMSService:
 
 
 # Create a default instance (will be configured via environment variables)
-def get_email_service() -> EmailService:
-    """Get configured email service instance."""
+def get_email_service(db: Optional[AsyncSession] = None) -> EmailService:
+    """
+    Get configured email service instance.
+
+    Pass the request's session to queue email in the same transaction as the
+    change that triggers it.
+    """
     from app.config import settings
 
     return EmailService(
@@ -1082,7 +1118,11 @@ def get_email_service() -> EmailService:
         smtp_user=getattr(settings, 'SMTP_USER', ''),
         smtp_password=getattr(settings, 'SMTP_PASSWORD', ''),
         from_email=getattr(settings, 'SMTP_FROM_EMAIL', ''),
-        from_name=getattr(settings, 'SMTP_FROM_NAME', 'Aquapurite ERP')
+        from_name=getattr(settings, 'SMTP_FROM_NAME', 'Aquapurite ERP'),
+        use_tls=settings.SMTP_USE_TLS,
+        timeout=settings.SMTP_TIMEOUT,
+        outbox=email_outbox,
+        session=db,
     )
 
 
@@ -1098,6 +1138,7 @@ def get_sms_service() -> SMSService:
 
 # ==================== NOTIFICATION HELPER ====================
 
+
 async def send_order_notifications(
     order_number: str,
     customer_email: Optional[str],
@@ -1107,23 +1148,27 @@ async def send_order_notifications(
     items: List[Dict],
     shipping_address: Dict,
     payment_method: str,
-    expected_delivery: Optional[str] = None
+    expected_delivery: Optional[str] = None,
+    db: Optional[AsyncSession] = None
 ):
     """
     Send all order confirmation notifications (email + SMS).
 
     This is the main function to call after order creation/payment confirmation.
+    Pass the request's session so the email is queued in the outbox and
+    committed with the caller's transaction.
     """
     from app.config import settings
 
-    email_service = get_email_service()
+    email_service = get_email_service(db)
     sms_service = get_sms_service()
 
     d2c_url = getattr(settings, 'D2C_FRONTEND_URL', 'https://www.aquapurite.com')
 
     # Send email if provided
     if customer_email:
-        email_service.send_order_confirmation_email(
+        await email_service.send_async(
+            email_service.send_order_confirmation_email,
             to_email=customer_email,
             order_number=order_number,
             customer_name=customer_name,
@@ -1154,21 +1199,26 @@ async def send_shipment_notifications(
     tracking_number: str,
     courier_name: str,
     tracking_url: Optional[str] = None,
-    expected_delivery: Optional[str] = None
+    expected_delivery: Optional[str] = None,
+    db: Optional[AsyncSession] = None
 ):
     """
     Send shipment notifications (email + SMS).
+
+    Pass the request's session so the email is queued in the outbox and
+    committed with the caller's transaction.
     """
     from app.config import settings
 
-    email_service = get_email_service()
+    email_service = get_email_service(db)
     sms_service = get_sms_service()
 
     d2c_url = getattr(settings, 'D2C_FRONTEND_URL', 'https://www.aquapurite.com')
 
     # Send email if provided
     if customer_email:
-        email_service.send_order_shipped_email(
+        await email_service.send_async(
+            email_service.send_order_shipped_email,
             to_email=customer_email,
             order_number=order_number,
             customer_name=customer_name,
@@ -23,10 +23,12 @@ from sqlalchemy.orm import selectinload
 
 from app.models.purchase import GoodsReceiptNote, GRNItem, PurchaseOrder, PurchaseOrderItem
 from app.models.serialization import POSerial, SerialStatus
-from app.models.inventory import StockItem, StockItemStatus, InventorySummary, StockMovement, StockMovementType
+from app.models.inventory import StockItem, StockItemStatus, StockMovement, StockMovementType
 from app.models.product import Product
 from app.models.warehouse import Warehouse
 from app.models.user import User
+from app.services.serialization import SerializationService
+from app.services.inventory_ledger import InventoryLedgerService
 
 
 class GRNService:
@@ -61,6 +63,24 @@ class GRNService:
                 "wrong_product": ["serial6"],  # Serial belongs to different product
             }
         """
+        serial_service = SerializationService(self.db)
+
+        # PO serials ready to receive, and the scanned barcodes resolved in one pass
+        expected = await serial_service.get_po_serial_barcodes(po_id, SerializationService.RECEIVABLE_STATUSES)
+        scanned_info = await serial_service.get_serials_by_barcodes(scanned_serials)
+
+        return self._match_serials(
+            expected.get(str(product_id), set()), product_id, scanned_serials, scanned_info
+        )
+
+    def _match_serials(
+        self,
+        po_serial_barcodes: set,
+        product_id: uuid.UUID,
+        scanned_serials: List[str],
+        scanned_serial_info: Dict[str, POSerial],
+    ) -> Dict[str, Any]:
+        """Classify scanned barcodes against the PO's receivable barcodes (in memory)."""
         result = {
             "is_valid": True,
             "matched": [],
@@ -68,46 +88,24 @@ class GRNService:
             "missing_from_scan": [],
             "already_received": [],
             "wrong_product": [],
-            "total_expected": 0,
+            "total_expected": len(po_serial_barcodes),
             "total_scanned": len(scanned_serials),
         }
 
-        # Get all PO serials for this PO and product that are ready to receive
-        po_serials_query = select(POSerial).where(
-            and_(
-                POSerial.po_id == po_id,
-                POSerial.product_id == product_id,
-                POSerial.status.in_(["GENERATED", "PRINTED", "SENT_TO_VENDOR"]),
-            )
-        )
-        po_serials_result = await self.db.execute(po_serials_query)
-        po_serials = po_serials_result.scalars().all()
-
-        # Build lookup sets
-        po_serial_barcodes = {s.barcode for s in po_serials}
         scanned_set = set(scanned_serials)
-
-        result["total_expected"] = len(po_serial_barcodes)
+        scanned_info = {barcode: scanned_serial_info.get(barcode.upper()) for barcode in scanned_set}
 
         # Check for already received serials (same barcode, status RECEIVED/ASSIGNED)
-        already_received_query = select(POSerial.barcode).where(
-            and_(
-                POSerial.barcode.in_(scanned_serials),
-                POSerial.status.in_(["RECEIVED", "ASSIGNED", "SOLD"]),
-            )
-        )
-        already_received_result = await self.db.execute(already_received_query)
-        already_received = {row[0] for row in already_received_result.all()}
+        already_received = {
+            barcode for barcode, serial in scanned_info.items()
+            if serial is not None and serial.status in ("RECEIVED", "ASSIGNED", "SOLD")
+        }
 
         # Check for serials belonging to different products
-        wrong_product_query = select(POSerial.barcode).where(
-            and_(
-                POSerial.barcode.in_(scanned_serials),
-                POSerial.product_id != product_id,
-            )
-        )
-        wrong_product_result = await self.db.execute(wrong_product_query)
-        wrong_product = {row[0] for row in wrong_product_result.all()}
+        wrong_product = {
+            barcode for barcode, serial in scanned_info.items()
+            if serial is not None and serial.product_id is not None and str(serial.product_id) != str(product_id)
+        }
 
         # Calculate matches and mismatches
         result["matched"] = list(scanned_set & po_serial_barcodes - already_received - wrong_product)
@@ -156,6 +154,15 @@ class GRNService:
             "requires_force": False,
         }
 
+        # One pass for the whole GRN: receivable PO serials by product, and every scanned barcode
+        serial_service = SerializationService(self.db)
+        expected = await serial_service.get_po_serial_barcodes(
+            grn.purchase_order_id, SerializationService.RECEIVABLE_STATUSES
+        )
+        scanned_info = await serial_service.get_serials_by_barcodes(
+            barcode for item in grn.items for barcode in (item.serial_numbers or [])
+        )
+
         for item in grn.items:
             if not item.serial_numbers:
                 # No serials provided for this item
@@ -168,10 +175,11 @@ class GRNService:
                 })
                 continue
 
-            validation = await self.validate_serials_for_grn(
-                po_id=grn.purchase_order_id,
-                product_id=item.product_id,
-                scanned_serials=item.serial_numbers,
+            validation = self._match_serials(
+                expected.get(str(item.product_id), set()),
+                item.product_id,
+                item.serial_numbers,
+                scanned_info,
             )
 
             overall_result["items"].append({
@@ -240,6 +248,7 @@ class GRNService:
         }
 
         now = datetime.now(timezone.utc)
+        serial_service = SerializationService(self.db)
 
         for grn_item in grn.items:
             if grn_item.quantity_accepted <= 0:
@@ -255,15 +264,10 @@ class GRNService:
             # If serials are provided, create stock_items from serials
             if grn_item.serial_numbers:
                 for barcode in grn_item.serial_numbers[:grn_item.quantity_accepted]:
-                    # Get the PO serial
-                    po_serial_query = select(POSerial).where(
-                        and_(
-                            POSerial.barcode == barcode,
-                            POSerial.po_id == grn.purchase_order_id,
-                        )
-                    )
-                    po_serial_result = await self.db.execute(po_serial_query)
-                    po_serial = po_serial_result.scalar_one_or_none()
+                    # Get the PO serial (stored row or range unit)
+                    po_serial = await serial_service.get_serial_by_barcode(barcode)
+                    if po_serial and po_serial.po_id != str(grn.purchase_order_id):
+                        po_serial = None
 
                     # Create stock item
                     stock_item = StockItem(
@@ -297,6 +301,7 @@ class GRNService:
 
                     # Update PO serial
                     if po_serial:
+                        serial_service.persist_serial(po_serial)
                         po_serial.status = "RECEIVED"
                         po_serial.grn_id = grn.id
                         po_serial.grn_item_id = grn_item.id
@@ -374,60 +379,29 @@ class GRNService:
         user_id: uuid.UUID,
     ) -> Dict[str, Any]:
         """
-        Update inventory_summary for a product/warehouse combination.
+        Record a quantity change for a product/warehouse combination in the
+        inventory ledger (folded into inventory_summary, receipts move the
+        weighted average cost).
 
-        Creates the record if it doesn't exist.
         Creates a stock_movement record for audit trail.
         """
-        # Find or create inventory summary
-        inv_query = select(InventorySummary).where(
-            and_(
-                InventorySummary.warehouse_id == warehouse_id,
-                InventorySummary.product_id == product_id,
-                InventorySummary.variant_id == variant_id if variant_id else InventorySummary.variant_id.is_(None),
-            )
+        # Current balance from the inventory ledger; the change itself is
+        # appended there and folded into inventory_summary
+        ledger = InventoryLedgerService(self.db)
+        cell = (warehouse_id, product_id, variant_id, None)
+        balance_before = (await ledger.levels([cell]))[cell]["total_quantity"]
+        balance_after = balance_before + quantity_change
+        ledger.record(
+            warehouse_id,
+            product_id,
+            source=reference_type.lower(),
+            variant_id=variant_id,
+            total=quantity_change,
+            available=quantity_change,
+            value=quantity_change * unit_cost if quantity_change > 0 else 0,
+            reference_id=reference_id,
+            reference_number=reference_number,
         )
-        inv_result = await self.db.execute(inv_query)
-        inventory = inv_result.scalar_one_or_none()
-
-        balance_before = 0
-        balance_after = quantity_change
-
-        if inventory:
-            balance_before = inventory.total_quantity
-            # Update with weighted average cost
-            if quantity_change > 0:
-                # Receiving stock - calculate weighted average
-                total_value = (inventory.total_quantity * inventory.average_cost) + (quantity_change * unit_cost)
-                new_total = inventory.total_quantity + quantity_change
-                inventory.average_cost = total_value / new_total if new_total > 0 else unit_cost
-                inventory.total_value = total_value
-
-            inventory.total_quantity += quantity_change
-            inventory.available_quantity += quantity_change
-            inventory.last_stock_in_date = datetime.now(timezone.utc)
-            balance_after = inventory.total_quantity
-        else:
-            # Create new inventory summary
-            inventory = InventorySummary(
-                warehouse_id=warehouse_id,
-                product_id=product_id,
-                variant_id=variant_id,
-                total_quantity=quantity_change,
-                available_quantity=quantity_change,
-                reserved_quantity=0,
-                allocated_quantity=0,
-                damaged_quantity=0,
-                in_transit_quantity=0,
-                average_cost=unit_cost,
-                total_value=quantity_change * unit_cost,
-                reorder_level=10,  # Default
-                minimum_stock=5,
-                maximum_stock=1000,
-                last_stock_in_date=datetime.now(timezone.utc),
-            )
-            self.db.add(inventory)
-            balance_after = quantity_change
 
         # Create stock movement for audit trail
         movement_number = await self._generate_movement_number()
@@ -27,6 +27,8 @@ import os
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.http_client import http_client, token_cache
+from app.database import release_connection
 from app.models.company import Company
 from app.models.billing import TaxInvoice, InvoiceItem
 
@@ -62,6 +64,9 @@ class GSTEInvoiceService:
     CANCEL_IRN_PATH = "/eicore/v1.03/Invoice/Cancel"
     GET_GSTIN_PATH = "/eivital/v1.03/Master/gstin"
 
+    # NIC error code returned for an expired or revoked auth token
+    INVALID_TOKEN_CODES = {"1005"}
+
     def __init__(self, db: AsyncSession, company_id: UUID):
         self.db = db
         self.company_id = company_id
@@ -69,6 +74,7 @@ class GSTEInvoiceService:
         self._auth_token: Optional[str] = None
         self._token_expiry: Optional[datetime] = None
         self._sek: Optional[bytes] = None  # Session Encryption Key
+        self._token_key: Optional[str] = None
 
     async def _get_company(self) -> Company:
         """Get company with E-Invoice settings."""
@@ -159,6 +165,66 @@ class GSTEInvoiceService:
         if self._auth_token and self._token_expiry and datetime.now(timezone.utc) < self._token_expiry:
             return self._auth_token
 
+        # Token and SEK are shared by all service instances of the company until expiry
+        company = await self._get_company()
+        self._token_key = f"gst_einvoice:{self.company_id}:{company.einvoice_api_mode}"
+        self._auth_token, self._sek, self._token_expiry = await token_cache.get_or_fetch(self._token_key, self._login)
+        return self._auth_token
+
+    def _token_rejected(self, response: httpx.Response) -> bool:
+        """True if the portal refused the auth token (HTTP 401 or an invalid-token error)."""
+        if response.status_code == 401:
+            return True
+        try:
+            result = response.json()
+        except ValueError:
+            return False
+        if not isinstance(result, dict) or result.get("Status") == 1:
+            return False
+        codes = {str(error.get("ErrorCode")) for error in result.get("ErrorDetails") or []}
+        return bool(codes & self.INVALID_TOKEN_CODES)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        timeout: float,
+        payload: Optional[Dict] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        """
+        Authenticated request to the NIC portal; payload is encrypted with the SEK.
+
+        If the portal rejects the token, it is dropped from the shared cache
+        and the request is retried once after a fresh login.
+        """
+        for attempt in range(2):
+            await self.authenticate()
+            company = await self._get_company()
+            request_headers = {
+                "Content-Type": "application/json",
+                "gstin": company.gstin,
+                "auth-token": self._auth_token,
+                "user_name": company.einvoice_username,
+                **(headers or {}),
+            }
+            body = {"Data": self._encrypt_request(payload, self._sek)} if payload is not None else None
+
+            await release_connection(self.db)
+
+            async with http_client("gst_einvoice", timeout=timeout) as client:
+                response = await client.request(
+                    method, f"{self.base_url}{path}", json=body, headers=request_headers
+                )
+
+            if attempt == 0 and self._token_rejected(response):
+                token_cache.invalidate(self._token_key, (self._auth_token, self._sek, self._token_expiry))
+                self._auth_token = self._token_expiry = None
+                continue
+            return response
+
+    async def _login(self):
+        """Log in to the NIC portal; returns ((auth_token, sek, expiry), expiry)."""
         company = await self._get_company()
         password = self._decrypt_password(company.einvoice_password_encrypted or "")
 
@@ -177,7 +243,9 @@ class GSTEInvoiceService:
             "client-secret": password,
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        await release_connection(self.db)
+
+        async with http_client("gst_einvoice", timeout=30.0) as client:
             try:
                 response = await client.post(
                     f"{self.base_url}{self.AUTH_PATH}",
@@ -188,11 +256,10 @@ class GSTEInvoiceService:
                 result = response.json()
 
                 if result.get("Status") == 1:
-                    self._auth_token = result["Data"]["AuthToken"]
-                    self._sek = base64.b64decode(result["Data"]["Sek"])
                     # Token valid for 6 hours, refresh at 5.5 hours
-                    self._token_expiry = datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)
-                    return self._auth_token
+                    expiry = datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)
+                    sek = base64.b64decode(result["Data"]["Sek"])
+                    return (result["Data"]["AuthToken"], sek, expiry), expiry
                 else:
                     raise GSTEInvoiceError(
                         message=result.get("ErrorDetails", [{}])[0].get("ErrorMessage", "Authentication failed"),
@@ -329,70 +396,50 @@ class GSTEInvoiceService:
         # Build payload
         payload = self._build_invoice_payload(invoice)
 
-        # Encrypt payload
-        encrypted_payload = self._encrypt_request(payload, self._sek)
+        try:
+            response = await self._send("POST", self.GENERATE_IRN_PATH, 60.0, payload)
+            response.raise_for_status()
+            result = response.json()
 
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "auth-token": self._auth_token,
-            "user_name": company.einvoice_username,
-        }
+            if result.get("Status") == 1:
+                # Decrypt response
+                decrypted_data = self._decrypt_response(result["Data"], self._sek)
 
-        request_body = {
-            "Data": encrypted_payload
-        }
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}{self.GENERATE_IRN_PATH}",
-                    json=request_body,
-                    headers=headers
+                # Update invoice with IRN details
+                invoice.irn = decrypted_data["Irn"]
+                invoice.ack_number = decrypted_data["AckNo"]
+                invoice.ack_date = datetime.strptime(
+                    decrypted_data["AckDt"], "%Y-%m-%d %H:%M:%S"
                 )
-                response.raise_for_status()
-                result = response.json()
+                invoice.irn_generated_at = datetime.now(timezone.utc)
+                invoice.signed_qr_code = decrypted_data.get("SignedQRCode")
+                invoice.signed_invoice_data = decrypted_data.get("SignedInvoice")
+                invoice.status = "IRN_GENERATED"
 
-                if result.get("Status") == 1:
-                    # Decrypt response
-                    decrypted_data = self._decrypt_response(result["Data"], self._sek)
-
-                    # Update invoice with IRN details
-                    invoice.irn = decrypted_data["Irn"]
-                    invoice.ack_number = decrypted_data["AckNo"]
-                    invoice.ack_date = datetime.strptime(
-                        decrypted_data["AckDt"], "%Y-%m-%d %H:%M:%S"
-                    )
-                    invoice.irn_generated_at = datetime.now(timezone.utc)
-                    invoice.signed_qr_code = decrypted_data.get("SignedQRCode")
-                    invoice.signed_invoice_data = decrypted_data.get("SignedInvoice")
-                    invoice.status = "IRN_GENERATED"
-
-                    await self.db.commit()
-                    await self.db.refresh(invoice)
-
-                    return {
-                        "irn": invoice.irn,
-                        "ack_number": invoice.ack_number,
-                        "ack_date": invoice.ack_date,
-                        "signed_qr_code": invoice.signed_qr_code,
-                        "status": "SUCCESS"
-                    }
-                else:
-                    error_details = result.get("ErrorDetails", [{}])[0]
-                    raise GSTEInvoiceError(
-                        message=error_details.get("ErrorMessage", "IRN generation failed"),
-                        error_code=error_details.get("ErrorCode"),
-                        details=result
-                    )
+                await self.db.commit()
+                await self.db.refresh(invoice)
 
-            except httpx.HTTPStatusError as e:
+                return {
+                    "irn": invoice.irn,
+                    "ack_number": invoice.ack_number,
+                    "ack_date": invoice.ack_date,
+                    "signed_qr_code": invoice.signed_qr_code,
+                    "status": "SUCCESS"
+                }
+            else:
+                error_details = result.get("ErrorDetails", [{}])[0]
                 raise GSTEInvoiceError(
-                    message=f"IRN generation HTTP error: {e.response.status_code}",
-                    details={"response": e.response.text}
+                    message=error_details.get("ErrorMessage", "IRN generation failed"),
+                    error_code=error_details.get("ErrorCode"),
+                    details=result
                 )
 
+        except httpx.HTTPStatusError as e:
+            raise GSTEInvoiceError(
+                message=f"IRN generation HTTP error: {e.response.status_code}",
+                details={"response": e.response.text}
+            )
+
     async def cancel_irn(self, invoice_id: UUID, reason: str, cancel_remarks: str = "") -> Dict:
         """
         Cancel IRN within 24 hours of generation.
@@ -431,147 +478,99 @@ class GSTEInvoiceService:
             "CnlRem": cancel_remarks or f"Cancelled: {reason}"
         }
 
-        encrypted_payload = self._encrypt_request(cancel_payload, self._sek)
-
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "auth-token": self._auth_token,
-            "user_name": company.einvoice_username,
-        }
-
-        request_body = {
-            "Data": encrypted_payload
-        }
+        try:
+            response = await self._send("POST", self.CANCEL_IRN_PATH, 60.0, cancel_payload)
+            response.raise_for_status()
+            result = response.json()
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}{self.CANCEL_IRN_PATH}",
-                    json=request_body,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get("Status") == 1:
-                    decrypted_data = self._decrypt_response(result["Data"], self._sek)
+            if result.get("Status") == 1:
+                decrypted_data = self._decrypt_response(result["Data"], self._sek)
 
-                    invoice.irn_cancelled_at = datetime.now(timezone.utc)
-                    invoice.irn_cancel_reason = cancel_remarks or reason
-                    invoice.status = "IRN_CANCELLED"
+                invoice.irn_cancelled_at = datetime.now(timezone.utc)
+                invoice.irn_cancel_reason = cancel_remarks or reason
+                invoice.status = "IRN_CANCELLED"
 
-                    await self.db.commit()
+                await self.db.commit()
 
-                    return {
-                        "irn": invoice.irn,
-                        "cancel_date": decrypted_data.get("CancelDate"),
-                        "status": "CANCELLED"
-                    }
-                else:
-                    error_details = result.get("ErrorDetails", [{}])[0]
-                    raise GSTEInvoiceError(
-                        message=error_details.get("ErrorMessage", "IRN cancellation failed"),
-                        error_code=error_details.get("ErrorCode"),
-                        details=result
-                    )
-
-            except httpx.HTTPStatusError as e:
+                return {
+                    "irn": invoice.irn,
+                    "cancel_date": decrypted_data.get("CancelDate"),
+                    "status": "CANCELLED"
+                }
+            else:
+                error_details = result.get("ErrorDetails", [{}])[0]
                 raise GSTEInvoiceError(
-                    message=f"IRN cancellation HTTP error: {e.response.status_code}",
-                    details={"response": e.response.text}
+                    message=error_details.get("ErrorMessage", "IRN cancellation failed"),
+                    error_code=error_details.get("ErrorCode"),
+                    details=result
                 )
 
+        except httpx.HTTPStatusError as e:
+            raise GSTEInvoiceError(
+                message=f"IRN cancellation HTTP error: {e.response.status_code}",
+                details={"response": e.response.text}
+            )
+
     async def get_irn_details(self, irn: str) -> Dict:
         """Get details of an existing IRN."""
-        await self.authenticate()
-
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "auth-token": self._auth_token,
-            "user_name": company.einvoice_username,
-            "irn": irn
-        }
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}{self.GET_IRN_PATH}/{irn}",
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get("Status") == 1:
-                    return self._decrypt_response(result["Data"], self._sek)
-                else:
-                    error_details = result.get("ErrorDetails", [{}])[0]
-                    raise GSTEInvoiceError(
-                        message=error_details.get("ErrorMessage", "Failed to get IRN details"),
-                        error_code=error_details.get("ErrorCode"),
-                        details=result
-                    )
-
-            except httpx.HTTPStatusError as e:
+        try:
+            response = await self._send("GET", f"{self.GET_IRN_PATH}/{irn}", 30.0, headers={"irn": irn})
+            response.raise_for_status()
+            result = response.json()
+
+            if result.get("Status") == 1:
+                return self._decrypt_response(result["Data"], self._sek)
+            else:
+                error_details = result.get("ErrorDetails", [{}])[0]
                 raise GSTEInvoiceError(
-                    message=f"Get IRN HTTP error: {e.response.status_code}",
-                    details={"response": e.response.text}
+                    message=error_details.get("ErrorMessage", "Failed to get IRN details"),
+                    error_code=error_details.get("ErrorCode"),
+                    details=result
                 )
 
+        except httpx.HTTPStatusError as e:
+            raise GSTEInvoiceError(
+                message=f"Get IRN HTTP error: {e.response.status_code}",
+                details={"response": e.response.text}
+            )
+
     async def verify_gstin(self, gstin: str) -> Dict:
         """
         Verify a GSTIN via the E-Invoice portal.
 
         Returns taxpayer details if valid.
         """
-        await self.authenticate()
-
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "auth-token": self._auth_token,
-            "user_name": company.einvoice_username,
-        }
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}{self.GET_GSTIN_PATH}/{gstin}",
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
+        try:
+            response = await self._send("GET", f"{self.GET_GSTIN_PATH}/{gstin}", 30.0)
+            response.raise_for_status()
+            result = response.json()
 
-                if result.get("Status") == 1:
-                    data = self._decrypt_response(result["Data"], self._sek)
-                    return {
-                        "gstin": data.get("Gstin"),
-                        "legal_name": data.get("LegalName"),
-                        "trade_name": data.get("TradeName"),
-                        "address": data.get("AddrBnm"),
-                        "state_code": data.get("StateCode"),
-                        "pincode": data.get("AddrPncd"),
-                        "status": data.get("Status"),
-                        "is_valid": data.get("Status") == "Active"
-                    }
-                else:
-                    return {
-                        "gstin": gstin,
-                        "is_valid": False,
-                        "error": result.get("ErrorDetails", [{}])[0].get("ErrorMessage")
-                    }
-
-            except httpx.HTTPStatusError as e:
+            if result.get("Status") == 1:
+                data = self._decrypt_response(result["Data"], self._sek)
+                return {
+                    "gstin": data.get("Gstin"),
+                    "legal_name": data.get("LegalName"),
+                    "trade_name": data.get("TradeName"),
+                    "address": data.get("AddrBnm"),
+                    "state_code": data.get("StateCode"),
+                    "pincode": data.get("AddrPncd"),
+                    "status": data.get("Status"),
+                    "is_valid": data.get("Status") == "Active"
+                }
+            else:
                 return {
                     "gstin": gstin,
                     "is_valid": False,
-                    "error": f"Verification failed: {e.response.status_code}"
+                    "error": result.get("ErrorDetails", [{}])[0].get("ErrorMessage")
                 }
 
+        except httpx.HTTPStatusError as e:
+            return {
+                "gstin": gstin,
+                "is_valid": False,
+                "error": f"Verification failed: {e.response.status_code}"
+            }
+
 
 # Utility function for generating QR code image from signed QR data
 def generate_qr_code_image(signed_qr_code: str) -> bytes:
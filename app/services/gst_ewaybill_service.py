@@ -32,6 +32,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.http_client import http_client, token_cache
+from app.database import release_connection
 from app.models.company import Company
 from app.models.billing import EWayBill, EWayBillItem, EWayBillStatus, TaxInvoice
 
@@ -76,6 +78,9 @@ class GSTEWayBillService:
     CONSOLIDATED_EWB_PATH = "/ewayapi/CEWB"
     GET_TRANSPORTER_PATH = "/ewayapi/GetTransporterDetails"
 
+    # NIC error code returned for an invalid or expired auth token
+    INVALID_TOKEN_CODES = {"238"}
+
     # Supply Type Codes
     SUPPLY_TYPES = {
         "O": "Outward",
@@ -128,6 +133,7 @@ class GSTEWayBillService:
         self._company: Optional[Company] = None
         self._auth_token: Optional[str] = None
         self._token_expiry: Optional[datetime] = None
+        self._token_key: Optional[str] = None
 
     async def _get_company(self) -> Company:
         """Get company with E-Way Bill settings."""
@@ -174,6 +180,55 @@ class GSTEWayBillService:
         if self._auth_token and self._token_expiry and datetime.now(timezone.utc) < self._token_expiry:
             return self._auth_token
 
+        # Token is shared by all service instances of the company until expiry
+        company = await self._get_company()
+        self._token_key = f"gst_ewaybill:{self.company_id}:{company.ewaybill_api_mode}"
+        self._auth_token, self._token_expiry = await token_cache.get_or_fetch(self._token_key, self._login)
+        return self._auth_token
+
+    def _token_rejected(self, response: httpx.Response) -> bool:
+        """True if the portal refused the auth token (HTTP 401 or an invalid-token error)."""
+        if response.status_code == 401:
+            return True
+        try:
+            result = response.json()
+        except ValueError:
+            return False
+        if not isinstance(result, dict) or result.get("status") == 1:
+            return False
+        error = result.get("error") or {}
+        codes = {code.strip() for code in str(error.get("errorCodes") or "").split(",")}
+        return bool(codes & self.INVALID_TOKEN_CODES)
+
+    async def _send(self, path: str, payload: Dict, timeout: float) -> httpx.Response:
+        """
+        Authenticated POST to the NIC portal.
+
+        If the portal rejects the token, it is dropped from the shared cache
+        and the request is retried once after a fresh login.
+        """
+        for attempt in range(2):
+            await self.authenticate()
+            company = await self._get_company()
+            headers = {
+                "Content-Type": "application/json",
+                "gstin": company.gstin,
+                "authToken": self._auth_token,
+            }
+
+            await release_connection(self.db)
+
+            async with http_client("gst_ewaybill", timeout=timeout) as client:
+                response = await client.post(f"{self.base_url}{path}", json=payload, headers=headers)
+
+            if attempt == 0 and self._token_rejected(response):
+                token_cache.invalidate(self._token_key, (self._auth_token, self._token_expiry))
+                self._auth_token = self._token_expiry = None
+                continue
+            return response
+
+    async def _login(self):
+        """Log in to the NIC portal; returns ((auth_token, expiry), expiry)."""
         company = await self._get_company()
 
         # Get decrypted password
@@ -193,7 +248,9 @@ class GSTEWayBillService:
             "gstin": company.gstin,
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        await release_connection(self.db)
+
+        async with http_client("gst_ewaybill", timeout=30.0) as client:
             try:
                 response = await client.post(
                     f"{self.base_url}{self.AUTH_PATH}",
@@ -204,10 +261,9 @@ class GSTEWayBillService:
                 result = response.json()
 
                 if result.get("status") == 1:
-                    self._auth_token = result.get("authToken")
                     # Token valid for 6 hours, but refresh after 5 hours
-                    self._token_expiry = datetime.now(timezone.utc) + timedelta(hours=5)
-                    return self._auth_token
+                    expiry = datetime.now(timezone.utc) + timedelta(hours=5)
+                    return (result.get("authToken"), expiry), expiry
                 else:
                     raise GSTEWayBillError(
                         message=result.get("error", {}).get("message", "Authentication failed"),
@@ -341,60 +397,48 @@ class GSTEWayBillService:
         payload = self._build_ewb_payload(ewb, invoice)
         payload["action"] = "GENEWAYBILL"
 
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "authToken": self._auth_token,
-        }
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}{self.GENERATE_EWB_PATH}",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get("status") == 1:
-                    ewb_data = result.get("data", {})
-
-                    # Update E-Way Bill record
-                    ewb.eway_bill_number = str(ewb_data.get("ewayBillNo"))
-                    ewb.generated_at = datetime.now(timezone.utc)
-                    ewb.valid_from = datetime.strptime(
-                        ewb_data.get("ewayBillDate"), "%d/%m/%Y %H:%M:%S"
-                    ) if ewb_data.get("ewayBillDate") else datetime.now(timezone.utc)
-                    ewb.valid_until = datetime.strptime(
-                        ewb_data.get("validUpto"), "%d/%m/%Y %H:%M:%S"
-                    ) if ewb_data.get("validUpto") else None
-                    ewb.status = EWayBillStatus.GENERATED.value
-
-                    await self.db.commit()
-                    await self.db.refresh(ewb)
-
-                    return {
-                        "ewb_number": ewb.eway_bill_number,
-                        "ewb_date": ewb.valid_from,
-                        "valid_until": ewb.valid_until,
-                        "status": "SUCCESS"
-                    }
-                else:
-                    error = result.get("error", {})
-                    raise GSTEWayBillError(
-                        message=error.get("message", "E-Way Bill generation failed"),
-                        error_code=error.get("errorCodes"),
-                        details=result
-                    )
-
-            except httpx.HTTPStatusError as e:
+        try:
+            response = await self._send(self.GENERATE_EWB_PATH, payload, 60.0)
+            response.raise_for_status()
+            result = response.json()
+
+            if result.get("status") == 1:
+                ewb_data = result.get("data", {})
+
+                # Update E-Way Bill record
+                ewb.eway_bill_number = str(ewb_data.get("ewayBillNo"))
+                ewb.generated_at = datetime.now(timezone.utc)
+                ewb.valid_from = datetime.strptime(
+                    ewb_data.get("ewayBillDate"), "%d/%m/%Y %H:%M:%S"
+                ) if ewb_data.get("ewayBillDate") else datetime.now(timezone.utc)
+                ewb.valid_until = datetime.strptime(
+                    ewb_data.get("validUpto"), "%d/%m/%Y %H:%M:%S"
+                ) if ewb_data.get("validUpto") else None
+                ewb.status = EWayBillStatus.GENERATED.value
+
+                await self.db.commit()
+                await self.db.refresh(ewb)
+
+                return {
+                    "ewb_number": ewb.eway_bill_number,
+                    "ewb_date": ewb.valid_from,
+                    "valid_until": ewb.valid_until,
+                    "status": "SUCCESS"
+                }
+            else:
+                error = result.get("error", {})
                 raise GSTEWayBillError(
-                    message=f"E-Way Bill generation HTTP error: {e.response.status_code}",
-                    details={"response": e.response.text}
+                    message=error.get("message", "E-Way Bill generation failed"),
+                    error_code=error.get("errorCodes"),
+                    details=result
                 )
 
+        except httpx.HTTPStatusError as e:
+            raise GSTEWayBillError(
+                message=f"E-Way Bill generation HTTP error: {e.response.status_code}",
+                details={"response": e.response.text}
+            )
+
     async def update_part_b(
         self,
         ewb_id: UUID,
@@ -462,55 +506,43 @@ class GSTEWayBillService:
         if transporter_id:
             payload["transporterId"] = transporter_id
 
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "authToken": self._auth_token,
-        }
+        try:
+            response = await self._send(self.UPDATE_PARTB_PATH, payload, 30.0)
+            response.raise_for_status()
+            result = response.json()
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}{self.UPDATE_PARTB_PATH}",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
+            if result.get("status") == 1:
+                # Update local record
+                ewb.vehicle_number = vehicle_number.upper().replace(" ", "")
+                ewb.transport_mode = transport_mode
 
-                if result.get("status") == 1:
-                    # Update local record
-                    ewb.vehicle_number = vehicle_number.upper().replace(" ", "")
-                    ewb.transport_mode = transport_mode
-
-                    if result.get("data", {}).get("validUpto"):
-                        ewb.valid_until = datetime.strptime(
-                            result["data"]["validUpto"], "%d/%m/%Y %H:%M:%S"
-                        )
-
-                    await self.db.commit()
-
-                    return {
-                        "ewb_number": ewb.eway_bill_number,
-                        "vehicle_number": ewb.vehicle_number,
-                        "valid_until": ewb.valid_until,
-                        "status": "SUCCESS"
-                    }
-                else:
-                    error = result.get("error", {})
-                    raise GSTEWayBillError(
-                        message=error.get("message", "Part-B update failed"),
-                        error_code=error.get("errorCodes"),
-                        details=result
+                if result.get("data", {}).get("validUpto"):
+                    ewb.valid_until = datetime.strptime(
+                        result["data"]["validUpto"], "%d/%m/%Y %H:%M:%S"
                     )
 
-            except httpx.HTTPStatusError as e:
+                await self.db.commit()
+
+                return {
+                    "ewb_number": ewb.eway_bill_number,
+                    "vehicle_number": ewb.vehicle_number,
+                    "valid_until": ewb.valid_until,
+                    "status": "SUCCESS"
+                }
+            else:
+                error = result.get("error", {})
                 raise GSTEWayBillError(
-                    message=f"Part-B update HTTP error: {e.response.status_code}",
-                    details={"response": e.response.text}
+                    message=error.get("message", "Part-B update failed"),
+                    error_code=error.get("errorCodes"),
+                    details=result
                 )
 
+        except httpx.HTTPStatusError as e:
+            raise GSTEWayBillError(
+                message=f"Part-B update HTTP error: {e.response.status_code}",
+                details={"response": e.response.text}
+            )
+
     async def cancel_ewaybill(self, ewb_id: UUID, reason_code: str, remarks: str = "") -> Dict:
         """
         Cancel E-Way Bill within 24 hours of generation.
@@ -550,49 +582,37 @@ class GSTEWayBillService:
             "cancelRmrk": remarks or f"Cancelled with reason code {reason_code}"
         }
 
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "authToken": self._auth_token,
-        }
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}{self.CANCEL_EWB_PATH}",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get("status") == 1:
-                    ewb.status = EWayBillStatus.CANCELLED.value
-                    ewb.cancelled_at = datetime.now(timezone.utc)
-                    ewb.cancel_reason = remarks or reason_code
-
-                    await self.db.commit()
-
-                    return {
-                        "ewb_number": ewb.eway_bill_number,
-                        "cancel_date": ewb.cancelled_at,
-                        "status": "CANCELLED"
-                    }
-                else:
-                    error = result.get("error", {})
-                    raise GSTEWayBillError(
-                        message=error.get("message", "E-Way Bill cancellation failed"),
-                        error_code=error.get("errorCodes"),
-                        details=result
-                    )
-
-            except httpx.HTTPStatusError as e:
+        try:
+            response = await self._send(self.CANCEL_EWB_PATH, payload, 30.0)
+            response.raise_for_status()
+            result = response.json()
+
+            if result.get("status") == 1:
+                ewb.status = EWayBillStatus.CANCELLED.value
+                ewb.cancelled_at = datetime.now(timezone.utc)
+                ewb.cancel_reason = remarks or reason_code
+
+                await self.db.commit()
+
+                return {
+                    "ewb_number": ewb.eway_bill_number,
+                    "cancel_date": ewb.cancelled_at,
+                    "status": "CANCELLED"
+                }
+            else:
+                error = result.get("error", {})
                 raise GSTEWayBillError(
-                    message=f"Cancellation HTTP error: {e.response.status_code}",
-                    details={"response": e.response.text}
+                    message=error.get("message", "E-Way Bill cancellation failed"),
+                    error_code=error.get("errorCodes"),
+                    details=result
                 )
 
+        except httpx.HTTPStatusError as e:
+            raise GSTEWayBillError(
+                message=f"Cancellation HTTP error: {e.response.status_code}",
+                details={"response": e.response.text}
+            )
+
     async def extend_validity(
         self,
         ewb_id: UUID,
@@ -656,127 +676,87 @@ class GSTEWayBillService:
             "consignmentStatus": transit_type
         }
 
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "authToken": self._auth_token,
-        }
+        try:
+            response = await self._send(self.EXTEND_VALIDITY_PATH, payload, 30.0)
+            response.raise_for_status()
+            result = response.json()
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}{self.EXTEND_VALIDITY_PATH}",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get("status") == 1:
-                    ewb_data = result.get("data", {})
-
-                    if ewb_data.get("validUpto"):
-                        ewb.valid_until = datetime.strptime(
-                            ewb_data["validUpto"], "%d/%m/%Y %H:%M:%S"
-                        )
-
-                    await self.db.commit()
+            if result.get("status") == 1:
+                ewb_data = result.get("data", {})
 
-                    return {
-                        "ewb_number": ewb.eway_bill_number,
-                        "new_validity": ewb.valid_until,
-                        "status": "EXTENDED"
-                    }
-                else:
-                    error = result.get("error", {})
-                    raise GSTEWayBillError(
-                        message=error.get("message", "E-Way Bill extension failed"),
-                        error_code=error.get("errorCodes"),
-                        details=result
+                if ewb_data.get("validUpto"):
+                    ewb.valid_until = datetime.strptime(
+                        ewb_data["validUpto"], "%d/%m/%Y %H:%M:%S"
                     )
 
-            except httpx.HTTPStatusError as e:
+                await self.db.commit()
+
+                return {
+                    "ewb_number": ewb.eway_bill_number,
+                    "new_validity": ewb.valid_until,
+                    "status": "EXTENDED"
+                }
+            else:
+                error = result.get("error", {})
                 raise GSTEWayBillError(
-                    message=f"Extension HTTP error: {e.response.status_code}",
-                    details={"response": e.response.text}
+                    message=error.get("message", "E-Way Bill extension failed"),
+                    error_code=error.get("errorCodes"),
+                    details=result
                 )
 
+        except httpx.HTTPStatusError as e:
+            raise GSTEWayBillError(
+                message=f"Extension HTTP error: {e.response.status_code}",
+                details={"response": e.response.text}
+            )
+
     async def get_ewaybill_details(self, ewb_number: str) -> Dict:
         """Get details of an existing E-Way Bill from portal."""
-        await self.authenticate()
-
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "authToken": self._auth_token,
-        }
-
         payload = {
             "action": "GETEWB",
             "ewbNo": int(ewb_number)
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}{self.GET_EWB_PATH}",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get("status") == 1:
-                    return result.get("data", {})
-                else:
-                    error = result.get("error", {})
-                    raise GSTEWayBillError(
-                        message=error.get("message", "Failed to get E-Way Bill details"),
-                        error_code=error.get("errorCodes"),
-                        details=result
-                    )
+        try:
+            response = await self._send(self.GET_EWB_PATH, payload, 30.0)
+            response.raise_for_status()
+            result = response.json()
 
-            except httpx.HTTPStatusError as e:
+            if result.get("status") == 1:
+                return result.get("data", {})
+            else:
+                error = result.get("error", {})
                 raise GSTEWayBillError(
-                    message=f"Get E-Way Bill HTTP error: {e.response.status_code}",
-                    details={"response": e.response.text}
+                    message=error.get("message", "Failed to get E-Way Bill details"),
+                    error_code=error.get("errorCodes"),
+                    details=result
                 )
 
+        except httpx.HTTPStatusError as e:
+            raise GSTEWayBillError(
+                message=f"Get E-Way Bill HTTP error: {e.response.status_code}",
+                details={"response": e.response.text}
+            )
+
     async def get_transporter_details(self, transporter_id: str) -> Dict:
         """Get transporter details by GSTIN."""
-        await self.authenticate()
-
-        company = await self._get_company()
-        headers = {
-            "Content-Type": "application/json",
-            "gstin": company.gstin,
-            "authToken": self._auth_token,
-        }
-
         payload = {
             "action": "GETTRANSDETAILS",
             "transId": transporter_id
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}{self.GET_TRANSPORTER_PATH}",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
+        try:
+            response = await self._send(self.GET_TRANSPORTER_PATH, payload, 30.0)
+            response.raise_for_status()
+            result = response.json()
 
-                if result.get("status") == 1:
-                    return result.get("data", {})
-                else:
-                    return {"error": result.get("error", {}).get("message", "Transporter not found")}
+            if result.get("status") == 1:
+                return result.get("data", {})
+            else:
+                return {"error": result.get("error", {}).get("message", "Transporter not found")}
 
-            except httpx.HTTPStatusError:
-                return {"error": "Failed to get transporter details"}
+        except httpx.HTTPStatusError:
+            return {"error": "Failed to get transporter details"}
 
 
 def calculate_ewb_validity_days(distance_km: int) -> int:
@@ -26,6 +26,8 @@ from sqlalchemy import select, func, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.http_client import http_client, token_cache
+from app.database import release_connection
 from app.models.company import Company
 from app.models.billing import TaxInvoice, CreditDebitNote, InvoiceStatus
 
@@ -142,6 +144,18 @@ class GSTFilingService:
 
         company = await self._get_company()
 
+        # Session token is shared by all service instances of the company until expiry
+        cache_key = f"gst_filing:{self.company_id}:{getattr(company, 'gst_api_mode', None)}"
+        cached = token_cache.get(cache_key)
+        if cached:
+            self._auth_token, self._token_expiry = cached
+            return {
+                "success": True,
+                "message": "Already authenticated",
+                "session_id": self._auth_token,
+                "expiry": self._token_expiry.isoformat(),
+            }
+
         # Get GSP credentials
         gsp_username = getattr(company, 'gsp_username', None) or company.gstin
         gsp_password = getattr(company, 'gsp_password', None)
@@ -169,7 +183,9 @@ class GSTFilingService:
             "Content-Type": "application/json",
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        await release_connection(self.db)
+
+        async with http_client("gst_filing", timeout=30.0) as client:
             try:
                 response = await client.post(
                     f"{self.base_url}{self.AUTH_PATH}",
@@ -182,6 +198,7 @@ class GSTFilingService:
                 if result.get("status") == 1 or result.get("success"):
                     self._auth_token = result.get("authToken") or result.get("auth_token")
                     self._token_expiry = datetime.now(timezone.utc) + timedelta(hours=5)
+                    token_cache.set(cache_key, (self._auth_token, self._token_expiry), self._token_expiry)
                     return {
                         "success": True,
                         "message": "Successfully authenticated with GST Portal",
@@ -446,7 +463,9 @@ class GSTFilingService:
             "ret_period": self._get_return_period(month, year),
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        await release_connection(self.db)
+
+        async with http_client("gst_filing", timeout=120.0) as client:
             try:
                 # Step 1: Save GSTR-1 data
                 save_response = await client.post(
@@ -608,7 +627,9 @@ class GSTFilingService:
             "ret_period": self._get_return_period(month, year),
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        await release_connection(self.db)
+
+        async with http_client("gst_filing", timeout=120.0) as client:
             try:
                 # Save, Submit, and File GSTR-3B
                 save_response = await client.post(
@@ -673,7 +694,9 @@ class GSTFilingService:
             "authToken": self._auth_token,
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        await release_connection(self.db)
+
+        async with http_client("gst_filing", timeout=30.0) as client:
             try:
                 response = await client.get(
                     f"{self.base_url}{self.FILING_STATUS_PATH}",
@@ -717,7 +740,9 @@ class GSTFilingService:
             "authToken": self._auth_token,
         }
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        await release_connection(self.db)
+
+        async with http_client("gst_filing", timeout=60.0) as client:
             try:
                 response = await client.get(
                     f"{self.base_url}{self.GSTR2A_PATH}",
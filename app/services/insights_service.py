@@ -26,6 +26,7 @@ from app.models.category import Category
 from app.models.customer import Customer
 from app.models.inventory import StockItem, InventorySummary
 from app.models.channel import SalesChannel
+from app.services.snop.demand_history import DemandHistoryService, BOOKED_STATUSES
 
 
 # ==================== Statistical Utility Functions ====================
@@ -131,6 +132,7 @@ class InsightsService:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.demand_history = DemandHistoryService(db)
 
     # ==================== SALES INSIGHTS ====================
 
@@ -145,36 +147,16 @@ class InsightsService:
         # Get historical daily revenue
         start_date = date.today() - timedelta(days=lookback_days)
 
-        query = select(
-            func.date(Order.created_at).label('order_date'),
-            func.sum(Order.total_amount).label('revenue')
-        ).where(
-            and_(
-                Order.created_at >= start_date,
-                Order.status.in_([OrderStatus.DELIVERED, OrderStatus.SHIPPED, OrderStatus.CONFIRMED, OrderStatus.IN_TRANSIT])
-            )
-        ).group_by(
-            func.date(Order.created_at)
-        ).order_by(
-            func.date(Order.created_at)
+        # Daily order value from the demand history store (missing days are 0)
+        history = await self.demand_history.get_daily_matrix(
+            start_date=start_date,
+            end_date=date.today(),
+            group_by=None,
+            measures=("order_value",),
+            statuses=BOOKED_STATUSES
         )
-
-        result = await self.db.execute(query)
-        rows = result.all()
-
-        # Build daily revenue map
-        daily_revenue = {}
-        for row in rows:
-            daily_revenue[row.order_date] = float(row.revenue or 0)
-
-        # Fill in missing days with 0
-        all_dates = []
-        all_values = []
-        current = start_date
-        while current <= date.today():
-            all_dates.append(current)
-            all_values.append(daily_revenue.get(current, 0))
-            current += timedelta(days=1)
+        all_dates = history["dates"]
+        all_values = history["order_value"].tolist()
 
         # Apply moving average smoothing
         smoothed = moving_average(all_values, window=7)
@@ -422,34 +404,14 @@ class InsightsService:
         # Get last 30 days of orders
         start_date = date.today() - timedelta(days=30)
 
-        query = select(
-            func.date(Order.created_at).label('order_date'),
-            func.count(Order.id).label('order_count')
-        ).where(
-            and_(
-                Order.created_at >= start_date,
-                Order.status != OrderStatus.CANCELLED
-            )
-        ).group_by(
-            func.date(Order.created_at)
-        ).order_by(
-            func.date(Order.created_at)
+        history = await self.demand_history.get_daily_matrix(
+            start_date=start_date,
+            end_date=date.today(),
+            group_by=None,
+            measures=("order_count",),
+            exclude_statuses=(OrderStatus.CANCELLED,)
         )
-
-        result = await self.db.execute(query)
-        rows = result.all()
-
-        # Build daily order counts
-        daily_orders = {}
-        for row in rows:
-            daily_orders[row.order_date] = row.order_count
-
-        # Fill missing days
-        all_counts = []
-        current = start_date
-        while current <= date.today():
-            all_counts.append(daily_orders.get(current, 0))
-            current += timedelta(days=1)
+        all_counts = [int(c) for c in history["order_count"]]
 
         # Linear regression
         x_values = list(range(len(all_counts)))
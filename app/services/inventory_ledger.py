@@ -0,0 +1,528 @@
+"""
+Inventory Ledger Service.
+
+inventory_ledger is the write path for inventory quantities: services call
+record() / record_many() to append deltas instead of updating
+inventory_summary and channel_inventory rows in place. fold() claims pending
+entries in id order, adds them up per cell and applies them with one
+INSERT ... ON CONFLICT DO UPDATE per target table and conflict target, so
+concurrent writers on a hot SKU append rows instead of queueing on one
+summary row lock.
+
+Summary rows lag the ledger by at most one fold (INVENTORY_LEDGER_FOLD_SECONDS,
+see app.jobs.inventory_ledger_jobs). levels(), product_levels() and
+stock_as_of() add the pending entries on top, reading rows and entries in
+one statement, and are exact; anything that
+gates a write on availability reads through them, never the rows alone.
+Writers that know an absolute quantity (an external stock sync, a count)
+use set_levels(), which records the difference from the exact level.
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, and_, case, cast, func, insert, literal, null, or_, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.config import settings
+from app.models.channel import ChannelInventory
+from app.models.inventory import InventorySummary
+from app.models.inventory_ledger import InventoryLedgerEntry
+
+
+# (warehouse_id, product_id, variant_id, channel_id); channel_id None = inventory_summary cell
+Cell = Tuple[uuid.UUID, uuid.UUID, Optional[uuid.UUID], Optional[uuid.UUID]]
+
+# Ledger delta column -> inventory_summary column
+SUMMARY_COLUMNS = {
+    "total_delta": "total_quantity",
+    "available_delta": "available_quantity",
+    "reserved_delta": "reserved_quantity",
+    "allocated_delta": "allocated_quantity",
+    "damaged_delta": "damaged_quantity",
+    "in_transit_delta": "in_transit_quantity",
+}
+# Ledger delta column -> channel_inventory column
+CHANNEL_COLUMNS = {
+    "allocated_delta": "allocated_quantity",
+    "reserved_delta": "reserved_quantity",
+}
+DELTA_COLUMNS = (*SUMMARY_COLUMNS, "value_delta")
+# Summary / channel column -> record() argument
+RECORD_ARGUMENTS = {column: delta[:-len("_delta")] for delta, column in SUMMARY_COLUMNS.items()}
+
+
+def cell_filter(model, cell: Cell):
+    """WHERE clause matching one cell on a model with the cell's key columns."""
+    warehouse_id, product_id, variant_id, channel_id = cell
+    conditions = [
+        model.warehouse_id == warehouse_id,
+        model.product_id == product_id,
+        model.variant_id == variant_id if variant_id else model.variant_id.is_(None),
+    ]
+    if model is not InventorySummary:
+        conditions.append(model.channel_id == channel_id if channel_id else model.channel_id.is_(None))
+    return and_(*conditions)
+
+
+class InventoryLedgerService:
+    """Append inventory deltas, fold them into summaries and read exact levels."""
+
+    # Summary cells per upsert statement (keeps bind parameters under the driver limit)
+    UPSERT_CHUNK = 1000
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # ==================== Recording ====================
+
+    def record(
+        self,
+        warehouse_id: uuid.UUID,
+        product_id: uuid.UUID,
+        source: str,
+        variant_id: Optional[uuid.UUID] = None,
+        channel_id: Optional[uuid.UUID] = None,
+        total: int = 0,
+        available: int = 0,
+        reserved: int = 0,
+        allocated: int = 0,
+        damaged: int = 0,
+        in_transit: int = 0,
+        value: float = 0,
+        reference_id: Optional[uuid.UUID] = None,
+        reference_number: Optional[str] = None,
+    ) -> InventoryLedgerEntry:
+        """Add one ledger entry to the session (written with the caller's transaction)."""
+        entry = InventoryLedgerEntry(
+            warehouse_id=warehouse_id,
+            product_id=product_id,
+            variant_id=variant_id,
+            channel_id=channel_id,
+            total_delta=total,
+            available_delta=available,
+            reserved_delta=reserved,
+            allocated_delta=allocated,
+            damaged_delta=damaged,
+            in_transit_delta=in_transit,
+            value_delta=value,
+            source=source,
+            reference_id=reference_id,
+            reference_number=reference_number,
+            occurred_at=datetime.now(timezone.utc),
+        )
+        self.db.add(entry)
+        return entry
+
+    async def record_many(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        Append many entries with one executemany INSERT. Each dict holds the
+        cell columns, source and any *_delta / reference columns.
+        """
+        if not entries:
+            return 0
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "variant_id": None, "channel_id": None, "reference_id": None, "reference_number": None,
+                "occurred_at": now,
+                **{column: 0 for column in DELTA_COLUMNS},
+                **entry,
+            }
+            for entry in entries
+        ]
+        await self.db.execute(insert(InventoryLedgerEntry.__table__), rows)
+        return len(rows)
+
+    async def set_levels(
+        self,
+        cell: Cell,
+        source: str,
+        reference_id: Optional[uuid.UUID] = None,
+        reference_number: Optional[str] = None,
+        **targets: int,
+    ) -> Optional[InventoryLedgerEntry]:
+        """
+        Record the entry that brings a cell to absolute quantities, given by
+        column name (available_quantity=..., for a channel cell
+        allocated_quantity / reserved_quantity). The cell's summary or
+        channel row is locked first, so two absolute writers on one cell
+        apply one after the other; deltas appended meanwhile by other writers
+        still add up. Returns None when the cell is already at the targets.
+        """
+        model = ChannelInventory if cell[3] else InventorySummary
+        await self.db.execute(select(model.id).where(cell_filter(model, cell)).with_for_update())
+        current = (await self.levels([cell]))[cell]
+        deltas = {
+            RECORD_ARGUMENTS[column]: target - current[column]
+            for column, target in targets.items()
+            if target is not None and target != current[column]
+        }
+        if not deltas:
+            return None
+        warehouse_id, product_id, variant_id, channel_id = cell
+        return self.record(
+            warehouse_id, product_id, source, variant_id=variant_id, channel_id=channel_id,
+            reference_id=reference_id, reference_number=reference_number, **deltas,
+        )
+
+    # ==================== Reading ====================
+
+    async def levels(self, cells: Iterable[Cell], flush: bool = True) -> Dict[Cell, Dict[str, int]]:
+        """
+        Current quantities per cell: the summary row plus pending ledger
+        entries, read in one statement (see _levels_query). Keys are
+        inventory_summary / channel_inventory column names; cells without a
+        row or entries come back as zeros.
+
+        flush=False leaves entries added to the session but not yet flushed
+        out of the result.
+        """
+        cells = list(dict.fromkeys(cells))
+        if not cells:
+            return {}
+        if flush:
+            await self.db.flush()
+
+        levels: Dict[Cell, Dict[str, int]] = {}
+        for cell in cells:
+            columns = CHANNEL_COLUMNS if cell[3] else SUMMARY_COLUMNS
+            levels[cell] = {column: 0 for column in columns.values()}
+
+        query = self._levels_query(
+            product_ids={cell[1] for cell in cells},
+            warehouse_ids={cell[0] for cell in cells},
+            summary=any(cell[3] is None for cell in cells),
+            channel_ids={cell[3] for cell in cells if cell[3]},
+        )
+        for cell, level, _ in await self._read_levels(query):
+            if cell in levels:
+                levels[cell] = level
+        return levels
+
+    async def product_levels(
+        self,
+        product_ids: Iterable[uuid.UUID],
+        warehouse_id: Optional[uuid.UUID] = None,
+        channel_id: Optional[uuid.UUID] = None,
+        flush: bool = True,
+    ) -> Dict[Cell, Dict[str, int]]:
+        """
+        Current quantities of every cell holding the products (optionally in
+        one warehouse), like levels() but found by product: inventory_summary
+        cells, or with channel_id that channel's active channel_inventory
+        cells (which also carry buffer_quantity). Cells that only have
+        pending entries so far are included.
+        """
+        product_ids = set(product_ids)
+        if not product_ids:
+            return {}
+        if flush:
+            await self.db.flush()
+
+        query = self._levels_query(
+            product_ids=product_ids,
+            warehouse_ids={warehouse_id} if warehouse_id else None,
+            summary=channel_id is None,
+            channel_ids={channel_id} if channel_id else (),
+        )
+        levels: Dict[Cell, Dict[str, int]] = {}
+        for cell, level, (buffer_quantity, active) in await self._read_levels(query):
+            if channel_id is not None:
+                if active == 0:
+                    continue
+                level["buffer_quantity"] = buffer_quantity or 0
+            levels[cell] = level
+        return levels
+
+    @staticmethod
+    def _levels_query(product_ids, warehouse_ids=None, summary: bool = True, channel_ids=()):
+        """
+        Summary / channel rows and their pending ledger entries, added up per
+        cell in a single statement (UNION ALL, then GROUP BY cell). One
+        statement reads one snapshot, so a fold committing meanwhile cannot
+        move a batch out of the pending entries after the rows were read (or
+        the other way round) and have it counted twice or not at all.
+
+        Row columns: the cell, one sum per ledger delta column, then
+        buffer_quantity and active (0 for an inactive channel row, NULL for
+        a cell with pending entries only).
+        """
+        entry = InventoryLedgerEntry
+        deltas = list(SUMMARY_COLUMNS)
+        product_ids, warehouse_ids, channel_ids = list(product_ids), list(warehouse_ids or ()), list(channel_ids)
+        no_channel = cast(null(), entry.channel_id.type)
+
+        def row_filters(model):
+            filters = [model.product_id.in_(product_ids)]
+            if warehouse_ids:
+                filters.append(model.warehouse_id.in_(warehouse_ids))
+            return filters
+
+        parts = []
+        if summary:
+            parts.append(
+                select(
+                    InventorySummary.warehouse_id, InventorySummary.product_id, InventorySummary.variant_id,
+                    no_channel.label("channel_id"),
+                    *(func.coalesce(getattr(InventorySummary, SUMMARY_COLUMNS[delta]), 0).label(delta)
+                      for delta in deltas),
+                    literal(0).label("buffer_quantity"),
+                    literal(1).label("active"),
+                ).where(*row_filters(InventorySummary))
+            )
+        if channel_ids:
+            parts.append(
+                select(
+                    ChannelInventory.warehouse_id, ChannelInventory.product_id, ChannelInventory.variant_id,
+                    ChannelInventory.channel_id,
+                    *(
+                        func.coalesce(getattr(ChannelInventory, CHANNEL_COLUMNS[delta]), 0).label(delta)
+                        if delta in CHANNEL_COLUMNS else literal(0).label(delta)
+                        for delta in deltas
+                    ),
+                    func.coalesce(ChannelInventory.buffer_quantity, 0).label("buffer_quantity"),
+                    case((ChannelInventory.is_active == True, 1), else_=0).label("active"),
+                ).where(ChannelInventory.channel_id.in_(channel_ids), *row_filters(ChannelInventory))
+            )
+
+        channel_filters = []
+        if summary:
+            channel_filters.append(entry.channel_id.is_(None))
+        if channel_ids:
+            channel_filters.append(entry.channel_id.in_(channel_ids))
+        parts.append(
+            select(
+                entry.warehouse_id, entry.product_id, entry.variant_id, entry.channel_id,
+                *(func.coalesce(getattr(entry, delta), 0).label(delta) for delta in deltas),
+                literal(0).label("buffer_quantity"),
+                cast(null(), Integer).label("active"),
+            ).where(entry.applied_at.is_(None), or_(*channel_filters), *row_filters(entry))
+        )
+
+        combined = union_all(*parts).subquery("cell_levels")
+        return select(
+            combined.c.warehouse_id, combined.c.product_id, combined.c.variant_id, combined.c.channel_id,
+            *(func.sum(combined.c[delta]) for delta in deltas),
+            func.sum(combined.c.buffer_quantity),
+            func.min(combined.c.active),
+        ).group_by(
+            combined.c.warehouse_id, combined.c.product_id, combined.c.variant_id, combined.c.channel_id,
+        )
+
+    async def _read_levels(self, query) -> List[Tuple[Cell, Dict[str, int], Tuple[Any, Any]]]:
+        """Run a _levels_query(): (cell, levels by column name, (buffer_quantity, active)) per row."""
+        rows = []
+        for row in (await self.db.execute(query)).all():
+            cell = tuple(row[:4])
+            sums = dict(zip(SUMMARY_COLUMNS, row[4:4 + len(SUMMARY_COLUMNS)]))
+            columns = CHANNEL_COLUMNS if cell[3] else SUMMARY_COLUMNS
+            level = {column: int(sums[delta] or 0) for delta, column in columns.items()}
+            rows.append((cell, level, tuple(row[4 + len(SUMMARY_COLUMNS):])))
+        return rows
+
+    @staticmethod
+    def pending_subquery(*conditions):
+        """
+        Unfolded deltas summed per cell (warehouse_id, product_id, variant_id,
+        channel_id, *_delta columns), for set-based readers to outer-join to
+        summary or channel rows instead of reading the rows alone.
+        """
+        return (
+            select(
+                InventoryLedgerEntry.warehouse_id, InventoryLedgerEntry.product_id,
+                InventoryLedgerEntry.variant_id, InventoryLedgerEntry.channel_id,
+                *(func.sum(getattr(InventoryLedgerEntry, delta)).label(delta) for delta in SUMMARY_COLUMNS),
+            )
+            .where(InventoryLedgerEntry.applied_at.is_(None), *conditions)
+            .group_by(
+                InventoryLedgerEntry.warehouse_id, InventoryLedgerEntry.product_id,
+                InventoryLedgerEntry.variant_id, InventoryLedgerEntry.channel_id,
+            )
+            .subquery("pending")
+        )
+
+    @staticmethod
+    def pending_join(model, pending):
+        """ON clause joining a summary / channel row to its pending_subquery() cell."""
+        conditions = [
+            pending.c.warehouse_id == model.warehouse_id,
+            pending.c.product_id == model.product_id,
+            pending.c.variant_id.is_not_distinct_from(model.variant_id),
+        ]
+        if model is ChannelInventory:
+            conditions.append(pending.c.channel_id == model.channel_id)
+        return and_(*conditions)
+
+    async def stock_as_of(
+        self,
+        warehouse_id: uuid.UUID,
+        product_id: uuid.UUID,
+        as_of: datetime,
+        variant_id: Optional[uuid.UUID] = None,
+        channel_id: Optional[uuid.UUID] = None,
+    ) -> Dict[str, int]:
+        """
+        Quantities of one cell at a point in time: current levels minus every
+        ledger entry that occurred after `as_of`. Exact for any time since
+        the ledger was introduced.
+        """
+        cell = (warehouse_id, product_id, variant_id, channel_id)
+        current = (await self.levels([cell]))[cell]
+        columns = CHANNEL_COLUMNS if channel_id else SUMMARY_COLUMNS
+        result = await self.db.execute(
+            select(*(func.coalesce(func.sum(getattr(InventoryLedgerEntry, delta)), 0) for delta in columns))
+            .where(cell_filter(InventoryLedgerEntry, cell), InventoryLedgerEntry.occurred_at > as_of)
+        )
+        later = result.one()
+        return {
+            column: current[column] - (change or 0)
+            for column, change in zip(columns.values(), later)
+        }
+
+    # ==================== Folding ====================
+
+    async def fold(self, batch_size: Optional[int] = None) -> int:
+        """
+        Apply one batch of pending entries to the summaries and commit.
+
+        Entries are claimed FOR UPDATE SKIP LOCKED, so concurrent folds take
+        disjoint batches. Returns the number of entries applied.
+        """
+        batch_size = batch_size or settings.INVENTORY_LEDGER_FOLD_BATCH
+        result = await self.db.execute(
+            select(
+                InventoryLedgerEntry.id, InventoryLedgerEntry.occurred_at,
+                InventoryLedgerEntry.warehouse_id, InventoryLedgerEntry.product_id,
+                InventoryLedgerEntry.variant_id, InventoryLedgerEntry.channel_id,
+                *(getattr(InventoryLedgerEntry, delta) for delta in DELTA_COLUMNS),
+            )
+            .where(InventoryLedgerEntry.applied_at.is_(None))
+            .order_by(InventoryLedgerEntry.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+
+        totals: Dict[Cell, Dict[str, Any]] = defaultdict(
+            lambda: {**{delta: 0 for delta in DELTA_COLUMNS}, "last_in": None, "last_out": None}
+        )
+        for entry_id, occurred_at, *cell_and_deltas in rows:
+            cell = tuple(cell_and_deltas[:4])
+            cell_totals = totals[cell]
+            for delta, value in zip(DELTA_COLUMNS, cell_and_deltas[4:]):
+                cell_totals[delta] += value or 0
+            total_delta = cell_and_deltas[4] or 0
+            if total_delta > 0:
+                cell_totals["last_in"] = max(filter(None, (cell_totals["last_in"], occurred_at)))
+            elif total_delta < 0:
+                cell_totals["last_out"] = max(filter(None, (cell_totals["last_out"], occurred_at)))
+
+        await self._apply_summary_totals({cell: t for cell, t in totals.items() if cell[3] is None})
+        await self._apply_channel_totals({cell: t for cell, t in totals.items() if cell[3] is not None})
+
+        ids = [row[0] for row in rows]
+        now = datetime.now(timezone.utc)
+        for i in range(0, len(ids), self.UPSERT_CHUNK):
+            await self.db.execute(
+                update(InventoryLedgerEntry)
+                .where(InventoryLedgerEntry.id.in_(ids[i:i + self.UPSERT_CHUNK]))
+                .values(applied_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        await self.db.commit()
+        return len(rows)
+
+    async def fold_all(self, max_batches: int = 100) -> int:
+        """Fold until no pending entries are left (or max_batches). Returns entries applied."""
+        applied = 0
+        batch_size = settings.INVENTORY_LEDGER_FOLD_BATCH
+        for _ in range(max_batches):
+            count = await self.fold(batch_size)
+            applied += count
+            if count < batch_size:
+                break
+        return applied
+
+    def _upsert_batches(self, model, totals: Dict[Cell, Dict[str, Any]], key_columns: List[str]):
+        """
+        Yield (insert statement, conflict arguments) per chunk of cells, split
+        by whether the cell has a variant: NULL variants never conflict on the
+        table's unique constraint, so those rows use its partial
+        *_no_variant index instead.
+        """
+        insert_stmt = sqlite_insert if database.is_sqlite else pg_insert
+        for with_variant in (True, False):
+            group = [cell for cell in totals if (cell[2] is not None) == with_variant]
+            for i in range(0, len(group), self.UPSERT_CHUNK):
+                values = []
+                for cell in group[i:i + self.UPSERT_CHUNK]:
+                    warehouse_id, product_id, variant_id, channel_id = cell
+                    row = {"warehouse_id": warehouse_id, "product_id": product_id, "variant_id": variant_id}
+                    if channel_id:
+                        row["channel_id"] = channel_id
+                    values.append((row, totals[cell]))
+                if with_variant:
+                    conflict = {"index_elements": [*key_columns, "variant_id"]}
+                else:
+                    conflict = {"index_elements": key_columns, "index_where": model.variant_id.is_(None)}
+                yield insert_stmt(model), values, conflict
+
+    async def _apply_summary_totals(self, totals: Dict[Cell, Dict[str, Any]]) -> None:
+        """Add folded deltas to inventory_summary, creating missing rows."""
+        for stmt, values, conflict in self._upsert_batches(
+            InventorySummary, totals, ["warehouse_id", "product_id"]
+        ):
+            stmt = stmt.values([
+                {
+                    **row,
+                    **{column: t[delta] for delta, column in SUMMARY_COLUMNS.items()},
+                    "total_value": t["value_delta"],
+                    "average_cost": t["value_delta"] / t["total_delta"] if t["total_delta"] > 0 else 0,
+                    "last_stock_in_date": t["last_in"],
+                    "last_stock_out_date": t["last_out"],
+                }
+                for row, t in values
+            ])
+            excluded = stmt.excluded
+            set_ = {
+                column: func.coalesce(getattr(InventorySummary, column), 0) + getattr(excluded, column)
+                for column in SUMMARY_COLUMNS.values()
+            }
+            # Received value moves the weighted average cost (as GRNs always did)
+            old_quantity = func.coalesce(InventorySummary.total_quantity, 0)
+            old_value = old_quantity * func.coalesce(InventorySummary.average_cost, 0)
+            new_quantity = old_quantity + excluded.total_quantity
+            received = excluded.total_value > 0
+            set_["total_value"] = case(
+                (received, old_value + excluded.total_value), else_=InventorySummary.total_value
+            )
+            set_["average_cost"] = case(
+                (and_(received, new_quantity > 0), (old_value + excluded.total_value) / new_quantity),
+                else_=InventorySummary.average_cost,
+            )
+            set_["last_stock_in_date"] = func.coalesce(excluded.last_stock_in_date, InventorySummary.last_stock_in_date)
+            set_["last_stock_out_date"] = func.coalesce(excluded.last_stock_out_date, InventorySummary.last_stock_out_date)
+            await self.db.execute(stmt.on_conflict_do_update(set_=set_, **conflict))
+
+    async def _apply_channel_totals(self, totals: Dict[Cell, Dict[str, Any]]) -> None:
+        """Add folded deltas to channel_inventory, creating missing rows."""
+        for stmt, values, conflict in self._upsert_batches(
+            ChannelInventory, totals, ["channel_id", "warehouse_id", "product_id"]
+        ):
+            stmt = stmt.values([
+                {**row, **{column: t[delta] for delta, column in CHANNEL_COLUMNS.items()}}
+                for row, t in values
+            ])
+            set_ = {
+                column: func.coalesce(getattr(ChannelInventory, column), 0) + getattr(stmt.excluded, column)
+                for column in CHANNEL_COLUMNS.values()
+            }
+            set_["updated_at"] = datetime.now(timezone.utc)
+            await self.db.execute(stmt.on_conflict_do_update(set_=set_, **conflict))
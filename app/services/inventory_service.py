@@ -1,17 +1,20 @@
 """Inventory Service for stock management operations."""
-from typing import Optional, List, Tuple
+from collections import defaultdict
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime, timezone
 import uuid
 
-from sqlalchemy import select, func, and_, or_, update
+from sqlalchemy import select, func, and_, or_, update, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, joinedload
 
+from app import database
 from app.models.warehouse import Warehouse, WarehouseType
 from app.models.inventory import (
     StockItem, StockItemStatus,
     InventorySummary,
     StockMovement, StockMovementType,
+    STOCK_MOVEMENT_NUMBER_SEQ,
 )
 from app.models.stock_transfer import (
     StockTransfer, StockTransferItem, StockTransferSerial,
@@ -23,11 +26,15 @@ from app.models.stock_adjustment import (
     InventoryAudit,
 )
 from app.models.product import Product, ProductVariant
+from app.services.inventory_ledger import InventoryLedgerService
 
 
 class InventoryService:
     """Service for inventory management operations."""
 
+    # Rows per bulk INSERT statement when receiving stock
+    RECEIPT_INSERT_CHUNK = 5000
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
@@ -208,6 +215,7 @@ class InventoryService:
             data["product_id"],
             data.get("variant_id"),
             quantity_change=1,
+            source="manual_receipt",
         )
 
         # Create stock movement
@@ -235,74 +243,98 @@ class InventoryService:
         purchase_order_id: Optional[uuid.UUID] = None,
         vendor_id: Optional[uuid.UUID] = None,
         created_by: uuid.UUID = None,
-    ) -> List[StockItem]:
-        """Bulk receive stock items (GRN)."""
-        created_items = []
+    ) -> int:
+        """
+        Bulk receive stock items (GRN).
+
+        Stock items, inventory ledger entries and movements are written with
+        chunked executemany INSERTs and movement numbers are taken from
+        stock_movement_number_seq in one query, so the number of statements
+        does not grow with the number of lines. Summaries pick the receipt up
+        on the next ledger fold. Returns the number of stock items created.
+        """
+        stock_rows = []
+        quantities: Dict[Tuple[uuid.UUID, Optional[uuid.UUID]], int] = defaultdict(int)
 
         for item_data in items:
             product_id = item_data["product_id"]
             variant_id = item_data.get("variant_id")
             quantity = item_data["quantity"]
-            serial_numbers = item_data.get("serial_numbers", [])
-
-            # If serial numbers provided, create individual items
+            serial_numbers = item_data.get("serial_numbers") or []
+
+            row = {
+                "product_id": product_id,
+                "variant_id": variant_id,
+                "warehouse_id": warehouse_id,
+                "serial_number": None,
+                "batch_number": item_data.get("batch_number"),
+                "grn_number": grn_number,
+                "purchase_order_id": purchase_order_id,
+                "vendor_id": vendor_id,
+                "purchase_price": item_data.get("purchase_price", 0),
+                "manufacturing_date": item_data.get("manufacturing_date"),
+                "expiry_date": item_data.get("expiry_date"),
+                "status": StockItemStatus.AVAILABLE.value,
+            }
+            # One row per serial number, otherwise one non-serialized row per unit
             if serial_numbers:
-                for serial in serial_numbers:
-                    stock_item = StockItem(
-                        product_id=product_id,
-                        variant_id=variant_id,
-                        warehouse_id=warehouse_id,
-                        serial_number=serial,
-                        batch_number=item_data.get("batch_number"),
-                        grn_number=grn_number,
-                        purchase_order_id=purchase_order_id,
-                        vendor_id=vendor_id,
-                        purchase_price=item_data.get("purchase_price", 0),
-                        manufacturing_date=item_data.get("manufacturing_date"),
-                        expiry_date=item_data.get("expiry_date"),
-                        status=StockItemStatus.AVAILABLE,
-                    )
-                    self.db.add(stock_item)
-                    created_items.append(stock_item)
+                stock_rows.extend({**row, "serial_number": serial} for serial in serial_numbers)
             else:
-                # Create non-serialized items
-                for _ in range(quantity):
-                    stock_item = StockItem(
-                        product_id=product_id,
-                        variant_id=variant_id,
-                        warehouse_id=warehouse_id,
-                        batch_number=item_data.get("batch_number"),
-                        grn_number=grn_number,
-                        purchase_order_id=purchase_order_id,
-                        vendor_id=vendor_id,
-                        purchase_price=item_data.get("purchase_price", 0),
-                        manufacturing_date=item_data.get("manufacturing_date"),
-                        expiry_date=item_data.get("expiry_date"),
-                        status=StockItemStatus.AVAILABLE,
-                    )
-                    self.db.add(stock_item)
-                    created_items.append(stock_item)
-
-            # Update inventory summary
-            await self._update_inventory_summary(
-                warehouse_id, product_id, variant_id, quantity_change=quantity
-            )
+                stock_rows.extend(dict(row) for _ in range(quantity))
+            quantities[(product_id, variant_id)] += quantity
 
-            # Create stock movement
-            await self._create_stock_movement(
-                movement_type=StockMovementType.RECEIPT,
-                warehouse_id=warehouse_id,
-                product_id=product_id,
-                variant_id=variant_id,
-                quantity=quantity,
-                unit_cost=item_data.get("purchase_price", 0),
-                reference_type="grn",
-                reference_number=grn_number,
-                created_by=created_by,
-            )
+        for i in range(0, len(stock_rows), self.RECEIPT_INSERT_CHUNK):
+            await self.db.execute(insert(StockItem.__table__), stock_rows[i:i + self.RECEIPT_INSERT_CHUNK])
+
+        # Balance before/after per line, replaying each key's lines on top of
+        # the stock it had before this receipt
+        ledger = InventoryLedgerService(self.db)
+        levels = await ledger.levels(
+            (warehouse_id, product_id, variant_id, None) for product_id, variant_id in quantities
+        )
+        running = {
+            key: levels[(warehouse_id, *key, None)]["total_quantity"] for key in quantities
+        }
+        await ledger.record_many([
+            {
+                "warehouse_id": warehouse_id,
+                "product_id": item_data["product_id"],
+                "variant_id": item_data.get("variant_id"),
+                "total_delta": item_data["quantity"],
+                "available_delta": item_data["quantity"],
+                "value_delta": item_data["quantity"] * float(item_data.get("purchase_price") or 0),
+                "source": "grn",
+                "reference_number": grn_number,
+            }
+            for item_data in items
+        ])
+        movement_numbers = await self._allocate_movement_numbers(len(items))
+        movement_rows = []
+        for item_data, movement_number in zip(items, movement_numbers):
+            key = (item_data["product_id"], item_data.get("variant_id"))
+            quantity = item_data["quantity"]
+            unit_cost = item_data.get("purchase_price", 0)
+            movement_rows.append({
+                "movement_number": movement_number,
+                "movement_type": StockMovementType.RECEIPT.value,
+                "warehouse_id": warehouse_id,
+                "product_id": key[0],
+                "variant_id": key[1],
+                "quantity": quantity,
+                "balance_before": running[key],
+                "balance_after": running[key] + quantity,
+                "reference_type": "grn",
+                "reference_number": grn_number,
+                "unit_cost": unit_cost,
+                "total_cost": quantity * unit_cost,
+                "created_by": created_by,
+            })
+            running[key] += quantity
+        for i in range(0, len(movement_rows), self.RECEIPT_INSERT_CHUNK):
+            await self.db.execute(insert(StockMovement.__table__), movement_rows[i:i + self.RECEIPT_INSERT_CHUNK])
 
         await self.db.commit()
-        return created_items
+        return len(stock_rows)
 
     async def allocate_stock_for_order(
         self,
@@ -340,7 +372,8 @@ class InventoryService:
         # Update inventory summary
         await self._update_inventory_summary(
             warehouse_id, product_id, variant_id,
-            available_change=-quantity, allocated_change=quantity
+            available_change=-quantity, allocated_change=quantity,
+            source="order_allocation",
         )
 
         await self.db.commit()
@@ -397,54 +430,25 @@ class InventoryService:
         allocated_change: int = 0,
         damaged_change: int = 0,
         in_transit_change: int = 0,
+        source: str = "inventory",
     ):
-        """Update or create inventory summary."""
-        # Try to get existing summary
-        query = select(InventorySummary).where(
-            and_(
-                InventorySummary.warehouse_id == warehouse_id,
-                InventorySummary.product_id == product_id,
-            )
+        """
+        Record an inventory summary change in the inventory ledger (applied
+        to inventory_summary by the ledger fold). Stock received
+        (quantity_change > 0) also becomes available.
+        """
+        InventoryLedgerService(self.db).record(
+            warehouse_id,
+            product_id,
+            source=source,
+            variant_id=variant_id,
+            total=quantity_change,
+            available=max(quantity_change, 0) + available_change,
+            reserved=reserved_change,
+            allocated=allocated_change,
+            damaged=damaged_change,
+            in_transit=in_transit_change,
         )
-        if variant_id:
-            query = query.where(InventorySummary.variant_id == variant_id)
-        else:
-            query = query.where(InventorySummary.variant_id.is_(None))
-
-        result = await self.db.execute(query)
-        summary = result.scalar_one_or_none()
-
-        if summary:
-            # Update existing
-            summary.total_quantity += quantity_change
-            if quantity_change > 0:
-                summary.available_quantity += quantity_change
-            summary.available_quantity += available_change
-            summary.reserved_quantity += reserved_change
-            summary.allocated_quantity += allocated_change
-            summary.damaged_quantity += damaged_change
-            summary.in_transit_quantity += in_transit_change
-
-            if quantity_change > 0:
-                summary.last_stock_in_date = datetime.now(timezone.utc)
-            elif quantity_change < 0:
-                summary.last_stock_out_date = datetime.now(timezone.utc)
-        else:
-            # Create new
-            summary = InventorySummary(
-                warehouse_id=warehouse_id,
-                product_id=product_id,
-                variant_id=variant_id,
-                total_quantity=max(0, quantity_change),
-                available_quantity=max(0, quantity_change + available_change),
-                reserved_quantity=max(0, reserved_change),
-                allocated_quantity=max(0, allocated_change),
-                damaged_quantity=max(0, damaged_change),
-                in_transit_quantity=max(0, in_transit_change),
-            )
-            if quantity_change > 0:
-                summary.last_stock_in_date = datetime.now(timezone.utc)
-            self.db.add(summary)
 
     # ==================== STOCK MOVEMENT METHODS ====================
 
@@ -508,15 +512,10 @@ class InventoryService:
         # Generate movement number
         movement_number = await self._generate_movement_number()
 
-        # Get current balance
-        summary_query = select(InventorySummary.total_quantity).where(
-            and_(
-                InventorySummary.warehouse_id == warehouse_id,
-                InventorySummary.product_id == product_id,
-            )
-        )
-        result = await self.db.scalar(summary_query)
-        balance_before = result or 0
+        # Current balance (ledger entries this caller has not flushed yet are not included)
+        cell = (warehouse_id, product_id, variant_id, None)
+        levels = await InventoryLedgerService(self.db).levels([cell], flush=False)
+        balance_before = levels[cell]["total_quantity"]
 
         # Calculate balance after
         if movement_type in [
@@ -554,12 +553,29 @@ class InventoryService:
 
     async def _generate_movement_number(self) -> str:
         """Generate unique movement number."""
+        return (await self._allocate_movement_numbers(1))[0]
+
+    async def _allocate_movement_numbers(self, count: int) -> List[str]:
+        """
+        Allocate `count` movement numbers from stock_movement_number_seq in
+        one query. SQLite has no sequences and falls back to counting the
+        day's movements.
+        """
+        if count <= 0:
+            return []
         date_part = datetime.now(timezone.utc).strftime("%Y%m%d")
-        query = select(func.count()).select_from(StockMovement).where(
-            StockMovement.movement_number.like(f"MOV-{date_part}%")
-        )
-        count = await self.db.scalar(query)
-        return f"MOV-{date_part}-{(count or 0) + 1:04d}"
+        if database.is_sqlite:
+            query = select(func.count()).select_from(StockMovement).where(
+                StockMovement.movement_number.like(f"MOV-{date_part}%")
+            )
+            start = (await self.db.scalar(query) or 0) + 1
+            numbers = range(start, start + count)
+        else:
+            result = await self.db.execute(
+                select(STOCK_MOVEMENT_NUMBER_SEQ.next_value()).select_from(func.generate_series(1, count))
+            )
+            numbers = sorted(result.scalars())
+        return [f"MOV-{date_part}-{number:06d}" for number in numbers]
 
     # ==================== STATISTICS ====================
 
@@ -940,8 +940,8 @@ class InvoiceService:
 
         # P2 TRIGGER 2 (email): Send invoice notification to dealer/customer
         try:
-            from app.services.email_service import EmailService
-            email_service = EmailService()
+            from app.services.email_service import get_email_service
+            email_service = get_email_service(self.db)
 
             # Determine recipient email
             recipient_email = getattr(customer, 'email', None)
@@ -957,7 +957,8 @@ class InvoiceService:
                     recipient_email = getattr(dealer_email_obj, 'email', None)
 
             if recipient_email:
-                email_service.send_invoice_generated_email(
+                await email_service.send_async(
+                    email_service.send_invoice_generated_email,
                     to_email=recipient_email,
                     invoice_number=invoice.invoice_number,
                     customer_name=recipient_name,
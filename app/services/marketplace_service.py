@@ -16,7 +16,6 @@ Supported Marketplaces:
 For production, obtain API credentials from each marketplace.
 """
 
-import httpx
 import json
 import hmac
 import hashlib
@@ -29,6 +28,7 @@ from enum import Enum
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.http_client import http_client, token_cache
 from app.services.encryption_service import decrypt_value
 
 
@@ -80,12 +80,22 @@ class AmazonSPAPI:
     def base_url(self) -> str:
         return self.SANDBOX_BASE_URL if self.is_sandbox else self.PRODUCTION_BASE_URL
 
+    @property
+    def _token_key(self) -> str:
+        return f"amazon:{self.client_id}:{hashlib.sha256(self.refresh_token.encode()).hexdigest()[:16]}"
+
     async def _get_access_token(self) -> str:
-        """Get access token using refresh token."""
+        """Get access token using refresh token (shared across instances until expiry)."""
         if self._access_token and self._token_expiry and datetime.now(timezone.utc) < self._token_expiry:
             return self._access_token
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        self._access_token, self._token_expiry = await token_cache.get_or_fetch(
+            self._token_key, self._fetch_access_token
+        )
+        return self._access_token
+
+    async def _fetch_access_token(self):
+        async with http_client("amazon", timeout=30.0) as client:
             response = await client.post(
                 "https://api.amazon.com/auth/o2/token",
                 data={
@@ -98,10 +108,8 @@ class AmazonSPAPI:
             response.raise_for_status()
             data = response.json()
 
-            self._access_token = data["access_token"]
-            self._token_expiry = datetime.now(timezone.utc) + timedelta(seconds=data.get("expires_in", 3600) - 60)
-
-            return self._access_token
+        expiry = datetime.now(timezone.utc) + timedelta(seconds=data.get("expires_in", 3600) - 60)
+        return (data["access_token"], expiry), expiry
 
     async def _make_request(
         self,
@@ -111,21 +119,28 @@ class AmazonSPAPI:
         body: Dict = None
     ) -> Dict:
         """Make authenticated request to SP-API."""
-        access_token = await self._get_access_token()
-
-        headers = {
-            "x-amz-access-token": access_token,
-            "Content-Type": "application/json",
-        }
+        for attempt in range(2):
+            access_token = await self._get_access_token()
+
+            headers = {
+                "x-amz-access-token": access_token,
+                "Content-Type": "application/json",
+            }
+
+            async with http_client("amazon", timeout=60.0) as client:
+                response = await client.request(
+                    method=method,
+                    url=f"{self.base_url}{path}",
+                    headers=headers,
+                    params=params,
+                    json=body
+                )
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.request(
-                method=method,
-                url=f"{self.base_url}{path}",
-                headers=headers,
-                params=params,
-                json=body
-            )
+            # Token revoked or expired early: drop it and retry once with a fresh one
+            if response.status_code == 401 and attempt == 0:
+                token_cache.invalidate(self._token_key, (access_token, self._token_expiry))
+                self._access_token = self._token_expiry = None
+                continue
 
             if response.status_code >= 400:
                 raise MarketplaceError(
@@ -205,17 +220,27 @@ class FlipkartAPI:
     def base_url(self) -> str:
         return self.SANDBOX_BASE_URL if self.is_sandbox else self.PRODUCTION_BASE_URL
 
+    @property
+    def _token_key(self) -> str:
+        return f"flipkart:{self.base_url}:{self.client_id}"
+
     async def _get_access_token(self) -> str:
-        """Get access token using client credentials."""
+        """Get access token using client credentials (shared across instances until expiry)."""
         if self._access_token and self._token_expiry and datetime.now(timezone.utc) < self._token_expiry:
             return self._access_token
 
+        self._access_token, self._token_expiry = await token_cache.get_or_fetch(
+            self._token_key, self._fetch_access_token
+        )
+        return self._access_token
+
+    async def _fetch_access_token(self):
         import base64
         auth_header = base64.b64encode(
             f"{self.client_id}:{self.client_secret}".encode()
         ).decode()
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_client("flipkart", timeout=30.0) as client:
             response = await client.post(
                 f"{self.base_url}/v2/oauth/access_token",
                 headers={
@@ -230,10 +255,8 @@ class FlipkartAPI:
             response.raise_for_status()
             data = response.json()
 
-            self._access_token = data["access_token"]
-            self._token_expiry = datetime.now(timezone.utc) + timedelta(seconds=data.get("expires_in", 86400) - 60)
-
-            return self._access_token
+        expiry = datetime.now(timezone.utc) + timedelta(seconds=data.get("expires_in", 86400) - 60)
+        return (data["access_token"], expiry), expiry
 
     async def _make_request(
         self,
@@ -243,21 +266,28 @@ class FlipkartAPI:
         body: Dict = None
     ) -> Dict:
         """Make authenticated request to Flipkart API."""
-        access_token = await self._get_access_token()
-
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json",
-        }
+        for attempt in range(2):
+            access_token = await self._get_access_token()
+
+            headers = {
+                "Authorization": f"Bearer {access_token}",
+                "Content-Type": "application/json",
+            }
+
+            async with http_client("flipkart", timeout=60.0) as client:
+                response = await client.request(
+                    method=method,
+                    url=f"{self.base_url}{path}",
+                    headers=headers,
+                    params=params,
+                    json=body
+                )
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.request(
-                method=method,
-                url=f"{self.base_url}{path}",
-                headers=headers,
-                params=params,
-                json=body
-            )
+            # Token revoked or expired early: drop it and retry once with a fresh one
+            if response.status_code == 401 and attempt == 0:
+                token_cache.invalidate(self._token_key, (access_token, self._token_expiry))
+                self._access_token = self._token_expiry = None
+                continue
 
             if response.status_code >= 400:
                 raise MarketplaceError(
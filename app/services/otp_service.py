@@ -196,7 +196,7 @@ async def send_otp_sms(phone: str, otp: str) -> bool:
     Returns:
         True if sent successfully, False otherwise
     """
-    import httpx
+    from app.core.http_client import http_client
 
     auth_key = settings.MSG91_AUTH_KEY
     template_id = settings.MSG91_TEMPLATE_ID_OTP
@@ -230,7 +230,7 @@ async def send_otp_sms(phone: str, otp: str) -> bool:
             ]
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("sms") as client:
             response = await client.post(url, json=payload, headers=headers, timeout=10)
             response.raise_for_status()
 
@@ -0,0 +1,197 @@
+"""
+Pick path sequencing for picklists.
+
+Bins are placed on a parallel-aisle walking model: aisles run front to back
+between a front and a back cross aisle, the depot sits at the front of the
+first aisle, and a bin's coordinates come from WarehouseBin.aisle (which
+aisle) and WarehouseBin.rack (how far down it). Stops are ordered with one of
+two classic routing heuristics:
+
+- S_SHAPE: every aisle that has a pick is walked end to end, alternating
+  direction.
+- LARGEST_GAP: the first and last aisles are walked end to end, the aisles in
+  between are entered from the front and from the back up to their largest
+  gap between picks, so the gap itself is never walked.
+- AUTO: whichever of the two is shorter for the bins at hand (S-shape tends
+  to win when most aisles have many picks, largest gap when picks are sparse).
+
+Bins without an aisle cannot be placed on the model and are picked last, in
+WarehouseBin.pick_sequence / bin_code order, followed by legacy
+StockItem.rack_location stock and lines with no stock found. With zone
+batching, each zone (ordered by WarehouseZone.sort_order) is routed on its
+own and zones are picked one after the other.
+"""
+import re
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import uuid
+
+from app.models.picklist import PickRouting
+
+# Distance between adjacent aisle centre lines, in rack bays.
+AISLE_SPACING = 2.0
+
+_DIGITS = re.compile(r"\d+")
+
+
+@dataclass(frozen=True)
+class PickLocation:
+    """A pickable bin and its place in the warehouse."""
+    bin_id: Optional[uuid.UUID]
+    bin_code: Optional[str]
+    aisle: Optional[str] = None
+    rack: Optional[str] = None
+    shelf: Optional[str] = None
+    position: Optional[str] = None
+    pick_sequence: int = 0
+    zone_code: Optional[str] = None
+    zone_order: int = 0
+
+
+@dataclass
+class PickStop:
+    """One visit to a bin: every order line picked from it in one go."""
+    location: PickLocation
+    lines: List[object] = field(default_factory=list)
+
+
+def _natural_key(label: Optional[str]) -> Tuple:
+    parts = re.split(r"(\d+)", (label or "").upper())
+    return tuple((0, int(p), "") if p.isdigit() else (1, 0, p) for p in parts if p)
+
+
+def _ordinals(labels: Iterable[Optional[str]]) -> Dict[Optional[str], int]:
+    """Number labels: by their digits when they all have some, else by rank."""
+    distinct = sorted({label for label in labels}, key=_natural_key)
+    numbers = [_DIGITS.search(label or "") for label in distinct]
+    if all(numbers) and len({int(n.group()) for n in numbers}) == len(distinct):
+        return {label: int(n.group()) for label, n in zip(distinct, numbers)}
+    return {label: rank for rank, label in enumerate(distinct, start=1)}
+
+
+class WalkingModel:
+    """Parallel aisles with a front and a back cross aisle."""
+
+    def __init__(self, locations: Iterable[PickLocation], aisle_spacing: float = AISLE_SPACING):
+        located = [loc for loc in locations if loc.aisle]
+        aisles = _ordinals(loc.aisle for loc in located)
+        racks = _ordinals(loc.rack for loc in located)
+        first_aisle = min(aisles.values(), default=0)
+        self.points: Dict[PickLocation, Tuple[float, float]] = {
+            loc: ((aisles[loc.aisle] - first_aisle) * aisle_spacing, float(racks[loc.rack]))
+            for loc in located
+        }
+        # Back cross aisle sits one bay past the deepest rack.
+        self.aisle_length = max((y for _, y in self.points.values()), default=0.0) + 1.0
+
+    def place(self, location: PickLocation) -> Optional[Tuple[float, float]]:
+        return self.points.get(location)
+
+    def distance(self, a: Tuple[float, float], b: Tuple[float, float]) -> float:
+        (xa, ya), (xb, yb) = a, b
+        if xa == xb:
+            return abs(ya - yb)
+        length = self.aisle_length
+        return abs(xa - xb) + min(ya + yb, 2 * length - ya - yb)
+
+    def route_length(self, locations: Sequence[PickLocation]) -> float:
+        """Walk from the depot through the located bins, in order, and back."""
+        depot = (0.0, 0.0)
+        total, here = 0.0, depot
+        for location in locations:
+            point = self.place(location)
+            if point is None:
+                continue
+            total += self.distance(here, point)
+            here = point
+        return total + self.distance(here, depot)
+
+
+def _in_aisle_order(location: PickLocation, model: WalkingModel) -> Tuple:
+    _, depth = model.place(location)
+    return depth, _natural_key(location.shelf), _natural_key(location.position), location.bin_code or ""
+
+
+def _s_shape(aisles: List[List[PickLocation]], model: WalkingModel) -> List[PickLocation]:
+    route = []
+    for index, bins in enumerate(aisles):
+        ordered = sorted(bins, key=lambda loc: _in_aisle_order(loc, model))
+        route.extend(ordered if index % 2 == 0 else reversed(ordered))
+    return route
+
+
+def _largest_gap(aisles: List[List[PickLocation]], model: WalkingModel) -> List[PickLocation]:
+    ordered = [sorted(bins, key=lambda loc: _in_aisle_order(loc, model)) for bins in aisles]
+    if len(ordered) == 1:
+        return ordered[0]
+
+    fronts, backs = [], []
+    for bins in ordered[1:-1]:
+        depths = [model.place(loc)[1] for loc in bins]
+        edges = [0.0, *depths, model.aisle_length]
+        gaps = [edges[i + 1] - edges[i] for i in range(len(edges) - 1)]
+        split = gaps.index(max(gaps))
+        fronts.append(bins[:split])
+        backs.append(bins[split:])
+
+    route = list(ordered[0])
+    for back in backs:
+        route.extend(reversed(back))
+    route.extend(reversed(ordered[-1]))
+    for front in reversed(fronts):
+        route.extend(front)
+    return route
+
+
+_STRATEGIES = {
+    PickRouting.S_SHAPE: _s_shape,
+    PickRouting.LARGEST_GAP: _largest_gap,
+}
+
+
+def sequence_locations(
+    locations: Iterable[PickLocation],
+    routing: PickRouting = PickRouting.AUTO,
+    model: Optional[WalkingModel] = None,
+) -> List[PickLocation]:
+    """Order distinct bins into a walking route."""
+    locations = list(dict.fromkeys(locations))
+    model = model or WalkingModel(locations)
+
+    located = sorted(
+        (loc for loc in locations if model.place(loc) is not None),
+        key=lambda loc: model.place(loc)[0],
+    )
+    aisles = [list(bins) for _, bins in groupby(located, key=lambda loc: model.place(loc)[0])]
+    if not aisles:
+        route = []
+    elif routing == PickRouting.AUTO:
+        route = min((strategy(aisles, model) for strategy in _STRATEGIES.values()), key=model.route_length)
+    else:
+        route = _STRATEGIES[routing](aisles, model)
+
+    unlocated = [loc for loc in locations if model.place(loc) is None]
+    unlocated.sort(key=lambda loc: (loc.bin_id is None, loc.pick_sequence or 0, _natural_key(loc.bin_code)))
+    return route + unlocated
+
+
+def zone_batches(stops: Iterable[PickStop]) -> List[List[PickStop]]:
+    """Split stops by zone, in WarehouseZone.sort_order order."""
+    key = lambda stop: (stop.location.zone_order, stop.location.zone_code or "")
+    return [list(group) for _, group in groupby(sorted(stops, key=key), key=key)]
+
+
+def sequence_stops(
+    stops: Iterable[PickStop],
+    routing: PickRouting = PickRouting.AUTO,
+    zone_batching: bool = False,
+) -> List[PickStop]:
+    """Order stops into a walking route, zone by zone if zone_batching."""
+    stops = list(stops)
+    batches = zone_batches(stops) if zone_batching else [stops]
+    route = []
+    for batch in batches:
+        by_location = {stop.location: stop for stop in batch}
+        route.extend(by_location[loc] for loc in sequence_locations(by_location, routing))
+    return route
@@ -1,5 +1,5 @@
 """Service for managing picklists and warehouse picking operations."""
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, timezone
 from math import ceil
 import uuid
@@ -12,8 +12,9 @@ from app.models.picklist import Picklist, PicklistItem, PicklistStatus, Picklist
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product, ProductVariant
 from app.models.inventory import StockItem, StockItemStatus
-from app.models.wms import WarehouseBin
+from app.models.wms import WarehouseBin, WarehouseZone
 from app.schemas.picklist import PicklistGenerateRequest
+from app.services.pick_path import PickLocation, PickStop, sequence_stops, zone_batches
 
 
 class PicklistService:
@@ -99,52 +100,96 @@ class PicklistService:
     async def generate_picklist(
         self,
         request: PicklistGenerateRequest,
-        created_by: Optional[uuid.UUID] = None
+        created_by: Optional[uuid.UUID] = None,
+        wave_id: Optional[uuid.UUID] = None
     ) -> Picklist:
-        """Generate picklist from orders."""
-        # Get orders
+        """Generate picklist from orders, sequenced along a walking route."""
+        [picklist] = await self._create_picklists(request, created_by, wave_id)
+        await self.db.commit()
+        await self.db.refresh(picklist)
+        return picklist
+
+    async def generate_zone_picklists(
+        self,
+        request: PicklistGenerateRequest,
+        created_by: Optional[uuid.UUID] = None,
+        wave_id: Optional[uuid.UUID] = None
+    ) -> List[Picklist]:
+        """Generate one picklist per warehouse zone, each with its own route."""
+        picklists = await self._create_picklists(request, created_by, wave_id, by_zone=True)
+        await self.db.commit()
+        for picklist in picklists:
+            await self.db.refresh(picklist)
+        return picklists
+
+    async def _create_picklists(
+        self,
+        request: PicklistGenerateRequest,
+        created_by: Optional[uuid.UUID] = None,
+        wave_id: Optional[uuid.UUID] = None,
+        by_zone: bool = False,
+    ) -> List[Picklist]:
+        """
+        Build the picklist (or one per zone) and move its orders to
+        PICKLIST_CREATED, without committing.
+        """
+        orders = await self._get_pickable_orders(request.order_ids)
+        stops = await self._plan_stops(request.warehouse_id, orders)
+
+        if by_zone:
+            routes = [sequence_stops(batch, request.routing) for batch in zone_batches(stops)]
+        else:
+            routes = [sequence_stops(stops, request.routing, request.zone_batching)]
+        picklists = [await self._build_picklist(request, created_by, route, wave_id) for route in routes]
+        for order in orders:
+            order.status = OrderStatus.PICKLIST_CREATED.value
+        return picklists
+
+    async def _get_pickable_orders(self, order_ids: List[uuid.UUID]) -> List[Order]:
+        # Orders another transaction is putting on a picklist are skipped; once it
+        # commits they are no longer CONFIRMED / ALLOCATED
         stmt = (
             select(Order)
             .options(selectinload(Order.items))
             .where(
-                Order.id.in_(request.order_ids),
-                Order.status == OrderStatus.CONFIRMED
+                Order.id.in_(order_ids),
+                Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.ALLOCATED])
             )
+            .with_for_update(of=Order, skip_locked=True)
         )
         result = await self.db.execute(stmt)
         orders = list(result.scalars().all())
 
         if not orders:
             raise ValueError("No valid orders found for picklist generation")
+        return orders
 
-        # Create picklist
-        picklist_number = await self.generate_picklist_number()
+    async def _build_picklist(
+        self,
+        request: PicklistGenerateRequest,
+        created_by: Optional[uuid.UUID],
+        route: List[PickStop],
+        wave_id: Optional[uuid.UUID] = None,
+    ) -> Picklist:
+        """Create a picklist whose items follow the route, stop by stop."""
         picklist = Picklist(
-            picklist_number=picklist_number,
+            picklist_number=await self.generate_picklist_number(),
             warehouse_id=request.warehouse_id,
+            wave_id=wave_id,
             picklist_type=request.picklist_type,
             priority=request.priority,
             notes=request.notes,
             created_by=created_by,
-            total_orders=len(orders),
+            items=[],
         )
 
-        # Add items from orders
-        total_items = 0
-        total_quantity = 0
+        order_ids = set()
         pick_sequence = 0
-
-        for order in orders:
-            for order_item in order.items:
-                # Get bin location for product
-                bin_location = await self._get_bin_location(
-                    request.warehouse_id,
-                    order_item.product_id
-                )
-
+        for stop in route:
+            location = stop.location
+            for order, order_item in stop.lines:
                 pick_sequence += 1
-                picklist_item = PicklistItem(
-                    picklist_id=picklist.id,
+                picklist.items.append(PicklistItem(
                     order_id=order.id,
                     order_item_id=order_item.id,
                     product_id=order_item.product_id,
@@ -152,47 +197,123 @@ class PicklistService:
                     sku=order_item.product_sku,
                     product_name=order_item.product_name,
                     variant_name=order_item.variant_name,
-                    bin_location=bin_location,
+                    bin_id=location.bin_id,
+                    bin_location=location.bin_code,
                     quantity_required=order_item.quantity,
                     pick_sequence=pick_sequence,
-                )
-                picklist.items.append(picklist_item)
-                total_items += 1
-                total_quantity += order_item.quantity
+                ))
+                order_ids.add(order.id)
 
-            # Update order status
-            order.status = OrderStatus.PICKLIST_CREATED.value
-
-        picklist.total_items = total_items
-        picklist.total_quantity = total_quantity
+        picklist.total_orders = len(order_ids)
+        picklist.total_items = pick_sequence
+        picklist.total_quantity = sum(item.quantity_required for item in picklist.items)
 
         self.db.add(picklist)
-        await self.db.commit()
-        await self.db.refresh(picklist)
-
+        await self.db.flush()
         return picklist
 
-    async def _get_bin_location(
+    async def _plan_stops(self, warehouse_id: uuid.UUID, orders: List[Order]) -> List[PickStop]:
+        """
+        Resolve a bin for every SKU on the orders (one query) and group the
+        order lines into one stop per bin, so a SKU ordered by many orders
+        is picked in a single visit.
+        """
+        lines = [(order, order_item) for order in orders for order_item in order.items]
+        required: Dict[Tuple[uuid.UUID, Optional[uuid.UUID]], int] = {}
+        for _, order_item in lines:
+            sku = (order_item.product_id, order_item.variant_id)
+            required[sku] = required.get(sku, 0) + order_item.quantity
+
+        candidates = await self._get_bin_candidates(warehouse_id, {product_id for product_id, _ in required})
+        unknown = PickLocation(bin_id=None, bin_code=None)
+        locations = {
+            sku: self._choose_location(candidates.get(sku[0], []), sku[1], quantity) or unknown
+            for sku, quantity in required.items()
+        }
+
+        stops: Dict[PickLocation, PickStop] = {}
+        for order, order_item in sorted(lines, key=lambda line: line[1].product_sku or ""):
+            location = locations[(order_item.product_id, order_item.variant_id)]
+            stops.setdefault(location, PickStop(location)).lines.append((order, order_item))
+        return list(stops.values())
+
+    async def _get_bin_candidates(
         self,
         warehouse_id: uuid.UUID,
-        product_id: uuid.UUID
-    ) -> Optional[str]:
-        """Get bin location for a product in warehouse."""
+        product_ids: Set[uuid.UUID]
+    ) -> Dict[uuid.UUID, List]:
+        """Available units per product and pickable bin (or legacy rack location)."""
+        if not product_ids:
+            return {}
         stmt = (
-            select(StockItem.rack_location, WarehouseBin.bin_code)
+            select(
+                StockItem.product_id,
+                StockItem.variant_id,
+                StockItem.rack_location,
+                WarehouseBin.id.label("bin_id"),
+                WarehouseBin.bin_code,
+                WarehouseBin.aisle,
+                WarehouseBin.rack,
+                WarehouseBin.shelf,
+                WarehouseBin.position,
+                WarehouseBin.pick_sequence,
+                WarehouseZone.zone_code,
+                WarehouseZone.sort_order.label("zone_order"),
+                func.count().label("units"),
+            )
             .outerjoin(WarehouseBin, StockItem.bin_id == WarehouseBin.id)
+            .outerjoin(WarehouseZone, WarehouseBin.zone_id == WarehouseZone.id)
             .where(
                 StockItem.warehouse_id == warehouse_id,
-                StockItem.product_id == product_id,
-                StockItem.status == StockItemStatus.AVAILABLE
+                StockItem.product_id.in_(product_ids),
+                StockItem.status == StockItemStatus.AVAILABLE,
+                or_(
+                    StockItem.bin_id.is_(None),
+                    and_(WarehouseBin.is_pickable == True, WarehouseBin.is_active == True),
+                ),
+            )
+            .group_by(
+                StockItem.product_id, StockItem.variant_id, StockItem.rack_location,
+                WarehouseBin.id, WarehouseBin.bin_code, WarehouseBin.aisle, WarehouseBin.rack,
+                WarehouseBin.shelf, WarehouseBin.position, WarehouseBin.pick_sequence,
+                WarehouseZone.zone_code, WarehouseZone.sort_order,
             )
-            .limit(1)
         )
-        result = await self.db.execute(stmt)
-        row = result.first()
-        if row:
-            return row[1] or row[0]  # Prefer bin_code over rack_location
-        return None
+        candidates: Dict[uuid.UUID, List] = {}
+        for row in (await self.db.execute(stmt)).all():
+            candidates.setdefault(row.product_id, []).append(row)
+        return candidates
+
+    @staticmethod
+    def _choose_location(rows: List, variant_id: Optional[uuid.UUID], quantity: int) -> Optional[PickLocation]:
+        """
+        Prefer a pickable bin that covers the whole quantity, earliest in the
+        bin pick sequence; otherwise the bin holding the most units. Stock
+        with only a rack_location is used when no bin has any.
+        """
+        matching = [row for row in rows if variant_id is None or row.variant_id == variant_id] or rows
+        if not matching:
+            return None
+        row = min(matching, key=lambda r: (
+            r.bin_id is None,
+            r.units < quantity,
+            r.pick_sequence or 0,
+            -r.units,
+            r.bin_code or r.rack_location or "",
+        ))
+        if row.bin_id is None:
+            return PickLocation(bin_id=None, bin_code=row.rack_location) if row.rack_location else None
+        return PickLocation(
+            bin_id=row.bin_id,
+            bin_code=row.bin_code,
+            aisle=row.aisle,
+            rack=row.rack,
+            shelf=row.shelf,
+            position=row.position,
+            pick_sequence=row.pick_sequence or 0,
+            zone_code=row.zone_code,
+            zone_order=row.zone_order or 0,
+        )
 
     # ==================== PICKING OPERATIONS ====================
 
@@ -337,6 +458,9 @@ class PicklistService:
                     order.status = OrderStatus.PICKED.value
                     order.picked_at = datetime.now(timezone.utc)
 
+        if picklist.wave_id:
+            await self._settle_wave_picklist(picklist)
+
         await self.db.commit()
         await self.db.refresh(picklist)
         return picklist
@@ -354,6 +478,19 @@ class PicklistService:
         if picklist.status in [PicklistStatus.COMPLETED, PicklistStatus.CANCELLED]:
             raise ValueError(f"Cannot cancel picklist in {picklist.status} status")
 
+        await self._cancel(picklist, reason)
+
+        await self.db.commit()
+        await self.db.refresh(picklist)
+        return picklist
+
+    async def _cancel(
+        self,
+        picklist: Picklist,
+        reason: str,
+        user_id: Optional[uuid.UUID] = None
+    ) -> None:
+        """Cancel a picklist (items loaded) and revert its orders, without committing."""
         picklist.status = PicklistStatus.CANCELLED.value
         picklist.cancelled_at = datetime.now(timezone.utc)
         picklist.cancellation_reason = reason
@@ -366,6 +503,16 @@ class PicklistService:
             if order and order.status == OrderStatus.PICKLIST_CREATED:
                 order.status = OrderStatus.CONFIRMED.value
 
-        await self.db.commit()
-        await self.db.refresh(picklist)
-        return picklist
+        if picklist.wave_id:
+            await self._settle_wave_picklist(picklist, user_id)
+
+    async def _settle_wave_picklist(
+        self,
+        picklist: Picklist,
+        user_id: Optional[uuid.UUID] = None
+    ) -> None:
+        """Issue / release a wave picklist's batch reservations."""
+        # Imported here: wave planning builds on this service
+        from app.services.wave_planning_service import WavePlanningService
+
+        await WavePlanningService(self.db).settle_picklist(picklist, user_id)
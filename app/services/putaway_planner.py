@@ -0,0 +1,167 @@
+"""
+In-memory putaway planning.
+
+WMSService loads a warehouse's receivable bins, their occupancy (including
+capacity held by planned putaway tasks), the putaway rules and the bins
+that already hold each SKU once; this module then assigns received
+quantities to bins without going back to the database:
+
+- rules are matched per product: product, category or brand rules in
+  priority order, then the highest-priority default rule
+- a rule limits candidates to its target zone and bin pattern ("A1-*")
+- candidates holding (or reserved for) the same SKU come first, then empty
+  bins, then bins holding other SKUs; each group by pick sequence
+- a quantity is split across bins when one bin cannot take it all, and
+  every assignment is deducted from the bin's free units and weight so
+  later lines see what earlier lines used
+"""
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import uuid
+
+
+@dataclass
+class BinOccupancy:
+    """A receivable bin and what is in it (or planned into it)."""
+    bin_id: uuid.UUID
+    bin_code: str
+    zone_id: Optional[uuid.UUID] = None
+    pick_sequence: int = 0
+    max_capacity: Optional[int] = None
+    max_weight_kg: Optional[float] = None
+    items: int = 0
+    weight_kg: float = 0.0
+    is_reserved: bool = False
+    reserved_product_id: Optional[uuid.UUID] = None
+    product_ids: Set[uuid.UUID] = field(default_factory=set)
+
+    def accepts(self, product_id: uuid.UUID) -> bool:
+        """Reserved bins only take the product they are reserved for."""
+        if self.reserved_product_id:
+            return self.reserved_product_id == product_id
+        return not self.is_reserved
+
+    def units_that_fit(self, unit_weight_kg: float = 0.0) -> Optional[int]:
+        """Units the bin can still take (None when unbounded)."""
+        fit = None
+        if self.max_capacity is not None:
+            fit = max(0, self.max_capacity - self.items)
+        if self.max_weight_kg is not None and unit_weight_kg > 0:
+            by_weight = max(0, int((self.max_weight_kg - self.weight_kg) / unit_weight_kg + 1e-9))
+            fit = by_weight if fit is None else min(fit, by_weight)
+        return fit
+
+    def add(self, product_id: uuid.UUID, quantity: int, weight_kg: float = 0.0) -> None:
+        self.items += quantity
+        self.weight_kg += weight_kg
+        self.product_ids.add(product_id)
+
+
+@dataclass(frozen=True)
+class PutAwayProduct:
+    """What rule matching and weight checks need to know about a product."""
+    product_id: uuid.UUID
+    category_id: Optional[uuid.UUID] = None
+    brand_id: Optional[uuid.UUID] = None
+    unit_weight_kg: float = 0.0
+
+
+@dataclass
+class PutAwayAssignment:
+    """Part (or all) of a received line assigned to one bin."""
+    line_id: Optional[uuid.UUID]
+    product_id: uuid.UUID
+    bin: BinOccupancy
+    quantity: int
+    weight_kg: float = 0.0
+    rule: Optional[object] = None
+
+
+def match_rule(rules: Sequence, product: PutAwayProduct):
+    """
+    First product, category or brand rule matching the product (rules in
+    priority order), else the first default rule.
+    """
+    default = None
+    for rule in rules:
+        if rule.product_id or rule.category_id or rule.brand_id:
+            if (
+                (rule.product_id and rule.product_id == product.product_id)
+                or (rule.category_id and rule.category_id == product.category_id)
+                or (rule.brand_id and rule.brand_id == product.brand_id)
+            ):
+                return rule
+        elif default is None:
+            default = rule
+    return default
+
+
+def candidate_bins(bins: Iterable[BinOccupancy], rule, product_id: uuid.UUID) -> List[BinOccupancy]:
+    """Bins the rule allows for the product, best first."""
+    pattern = rule.target_bin_pattern if rule else None
+    candidates = [
+        b for b in bins
+        if b.accepts(product_id)
+        and (rule is None or b.zone_id == rule.target_zone_id)
+        and (not pattern or fnmatchcase(b.bin_code.upper(), pattern.upper()))
+    ]
+
+    def rank(b: BinOccupancy) -> Tuple[int, int, str]:
+        if product_id in b.product_ids or b.reserved_product_id == product_id:
+            group = 0
+        elif not b.items:
+            group = 1
+        else:
+            group = 2
+        return group, b.pick_sequence or 0, b.bin_code
+
+    return sorted(candidates, key=rank)
+
+
+def assign_quantity(
+    bins: Iterable[BinOccupancy],
+    rule,
+    product: PutAwayProduct,
+    quantity: int,
+    line_id: Optional[uuid.UUID] = None,
+) -> Tuple[List[PutAwayAssignment], int]:
+    """
+    Spread quantity over the rule's candidate bins, updating their occupancy.
+    Returns the assignments and the quantity that found no room.
+    """
+    assignments = []
+    remaining = quantity
+    for b in candidate_bins(bins, rule, product.product_id):
+        if remaining <= 0:
+            break
+        fit = b.units_that_fit(product.unit_weight_kg)
+        take = remaining if fit is None else min(remaining, fit)
+        if take <= 0:
+            continue
+        weight = take * product.unit_weight_kg
+        b.add(product.product_id, take, weight)
+        assignments.append(PutAwayAssignment(
+            line_id=line_id, product_id=product.product_id, bin=b,
+            quantity=take, weight_kg=weight, rule=rule,
+        ))
+        remaining -= take
+    return assignments, remaining
+
+
+def plan_putaway(
+    lines: Iterable[Tuple[Optional[uuid.UUID], PutAwayProduct, int]],
+    bins: Sequence[BinOccupancy],
+    rules: Sequence,
+) -> Tuple[List[PutAwayAssignment], Dict[Optional[uuid.UUID], int]]:
+    """
+    Assign (line_id, product, quantity) lines to bins in the order given.
+    Returns the assignments and the unassigned quantity per line.
+    """
+    assignments, unassigned = [], {}
+    for line_id, product, quantity in lines:
+        placed, remaining = assign_quantity(bins, match_rule(rules, product), product, quantity, line_id)
+        assignments.extend(placed)
+        if remaining:
+            unassigned[line_id] = remaining
+    return assignments, unassigned
@@ -36,15 +36,23 @@ Same spare part item can have TWO series:
 """
 
 import uuid
+from bisect import bisect_right
 from datetime import datetime, timezone
-from typing import List, Optional, Dict, Tuple
-from sqlalchemy import select, func, and_
+from typing import AsyncIterator, Iterable, List, Optional, Dict, Sequence, Tuple
+from sqlalchemy import String, select, func, and_, or_, insert, inspect, false, literal, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import database
+from app.config import settings
+
 from app.models.serialization import (
     SerialSequence,
     ProductSerialSequence,
     POSerial,
+    POSerialRange,
     ModelCodeReference,
     SupplierCode,
     SerialStatus,
@@ -65,6 +73,16 @@ from app.schemas.serialization import (
     FGCodeGenerateResponse,
 )
 
+# Ids of range units are derived from the barcode, so a unit keeps its id
+# when it becomes an exception row.
+SERIAL_ID_NAMESPACE = uuid.UUID("6f1c2d4e-7a38-4b0e-9d52-3c8e1f0a9b71")
+
+# Serials of a PO across per-unit rows and ranges, for raw SQL callers (param :po_id)
+PO_SERIAL_COUNT_SQL = """
+    SELECT (SELECT COUNT(*) FROM po_serials WHERE po_id = :po_id AND range_id IS NULL)
+         + (SELECT COALESCE(SUM(quantity), 0) FROM po_serial_ranges WHERE po_id = :po_id)
+"""
+
 
 class SerializationService:
     """Service for generating and managing product serial numbers/barcodes"""
@@ -382,7 +400,8 @@ class SerializationService:
         product_name: str = None,
         product_sku: str = None,
         item_type: ItemType = ItemType.FINISHED_GOODS,
-        max_serial: int = 99999999
+        max_serial: int = 99999999,
+        for_update: bool = False
     ) -> ProductSerialSequence:
         """
         Get or create a product-level serial sequence.
@@ -394,16 +413,20 @@ class SerializationService:
         Example:
         - FG IEL: sequence 1-99999999
         - SP IEL: sequence 1-99999999 (separate)
+
+        for_update locks the sequence row (and refreshes it) so concurrent
+        generation for the same model cannot reserve overlapping ranges.
         """
         # Try to find existing sequence by model_code AND item_type
-        result = await self.db.execute(
-            select(ProductSerialSequence).where(
-                and_(
-                    ProductSerialSequence.model_code == model_code.upper(),
-                    ProductSerialSequence.item_type == item_type
-                )
+        query = select(ProductSerialSequence).where(
+            and_(
+                ProductSerialSequence.model_code == model_code.upper(),
+                ProductSerialSequence.item_type == item_type
             )
         )
+        if for_update:
+            query = query.with_for_update().execution_options(populate_existing=True)
+        result = await self.db.execute(query)
         sequence = result.scalar_one_or_none()
 
         if sequence:
@@ -528,6 +551,131 @@ class SerializationService:
 
     # ==================== Serial Generation ====================
 
+    # Rows per COPY / executemany chunk when inserting generated serials
+    SERIAL_INSERT_CHUNK = 10000
+
+    # po_serials columns written by bulk generation, in row-tuple order
+    PO_SERIAL_COLUMNS = (
+        "id", "po_id", "po_item_id", "product_id", "product_sku", "model_code",
+        "item_type", "brand_prefix", "supplier_code", "year_code", "month_code",
+        "serial_number", "barcode", "status", "created_at", "updated_at",
+    )
+
+    def barcode_prefix(
+        self,
+        supplier_code: str,
+        year_code: str,
+        month_code: str,
+        model_code: str,
+        item_type: ItemType = ItemType.FINISHED_GOODS
+    ) -> str:
+        """
+        Everything in the barcode before the 8-digit serial number.
+
+        generate_barcode(..., serial_number=n) == f"{barcode_prefix(...)}{n:08d}"
+        """
+        return self.generate_barcode(
+            supplier_code=supplier_code,
+            year_code=year_code,
+            month_code=month_code,
+            model_code=model_code,
+            serial_number=0,
+            item_type=item_type,
+        )[:-self.SERIAL_DIGITS]
+
+    def iter_serial_rows(
+        self,
+        po_id: str,
+        item: GenerateSerialItem,
+        supplier_code: str,
+        year_code: str,
+        month_code: str,
+        start_serial: int,
+        end_serial: int,
+    ):
+        """Yield po_serials row tuples (PO_SERIAL_COLUMNS order) for a serial range."""
+        prefix = self.barcode_prefix(supplier_code, year_code, month_code, item.model_code, item.item_type)
+        item_type = item.item_type.value if hasattr(item.item_type, 'value') else str(item.item_type)
+        now = datetime.now(timezone.utc)
+        # Database columns are VARCHAR(36) for po_id, po_item_id, product_id
+        constant_head = (
+            str(po_id),
+            str(item.po_item_id) if item.po_item_id else None,
+            str(item.product_id) if item.product_id else None,
+            item.product_sku,
+            item.model_code.upper(),
+            item_type,
+            self.BRAND_PREFIX,
+            supplier_code.upper(),
+            year_code if item.item_type != ItemType.SPARE_PART else year_code[0],
+            month_code,
+        )
+        status = SerialStatus.GENERATED.value
+        uuid4 = uuid.uuid4
+        for serial_num in range(start_serial, end_serial + 1):
+            yield (str(uuid4()), *constant_head, serial_num, f"{prefix}{serial_num:08d}", status, now, now)
+
+    def build_serial_range(
+        self,
+        po_id: str,
+        item: GenerateSerialItem,
+        supplier_code: str,
+        year_code: str,
+        month_code: str,
+        start_serial: int,
+        end_serial: int,
+    ) -> POSerialRange:
+        """POSerialRange row standing for serials start_serial..end_serial of a PO item."""
+        prefix = self.barcode_prefix(supplier_code, year_code, month_code, item.model_code, item.item_type)
+        return POSerialRange(
+            id=str(uuid.uuid4()),
+            po_id=str(po_id),
+            po_item_id=str(item.po_item_id) if item.po_item_id else None,
+            product_id=str(item.product_id) if item.product_id else None,
+            product_sku=item.product_sku,
+            model_code=item.model_code.upper(),
+            item_type=item.item_type.value if hasattr(item.item_type, 'value') else str(item.item_type),
+            brand_prefix=self.BRAND_PREFIX,
+            supplier_code=supplier_code.upper(),
+            year_code=year_code if item.item_type != ItemType.SPARE_PART else year_code[0],
+            month_code=month_code,
+            start_serial=start_serial,
+            end_serial=end_serial,
+            quantity=end_serial - start_serial + 1,
+            barcode_prefix=prefix,
+            start_barcode=f"{prefix}{start_serial:08d}",
+            end_barcode=f"{prefix}{end_serial:08d}",
+            status=SerialStatus.GENERATED.value,
+        )
+
+    async def insert_serial_rows(self, rows) -> int:
+        """
+        Insert po_serials row tuples in chunks: COPY on PostgreSQL,
+        executemany elsewhere. Runs in the session's transaction.
+        """
+        from app.database import copy_rows, is_sqlite
+
+        table = POSerial.__table__
+        written = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.SERIAL_INSERT_CHUNK:
+                written += await self._insert_serial_chunk(table, chunk, is_sqlite, copy_rows)
+                chunk = []
+        if chunk:
+            written += await self._insert_serial_chunk(table, chunk, is_sqlite, copy_rows)
+        return written
+
+    async def _insert_serial_chunk(self, table, chunk, is_sqlite, copy_rows) -> int:
+        if is_sqlite:
+            await self.db.execute(
+                insert(table),
+                [dict(zip(self.PO_SERIAL_COLUMNS, row)) for row in chunk],
+            )
+            return len(chunk)
+        return await copy_rows(self.db, table.name, self.PO_SERIAL_COLUMNS, chunk)
+
     async def generate_serials_for_po(
         self,
         request: GenerateSerialsRequest
@@ -540,6 +688,13 @@ class SerializationService:
         - Serial numbers do NOT reset by year/month
         - Year/month codes are still included in barcode for traceability
 
+        Ranges are reserved under a row lock on the product sequence. With
+        SERIAL_RANGE_STORAGE each item is stored as one po_serial_ranges row;
+        otherwise the serial rows are streamed into po_serials in chunks (COPY
+        on PostgreSQL) without building ORM objects. The response carries the
+        per-item range summary; the full barcode list only when
+        request.include_barcodes is set.
+
         This is called when a PO is sent to the vendor.
         """
         import logging
@@ -548,14 +703,12 @@ class SerializationService:
         # Year/month codes for barcode (traceability only, not for sequence lookup)
         year_code = self.get_year_code()
         month_code = self.get_month_code()
-        logging.info(f"[SerializationService] year_code={year_code}, month_code={month_code}")
 
+        total_generated = 0
         all_barcodes = []
         item_summaries = []
 
-        for idx, item in enumerate(request.items):
-            logging.info(f"[SerializationService] Processing item {idx+1}/{len(request.items)}: model={item.model_code}, qty={item.quantity}, type={item.item_type}")
-
+        for item in request.items:
             # NEW: Use product-level sequencing (continuous per model)
             product_sequence = await self.get_or_create_product_sequence(
                 model_code=item.model_code,
@@ -563,55 +716,33 @@ class SerializationService:
                 product_name=item.product_name if hasattr(item, 'product_name') else None,
                 product_sku=item.product_sku,
                 item_type=item.item_type,
+                for_update=True,
             )
-            logging.info(f"[SerializationService] Got sequence: id={product_sequence.id}, last_serial={product_sequence.last_serial}")
 
             # Reserve serial range from product sequence
             start_serial, end_serial = await self.get_next_product_serial_range(
                 product_sequence, item.quantity
             )
-            logging.info(f"[SerializationService] Reserved range: {start_serial} - {end_serial}")
-
-            # Generate individual serial records
-            item_barcodes = []
-
-            # For spare parts, get the channel code
-            channel_code = None
-            if item.item_type == ItemType.SPARE_PART:
-                channel_code = self.get_channel_from_supplier(request.supplier_code)
-
-            for serial_num in range(start_serial, end_serial + 1):
-                barcode = self.generate_barcode(
-                    supplier_code=request.supplier_code,
-                    year_code=year_code,
-                    month_code=month_code,
-                    model_code=item.model_code,
-                    serial_number=serial_num,
-                    item_type=item.item_type,
-                )
+            await self.db.flush()
 
-                # Database columns are VARCHAR(36) for po_id, po_item_id, product_id
-                # Store as strings to match database schema
-                po_serial = POSerial(
-                    id=str(uuid.uuid4()),
-                    po_id=str(request.po_id),
-                    po_item_id=str(item.po_item_id) if item.po_item_id else None,
-                    product_id=str(item.product_id) if item.product_id else None,
-                    product_sku=item.product_sku,
-                    model_code=item.model_code.upper(),
-                    item_type=item.item_type.value if hasattr(item.item_type, 'value') else str(item.item_type),
-                    brand_prefix=self.BRAND_PREFIX,
-                    supplier_code=request.supplier_code.upper(),
-                    year_code=year_code if item.item_type != ItemType.SPARE_PART else year_code[0],
-                    month_code=month_code,
-                    serial_number=serial_num,
-                    barcode=barcode,
-                    status=SerialStatus.GENERATED.value,
+            prefix = self.barcode_prefix(
+                request.supplier_code, year_code, month_code, item.model_code, item.item_type
+            )
+            if settings.SERIAL_RANGE_STORAGE:
+                self.db.add(self.build_serial_range(
+                    request.po_id, item, request.supplier_code, year_code, month_code, start_serial, end_serial
+                ))
+                written = item.quantity
+            else:
+                rows = self.iter_serial_rows(
+                    request.po_id, item, request.supplier_code, year_code, month_code, start_serial, end_serial
                 )
-                self.db.add(po_serial)
-                item_barcodes.append(barcode)
+                written = await self.insert_serial_rows(rows)
+            total_generated += written
+            logging.info(f"[SerializationService] {item.model_code}: serials {start_serial}-{end_serial} ({written} rows)")
 
-            all_barcodes.extend(item_barcodes)
+            if request.include_barcodes:
+                all_barcodes.extend(f"{prefix}{n:08d}" for n in range(start_serial, end_serial + 1))
 
             # Create summary for this item
             item_summaries.append(GeneratedSerialSummary(
@@ -619,62 +750,380 @@ class SerializationService:
                 quantity=item.quantity,
                 start_serial=start_serial,
                 end_serial=end_serial,
-                start_barcode=item_barcodes[0],
-                end_barcode=item_barcodes[-1],
+                start_barcode=f"{prefix}{start_serial:08d}",
+                end_barcode=f"{prefix}{end_serial:08d}",
             ))
 
-        logging.info(f"[SerializationService] Committing {len(all_barcodes)} serial records to database...")
         await self.db.commit()
-        logging.info(f"[SerializationService] COMMIT SUCCESS: {len(all_barcodes)} serials generated for PO {request.po_id}")
+        logging.info(f"[SerializationService] COMMIT SUCCESS: {total_generated} serials generated for PO {request.po_id}")
 
         return GenerateSerialsResponse(
             po_id=request.po_id,
             supplier_code=request.supplier_code.upper(),
-            total_generated=len(all_barcodes),
+            total_generated=total_generated,
             items=item_summaries,
             barcodes=all_barcodes,
         )
 
-    # ==================== Serial Retrieval ====================
+    # ==================== Serial Ranges ====================
 
-    async def get_serials_by_po(
+    def range_unit(self, serial_range: POSerialRange, serial_number: int) -> POSerial:
+        """
+        Transient POSerial for a unit of a range that has no exception row.
+
+        Pass it to persist_serial() before changing it; it then becomes the
+        unit's exception row.
+        """
+        barcode = f"{serial_range.barcode_prefix}{serial_number:08d}"
+        return POSerial(
+            id=str(uuid.uuid5(SERIAL_ID_NAMESPACE, barcode)),
+            range_id=serial_range.id,
+            po_id=serial_range.po_id,
+            po_item_id=serial_range.po_item_id,
+            product_id=serial_range.product_id,
+            product_sku=serial_range.product_sku,
+            model_code=serial_range.model_code,
+            item_type=serial_range.item_type,
+            brand_prefix=serial_range.brand_prefix,
+            supplier_code=serial_range.supplier_code,
+            year_code=serial_range.year_code,
+            month_code=serial_range.month_code,
+            serial_number=serial_number,
+            barcode=barcode,
+            status=serial_range.status,
+            created_at=serial_range.created_at,
+            updated_at=serial_range.updated_at,
+        )
+
+    def persist_serial(self, serial: POSerial) -> POSerial:
+        """Add a range unit to the session as its exception row (no-op for stored rows)."""
+        if inspect(serial).transient:
+            self.db.add(serial)
+        return serial
+
+    def _split_barcode(self, barcode: str) -> Optional[Tuple[str, int]]:
+        """(barcode prefix, serial number) of a well-formed barcode, else None."""
+        try:
+            serial_number = self.parse_barcode(barcode)["serial_number"]
+        except ValueError:
+            return None
+        return barcode[:-self.SERIAL_DIGITS], serial_number
+
+    async def get_serial_range(self, barcode: str) -> Optional[POSerialRange]:
+        """
+        Range containing a barcode: an index probe on (barcode_prefix,
+        start_serial) for the last range starting at or before its serial.
+        """
+        split = self._split_barcode(barcode.upper())
+        if split is None:
+            return None
+        prefix, serial_number = split
+
+        result = await self.db.execute(
+            select(POSerialRange).where(
+                and_(
+                    POSerialRange.barcode_prefix == prefix,
+                    POSerialRange.start_serial <= serial_number,
+                )
+            ).order_by(POSerialRange.start_serial.desc()).limit(1)
+        )
+        serial_range = result.scalar_one_or_none()
+        if serial_range is None or serial_range.end_serial < serial_number:
+            return None
+        return serial_range
+
+    async def get_serials_by_barcodes(self, barcodes: Iterable[str]) -> Dict[str, POSerial]:
+        """
+        Resolve many barcodes at once: one query for stored rows, one for the
+        ranges covering the rest (matched in memory by bisection).
+
+        Returns {barcode (upper case): POSerial}; unknown barcodes are absent.
+        """
+        barcodes = {barcode.upper() for barcode in barcodes}
+        if not barcodes:
+            return {}
+
+        result = await self.db.execute(select(POSerial).where(POSerial.barcode.in_(barcodes)))
+        found = {serial.barcode: serial for serial in result.scalars().all()}
+
+        wanted: Dict[str, List[Tuple[int, str]]] = {}
+        for barcode in barcodes - found.keys():
+            split = self._split_barcode(barcode)
+            if split is not None:
+                wanted.setdefault(split[0], []).append((split[1], barcode))
+        if not wanted:
+            return found
+
+        conditions = [
+            and_(
+                POSerialRange.barcode_prefix == prefix,
+                POSerialRange.start_serial <= max(wanted_serials)[0],
+                POSerialRange.end_serial >= min(wanted_serials)[0],
+            )
+            for prefix, wanted_serials in wanted.items()
+        ]
+        result = await self.db.execute(
+            select(POSerialRange).where(or_(*conditions)).order_by(POSerialRange.start_serial)
+        )
+        ranges_by_prefix: Dict[str, List[POSerialRange]] = {}
+        for serial_range in result.scalars().all():
+            ranges_by_prefix.setdefault(serial_range.barcode_prefix, []).append(serial_range)
+
+        for prefix, ranges in ranges_by_prefix.items():
+            starts = [serial_range.start_serial for serial_range in ranges]
+            for serial_number, barcode in wanted[prefix]:
+                index = bisect_right(starts, serial_number) - 1
+                if index >= 0 and ranges[index].end_serial >= serial_number:
+                    found[barcode] = self.range_unit(ranges[index], serial_number)
+        return found
+
+    async def iter_po_serials(
         self,
         po_id: str,
-        status: SerialStatus = None,
-        limit: int = 1000,
-        offset: int = 0
-    ) -> List[POSerial]:
-        """Get all serials for a PO"""
+        statuses: Optional[Sequence[str]] = None,
+        product_id: Optional[str] = None,
+        offset: int = 0,
+    ) -> AsyncIterator[POSerial]:
+        """
+        Yield a PO's serials in serial order: per-unit rows first, then the
+        units of each range (its exception row where one exists).
+
+        Whole ranges before offset are skipped arithmetically.
+        """
         # po_id is VARCHAR(36) in database, use string comparison
         po_id_str = str(po_id) if po_id else None
+        statuses = {s.value if hasattr(s, 'value') else s for s in statuses} if statuses else None
+
+        unit_filters = [POSerial.po_id == po_id_str, POSerial.range_id.is_(None)]
+        range_filters = [POSerialRange.po_id == po_id_str]
+        if statuses:
+            unit_filters.append(POSerial.status.in_(statuses))
+        if product_id:
+            unit_filters.append(POSerial.product_id == str(product_id))
+            range_filters.append(POSerialRange.product_id == str(product_id))
+
+        if offset:
+            unit_count = await self.db.scalar(select(func.count(POSerial.id)).where(*unit_filters))
+        result = await self.db.execute(
+            select(POSerial).where(*unit_filters).order_by(POSerial.serial_number).offset(offset)
+        )
+        for serial in result.scalars():
+            yield serial
+        offset = max(0, offset - unit_count) if offset else 0
 
-        query = select(POSerial).where(POSerial.po_id == po_id_str)
+        result = await self.db.execute(
+            select(POSerialRange).where(*range_filters)
+            .order_by(POSerialRange.start_serial, POSerialRange.model_code)
+        )
+        ranges = result.scalars().all()
 
-        if status:
-            query = query.where(POSerial.status == status)
+        # Units per (range, status) held by exception rows
+        exception_counts: Dict[Tuple[str, str], int] = {}
+        if ranges and (offset or statuses):
+            result = await self.db.execute(
+                select(POSerial.range_id, POSerial.status, func.count(POSerial.id))
+                .where(and_(POSerial.po_id == po_id_str, POSerial.range_id.is_not(None)))
+                .group_by(POSerial.range_id, POSerial.status)
+            )
+            for range_id, status, count in result.all():
+                exception_counts[(range_id, status)] = count
+
+        for serial_range in ranges:
+            if offset:
+                exceptions = sum(c for (r, _), c in exception_counts.items() if r == serial_range.id)
+                matching = serial_range.quantity if not statuses else (
+                    (serial_range.quantity - exceptions if serial_range.status in statuses else 0)
+                    + sum(c for (r, st), c in exception_counts.items() if r == serial_range.id and st in statuses)
+                )
+                if offset >= matching:
+                    offset -= matching
+                    continue
+            elif statuses and serial_range.status not in statuses and not any(
+                r == serial_range.id and st in statuses for (r, st) in exception_counts
+            ):
+                continue
 
-        query = query.order_by(POSerial.serial_number).offset(offset).limit(limit)
+            result = await self.db.execute(
+                select(POSerial).where(POSerial.range_id == serial_range.id)
+            )
+            exceptions = {serial.serial_number: serial for serial in result.scalars().all()}
+
+            first = serial_range.start_serial
+            if offset and not statuses:
+                first += offset
+                offset = 0
+            for serial_number in range(first, serial_range.end_serial + 1):
+                serial = exceptions.get(serial_number)
+                if serial is None:
+                    if statuses and serial_range.status not in statuses:
+                        continue
+                    serial = self.range_unit(serial_range, serial_number)
+                elif statuses and serial.status not in statuses:
+                    continue
+                if offset:
+                    offset -= 1
+                    continue
+                yield serial
+
+    # Serials per batch when streaming a PO's serials out (export)
+    SERIAL_EXPORT_BATCH = 5000
+
+    async def iter_po_serial_values(
+        self,
+        po_id: str,
+        batch_size: int = SERIAL_EXPORT_BATCH
+    ) -> AsyncIterator[List[Tuple[str, str, int, str]]]:
+        """
+        Yield batches of (barcode, model_code, serial_number, status) for every
+        serial of a PO, in iter_po_serials order, without building ORM objects.
 
-        result = await self.db.execute(query)
-        return result.scalars().all()
+        Stored rows are read through server-side cursors (session.stream), and
+        range units are generated while merging in the range's exception rows,
+        so memory stays at one batch regardless of PO size.
+        """
+        # po_id is VARCHAR(36) in database, use string comparison
+        po_id_str = str(po_id) if po_id else None
+
+        result = await self.db.stream(
+            select(POSerial.barcode, POSerial.model_code, POSerial.serial_number, POSerial.status)
+            .where(and_(POSerial.po_id == po_id_str, POSerial.range_id.is_(None)))
+            .order_by(POSerial.serial_number)
+            .execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+        result = await self.db.execute(
+            select(POSerialRange).where(POSerialRange.po_id == po_id_str)
+            .order_by(POSerialRange.start_serial, POSerialRange.model_code)
+        )
+        batch = []
+        for serial_range in result.scalars().all():
+            prefix = serial_range.barcode_prefix
+            exceptions = await self.db.stream(
+                select(POSerial.serial_number, POSerial.status)
+                .where(POSerial.range_id == serial_range.id)
+                .order_by(POSerial.serial_number)
+                .execution_options(yield_per=batch_size)
+            )
+            exception = await anext(exceptions, None)
+            for serial_number in range(serial_range.start_serial, serial_range.end_serial + 1):
+                status = serial_range.status
+                if exception is not None and exception.serial_number == serial_number:
+                    status = exception.status
+                    exception = await anext(exceptions, None)
+                batch.append((f"{prefix}{serial_number:08d}", serial_range.model_code, serial_number, status))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            await exceptions.close()
+        if batch:
+            yield batch
+
+    async def get_po_serial_barcodes(
+        self,
+        po_id: str,
+        statuses: Sequence[str]
+    ) -> Dict[Optional[str], set]:
+        """
+        Barcodes of a PO's serials in the given statuses, keyed by product_id
+        (as str), without building ORM objects.
+        """
+        # po_id is VARCHAR(36) in database, use string comparison
+        po_id_str = str(po_id) if po_id else None
+        statuses = {s.value if hasattr(s, 'value') else s for s in statuses}
+        barcodes: Dict[Optional[str], set] = {}
+
+        result = await self.db.execute(
+            select(POSerial.product_id, POSerial.barcode, POSerial.range_id, POSerial.serial_number, POSerial.status)
+            .where(POSerial.po_id == po_id_str)
+        )
+        taken: Dict[str, set] = {}
+        for product_id, barcode, range_id, serial_number, status in result.all():
+            if range_id is not None:
+                taken.setdefault(range_id, set()).add(serial_number)
+            if status in statuses:
+                barcodes.setdefault(str(product_id) if product_id else None, set()).add(barcode)
+
+        result = await self.db.execute(
+            select(POSerialRange).where(
+                and_(
+                    POSerialRange.po_id == po_id_str,
+                    POSerialRange.status.in_(statuses)
+                )
+            )
+        )
+        for serial_range in result.scalars().all():
+            product_barcodes = barcodes.setdefault(
+                str(serial_range.product_id) if serial_range.product_id else None, set()
+            )
+            prefix = serial_range.barcode_prefix
+            skip = taken.get(serial_range.id, ())
+            product_barcodes.update(
+                f"{prefix}{serial_number:08d}"
+                for serial_number in range(serial_range.start_serial, serial_range.end_serial + 1)
+                if serial_number not in skip
+            )
+        return barcodes
+
+    # ==================== Serial Retrieval ====================
+
+    async def get_serials_by_po(
+        self,
+        po_id: str,
+        status: SerialStatus = None,
+        limit: int = 1000,
+        offset: int = 0
+    ) -> List[POSerial]:
+        """Get all serials for a PO (range units included, see iter_po_serials)"""
+        serials = []
+        if limit <= 0:
+            return serials
+        async for serial in self.iter_po_serials(po_id, statuses=[status] if status else None, offset=offset):
+            serials.append(serial)
+            if len(serials) >= limit:
+                break
+        return serials
 
     async def get_serial_by_barcode(self, barcode: str) -> Optional[POSerial]:
-        """Get serial details by barcode"""
+        """
+        Get serial details by barcode.
+
+        A stored po_serials row (per-unit serial or exception row) wins;
+        otherwise the barcode is resolved to its range and returned as a
+        transient range unit.
+        """
+        barcode = barcode.upper()
         result = await self.db.execute(
-            select(POSerial).where(POSerial.barcode == barcode.upper())
+            select(POSerial).where(POSerial.barcode == barcode)
         )
-        return result.scalar_one_or_none()
+        serial = result.scalar_one_or_none()
+        if serial is not None:
+            return serial
+
+        serial_range = await self.get_serial_range(barcode)
+        if serial_range is None:
+            return None
+        return self.range_unit(serial_range, self._split_barcode(barcode)[1])
 
     async def get_serials_count_by_po(self, po_id: str) -> Dict[str, int]:
         """Get count of serials by status for a PO"""
         # po_id is VARCHAR(36) in database, use string comparison
-        po_id_str = str(po_id) if po_id else None
+        return await self.count_serials_by_status(str(po_id) if po_id else None)
+
+    async def count_serials_by_status(self, po_id_str: Optional[str] = None) -> Dict[str, int]:
+        """Serial counts by status (plus "total"), for one PO or all of them."""
+        unit_filters = [POSerial.range_id.is_(None)]
+        range_filters = []
+        if po_id_str is not None:
+            unit_filters.append(POSerial.po_id == po_id_str)
+            range_filters.append(POSerialRange.po_id == po_id_str)
 
         result = await self.db.execute(
             select(
                 POSerial.status,
                 func.count(POSerial.id).label("count")
-            ).where(POSerial.po_id == po_id_str)
+            ).where(*unit_filters)
             .group_by(POSerial.status)
         )
 
@@ -683,7 +1132,157 @@ class SerializationService:
             counts[row.status] = row.count
             counts["total"] += row.count
 
-        return counts
+        # Ranges count at their own status, except units moved on by an exception row
+        result = await self.db.execute(
+            select(
+                POSerialRange.status,
+                func.sum(POSerialRange.quantity).label("count")
+            ).where(*range_filters)
+            .group_by(POSerialRange.status)
+        )
+        for row in result:
+            counts[row.status] = counts.get(row.status, 0) + row.count
+            counts["total"] += row.count
+
+        result = await self.db.execute(
+            select(
+                POSerialRange.status.label("range_status"),
+                POSerial.status,
+                func.count(POSerial.id).label("count")
+            ).join(POSerialRange, POSerial.range_id == POSerialRange.id)
+            .where(*range_filters)
+            .group_by(POSerialRange.status, POSerial.status)
+        )
+        for row in result:
+            counts[row.range_status] -= row.count
+            counts[row.status] = counts.get(row.status, 0) + row.count
+
+        return {status: count for status, count in counts.items() if count or status == "total"}
+
+    async def list_serials(
+        self,
+        item_type: Optional[str] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50
+    ) -> Tuple[int, List[POSerial]]:
+        """
+        Page through serials across all POs, newest first. Returns (total, page).
+
+        Stored rows and ranges are paged together as blocks (a row is one
+        unit, a range is its units without exception rows) using a running
+        sum of units, so only the ranges on the requested page are expanded.
+        A search matches stored barcodes/serial numbers by substring, and
+        range units by exact barcode.
+        """
+        row_filters = []
+        range_filters = []
+        if item_type:
+            row_filters.append(POSerial.item_type == item_type.upper())
+            range_filters.append(POSerialRange.item_type == item_type.upper())
+        if status:
+            row_filters.append(func.upper(POSerial.status) == status.upper())
+            range_filters.append(func.upper(POSerialRange.status) == status.upper())
+
+        searched_unit = None
+        if search:
+            search_filter = f"%{search}%"
+            row_filters.append(
+                (POSerial.barcode.ilike(search_filter)) |
+                (POSerial.serial_number.cast(String).ilike(search_filter))
+            )
+            serial_range = await self.get_serial_range(search)
+            if serial_range is not None:
+                searched_unit = await self.get_serial_by_barcode(search)
+                if not inspect(searched_unit).transient or (
+                    item_type and serial_range.item_type != item_type.upper()
+                ) or (status and serial_range.status.upper() != status.upper()):
+                    searched_unit = None
+            range_filters.append(false())
+
+        exceptions = (
+            select(POSerial.range_id, func.count(POSerial.id).label("exceptions"))
+            .where(POSerial.range_id.is_not(None))
+            .group_by(POSerial.range_id)
+            .subquery()
+        )
+        blocks = union_all(
+            select(
+                literal("row").label("kind"),
+                POSerial.id.label("id"),
+                POSerial.created_at.label("created_at"),
+                literal(1).label("units"),
+            ).where(*row_filters),
+            select(
+                literal("range").label("kind"),
+                POSerialRange.id.label("id"),
+                POSerialRange.created_at.label("created_at"),
+                (POSerialRange.quantity - func.coalesce(exceptions.c.exceptions, 0)).label("units"),
+            ).outerjoin(exceptions, exceptions.c.range_id == POSerialRange.id)
+            .where(*range_filters),
+        ).subquery()
+
+        total = (await self.db.scalar(select(func.sum(blocks.c.units)))) or 0
+        serials: List[POSerial] = []
+        if searched_unit is not None:
+            total += 1
+            if offset == 0:
+                serials.append(searched_unit)
+            else:
+                offset -= 1
+        remaining = limit - len(serials)
+        if total == 0 or remaining <= 0:
+            return total, serials
+
+        running = func.sum(blocks.c.units).over(
+            order_by=(blocks.c.created_at.desc(), blocks.c.kind, blocks.c.id)
+        )
+        numbered = select(blocks, running.label("upto")).subquery()
+        result = await self.db.execute(
+            select(numbered).where(
+                and_(
+                    numbered.c.upto > offset,
+                    numbered.c.upto - numbered.c.units < offset + remaining,
+                )
+            ).order_by(numbered.c.upto)
+        )
+        page = result.all()
+
+        row_ids = [block.id for block in page if block.kind == "row"]
+        range_ids = [block.id for block in page if block.kind == "range"]
+        rows = {}
+        if row_ids:
+            result = await self.db.execute(select(POSerial).where(POSerial.id.in_(row_ids)))
+            rows = {serial.id: serial for serial in result.scalars().all()}
+        ranges = {}
+        taken: Dict[str, set] = {}
+        if range_ids:
+            result = await self.db.execute(select(POSerialRange).where(POSerialRange.id.in_(range_ids)))
+            ranges = {serial_range.id: serial_range for serial_range in result.scalars().all()}
+            result = await self.db.execute(
+                select(POSerial.range_id, POSerial.serial_number).where(POSerial.range_id.in_(range_ids))
+            )
+            for range_id, serial_number in result.all():
+                taken.setdefault(range_id, set()).add(serial_number)
+
+        for block in page:
+            if block.kind == "row":
+                serials.append(rows[block.id])
+                continue
+            serial_range = ranges[block.id]
+            skip = max(0, offset - (block.upto - block.units))
+            exceptions_in_range = taken.get(block.id, set())
+            for serial_number in range(serial_range.start_serial, serial_range.end_serial + 1):
+                if len(serials) >= limit:
+                    break
+                if serial_number in exceptions_in_range:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                serials.append(self.range_unit(serial_range, serial_number))
+        return total, serials
 
     # ==================== Serial Scanning (GRN) ====================
 
@@ -697,7 +1296,9 @@ class SerializationService:
         """
         Scan and validate a serial during GRN receiving.
 
-        Marks the serial as RECEIVED if valid.
+        Marks the serial as RECEIVED if valid. A range unit that a concurrent
+        scan received first (its exception row insert hits the unique id /
+        barcode) is reported as already scanned.
         """
         serial = await self.get_serial_by_barcode(barcode)
 
@@ -731,6 +1332,7 @@ class SerializationService:
             )
 
         # Mark as received
+        self.persist_serial(serial)
         serial.status = SerialStatus.RECEIVED.value
         serial.grn_id = grn_id
         serial.grn_item_id = grn_item_id
@@ -738,7 +1340,18 @@ class SerializationService:
         serial.received_by = user_id
         serial.updated_at = datetime.now(timezone.utc)
 
-        await self.db.commit()
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            current = await self.get_serial_by_barcode(barcode)
+            return ScanSerialResponse(
+                barcode=barcode,
+                is_valid=False,
+                status=current.status if current else SerialStatus.RECEIVED,
+                message="Barcode already scanned",
+                serial_details=POSerialResponse.model_validate(current) if current else None,
+            )
 
         return ScanSerialResponse(
             barcode=barcode,
@@ -748,17 +1361,157 @@ class SerializationService:
             serial_details=POSerialResponse.model_validate(serial),
         )
 
+    # Statuses a serial can be received from in a GRN
+    RECEIVABLE_STATUSES = (
+        SerialStatus.GENERATED.value,
+        SerialStatus.PRINTED.value,
+        SerialStatus.SENT_TO_VENDOR.value,
+    )
+
     async def bulk_scan_serials(
         self,
         barcodes: List[str],
         grn_id: str,
-        user_id: str = None
+        user_id: str = None,
+        grn_item_id: str = None
     ) -> List[ScanSerialResponse]:
-        """Scan multiple barcodes at once"""
-        results = []
+        """
+        Scan many barcodes at once (GRN receiving).
+
+        All barcodes are resolved in one pass (get_serials_by_barcodes),
+        checked against the GRN's purchase order and their status in memory,
+        and every RECEIVED transition is written together: one UPDATE for
+        stored rows and one bulk insert of exception rows for range units.
+        Commits once. Results are in input order; a barcode repeated within
+        the batch is reported as a duplicate, and one a concurrent scan
+        received first (the UPDATE no longer matched it, or its insert hit
+        the barcode's unique key) as already processed.
+        """
+        if not barcodes:
+            return []
+
+        grn_po_id = None
+        if grn_id:
+            try:
+                grn_uuid = uuid.UUID(str(grn_id))
+            except ValueError:
+                grn_uuid = None
+            if grn_uuid is not None:
+                grn_po_id = await self.db.scalar(
+                    select(GoodsReceiptNote.purchase_order_id).where(GoodsReceiptNote.id == grn_uuid)
+                )
+            if grn_po_id is None:
+                return [
+                    ScanSerialResponse(
+                        barcode=barcode,
+                        is_valid=False,
+                        status=SerialStatus.GENERATED,
+                        message=f"GRN {grn_id} not found",
+                        serial_details=None,
+                    )
+                    for barcode in barcodes
+                ]
+            grn_po_id = str(grn_po_id)
+
+        resolved = await self.get_serials_by_barcodes(barcode.strip() for barcode in barcodes)
+
+        seen = set()
+        received: List[POSerial] = []
+        outcomes: List[Tuple[str, Optional[POSerial], Optional[str]]] = []  # (barcode, serial, error)
         for barcode in barcodes:
-            result = await self.scan_serial(barcode, grn_id, user_id=user_id)
-            results.append(result)
+            key = barcode.strip().upper()
+            serial = resolved.get(key)
+            if serial is None:
+                error = f"Barcode {barcode} not found in system"
+            elif key in seen:
+                error = "Barcode scanned more than once in this batch"
+            elif grn_po_id is not None and serial.po_id != grn_po_id:
+                error = "Barcode belongs to a different purchase order"
+            elif serial.status in (SerialStatus.RECEIVED, SerialStatus.ASSIGNED, SerialStatus.SOLD):
+                error = f"Barcode already processed. Current status: {serial.status}"
+            elif serial.status == SerialStatus.CANCELLED:
+                error = "Barcode has been cancelled"
+            else:
+                error = None
+                received.append(serial)
+            seen.add(key)
+            outcomes.append((barcode, serial, error))
+
+        if received:
+            now = datetime.now(timezone.utc)
+            values = {
+                "status": SerialStatus.RECEIVED.value,
+                "grn_id": str(grn_id) if grn_id else None,
+                "grn_item_id": grn_item_id,
+                "received_at": now,
+                "received_by": str(user_id) if user_id else None,
+                "updated_at": now,
+            }
+            stored_ids = [serial.id for serial in received if not inspect(serial).transient]
+            units = [serial for serial in received if inspect(serial).transient]
+            raced_ids, raced_barcodes = [], []
+            if stored_ids:
+                updated = set((await self.db.execute(
+                    update(POSerial).where(
+                        POSerial.id.in_(stored_ids),
+                        POSerial.status.in_(self.RECEIVABLE_STATUSES)
+                    ).values(**values).returning(POSerial.id)
+                    .execution_options(synchronize_session="fetch")
+                )).scalars())
+                raced_ids = [serial_id for serial_id in stored_ids if serial_id not in updated]
+            if units:
+                columns = [column.key for column in POSerial.__table__.columns]
+                insert_stmt = sqlite_insert if database.is_sqlite else pg_insert
+                inserted = set((await self.db.execute(
+                    insert_stmt(POSerial)
+                    .on_conflict_do_nothing(index_elements=[POSerial.barcode])
+                    .returning(POSerial.barcode),
+                    [{**{column: getattr(unit, column) for column in columns}, **values} for unit in units],
+                )).scalars())
+                for unit in units:
+                    if unit.barcode in inserted:
+                        for key, value in values.items():
+                            setattr(unit, key, value)
+                    else:
+                        raced_barcodes.append(unit.barcode)
+
+            if raced_ids or raced_barcodes:
+                # Report them as the concurrent scan left them
+                current = {
+                    serial.barcode: serial
+                    for serial in (await self.db.execute(
+                        select(POSerial)
+                        .where(or_(POSerial.id.in_(raced_ids), POSerial.barcode.in_(raced_barcodes)))
+                        .execution_options(populate_existing=True)
+                    )).scalars()
+                }
+                for index, (barcode, serial, error) in enumerate(outcomes):
+                    if error is None and serial.barcode in current:
+                        serial = current[serial.barcode]
+                        outcomes[index] = (
+                            barcode, serial, f"Barcode already processed. Current status: {serial.status}"
+                        )
+            await self.db.commit()
+
+        results = []
+        for barcode, serial, error in outcomes:
+            details = POSerialResponse.model_validate(serial) if serial is not None else None
+            if error is None:
+                results.append(ScanSerialResponse(
+                    barcode=barcode,
+                    is_valid=True,
+                    status=SerialStatus.RECEIVED,
+                    message="Serial received successfully",
+                    serial_details=details,
+                ))
+            else:
+                results.append(ScanSerialResponse(
+                    barcode=barcode,
+                    is_valid=False,
+                    status=serial.status if serial is not None else SerialStatus.GENERATED,
+                    message=error,
+                    serial_details=details,
+                ))
         return results
 
     # ==================== Serial Assignment (Stock) ====================
@@ -779,6 +1532,7 @@ class SerializationService:
                 f"Serial must be in RECEIVED status to assign. Current: {serial.status}"
             )
 
+        self.persist_serial(serial)
         serial.status = SerialStatus.ASSIGNED.value
         serial.stock_item_id = stock_item_id
         serial.assigned_at = datetime.now(timezone.utc)
@@ -809,6 +1563,7 @@ class SerializationService:
             )
 
         now = datetime.now(timezone.utc)
+        self.persist_serial(serial)
         serial.status = SerialStatus.SOLD.value
         serial.order_id = order_id
         serial.order_item_id = order_item_id
@@ -1051,26 +1806,58 @@ class SerializationService:
 
     # ==================== Update PO Status ====================
 
+    async def _update_range_status(
+        self,
+        po_id_str: str,
+        from_statuses: Sequence[str],
+        to_status: str,
+        notes: str = None
+    ) -> int:
+        """Move a PO's ranges between statuses. Returns the units affected (exception rows excluded)."""
+        result = await self.db.execute(
+            select(POSerialRange.id, POSerialRange.quantity).where(
+                and_(
+                    POSerialRange.po_id == po_id_str,
+                    POSerialRange.status.in_(from_statuses)
+                )
+            )
+        )
+        ranges = result.all()
+        if not ranges:
+            return 0
+        range_ids = [row.id for row in ranges]
+
+        exceptions = await self.db.scalar(
+            select(func.count(POSerial.id)).where(POSerial.range_id.in_(range_ids))
+        )
+        values = {"status": to_status, "updated_at": datetime.now(timezone.utc)}
+        if notes is not None:
+            values["notes"] = notes
+        await self.db.execute(
+            update(POSerialRange).where(POSerialRange.id.in_(range_ids)).values(**values)
+        )
+        return sum(row.quantity for row in ranges) - (exceptions or 0)
+
     async def mark_serials_sent_to_vendor(self, po_id: str) -> int:
         """Mark all serials for a PO as sent to vendor"""
         # po_id is VARCHAR(36) in database
         po_id_str = str(po_id) if po_id else None
 
+        count = await self._update_range_status(
+            po_id_str, [SerialStatus.GENERATED.value], SerialStatus.SENT_TO_VENDOR.value
+        )
         result = await self.db.execute(
-            select(POSerial).where(
+            update(POSerial).where(
                 and_(
                     POSerial.po_id == po_id_str,
-                    POSerial.status == SerialStatus.GENERATED
+                    POSerial.status == SerialStatus.GENERATED.value
                 )
-            )
+            ).values(
+                status=SerialStatus.SENT_TO_VENDOR.value,
+                updated_at=datetime.now(timezone.utc),
+            ).execution_options(synchronize_session=False)
         )
-        serials = result.scalars().all()
-
-        count = 0
-        for serial in serials:
-            serial.status = SerialStatus.SENT_TO_VENDOR.value
-            serial.updated_at = datetime.now(timezone.utc)
-            count += 1
+        count += result.rowcount
 
         await self.db.commit()
         return count
@@ -1079,27 +1866,28 @@ class SerializationService:
         """Cancel all unreceived serials for a PO"""
         # po_id is VARCHAR(36) in database
         po_id_str = str(po_id) if po_id else None
-
+        unreceived = [
+            SerialStatus.GENERATED.value,
+            SerialStatus.PRINTED.value,
+            SerialStatus.SENT_TO_VENDOR.value,
+        ]
+
+        count = await self._update_range_status(
+            po_id_str, unreceived, SerialStatus.CANCELLED.value, notes=reason
+        )
         result = await self.db.execute(
-            select(POSerial).where(
+            update(POSerial).where(
                 and_(
                     POSerial.po_id == po_id_str,
-                    POSerial.status.in_([
-                        SerialStatus.GENERATED,
-                        SerialStatus.PRINTED,
-                        SerialStatus.SENT_TO_VENDOR
-                    ])
+                    POSerial.status.in_(unreceived)
                 )
-            )
+            ).values(
+                status=SerialStatus.CANCELLED.value,
+                notes=reason,
+                updated_at=datetime.now(timezone.utc),
+            ).execution_options(synchronize_session=False)
         )
-        serials = result.scalars().all()
-
-        count = 0
-        for serial in serials:
-            serial.status = SerialStatus.CANCELLED.value
-            serial.notes = reason
-            serial.updated_at = datetime.now(timezone.utc)
-            count += 1
+        count += result.rowcount
 
         await self.db.commit()
         return count
@@ -18,8 +18,9 @@ from sqlalchemy.orm import selectinload
 from app.models.serviceability import WarehouseServiceability, AllocationRule, ChannelCode
 from app.models.transporter import Transporter, TransporterServiceability
 from app.models.warehouse import Warehouse
-from app.models.inventory import InventorySummary, StockItem, StockItemStatus
+from app.models.inventory import StockItem, StockItemStatus
 from app.models.product import Product
+from app.services.inventory_ledger import InventoryLedgerService
 from app.schemas.serviceability import (
     ServiceabilityCheckRequest,
     ServiceabilityCheckResponse,
@@ -183,26 +184,19 @@ class ServiceabilityService:
 
         logger.info(f"_check_stock_availability: warehouse_id={warehouse_id}, product_ids={product_ids}")
 
-        # Check inventory summary
-        query = select(InventorySummary).where(
-            and_(
-                InventorySummary.warehouse_id == warehouse_id,
-                InventorySummary.product_id.in_(product_ids)
-            )
-        )
-        result = await self.db.execute(query)
-        summaries = result.scalars().all()
+        # Check inventory summary, including unfolded ledger entries
+        levels = await InventoryLedgerService(self.db).product_levels(product_ids, warehouse_id=warehouse_id)
 
-        logger.info(f"_check_stock_availability: Found {len(summaries)} inventory records")
-        for s in summaries:
-            logger.info(f"  - product_id={s.product_id}, available_quantity={s.available_quantity}")
+        logger.info(f"_check_stock_availability: Found {len(levels)} inventory records")
+        for (_, product_id, _, _), level in levels.items():
+            logger.info(f"  - product_id={product_id}, available_quantity={level['available_quantity']}")
 
-        if not summaries:
+        if not levels:
             logger.warning(f"_check_stock_availability: NO inventory found for warehouse_id={warehouse_id}, product_ids={product_ids}")
             return False, 0
 
-        total_available = sum(s.available_quantity for s in summaries)
-        all_available = all(s.available_quantity > 0 for s in summaries)
+        total_available = sum(level["available_quantity"] for level in levels.values())
+        all_available = all(level["available_quantity"] > 0 for level in levels.values())
 
         logger.info(f"_check_stock_availability: total_available={total_available}, all_available={all_available}")
         return all_available, total_available
@@ -13,12 +13,14 @@ API Docs: https://apidocs.shiprocket.in/
 """
 import httpx
 import logging
+from contextlib import asynccontextmanager
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass
 from enum import Enum
 
 from app.config import settings
+from app.core.http_client import http_client
 from app.services.cache_service import get_cache
 
 logger = logging.getLogger(__name__)
@@ -152,12 +154,22 @@ class ShiprocketService:
         tracking = await service.track_shipment(awb_code)
     """
 
-    def __init__(self):
-        self.base_url = settings.SHIPROCKET_API_URL
+    def __init__(self, base_url: Optional[str] = None, client: Optional[httpx.AsyncClient] = None):
+        self.base_url = (base_url or settings.SHIPROCKET_API_URL).rstrip("/")
         self.email = settings.SHIPROCKET_EMAIL
         self.password = settings.SHIPROCKET_PASSWORD
         self.cache = get_cache()
         self._token: Optional[str] = None
+        self._client = client
+
+    @asynccontextmanager
+    async def _http(self):
+        """Client passed in (e.g. by the tracking poller), else the shared Shiprocket pool."""
+        if self._client is not None:
+            yield self._client
+        else:
+            async with http_client("shiprocket") as client:
+                yield client
 
     async def _get_token(self) -> str:
         """
@@ -172,7 +184,7 @@ class ShiprocketService:
             return cached_token
 
         # Generate new token
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             response = await client.post(
                 f"{self.base_url}/auth/login",
                 json={
@@ -214,7 +226,7 @@ class ShiprocketService:
 
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
 
-        async with httpx.AsyncClient() as client:
+        async with self._http() as client:
             if method.upper() == "GET":
                 response = await client.get(url, headers=headers, params=params, timeout=30.0)
             elif method.upper() == "POST":
@@ -389,10 +401,14 @@ class ShiprocketService:
             TrackingInfo with current status and activities
         """
         result = await self._request("GET", f"/courier/track/awb/{awb_code}")
+        return self.parse_tracking(awb_code, result)
 
-        tracking_data = result.get("tracking_data", {})
+    @staticmethod
+    def parse_tracking(awb_code: str, result: Dict) -> TrackingInfo:
+        """Build TrackingInfo from a Shiprocket tracking payload ({"tracking_data": {...}})."""
+        tracking_data = result.get("tracking_data", {}) or {}
         shipment_track = tracking_data.get("shipment_track", [{}])[0] if tracking_data.get("shipment_track") else {}
-        activities = tracking_data.get("shipment_track_activities", [])
+        activities = tracking_data.get("shipment_track_activities", []) or []
 
         return TrackingInfo(
             awb_code=awb_code,
@@ -420,9 +436,14 @@ class ShiprocketService:
         return await self._request("GET", f"/courier/track", params={"order_id": order_id})
 
     async def track_multiple(self, awb_codes: List[str]) -> Dict:
-        """Track multiple shipments at once."""
-        return await self._request("GET", "/courier/track/awbs", params={
-            "awbs": ",".join(awb_codes)
+        """
+        Track multiple shipments at once.
+
+        Returns the raw response: tracking payloads (as returned by
+        track_shipment's endpoint) keyed by AWB code.
+        """
+        return await self._request("POST", "/courier/track/awbs", data={
+            "awbs": awb_codes
         })
 
     # ==================== COURIER SERVICEABILITY ====================
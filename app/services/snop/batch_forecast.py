@@ -0,0 +1,335 @@
+"""
+Batch Forecast Pipeline
+
+Full-catalog SKU forecasting as a background job:
+1. One grouped query loads demand history for every selected SKU
+2. Model fitting is fanned out to a process pool in chunks
+   (each chunk is fitted with the vectorized EnsembleForecaster backend)
+3. Forecasts are bulk-inserted into demand_forecasts
+
+Job progress is kept in the cache service (Redis in production) so any
+API worker can answer status polls.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session_factory
+from app.models.product import Product
+from app.models.snop import (
+    DemandForecast,
+    ForecastAlgorithm,
+    ForecastGranularity,
+    ForecastLevel,
+)
+from app.services.cache_service import get_cache
+from app.services.snop.demand_planner import DemandPlannerService
+from app.services.snop.ensemble_forecaster import EnsembleForecaster
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY_PREFIX = "snop:forecast_job:"
+JOB_STATUS_TTL = 86400  # Keep job status for 24 hours
+
+
+class ForecastJobStatus:
+    """Batch forecast job states."""
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+# ==================== Process Pool ====================
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_forecast_pool() -> ProcessPoolExecutor:
+    """Get the shared process pool used for model fitting."""
+    global _process_pool
+
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.SNOP_FORECAST_WORKERS)
+
+    return _process_pool
+
+
+def shutdown_forecast_pool() -> None:
+    """Shut down the model-fitting process pool (application shutdown)."""
+    global _process_pool
+
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def fit_forecast_chunk(
+    series: List[Tuple[str, List[float]]],
+    base_date: date,
+    forecast_periods: int,
+    granularity: str,
+    algorithm: str
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Fit forecasts for a chunk of (product_id, history) pairs.
+
+    Runs inside a pool worker process. Series are grouped by length so each
+    group is fitted with one vectorized call; results have the same shape as
+    EnsembleForecaster.ensemble_forecast().
+    """
+    forecaster = EnsembleForecaster(db=None)
+
+    by_length: Dict[int, List[Tuple[str, List[float]]]] = defaultdict(list)
+    for key, data in series:
+        by_length[len(data)].append((key, data))
+
+    results = []
+    for group in by_length.values():
+        batch = forecaster.forecast_batch(
+            [data for _, data in group],
+            base_date=base_date,
+            forecast_periods=forecast_periods,
+            granularity=ForecastGranularity(granularity),
+            algorithm=ForecastAlgorithm(algorithm),
+        )
+        results.extend((key, result) for (key, _), result in zip(group, batch))
+
+    return results
+
+
+# ==================== Job Status ====================
+
+async def get_forecast_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get batch forecast job status."""
+    return await get_cache().get(f"{JOB_KEY_PREFIX}{job_id}")
+
+
+async def _save_job(job: Dict[str, Any]) -> None:
+    await get_cache().set(f"{JOB_KEY_PREFIX}{job['job_id']}", job, ttl=JOB_STATUS_TTL)
+
+
+# Strong references to running job tasks (asyncio only keeps weak ones)
+_running_jobs: set = set()
+
+
+async def start_forecast_job(**params: Any) -> Dict[str, Any]:
+    """
+    Queue a batch forecast job and run it in the background.
+
+    Accepts the keyword arguments of BatchForecastService.run() (except job_id).
+    Returns the initial job status.
+    """
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "status": ForecastJobStatus.QUEUED,
+        "total_products": 0,
+        "processed_products": 0,
+        "forecasts_created": 0,
+        "progress_pct": 0.0,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "started_at": None,
+        "finished_at": None,
+        "error": None,
+    }
+    await _save_job(job)
+
+    task = asyncio.create_task(_run_forecast_job(job, params))
+    _running_jobs.add(task)
+    task.add_done_callback(_running_jobs.discard)
+
+    return job
+
+
+async def _run_forecast_job(job: Dict[str, Any], params: Dict[str, Any]) -> None:
+    """Run a queued job on its own session, recording failure in the job status."""
+    try:
+        async with async_session_factory() as session:
+            await BatchForecastService(session).run(job=job, **params)
+    except Exception as e:
+        logger.exception(f"Batch forecast job {job['job_id']} failed")
+        job["status"] = ForecastJobStatus.FAILED
+        job["error"] = str(e)
+        job["finished_at"] = datetime.now(timezone.utc).isoformat()
+        await _save_job(job)
+
+
+# ==================== Batch Service ====================
+
+class BatchForecastService:
+    """
+    Generates SKU-level forecasts for many products in one pipeline.
+
+    Produces the same forecasts as SNOPService.generate_forecasts() at SKU
+    level, without one history query and one commit per product.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.demand_planner = DemandPlannerService(db)
+
+    async def run(
+        self,
+        job: Dict[str, Any],
+        product_ids: Optional[List[uuid.UUID]] = None,
+        category_ids: Optional[List[uuid.UUID]] = None,
+        granularity: ForecastGranularity = ForecastGranularity.WEEKLY,
+        forecast_start_date: Optional[date] = None,
+        forecast_horizon_days: int = 90,
+        algorithm: ForecastAlgorithm = ForecastAlgorithm.ENSEMBLE,
+        lookback_days: int = 365,
+        user_id: Optional[uuid.UUID] = None
+    ) -> Dict[str, Any]:
+        """Run the pipeline, updating `job` progress as chunks complete."""
+        if forecast_start_date is None:
+            forecast_start_date = date.today()
+
+        forecast_end_date = forecast_start_date + timedelta(days=forecast_horizon_days)
+        forecast_periods = forecast_horizon_days if granularity == ForecastGranularity.DAILY else (forecast_horizon_days // 7)
+
+        job["status"] = ForecastJobStatus.RUNNING
+        job["started_at"] = datetime.now(timezone.utc).isoformat()
+
+        # Products to forecast
+        product_query = select(Product.id, Product.name).where(Product.is_active == True)
+        if product_ids:
+            product_query = product_query.where(Product.id.in_(product_ids))
+        if category_ids:
+            product_query = product_query.where(Product.category_id.in_(category_ids))
+
+        products = (await self.db.execute(product_query)).all()
+        product_names = {str(p.id): p.name for p in products}
+        job["total_products"] = len(products)
+        await _save_job(job)
+
+        # One grouped history query for all products
+        history = await self.demand_planner.get_historical_demand_by_product(
+            product_ids=[p.id for p in products],
+            start_date=forecast_start_date - timedelta(days=lookback_days),
+            end_date=forecast_start_date,
+            granularity=granularity
+        )
+
+        results: Dict[str, Dict[str, Any]] = {}
+        series = []
+        for product in products:
+            points = history.get(product.id)
+            if points:
+                series.append((str(product.id), [float(p["quantity"]) for p in points]))
+            else:
+                results[str(product.id)] = self._empty_result(algorithm, forecast_start_date, forecast_periods)
+
+        job["processed_products"] = len(results)
+        await _save_job(job)
+
+        # Fan model fitting out to the process pool
+        loop = asyncio.get_running_loop()
+        pool = get_forecast_pool()
+        chunk_size = settings.SNOP_FORECAST_CHUNK_SIZE
+        futures = [
+            loop.run_in_executor(
+                pool,
+                fit_forecast_chunk,
+                series[i:i + chunk_size],
+                forecast_start_date,
+                forecast_periods,
+                granularity.value,
+                algorithm.value,
+            )
+            for i in range(0, len(series), chunk_size)
+        ]
+
+        for completed in asyncio.as_completed(futures):
+            for key, result in await completed:
+                results[key] = result
+            job["processed_products"] = len(results)
+            job["progress_pct"] = round(len(results) / max(len(products), 1) * 100, 1)
+            await _save_job(job)
+
+        # Bulk insert
+        created = await self._bulk_insert_forecasts(
+            results=results,
+            product_names=product_names,
+            granularity=granularity,
+            forecast_start_date=forecast_start_date,
+            forecast_end_date=forecast_end_date,
+            algorithm=algorithm,
+            user_id=user_id
+        )
+
+        job["status"] = ForecastJobStatus.COMPLETED
+        job["forecasts_created"] = created
+        job["progress_pct"] = 100.0
+        job["finished_at"] = datetime.now(timezone.utc).isoformat()
+        await _save_job(job)
+
+        logger.info(f"Batch forecast job {job['job_id']}: {created} forecasts for {len(products)} products")
+        return job
+
+    async def _bulk_insert_forecasts(
+        self,
+        results: Dict[str, Dict[str, Any]],
+        product_names: Dict[str, str],
+        granularity: ForecastGranularity,
+        forecast_start_date: date,
+        forecast_end_date: date,
+        algorithm: ForecastAlgorithm,
+        user_id: Optional[uuid.UUID]
+    ) -> int:
+        """Insert all forecasts with executemany and one commit."""
+        if not results:
+            return 0
+
+        codes = await self.demand_planner.generate_forecast_codes(len(results))
+        rows = [
+            self.demand_planner.build_forecast_values(
+                forecast_code=code,
+                forecast_name=f"Forecast - {product_names[key]} - {forecast_start_date.isoformat()}",
+                forecast_level=ForecastLevel.SKU,
+                granularity=granularity,
+                forecast_start_date=forecast_start_date,
+                forecast_end_date=forecast_end_date,
+                forecast_data=result["forecasts"],
+                algorithm=algorithm,
+                product_id=uuid.UUID(key),
+                accuracy_metrics=result.get("accuracy_metrics"),
+                user_id=user_id,
+                notes=f"Auto-generated using {algorithm.value} algorithm (batch)"
+            )
+            for code, (key, result) in zip(codes, results.items())
+        ]
+
+        for i in range(0, len(rows), settings.SNOP_FORECAST_CHUNK_SIZE):
+            await self.db.execute(insert(DemandForecast), rows[i:i + settings.SNOP_FORECAST_CHUNK_SIZE])
+        await self.db.commit()
+
+        return len(rows)
+
+    @staticmethod
+    def _empty_result(
+        algorithm: ForecastAlgorithm,
+        end_date: date,
+        forecast_periods: int
+    ) -> Dict[str, Any]:
+        """Result for a product without demand history (as in EnsembleForecaster)."""
+        if algorithm != ForecastAlgorithm.ENSEMBLE:
+            return {"forecasts": [], "algorithm": algorithm, "accuracy_metrics": {"mape": 100.0}}
+
+        return {
+            "forecasts": [
+                {"date": (end_date + timedelta(days=i+1)).isoformat(), "forecasted_qty": 0, "lower_bound": 0, "upper_bound": 0}
+                for i in range(forecast_periods)
+            ],
+            "algorithm": ForecastAlgorithm.ENSEMBLE,
+            "accuracy_metrics": {"mape": 100.0},
+            "model_weights": {}
+        }
@@ -0,0 +1,497 @@
+"""
+Demand History Store
+
+Daily demand facts (daily_demand_facts) shared by the forecasting and
+dashboard services:
+- Refresh: recompute fact cells for a day range (optionally limited to some
+  products) from orders/order_items
+- Incremental maintenance: order changes committed through the ORM queue a
+  debounced refresh of the affected (day, product) cells
+- Nightly backfill of a trailing window (catches changes made outside the ORM)
+- Read API: period totals and dense daily arrays for a date range
+"""
+
+import asyncio
+import hashlib
+import logging
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+from sqlalchemy import case, delete, event, func, inspect, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import async_session_factory
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.snop import DailyDemandFact, ForecastGranularity
+
+logger = logging.getLogger(__name__)
+
+# Stored in place of a missing warehouse/region/dealer (dimension columns are NOT NULL)
+NIL_UUID = uuid.UUID(int=0)
+
+# Order status sets used by the consumers
+FULFILLED_STATUSES = (OrderStatus.DELIVERED, OrderStatus.PARTIALLY_DELIVERED)
+BOOKED_STATUSES = (OrderStatus.DELIVERED, OrderStatus.SHIPPED, OrderStatus.CONFIRMED, OrderStatus.IN_TRANSIT)
+
+DIMENSIONS = ("product_id", "warehouse_id", "channel", "region_id", "dealer_id", "order_status")
+MEASURES = ("quantity", "revenue", "order_lines", "order_count", "order_value")
+
+# Order attributes that move an order's lines between fact cells
+TRACKED_ORDER_FIELDS = ("status", "warehouse_id", "region_id", "dealer_id", "source", "total_amount")
+
+PENDING_CHANGES_KEY = "demand_fact_pending_orders"
+
+
+def _status_values(statuses: Iterable[Any]) -> List[str]:
+    return [getattr(s, "value", s) for s in statuses]
+
+
+def _group_dimensions(group_by: Optional[Union[str, Sequence[str]]]) -> Tuple[str, ...]:
+    if not group_by:
+        return ()
+    dims = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+    for d in dims:
+        if d not in DIMENSIONS:
+            raise ValueError(f"Cannot group demand facts by {d}")
+    return dims
+
+
+class DemandHistoryService:
+    """
+    Maintains and reads the daily demand fact table.
+
+    Facts hold one row per day x product x warehouse x channel x region x
+    dealer x order status. Line measures (quantity, revenue, order_lines) sum
+    exactly over any dimension; order measures (order_count, order_value) are
+    booked on each order's first line and sum exactly over day, warehouse,
+    channel, region, dealer and status.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # ==================== Refresh ====================
+
+    async def refresh_range(
+        self,
+        start_date: date,
+        end_date: date,
+        product_ids: Optional[Sequence[uuid.UUID]] = None
+    ) -> int:
+        """
+        Recompute fact cells for orders created between start_date and end_date
+        (inclusive), optionally only for the given products.
+
+        Does not commit. Returns the number of fact rows written.
+        """
+        cleanup = delete(DailyDemandFact).where(
+            DailyDemandFact.demand_date >= start_date,
+            DailyDemandFact.demand_date <= end_date
+        )
+        if product_ids:
+            cleanup = cleanup.where(DailyDemandFact.product_id.in_(product_ids))
+        await self.db.execute(cleanup)
+
+        # One row per order line; row_number is taken over all lines of the
+        # order so the first line is the same whichever products are refreshed
+        first_line = func.row_number().over(partition_by=OrderItem.order_id, order_by=OrderItem.id) == 1
+        nil = literal(NIL_UUID, UUID(as_uuid=True))
+        lines = (
+            select(
+                func.date(Order.created_at).label("demand_date"),
+                OrderItem.product_id.label("product_id"),
+                func.coalesce(Order.warehouse_id, nil).label("warehouse_id"),
+                func.coalesce(Order.source, "").label("channel"),
+                func.coalesce(Order.region_id, nil).label("region_id"),
+                func.coalesce(Order.dealer_id, nil).label("dealer_id"),
+                Order.status.label("order_status"),
+                OrderItem.quantity.label("quantity"),
+                OrderItem.total_amount.label("revenue"),
+                case((first_line, 1), else_=0).label("first_line"),
+                case((first_line, Order.total_amount), else_=0).label("order_value"),
+            )
+            .join(OrderItem, Order.id == OrderItem.order_id)
+            .where(
+                Order.created_at >= start_date,
+                Order.created_at < end_date + timedelta(days=1)
+            )
+            .subquery()
+        )
+
+        dims = [lines.c.demand_date] + [getattr(lines.c, d) for d in DIMENSIONS]
+        aggregate = (
+            select(
+                func.gen_random_uuid(),
+                *dims,
+                func.sum(lines.c.quantity),
+                func.sum(lines.c.revenue),
+                func.count(),
+                func.sum(lines.c.first_line),
+                func.sum(lines.c.order_value),
+                func.now(),
+            )
+            .group_by(*dims)
+        )
+        if product_ids:
+            aggregate = aggregate.where(lines.c.product_id.in_(product_ids))
+
+        stmt = pg_insert(DailyDemandFact).from_select(
+            ["id", "demand_date", *DIMENSIONS, *MEASURES, "refreshed_at"],
+            aggregate
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_daily_demand_facts_cell",
+            set_={name: stmt.excluded[name] for name in (*MEASURES, "refreshed_at")}
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount or 0
+
+    async def refresh_orders(self, changes: Dict[uuid.UUID, Set[uuid.UUID]]) -> int:
+        """
+        Refresh the fact cells touched by changed orders and commit.
+
+        `changes` maps order_id -> product_ids of lines that were added,
+        changed or removed; the order's current lines are always included.
+        """
+        if not changes:
+            return 0
+
+        cells: Dict[date, Set[uuid.UUID]] = defaultdict(set)
+        order_ids = list(changes)
+        for i in range(0, len(order_ids), 1000):
+            chunk = order_ids[i:i + 1000]
+            result = await self.db.execute(
+                select(Order.id, func.date(Order.created_at).label("demand_date"), OrderItem.product_id)
+                .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+                .where(Order.id.in_(chunk))
+            )
+            for row in result.all():
+                if row.product_id:
+                    cells[row.demand_date].add(row.product_id)
+                cells[row.demand_date] |= changes[row.id]
+
+        written = 0
+        for demand_date, product_ids in sorted(cells.items()):
+            if product_ids:
+                written += await self.refresh_range(demand_date, demand_date, product_ids=list(product_ids))
+        await self.db.commit()
+
+        return written
+
+    async def backfill(self, start_date: date, end_date: date, chunk_days: int = 31) -> int:
+        """Recompute all facts in a date range, committing every chunk_days days."""
+        written = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+            written += await self.refresh_range(chunk_start, chunk_end)
+            await self.db.commit()
+            chunk_start = chunk_end + timedelta(days=1)
+
+        return written
+
+    # ==================== Read API ====================
+
+    def _apply_filters(
+        self,
+        query,
+        product_ids: Optional[Sequence[uuid.UUID]] = None,
+        category_id: Optional[uuid.UUID] = None,
+        warehouse_id: Optional[uuid.UUID] = None,
+        warehouse_ids: Optional[Sequence[uuid.UUID]] = None,
+        channel: Optional[str] = None,
+        region_id: Optional[uuid.UUID] = None,
+        dealer_ids: Optional[Sequence[uuid.UUID]] = None,
+        statuses: Optional[Sequence[Any]] = None,
+        exclude_statuses: Optional[Sequence[Any]] = None
+    ):
+        if product_ids is not None:
+            query = query.where(DailyDemandFact.product_id.in_(product_ids))
+        if category_id:
+            query = query.join(Product, Product.id == DailyDemandFact.product_id).where(
+                Product.category_id == category_id
+            )
+        if warehouse_id:
+            query = query.where(DailyDemandFact.warehouse_id == warehouse_id)
+        if warehouse_ids is not None:
+            query = query.where(DailyDemandFact.warehouse_id.in_(warehouse_ids))
+        if channel:
+            query = query.where(DailyDemandFact.channel == channel)
+        if region_id:
+            query = query.where(DailyDemandFact.region_id == region_id)
+        if dealer_ids is not None:
+            query = query.where(DailyDemandFact.dealer_id.in_(dealer_ids))
+        if statuses:
+            query = query.where(DailyDemandFact.order_status.in_(_status_values(statuses)))
+        if exclude_statuses:
+            query = query.where(DailyDemandFact.order_status.notin_(_status_values(exclude_statuses)))
+        return query
+
+    async def get_totals(
+        self,
+        start_date: date,
+        end_date: date,
+        granularity: ForecastGranularity = ForecastGranularity.DAILY,
+        group_by: Optional[Union[str, Sequence[str]]] = None,
+        measures: Sequence[str] = ("quantity",),
+        **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Demand totals per period (and per `group_by` dimension or dimensions).
+
+        Returns [{"date": period_start, <dimension>: key, <measure>: value, ...}]
+        ordered by key and period; periods without demand are omitted.
+        Filters: product_ids, category_id, warehouse_id, warehouse_ids, channel,
+        region_id, dealer_ids, statuses, exclude_statuses.
+        """
+        if granularity == ForecastGranularity.DAILY:
+            period = DailyDemandFact.demand_date
+        else:
+            unit = {
+                ForecastGranularity.WEEKLY: "week",
+                ForecastGranularity.MONTHLY: "month",
+                ForecastGranularity.QUARTERLY: "quarter",
+            }[granularity]
+            # Inline the unit so GROUP BY and SELECT render the same expression
+            period = func.date_trunc(literal_column(f"'{unit}'"), DailyDemandFact.demand_date)
+
+        group_dims = _group_dimensions(group_by)
+        columns = [getattr(DailyDemandFact, d).label(d) for d in group_dims] + [period.label("period")]
+        group_columns = [getattr(DailyDemandFact, d) for d in group_dims] + [period]
+        columns += [func.sum(getattr(DailyDemandFact, m)).label(m) for m in measures]
+
+        query = (
+            select(*columns)
+            .where(
+                DailyDemandFact.demand_date >= start_date,
+                DailyDemandFact.demand_date <= end_date
+            )
+            .group_by(*group_columns)
+            .order_by(*group_columns)
+        )
+        query = self._apply_filters(query, **filters)
+
+        result = await self.db.execute(query)
+        totals = []
+        for row in result.all():
+            entry = {"date": row.period.date() if isinstance(row.period, datetime) else row.period}
+            for d in group_dims:
+                entry[d] = getattr(row, d)
+            for m in measures:
+                entry[m] = getattr(row, m) or 0
+            totals.append(entry)
+
+        return totals
+
+    async def get_daily_matrix(
+        self,
+        start_date: date,
+        end_date: date,
+        group_by: Optional[Union[str, Sequence[str]]] = "product_id",
+        measures: Sequence[str] = ("quantity",),
+        keys: Optional[Sequence[Any]] = None,
+        **filters: Any
+    ) -> Dict[str, Any]:
+        """
+        Dense daily series for a date range (days without demand are 0).
+
+        Returns {"dates": [...], "keys": [...], <measure>: ndarray} where each
+        measure is a (len(keys), len(dates)) float array, or a 1-D array over
+        dates when group_by is None. Keys are tuples when grouping by several
+        dimensions. Row order follows `keys` when given, otherwise the sorted
+        keys found.
+        """
+        totals = await self.get_totals(
+            start_date, end_date,
+            granularity=ForecastGranularity.DAILY,
+            group_by=group_by,
+            measures=measures,
+            **filters
+        )
+
+        n_days = (end_date - start_date).days + 1
+        dates = [start_date + timedelta(days=i) for i in range(n_days)]
+
+        if group_by is None:
+            matrix = {"dates": dates}
+            for m in measures:
+                series = np.zeros(n_days)
+                for entry in totals:
+                    series[(entry["date"] - start_date).days] = float(entry[m])
+                matrix[m] = series
+            return matrix
+
+        group_dims = _group_dimensions(group_by)
+        if isinstance(group_by, str):
+            entry_keys = [entry[group_by] for entry in totals]
+        else:
+            entry_keys = [tuple(entry[d] for d in group_dims) for entry in totals]
+
+        if keys is None:
+            keys = sorted(set(entry_keys), key=str)
+        row_of = {key: i for i, key in enumerate(keys)}
+
+        rows = np.array([row_of.get(key, -1) for key in entry_keys], dtype=int)
+        cols = np.array([(entry["date"] - start_date).days for entry in totals], dtype=int)
+        found = rows >= 0
+
+        matrix = {"dates": dates, "keys": list(keys)}
+        for m in measures:
+            values = np.zeros((len(keys), n_days))
+            values[rows[found], cols[found]] = np.array([float(entry[m]) for entry in totals])[found]
+            matrix[m] = values
+
+        return matrix
+
+    async def get_watermarks(
+        self,
+        start_date: date,
+        end_date: date,
+        group_by: str = "product_id",
+        **filters: Any
+    ) -> Dict[Any, str]:
+        """
+        Fingerprint of the facts per `group_by` key in a date range.
+
+        A checksum over the key's per-day totals, so it changes whenever
+        demand in the range changes, including quantity moving between days.
+        Nightly rewrites of unchanged facts keep it stable, so results derived
+        from the range can be cached against it. Keys without facts are
+        omitted (their watermark is '').
+        """
+        key = getattr(DailyDemandFact, group_by)
+        query = (
+            select(
+                key.label("key"),
+                DailyDemandFact.demand_date,
+                func.count().label("cells"),
+                func.sum(DailyDemandFact.quantity).label("quantity"),
+                func.sum(DailyDemandFact.revenue).label("revenue"),
+                func.sum(DailyDemandFact.order_lines).label("order_lines"),
+                func.sum(DailyDemandFact.order_count).label("order_count")
+            )
+            .where(
+                DailyDemandFact.demand_date >= start_date,
+                DailyDemandFact.demand_date <= end_date
+            )
+            .group_by(key, DailyDemandFact.demand_date)
+            .order_by(key, DailyDemandFact.demand_date)
+        )
+        query = self._apply_filters(query, **filters)
+
+        checksums: Dict[Any, Any] = {}
+        for row in (await self.db.execute(query)).all():
+            checksum = checksums.get(row.key)
+            if checksum is None:
+                checksum = checksums[row.key] = hashlib.sha1()
+            checksum.update(
+                f"{row.demand_date.isoformat()}:{row.cells}:{row.quantity}:{row.revenue}:"
+                f"{row.order_lines}:{row.order_count};".encode()
+            )
+        return {key: checksum.hexdigest() for key, checksum in checksums.items()}
+
+    async def get_last_demand_dates(
+        self,
+        group_by: str = "dealer_id",
+        **filters: Any
+    ) -> Dict[Any, date]:
+        """Last day with orders per `group_by` key."""
+        query = (
+            select(
+                getattr(DailyDemandFact, group_by).label("key"),
+                func.max(DailyDemandFact.demand_date).label("last_date")
+            )
+            .where(DailyDemandFact.order_count > 0)
+            .group_by(getattr(DailyDemandFact, group_by))
+        )
+        query = self._apply_filters(query, **filters)
+
+        result = await self.db.execute(query)
+        return {row.key: row.last_date for row in result.all()}
+
+
+# ==================== Incremental Maintenance ====================
+
+class DemandFactRefresher:
+    """
+    Debounced in-process refresh of fact cells touched by committed order changes.
+
+    Changes arriving within DEMAND_FACT_REFRESH_DELAY seconds are refreshed
+    together on a separate session; failures are logged and left to the
+    nightly backfill.
+    """
+
+    def __init__(self):
+        self._pending: Dict[uuid.UUID, Set[uuid.UUID]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, changes: Dict[uuid.UUID, Set[uuid.UUID]]) -> None:
+        for order_id, product_ids in changes.items():
+            self._pending[order_id] |= product_ids
+
+        if self._task is None or self._task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No event loop (sync scripts): the nightly backfill covers these
+                return
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        await asyncio.sleep(settings.DEMAND_FACT_REFRESH_DELAY)
+        while self._pending:
+            changes, self._pending = self._pending, defaultdict(set)
+            try:
+                async with async_session_factory() as session:
+                    written = await DemandHistoryService(session).refresh_orders(changes)
+                logger.debug(f"Refreshed {written} demand facts for {len(changes)} orders")
+            except Exception:
+                logger.exception(f"Demand fact refresh failed for {len(changes)} orders")
+
+
+demand_fact_refresher = DemandFactRefresher()
+
+
+def _collect_order_changes(session: Session, flush_context) -> None:
+    """after_flush: remember orders whose lines or fact dimensions changed."""
+    pending: Dict[uuid.UUID, Set[uuid.UUID]] = session.info.setdefault(PENDING_CHANGES_KEY, {})
+
+    for obj in session.new:
+        if isinstance(obj, Order):
+            pending.setdefault(obj.id, set())
+
+    for obj in session.dirty:
+        if isinstance(obj, Order):
+            changed = {attr.key for attr in inspect(obj).attrs if attr.history.has_changes()}
+            if changed.intersection(TRACKED_ORDER_FIELDS):
+                pending.setdefault(obj.id, set())
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, OrderItem) and obj.order_id:
+            pending.setdefault(obj.order_id, set()).add(obj.product_id)
+
+
+def _dispatch_order_changes(session: Session) -> None:
+    """after_commit: hand collected order changes to the refresher."""
+    pending = session.info.pop(PENDING_CHANGES_KEY, None)
+    if pending:
+        demand_fact_refresher.enqueue(pending)
+
+
+def _discard_order_changes(session: Session) -> None:
+    session.info.pop(PENDING_CHANGES_KEY, None)
+
+
+def register_demand_fact_listeners() -> None:
+    """Track order changes on every ORM session (idempotent)."""
+    if not event.contains(Session, "after_flush", _collect_order_changes):
+        event.listen(Session, "after_flush", _collect_order_changes)
+        event.listen(Session, "after_commit", _dispatch_order_changes)
+        event.listen(Session, "after_rollback", _discard_order_changes)
@@ -13,9 +13,8 @@ from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from typing import List, Dict, Optional, Tuple, Any
 from collections import defaultdict
-import math
 
-from sqlalchemy import select, func, and_, or_, desc, extract
+from sqlalchemy import select, func, and_, or_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -34,6 +33,8 @@ from app.models.snop import (
     ForecastAlgorithm,
     ExternalFactorType,
 )
+from app.services.snop.demand_history import DemandHistoryService, FULFILLED_STATUSES
+from app.services.snop.demand_statistics import demand_statistics, safety_stock_levels
 
 
 class DemandPlannerService:
@@ -54,6 +55,7 @@ class DemandPlannerService:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.demand_history = DemandHistoryService(db)
 
     # ==================== Historical Data Aggregation ====================
 
@@ -78,78 +80,66 @@ class DemandPlannerService:
         if end_date is None:
             end_date = date.today()
 
-        # Build base query for delivered orders
-        query = (
-            select(
-                Order.created_at,
-                func.sum(OrderItem.quantity).label("quantity"),
-                func.sum(OrderItem.total_amount).label("revenue")
-            )
-            .join(OrderItem, Order.id == OrderItem.order_id)
-            .join(Product, OrderItem.product_id == Product.id)
-            .where(
-                and_(
-                    Order.status.in_([OrderStatus.DELIVERED, OrderStatus.PARTIALLY_DELIVERED]),
-                    Order.created_at >= start_date,
-                    Order.created_at <= end_date
-                )
-            )
+        # Read precomputed daily demand facts for delivered orders
+        totals = await self.demand_history.get_totals(
+            start_date=start_date,
+            end_date=end_date,
+            granularity=granularity,
+            measures=("quantity", "revenue"),
+            product_ids=[product_id] if product_id else None,
+            category_id=category_id,
+            warehouse_id=warehouse_id,
+            region_id=region_id,
+            channel=channel,
+            statuses=FULFILLED_STATUSES
         )
 
-        # Apply filters
-        if product_id:
-            query = query.where(OrderItem.product_id == product_id)
-        if category_id:
-            query = query.where(Product.category_id == category_id)
-        if warehouse_id:
-            query = query.where(Order.warehouse_id == warehouse_id)
-        if region_id:
-            query = query.where(Order.region_id == region_id)
-        if channel:
-            query = query.where(Order.source == channel)
-
-        # Group by granularity
-        if granularity == ForecastGranularity.DAILY:
-            query = query.group_by(Order.created_at).order_by(Order.created_at)
-        elif granularity == ForecastGranularity.WEEKLY:
-            # Group by ISO week
-            query = query.group_by(
-                extract('year', Order.created_at),
-                extract('week', Order.created_at)
-            ).order_by(
-                extract('year', Order.created_at),
-                extract('week', Order.created_at)
-            )
-        elif granularity == ForecastGranularity.MONTHLY:
-            query = query.group_by(
-                extract('year', Order.created_at),
-                extract('month', Order.created_at)
-            ).order_by(
-                extract('year', Order.created_at),
-                extract('month', Order.created_at)
-            )
+        return [
+            {
+                "date": entry["date"],
+                "quantity": Decimal(str(entry["quantity"])),
+                "revenue": Decimal(str(entry["revenue"]))
+            }
+            for entry in totals
+        ]
 
-        result = await self.db.execute(query)
-        rows = result.all()
+    async def get_historical_demand_by_product(
+        self,
+        product_ids: List[uuid.UUID],
+        start_date: date,
+        end_date: date,
+        warehouse_id: Optional[uuid.UUID] = None,
+        granularity: ForecastGranularity = ForecastGranularity.DAILY
+    ) -> Dict[uuid.UUID, List[Dict[str, Any]]]:
+        """
+        Get historical demand for many products in one grouped query.
+
+        Returns {product_id: [{"date": date, "quantity": Decimal, "revenue": Decimal}, ...]}
+        with each series ordered by period. Products without sales are omitted.
+        """
+        if not product_ids:
+            return {}
+
+        totals = await self.demand_history.get_totals(
+            start_date=start_date,
+            end_date=end_date,
+            granularity=granularity,
+            group_by="product_id",
+            measures=("quantity", "revenue"),
+            product_ids=product_ids,
+            warehouse_id=warehouse_id,
+            statuses=FULFILLED_STATUSES
+        )
+
+        demand_by_product: Dict[uuid.UUID, List[Dict[str, Any]]] = defaultdict(list)
+        for entry in totals:
+            demand_by_product[entry["product_id"]].append({
+                "date": entry["date"],
+                "quantity": Decimal(str(entry["quantity"])),
+                "revenue": Decimal(str(entry["revenue"]))
+            })
 
-        # Convert to standardized format
-        demand_data = []
-        for row in rows:
-            if granularity == ForecastGranularity.DAILY:
-                demand_data.append({
-                    "date": row.order_date,
-                    "quantity": Decimal(str(row.quantity or 0)),
-                    "revenue": Decimal(str(row.revenue or 0))
-                })
-            else:
-                # For weekly/monthly, we need to reconstruct the date
-                demand_data.append({
-                    "date": row.order_date if hasattr(row, 'order_date') else start_date,
-                    "quantity": Decimal(str(row.quantity or 0)),
-                    "revenue": Decimal(str(row.revenue or 0))
-                })
-
-        return demand_data
+        return dict(demand_by_product)
 
     async def get_demand_by_product(
         self,
@@ -370,17 +360,19 @@ class DemandPlannerService:
         end_date = date.today()
         start_date = end_date - timedelta(days=lookback_days)
 
-        # Get daily demand data
-        daily_demand = await self.get_historical_demand(
-            product_id=product_id,
-            category_id=category_id,
-            warehouse_id=warehouse_id,
+        # Daily demand (same delivered-order history as get_historical_demand)
+        history = await self.demand_history.get_daily_matrix(
             start_date=start_date,
             end_date=end_date,
-            granularity=ForecastGranularity.DAILY
+            group_by=None,
+            product_ids=[product_id] if product_id else None,
+            category_id=category_id,
+            warehouse_id=warehouse_id,
+            statuses=FULFILLED_STATUSES
         )
+        stats = demand_statistics(history["quantity"][None, :], history["dates"])
 
-        if not daily_demand:
+        if not stats["data_points"][0]:
             return {
                 "avg_daily_demand": Decimal("0"),
                 "demand_std_dev": Decimal("0"),
@@ -391,66 +383,72 @@ class DemandPlannerService:
                 "trend": "stable"
             }
 
-        # Extract quantities
-        quantities = [float(d["quantity"]) for d in daily_demand]
-
-        # Calculate statistics
-        n = len(quantities)
-        mean_demand = sum(quantities) / n
-
-        # Standard deviation
-        variance = sum((q - mean_demand) ** 2 for q in quantities) / n
-        std_dev = math.sqrt(variance)
-
-        # Coefficient of variation
-        cv = std_dev / mean_demand if mean_demand > 0 else 0
-
-        # Trend detection (simple linear regression slope)
-        if n > 1:
-            x_mean = (n - 1) / 2
-            numerator = sum((i - x_mean) * (quantities[i] - mean_demand) for i in range(n))
-            denominator = sum((i - x_mean) ** 2 for i in range(n))
-            slope = numerator / denominator if denominator > 0 else 0
-
-            # Classify trend
-            if slope > mean_demand * 0.001:
-                trend = "increasing"
-            elif slope < -mean_demand * 0.001:
-                trend = "decreasing"
-            else:
-                trend = "stable"
-        else:
-            trend = "stable"
-
-        # Seasonality detection (simple check based on monthly variance)
-        monthly_demand = await self.get_historical_demand(
-            product_id=product_id,
-            category_id=category_id,
-            warehouse_id=warehouse_id,
+        return {
+            "avg_daily_demand": Decimal(str(round(float(stats["avg_daily_demand"][0]), 4))),
+            "demand_std_dev": Decimal(str(round(float(stats["demand_std_dev"][0]), 4))),
+            "coefficient_of_variation": round(float(stats["coefficient_of_variation"][0]), 4),
+            "max_demand": Decimal(str(float(stats["max_demand"][0]))),
+            "min_demand": Decimal(str(float(stats["min_demand"][0]))),
+            "seasonality_detected": bool(stats["seasonality_detected"][0]),
+            "trend": stats["trend"][0],
+            "data_points": int(stats["data_points"][0])
+        }
+
+    async def calculate_demand_statistics_batch(
+        self,
+        product_ids: Optional[List[uuid.UUID]] = None,
+        warehouse_ids: Optional[List[uuid.UUID]] = None,
+        lookback_days: int = 365,
+        service_level: float = 0.95,
+        lead_time_days: int = 14
+    ) -> List[Dict[str, Any]]:
+        """
+        Demand statistics, safety stock and reorder point for every
+        SKU x warehouse with demand, in one query and one vectorized pass.
+
+        Statistics match calculate_demand_statistics(product_id, warehouse_id);
+        safety stock / reorder point / EOQ match SNOPService.calculate_safety_stock().
+        """
+        end_date = date.today()
+        start_date = end_date - timedelta(days=lookback_days)
+
+        history = await self.demand_history.get_daily_matrix(
             start_date=start_date,
             end_date=end_date,
-            granularity=ForecastGranularity.MONTHLY
+            group_by=("product_id", "warehouse_id"),
+            product_ids=product_ids,
+            warehouse_ids=warehouse_ids,
+            statuses=FULFILLED_STATUSES
         )
 
-        if len(monthly_demand) >= 12:
-            monthly_quantities = [float(d["quantity"]) for d in monthly_demand]
-            monthly_mean = sum(monthly_quantities) / len(monthly_quantities)
-            monthly_variance = sum((q - monthly_mean) ** 2 for q in monthly_quantities) / len(monthly_quantities)
-            monthly_cv = math.sqrt(monthly_variance) / monthly_mean if monthly_mean > 0 else 0
-            seasonality_detected = monthly_cv > 0.3  # 30% variation suggests seasonality
-        else:
-            seasonality_detected = False
+        stats = demand_statistics(history["quantity"], history["dates"])
+        levels = safety_stock_levels(
+            stats["avg_daily_demand"],
+            stats["demand_std_dev"],
+            service_level=service_level,
+            lead_time_days=lead_time_days
+        )
 
-        return {
-            "avg_daily_demand": Decimal(str(round(mean_demand, 4))),
-            "demand_std_dev": Decimal(str(round(std_dev, 4))),
-            "coefficient_of_variation": round(cv, 4),
-            "max_demand": Decimal(str(max(quantities))),
-            "min_demand": Decimal(str(min(quantities))),
-            "seasonality_detected": seasonality_detected,
-            "trend": trend,
-            "data_points": n
-        }
+        return [
+            {
+                "product_id": product_id,
+                "warehouse_id": warehouse_id,
+                "avg_daily_demand": round(float(stats["avg_daily_demand"][i]), 4),
+                "demand_std_dev": round(float(stats["demand_std_dev"][i]), 4),
+                "coefficient_of_variation": round(float(stats["coefficient_of_variation"][i]), 4),
+                "max_demand": float(stats["max_demand"][i]),
+                "min_demand": float(stats["min_demand"][i]),
+                "seasonality_detected": bool(stats["seasonality_detected"][i]),
+                "trend": stats["trend"][i],
+                "data_points": int(stats["data_points"][i]),
+                "safety_stock": round(float(levels["safety_stock"][i]), 2),
+                "reorder_point": round(float(levels["reorder_point"][i]), 2),
+                "economic_order_qty": round(float(levels["economic_order_qty"][i]), 2),
+                "service_level": service_level,
+                "lead_time_days": lead_time_days
+            }
+            for i, (product_id, warehouse_id) in enumerate(history["keys"])
+        ]
 
     # ==================== External Factors ====================
 
@@ -544,6 +542,19 @@ class DemandPlannerService:
 
         return f"{prefix}{count + 1:04d}"
 
+    async def generate_forecast_codes(self, count: int) -> List[str]:
+        """Allocate `count` consecutive forecast codes with a single lookup."""
+        today = datetime.now(timezone.utc)
+        prefix = f"FC{today.strftime('%Y%m%d')}"
+
+        result = await self.db.execute(
+            select(func.count(DemandForecast.id))
+            .where(DemandForecast.forecast_code.like(f"{prefix}%"))
+        )
+        existing = result.scalar() or 0
+
+        return [f"{prefix}{existing + i + 1:04d}" for i in range(count)]
+
     async def create_demand_forecast(
         self,
         forecast_name: str,
@@ -567,13 +578,62 @@ class DemandPlannerService:
         """
         forecast_code = await self.generate_forecast_code()
 
+        forecast = DemandForecast(**self.build_forecast_values(
+            forecast_code=forecast_code,
+            forecast_name=forecast_name,
+            forecast_level=forecast_level,
+            granularity=granularity,
+            forecast_start_date=forecast_start_date,
+            forecast_end_date=forecast_end_date,
+            forecast_data=forecast_data,
+            algorithm=algorithm,
+            product_id=product_id,
+            category_id=category_id,
+            warehouse_id=warehouse_id,
+            region_id=region_id,
+            channel=channel,
+            accuracy_metrics=accuracy_metrics,
+            user_id=user_id,
+            notes=notes
+        ))
+
+        self.db.add(forecast)
+        await self.db.commit()
+        await self.db.refresh(forecast)
+
+        return forecast
+
+    def build_forecast_values(
+        self,
+        forecast_code: str,
+        forecast_name: str,
+        forecast_level: ForecastLevel,
+        granularity: ForecastGranularity,
+        forecast_start_date: date,
+        forecast_end_date: date,
+        forecast_data: List[Dict[str, Any]],
+        algorithm: ForecastAlgorithm = ForecastAlgorithm.ENSEMBLE,
+        product_id: Optional[uuid.UUID] = None,
+        category_id: Optional[uuid.UUID] = None,
+        warehouse_id: Optional[uuid.UUID] = None,
+        region_id: Optional[uuid.UUID] = None,
+        channel: Optional[str] = None,
+        accuracy_metrics: Optional[Dict[str, float]] = None,
+        user_id: Optional[uuid.UUID] = None,
+        notes: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Column values for a DemandForecast row, including aggregated metrics.
+
+        Shared by create_demand_forecast and bulk inserts.
+        """
         # Calculate aggregated metrics
         total_qty = sum(Decimal(str(d.get("forecasted_qty", 0))) for d in forecast_data)
         horizon_days = (forecast_end_date - forecast_start_date).days + 1
         avg_daily = total_qty / Decimal(str(horizon_days)) if horizon_days > 0 else Decimal("0")
         peak_demand = max(Decimal(str(d.get("forecasted_qty", 0))) for d in forecast_data) if forecast_data else Decimal("0")
 
-        forecast = DemandForecast(
+        return dict(
             forecast_code=forecast_code,
             forecast_name=forecast_name,
             forecast_level=forecast_level,
@@ -600,12 +660,6 @@ class DemandPlannerService:
             notes=notes
         )
 
-        self.db.add(forecast)
-        await self.db.commit()
-        await self.db.refresh(forecast)
-
-        return forecast
-
     async def get_forecast(self, forecast_id: uuid.UUID) -> Optional[DemandForecast]:
         """Get a forecast by ID."""
         result = await self.db.execute(
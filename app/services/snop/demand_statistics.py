@@ -0,0 +1,136 @@
+"""
+Vectorized Demand Statistics
+
+Demand statistics and service-level inventory parameters for many series at
+once. Each row of the input matrix is one series (e.g. a SKU x warehouse),
+each column one day; the formulas match DemandPlannerService.calculate_demand_statistics()
+and SNOPService.calculate_safety_stock():
+
+- Statistics use only days with demand (non-zero cells), as the per-product
+  calculation works on the days present in demand history.
+- Safety Stock = Z * σd * √L, Reorder Point = d̄ * L + Safety Stock,
+  EOQ = √(2 * D * S / H)
+"""
+
+import math
+from datetime import date
+from typing import Dict, Sequence
+
+import numpy as np
+
+# Z-score per service level (other levels fall back to 95%)
+Z_SCORES = {
+    0.90: 1.28,
+    0.95: 1.65,
+    0.97: 1.88,
+    0.99: 2.33
+}
+
+# EOQ assumptions (as in SNOPService.calculate_safety_stock)
+ORDERING_COST = 100
+HOLDING_COST_RATE = 0.25
+UNIT_COST = 1000
+
+
+def service_level_z(service_level: float) -> float:
+    """Z-score for a service level."""
+    return Z_SCORES.get(service_level, 1.65)
+
+
+def month_starts(dates: Sequence[date]) -> np.ndarray:
+    """Column indexes where a new calendar month begins."""
+    starts = [0]
+    for i in range(1, len(dates)):
+        if (dates[i].year, dates[i].month) != (dates[i - 1].year, dates[i - 1].month):
+            starts.append(i)
+    return np.array(starts, dtype=int)
+
+
+def demand_statistics(matrix: np.ndarray, dates: Sequence[date]) -> Dict[str, np.ndarray]:
+    """
+    Demand statistics for every row of a (series x days) demand matrix.
+
+    Returns arrays indexed by row: data_points, avg_daily_demand,
+    demand_std_dev, coefficient_of_variation, max_demand, min_demand,
+    trend_slope, trend ("increasing" / "decreasing" / "stable") and
+    seasonality_detected. Rows without demand have data_points == 0 and
+    zero statistics.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    observed = matrix != 0
+    n = observed.sum(axis=1)
+    has_data = n > 0
+    safe_n = np.where(has_data, n, 1)
+
+    mean = matrix.sum(axis=1) / safe_n
+    deviation = np.where(observed, matrix - mean[:, None], 0.0)
+    variance = (deviation ** 2).sum(axis=1) / safe_n
+    std_dev = np.sqrt(variance)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(mean > 0, std_dev / np.where(mean > 0, mean, 1), 0.0)
+
+    max_demand = np.where(has_data, np.where(observed, matrix, -np.inf).max(axis=1, initial=-np.inf), 0.0)
+    min_demand = np.where(has_data, np.where(observed, matrix, np.inf).min(axis=1, initial=np.inf), 0.0)
+
+    # Trend: least-squares slope over the observed points (x = 0..n-1)
+    x = np.cumsum(observed, axis=1) - 1
+    x_mean = (n - 1) / 2
+    x_dev = np.where(observed, x - x_mean[:, None], 0.0)
+    numerator = (x_dev * deviation).sum(axis=1)
+    denominator = (x_dev ** 2).sum(axis=1)
+    slope = np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), 0.0)
+    slope = np.where(n > 1, slope, 0.0)
+
+    trend = np.full(matrix.shape[0], "stable", dtype=object)
+    trend[(n > 1) & (slope > mean * 0.001)] = "increasing"
+    trend[(n > 1) & (slope < -mean * 0.001)] = "decreasing"
+
+    # Seasonality: coefficient of variation of monthly totals (12+ months with demand)
+    if matrix.shape[1]:
+        monthly = np.add.reduceat(matrix, month_starts(dates), axis=1)
+    else:
+        monthly = np.zeros((matrix.shape[0], 0))
+    months_observed = monthly != 0
+    m = months_observed.sum(axis=1)
+    safe_m = np.where(m > 0, m, 1)
+    monthly_mean = monthly.sum(axis=1) / safe_m
+    monthly_variance = (np.where(months_observed, monthly - monthly_mean[:, None], 0.0) ** 2).sum(axis=1) / safe_m
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly_cv = np.where(monthly_mean > 0, np.sqrt(monthly_variance) / np.where(monthly_mean > 0, monthly_mean, 1), 0.0)
+    seasonality = (m >= 12) & (monthly_cv > 0.3)
+
+    return {
+        "data_points": n,
+        "avg_daily_demand": np.where(has_data, mean, 0.0),
+        "demand_std_dev": np.where(has_data, std_dev, 0.0),
+        "coefficient_of_variation": np.where(has_data, cv, 0.0),
+        "max_demand": max_demand,
+        "min_demand": min_demand,
+        "trend_slope": slope,
+        "trend": trend,
+        "seasonality_detected": seasonality,
+    }
+
+
+def safety_stock_levels(
+    avg_daily_demand: np.ndarray,
+    demand_std_dev: np.ndarray,
+    service_level: float = 0.95,
+    lead_time_days: int = 14
+) -> Dict[str, np.ndarray]:
+    """Service-level safety stock, reorder point and EOQ per row."""
+    avg_daily_demand = np.asarray(avg_daily_demand, dtype=float)
+    demand_std_dev = np.asarray(demand_std_dev, dtype=float)
+
+    safety_stock = service_level_z(service_level) * demand_std_dev * math.sqrt(lead_time_days)
+    reorder_point = avg_daily_demand * lead_time_days + safety_stock
+
+    holding_cost = UNIT_COST * HOLDING_COST_RATE
+    economic_order_qty = np.sqrt((2 * avg_daily_demand * 365 * ORDERING_COST) / holding_cost)
+
+    return {
+        "safety_stock": safety_stock,
+        "reorder_point": reorder_point,
+        "economic_order_qty": economic_order_qty,
+    }
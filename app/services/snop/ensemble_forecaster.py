@@ -10,6 +10,10 @@ Advanced demand forecasting using multiple algorithms:
 - Weighted Ensemble combining all models
 
 No external ML libraries required - pure Python/NumPy compatible implementation.
+When NumPy is installed, forecasts are computed by the vectorized backend
+(vectorized_forecaster.VectorizedForecaster), which also fits many series in
+one call via forecast_batch(); the pure-Python methods below remain the
+reference implementation.
 """
 
 import math
@@ -32,6 +36,13 @@ from app.models.snop import (
 )
 from app.services.snop.demand_planner import DemandPlannerService
 
+# NumPy backend for batch/vectorized forecasting
+try:
+    from app.services.snop.vectorized_forecaster import VectorizedForecaster
+    VECTORIZED_BACKEND_AVAILABLE = True
+except ImportError:
+    VECTORIZED_BACKEND_AVAILABLE = False
+
 
 class EnsembleForecaster:
     """
@@ -41,9 +52,10 @@ class EnsembleForecaster:
     using weighted averaging based on historical accuracy.
     """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, use_vectorized: bool = True):
         self.db = db
         self.demand_planner = DemandPlannerService(db)
+        self.vectorized = VectorizedForecaster() if (use_vectorized and VECTORIZED_BACKEND_AVAILABLE) else None
 
     # ==================== Holt-Winters Triple Exponential Smoothing ====================
 
@@ -467,6 +479,14 @@ class EnsembleForecaster:
 
         data = [float(h["quantity"]) for h in historical]
 
+        if self.vectorized:
+            return self.forecast_batch(
+                [data],
+                base_date=end_date,
+                forecast_periods=forecast_periods,
+                granularity=granularity,
+            )[0]
+
         # Determine season length based on granularity
         if granularity == ForecastGranularity.DAILY:
             season_length = 7  # Weekly pattern
@@ -593,6 +613,15 @@ class EnsembleForecaster:
 
         data = [float(h["quantity"]) for h in historical]
 
+        if self.vectorized:
+            return self.forecast_batch(
+                [data],
+                base_date=end_date,
+                forecast_periods=forecast_periods,
+                granularity=granularity,
+                algorithm=algorithm,
+            )[0]
+
         # Determine season length
         season_length = 7 if granularity == ForecastGranularity.DAILY else 4
 
@@ -649,3 +678,140 @@ class EnsembleForecaster:
                 "bias": round(metrics.get("bias", 0), 2)
             }
         }
+
+    # ==================== Batch Forecasting (NumPy backend) ====================
+
+    def _forecast_dates(
+        self,
+        base_date: date,
+        granularity: ForecastGranularity,
+        forecast_periods: int
+    ) -> List[str]:
+        """ISO dates of the forecast periods following base_date."""
+        dates = []
+        for i in range(forecast_periods):
+            if granularity == ForecastGranularity.DAILY:
+                forecast_date = base_date + timedelta(days=i+1)
+            elif granularity == ForecastGranularity.WEEKLY:
+                forecast_date = base_date + timedelta(weeks=i+1)
+            else:
+                forecast_date = base_date + timedelta(days=30*(i+1))
+            dates.append(forecast_date.isoformat())
+        return dates
+
+    def forecast_batch(
+        self,
+        demand: Any,
+        base_date: date,
+        forecast_periods: int = 30,
+        granularity: ForecastGranularity = ForecastGranularity.DAILY,
+        algorithm: ForecastAlgorithm = ForecastAlgorithm.ENSEMBLE
+    ) -> List[Dict[str, Any]]:
+        """
+        Forecast many series in one vectorized call.
+
+        `demand` is a 2-D matrix (list of equal-length series or ndarray),
+        one row per SKU. Returns one result per row, shaped exactly like the
+        result of ensemble_forecast() / single_algorithm_forecast().
+        Requires NumPy.
+        """
+        if not VECTORIZED_BACKEND_AVAILABLE:
+            raise RuntimeError("NumPy is required for batch forecasting. Run: pip install numpy")
+
+        backend = self.vectorized or VectorizedForecaster()
+        matrix = backend.as_matrix(demand)
+        dates = self._forecast_dates(base_date, granularity, forecast_periods)
+
+        if algorithm not in (
+            ForecastAlgorithm.HOLT_WINTERS,
+            ForecastAlgorithm.ARIMA,
+            ForecastAlgorithm.PROPHET,
+            ForecastAlgorithm.XGBOOST,
+            ForecastAlgorithm.LIGHTGBM,
+        ):
+            return self._build_ensemble_results(backend, matrix, dates, granularity)
+
+        season_length = 7 if granularity == ForecastGranularity.DAILY else 4
+        if algorithm == ForecastAlgorithm.HOLT_WINTERS:
+            forecasts, metrics = backend.holt_winters(matrix, season_length, forecast_periods=forecast_periods)
+        elif algorithm == ForecastAlgorithm.ARIMA:
+            forecasts, metrics = backend.arima_forecast(matrix, forecast_periods=forecast_periods)
+        elif algorithm == ForecastAlgorithm.PROPHET:
+            forecasts, metrics = backend.prophet_forecast(matrix, forecast_periods=forecast_periods)
+        else:
+            forecasts, metrics = backend.gradient_boost_forecast(matrix, forecast_periods=forecast_periods)
+
+        n = matrix.shape[1]
+
+        results = []
+        for row in range(matrix.shape[0]):
+            std_dev = float(metrics["rmse"][row]) or (float(matrix[row].sum()) / n * 0.2 if n else 0.0)
+            forecast_data = []
+            for i in range(forecast_periods):
+                value = float(forecasts[row, i])
+                margin = std_dev * 1.96 * (1 + 0.05 * i)  # Widen CI over time
+                forecast_data.append({
+                    "date": dates[i],
+                    "forecasted_qty": round(value, 2),
+                    "lower_bound": round(max(0, value - margin), 2),
+                    "upper_bound": round(value + margin, 2)
+                })
+
+            results.append({
+                "forecasts": forecast_data,
+                "algorithm": algorithm,
+                "accuracy_metrics": {
+                    "mape": round(float(metrics["mape"][row]), 2),
+                    "mae": round(float(metrics["mae"][row]), 2),
+                    "rmse": round(float(metrics["rmse"][row]), 2),
+                    "bias": round(float(metrics["bias"][row]), 2)
+                }
+            })
+
+        return results
+
+    def _build_ensemble_results(
+        self,
+        backend: "VectorizedForecaster",
+        matrix: Any,
+        dates: List[str],
+        granularity: ForecastGranularity
+    ) -> List[Dict[str, Any]]:
+        """Run the vectorized ensemble and shape each row like ensemble_forecast()."""
+        if granularity == ForecastGranularity.DAILY:
+            season_length = 7  # Weekly pattern
+        elif granularity == ForecastGranularity.WEEKLY:
+            season_length = 4  # Monthly pattern
+        else:
+            season_length = 12  # Yearly pattern
+
+        combined = backend.ensemble(matrix, season_length, forecast_periods=len(dates))
+        names = backend.MODEL_NAMES
+
+        results = []
+        for row in range(matrix.shape[0]):
+            weights = {name: float(combined["weights"][row, k]) for k, name in enumerate(names)}
+            forecast_data = [
+                {
+                    "date": dates[i],
+                    "forecasted_qty": round(float(combined["forecasts"][row, i]), 2),
+                    "lower_bound": round(float(combined["lower"][row, i]), 2),
+                    "upper_bound": round(float(combined["upper"][row, i]), 2)
+                }
+                for i in range(len(dates))
+            ]
+
+            results.append({
+                "forecasts": forecast_data,
+                "algorithm": ForecastAlgorithm.ENSEMBLE,
+                "accuracy_metrics": {
+                    "mape": round(float(combined["mape"][row]), 2),
+                    "individual_models": {
+                        name: {"mape": float(combined["model_mape"][row, k]), "weight": round(weights[name], 4)}
+                        for k, name in enumerate(names)
+                    }
+                },
+                "model_weights": weights
+            })
+
+        return results
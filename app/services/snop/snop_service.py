@@ -13,7 +13,6 @@ import uuid
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from typing import List, Dict, Optional, Tuple, Any
-import math
 
 from sqlalchemy import select, func, and_, or_, desc
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -41,6 +40,8 @@ from app.models.vendor import Vendor
 from app.models.warehouse import Warehouse
 from app.services.snop.demand_planner import DemandPlannerService
 from app.services.snop.ensemble_forecaster import EnsembleForecaster
+from app.services.snop.batch_forecast import start_forecast_job, get_forecast_job
+from app.services.snop.demand_statistics import safety_stock_levels
 
 
 class SNOPService:
@@ -170,6 +171,43 @@ class SNOPService:
 
         return created_forecasts
 
+    async def start_batch_forecast_job(
+        self,
+        product_ids: Optional[List[uuid.UUID]] = None,
+        category_ids: Optional[List[uuid.UUID]] = None,
+        forecast_level: ForecastLevel = ForecastLevel.SKU,
+        granularity: ForecastGranularity = ForecastGranularity.WEEKLY,
+        forecast_start_date: Optional[date] = None,
+        forecast_horizon_days: int = 90,
+        algorithm: ForecastAlgorithm = ForecastAlgorithm.ENSEMBLE,
+        lookback_days: int = 365,
+        user_id: Optional[uuid.UUID] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue SKU-level forecast generation as a background job.
+
+        History is fetched in one grouped query, models are fitted in a
+        process pool and forecasts are bulk-inserted. Poll progress with
+        get_batch_forecast_job().
+        """
+        if forecast_level != ForecastLevel.SKU:
+            raise ValueError("Batch forecast jobs support SKU level only")
+
+        return await start_forecast_job(
+            product_ids=product_ids,
+            category_ids=category_ids,
+            granularity=granularity,
+            forecast_start_date=forecast_start_date,
+            forecast_horizon_days=forecast_horizon_days,
+            algorithm=algorithm,
+            lookback_days=lookback_days,
+            user_id=user_id
+        )
+
+    async def get_batch_forecast_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get status/progress of a batch forecast job."""
+        return await get_forecast_job(job_id)
+
     # ==================== Supply Planning ====================
 
     async def generate_supply_plan_code(self) -> str:
@@ -366,31 +404,16 @@ class SNOPService:
         avg_daily_demand = float(stats["avg_daily_demand"])
         demand_std_dev = float(stats["demand_std_dev"])
 
-        # Z-score for service level
-        z_scores = {
-            0.90: 1.28,
-            0.95: 1.65,
-            0.97: 1.88,
-            0.99: 2.33
-        }
-        z = z_scores.get(service_level, 1.65)
-
-        # Safety stock calculation
-        safety_stock = z * demand_std_dev * math.sqrt(lead_time_days)
-
-        # Reorder point = (avg daily demand * lead time) + safety stock
-        reorder_point = (avg_daily_demand * lead_time_days) + safety_stock
-
-        # Economic Order Quantity (simplified Wilson formula)
-        # EOQ = sqrt(2 * D * S / H)
-        # D = annual demand, S = ordering cost, H = holding cost per unit
-        annual_demand = avg_daily_demand * 365
-        ordering_cost = 100  # Assumed
-        holding_cost_rate = 0.25  # 25% of unit cost
-        unit_cost = 1000  # Assumed
-        holding_cost = unit_cost * holding_cost_rate
-
-        eoq = math.sqrt((2 * annual_demand * ordering_cost) / holding_cost) if holding_cost > 0 else avg_daily_demand * 30
+        # Safety stock, reorder point and EOQ (same formulas as the batch API)
+        levels = safety_stock_levels(
+            [avg_daily_demand],
+            [demand_std_dev],
+            service_level=service_level,
+            lead_time_days=lead_time_days
+        )
+        safety_stock = float(levels["safety_stock"][0])
+        reorder_point = float(levels["reorder_point"][0])
+        eoq = float(levels["economic_order_qty"][0])
 
         return {
             "safety_stock": round(safety_stock, 2),
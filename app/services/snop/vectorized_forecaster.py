@@ -0,0 +1,409 @@
+"""
+Vectorized Forecasting Backend
+
+NumPy implementation of the EnsembleForecaster models operating on a
+2-D demand matrix (one row per series, one column per period):
+- Holt-Winters Triple Exponential Smoothing
+- ARIMA (autoregression on differenced data + MA of residuals)
+- Prophet-like decomposition
+- Gradient boosting with decision stumps
+- Simple Moving Average
+- Weighted Ensemble
+
+Every method mirrors the pure-Python method of the same name on
+EnsembleForecaster and fits all rows in one call. Recursions that are
+inherently sequential (Holt-Winters smoothing, AR/boosting roll-forward)
+loop over time but operate on all series at once.
+
+Results match the pure-Python implementation to floating-point tolerance
+(NumPy reductions use pairwise summation). The only intentional difference:
+a series on which the Holt-Winters recursion would divide by zero (zero
+demand inside the first season) falls back to the moving average instead
+of raising ZeroDivisionError, so one sparse SKU cannot abort a batch.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+Metrics = Dict[str, np.ndarray]
+
+
+class VectorizedForecaster:
+    """
+    Batch forecaster over a (series x periods) demand matrix.
+
+    All methods return (forecasts, metrics) where forecasts has shape
+    (series, forecast_periods) and every metric is an array of shape (series,).
+    """
+
+    MODEL_NAMES = ("holt_winters", "arima", "prophet", "gradient_boost")
+
+    @staticmethod
+    def as_matrix(data) -> np.ndarray:
+        """Coerce a list/array of series into a float64 2-D matrix."""
+        matrix = np.asarray(data, dtype=np.float64)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        return matrix
+
+    # ==================== Holt-Winters Triple Exponential Smoothing ====================
+
+    def holt_winters(
+        self,
+        data: np.ndarray,
+        season_length: int = 7,
+        alpha: float = 0.3,
+        beta: float = 0.1,
+        gamma: float = 0.2,
+        forecast_periods: int = 30
+    ) -> Tuple[np.ndarray, Metrics]:
+        """Holt-Winters for every row of the matrix."""
+        data = self.as_matrix(data)
+        n = data.shape[1]
+        if n < season_length * 2:
+            return self.simple_moving_average(data, forecast_periods)
+
+        s = season_length
+        level = data[:, :s].sum(axis=1) / s
+        trend = (data[:, s:2 * s].sum(axis=1) - data[:, :s].sum(axis=1)) / (s ** 2)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            seasonals = np.where(level[:, None] > 0, data[:, :s] / level[:, None], 1.0)
+
+            fitted = np.empty_like(data)
+            invalid = np.zeros(data.shape[0], dtype=bool)
+
+            for i in range(n):
+                slot = i % s
+                if i >= s:
+                    invalid |= seasonals[:, slot] == 0
+                    old_level = level
+                    level = alpha * (data[:, i] / seasonals[:, slot]) + (1 - alpha) * (level + trend)
+                    trend = beta * (level - old_level) + (1 - beta) * trend
+                    invalid |= level == 0
+                    seasonals[:, slot] = gamma * (data[:, i] / level) + (1 - gamma) * seasonals[:, slot]
+
+                fitted[:, i] = (level + trend) * seasonals[:, slot]
+
+            steps = np.arange(1, forecast_periods + 1)
+            slots = (n + steps - 1) % s
+            forecasts = (level[:, None] + steps[None, :] * trend[:, None]) * seasonals[:, slots]
+            metrics = self.calculate_accuracy(data, fitted)
+
+        forecasts = np.maximum(forecasts, 0)
+
+        if invalid.any():
+            sma_forecasts, sma_metrics = self.simple_moving_average(data[invalid], forecast_periods)
+            forecasts[invalid] = sma_forecasts
+            for key in metrics:
+                metrics[key][invalid] = sma_metrics[key]
+
+        return forecasts, metrics
+
+    # ==================== ARIMA-like Model ====================
+
+    def arima_forecast(
+        self,
+        data: np.ndarray,
+        p: int = 3,
+        d: int = 1,
+        q: int = 1,
+        forecast_periods: int = 30
+    ) -> Tuple[np.ndarray, Metrics]:
+        """Simplified ARIMA for every row of the matrix."""
+        data = self.as_matrix(data)
+        n = data.shape[1]
+        if n < 10:
+            return self.simple_moving_average(data, forecast_periods)
+
+        diff_data = np.diff(data, n=d, axis=1) if d > 0 else data.copy()
+        nd = diff_data.shape[1]
+        if nd < p + q:
+            return self.simple_moving_average(data, forecast_periods)
+
+        ar_coeffs = self._fit_ar(diff_data, p)
+
+        residuals = self._calculate_residuals(diff_data, ar_coeffs, p)
+        if residuals.shape[1] and q > 0:
+            ma_coeff = residuals[:, -q:].sum(axis=1) / q
+        else:
+            ma_coeff = np.zeros(data.shape[0])
+
+        # Roll the AR model forward on differenced data, integrating as we go
+        recent = diff_data[:, -p:].copy()
+        last_value = data[:, -1].copy()
+        forecasts = np.empty((data.shape[0], forecast_periods))
+        for i in range(forecast_periods):
+            ar_part = np.zeros(data.shape[0])
+            for j in range(min(p, recent.shape[1])):
+                ar_part = ar_part + ar_coeffs[:, j] * recent[:, -(j + 1)]
+            step = ar_part + ma_coeff
+            recent = np.concatenate([recent[:, 1:], step[:, None]], axis=1)
+            for _ in range(d):
+                last_value = last_value + step
+            forecasts[:, i] = last_value
+
+        forecasts = np.maximum(forecasts, 0)
+
+        fitted = self._fit_arima_values(data, ar_coeffs)
+        if n > p + d:
+            metrics = self.calculate_accuracy(data[:, p + d:], fitted[:, p + d:])
+        else:
+            metrics = self._constant_metrics(data.shape[0], mape=50.0)
+
+        return forecasts, metrics
+
+    def _fit_ar(self, data: np.ndarray, p: int) -> np.ndarray:
+        """Fit AR coefficients from normalized autocorrelations, one row per series."""
+        rows, n = data.shape
+        if n <= p:
+            return np.full((rows, p), 1.0 / p)
+
+        mean = data.sum(axis=1) / n
+        centered = data - mean[:, None]
+        var = (centered ** 2).sum(axis=1) / n
+
+        coeffs = np.empty((rows, p))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for lag in range(1, p + 1):
+                coeffs[:, lag - 1] = (centered[:, lag:] * centered[:, :-lag]).sum(axis=1) / (n * var)
+
+        coeffs[var == 0] = 0.0
+        total = np.abs(coeffs).sum(axis=1)
+        total[total == 0] = 1
+        return coeffs / total[:, None]
+
+    def _calculate_residuals(self, data: np.ndarray, ar_coeffs: np.ndarray, p: int) -> np.ndarray:
+        """Residuals of the AR model for positions p..n-1."""
+        n = data.shape[1]
+        predicted = np.zeros((data.shape[0], max(n - p, 0)))
+        for j in range(ar_coeffs.shape[1]):
+            predicted = predicted + ar_coeffs[:, j, None] * data[:, p - j - 1:n - j - 1]
+        return data[:, p:] - predicted
+
+    def _fit_arima_values(self, data: np.ndarray, ar_coeffs: np.ndarray) -> np.ndarray:
+        """Fitted values: the AR model applied to the undifferenced series."""
+        p = ar_coeffs.shape[1]
+        fitted = data.copy()
+        fitted[:, p:] = 0.0
+        for j in range(p):
+            fitted[:, p:] = fitted[:, p:] + ar_coeffs[:, j, None] * data[:, p - j - 1:data.shape[1] - j - 1]
+        return fitted
+
+    # ==================== Prophet-like Decomposition ====================
+
+    def prophet_forecast(
+        self,
+        data: np.ndarray,
+        forecast_periods: int = 30,
+        yearly_seasonality: bool = True,
+        weekly_seasonality: bool = True
+    ) -> Tuple[np.ndarray, Metrics]:
+        """Linear trend + weekly + monthly-proxy yearly seasonality for every row."""
+        data = self.as_matrix(data)
+        rows, n = data.shape
+        if n < 14:
+            return self.simple_moving_average(data, forecast_periods)
+
+        idx = np.arange(n)
+        x_mean = (n - 1) / 2
+        y_mean = data.sum(axis=1) / n
+        numerator = ((idx - x_mean)[None, :] * (data - y_mean[:, None])).sum(axis=1)
+        denominator = ((idx - x_mean) ** 2).sum()
+        slope = numerator / denominator if denominator > 0 else np.zeros(rows)
+        intercept = y_mean - slope * x_mean
+
+        trend = intercept[:, None] + slope[:, None] * idx[None, :]
+        detrended = data - trend
+
+        weekly_pattern = np.zeros((rows, 7))
+        if weekly_seasonality:
+            for day in range(7):
+                weekly_pattern[:, day] = detrended[:, day::7].mean(axis=1)
+
+        use_yearly = yearly_seasonality and n >= 90
+        yearly_pattern = np.zeros((rows, 365))
+        if use_yearly:
+            months = (idx // 30) % 12
+            for month in range(12):
+                mask = months == month
+                if mask.any():
+                    yearly_pattern[:, month * 30:(month + 1) * 30] = detrended[:, mask].mean(axis=1)[:, None]
+
+        future_idx = n + np.arange(forecast_periods)
+        forecasts = (
+            intercept[:, None] + slope[:, None] * future_idx[None, :]
+            + weekly_pattern[:, future_idx % 7]
+        )
+        if yearly_seasonality:
+            forecasts = forecasts + yearly_pattern[:, future_idx % 365]
+        forecasts = np.maximum(forecasts, 0)
+
+        fitted = trend + weekly_pattern[:, idx % 7]
+        if use_yearly:
+            fitted = fitted + yearly_pattern[:, idx % 365]
+
+        metrics = self.calculate_accuracy(data, fitted)
+
+        return forecasts, metrics
+
+    # ==================== Gradient Boosting (Simplified) ====================
+
+    def gradient_boost_forecast(
+        self,
+        data: np.ndarray,
+        forecast_periods: int = 30,
+        n_estimators: int = 10,
+        learning_rate: float = 0.1
+    ) -> Tuple[np.ndarray, Metrics]:
+        """Boosted lag-1 decision stumps for every row."""
+        data = self.as_matrix(data)
+        rows, n = data.shape
+        if n < 10:
+            return self.simple_moving_average(data, forecast_periods)
+
+        lookback = min(7, n - 1)
+        m = n - lookback
+        y = data[:, lookback:]
+        lag1_values = data[:, :m]
+
+        # The split feature never changes between iterations, so neither does the split
+        threshold = np.sort(lag1_values, axis=1)[:, m // 2]
+        above = lag1_values >= threshold[:, None]
+        count_above = above.sum(axis=1)
+        count_below = m - count_above
+
+        base = y.sum(axis=1) / m
+        predictions = np.repeat(base[:, None], m, axis=1)
+        pred_above = np.empty((rows, n_estimators))
+        pred_below = np.empty((rows, n_estimators))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for k in range(n_estimators):
+                residuals = y - predictions
+                sum_above = np.where(above, residuals, 0.0).sum(axis=1)
+                sum_below = np.where(above, 0.0, residuals).sum(axis=1)
+                pred_above[:, k] = np.where(count_above > 0, sum_above / count_above, 0.0) * learning_rate
+                pred_below[:, k] = np.where(count_below > 0, sum_below / count_below, 0.0) * learning_rate
+                predictions = predictions + np.where(above, pred_above[:, k, None], pred_below[:, k, None])
+
+        forecasts = np.empty((rows, forecast_periods))
+        recent = data[:, -lookback:].copy()
+        for i in range(forecast_periods):
+            goes_above = recent[:, 0] >= threshold
+            pred = base.copy()
+            for k in range(n_estimators):
+                pred = pred + np.where(goes_above, pred_above[:, k], pred_below[:, k])
+            forecasts[:, i] = pred
+            recent = np.concatenate([recent[:, 1:], pred[:, None]], axis=1)
+
+        forecasts = np.maximum(forecasts, 0)
+
+        fitted_full = np.concatenate([np.repeat(base[:, None], lookback, axis=1), predictions], axis=1)
+        metrics = self.calculate_accuracy(data, fitted_full)
+
+        return forecasts, metrics
+
+    # ==================== Simple Moving Average ====================
+
+    def simple_moving_average(
+        self,
+        data: np.ndarray,
+        forecast_periods: int,
+        window: int = 7
+    ) -> Tuple[np.ndarray, Metrics]:
+        """Moving average of the last `window` periods for every row."""
+        data = self.as_matrix(data)
+        rows, n = data.shape
+        if n == 0:
+            return np.zeros((rows, forecast_periods)), self._constant_metrics(rows, mape=100.0)
+
+        window = min(window, n)
+        avg = data[:, -window:].sum(axis=1) / window
+
+        forecasts = np.repeat(np.maximum(avg, 0)[:, None], forecast_periods, axis=1)
+        metrics = self._constant_metrics(rows, mape=30.0)
+        metrics["mae"] = np.abs(avg - data.sum(axis=1) / n)
+
+        return forecasts, metrics
+
+    # ==================== Accuracy Metrics ====================
+
+    def calculate_accuracy(self, actual: np.ndarray, predicted: np.ndarray) -> Metrics:
+        """MAPE (capped at 100), MAE, RMSE and bias for every row."""
+        n = min(actual.shape[1], predicted.shape[1])
+        if n == 0:
+            return self._constant_metrics(actual.shape[0], mape=100.0)
+
+        actual = actual[:, :n]
+        predicted = predicted[:, :n]
+        error = actual - predicted
+
+        nonzero = actual != 0
+        valid_count = nonzero.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ape = np.where(nonzero, np.abs(error) / np.abs(actual), 0.0)
+            mape = np.where(valid_count > 0, ape.sum(axis=1) / valid_count * 100, 100.0)
+
+        return {
+            "mape": np.minimum(mape, 100.0),
+            "mae": np.abs(error).sum(axis=1) / n,
+            "rmse": np.sqrt((error ** 2).sum(axis=1) / n),
+            "bias": (-error).sum(axis=1) / n,
+        }
+
+    @staticmethod
+    def _constant_metrics(rows: int, mape: float) -> Metrics:
+        return {
+            "mape": np.full(rows, mape),
+            "mae": np.zeros(rows),
+            "rmse": np.zeros(rows),
+            "bias": np.zeros(rows),
+        }
+
+    # ==================== Ensemble Combination ====================
+
+    def ensemble(
+        self,
+        data: np.ndarray,
+        season_length: int = 7,
+        forecast_periods: int = 30
+    ) -> Dict[str, np.ndarray]:
+        """
+        Run all models and combine them with inverse-MAPE weights.
+
+        Returns arrays: forecasts / lower / upper (series x periods),
+        mape (series,), and per-model "weights" and "model_mape"
+        (series x models, columns in MODEL_NAMES order).
+        """
+        data = self.as_matrix(data)
+
+        results = [
+            self.holt_winters(data, season_length, forecast_periods=forecast_periods),
+            self.arima_forecast(data, forecast_periods=forecast_periods),
+            self.prophet_forecast(data, forecast_periods=forecast_periods),
+            self.gradient_boost_forecast(data, forecast_periods=forecast_periods),
+        ]
+        model_forecasts = np.stack([r[0] for r in results], axis=1)  # series x models x periods
+        model_mape = np.stack([r[1]["mape"] for r in results], axis=1)  # series x models
+
+        inverse_mape = 1 / np.maximum(model_mape, 1)
+        weights = inverse_mape / inverse_mape.sum(axis=1, keepdims=True)
+
+        combined = (model_forecasts * weights[:, :, None]).sum(axis=1)
+        combined = np.maximum(combined, 0)
+
+        # 95% confidence interval from the spread of model predictions
+        variance = ((model_forecasts - combined[:, None, :]) ** 2).sum(axis=1) / len(results)
+        margin = np.sqrt(variance) * 1.96
+
+        return {
+            "forecasts": combined,
+            "lower": np.maximum(combined - margin, 0),
+            "upper": combined + margin,
+            "mape": (model_mape * weights).sum(axis=1),
+            "weights": weights,
+            "model_mape": model_mape,
+        }
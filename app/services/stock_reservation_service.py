@@ -12,12 +12,13 @@ from typing import Optional, List, Dict
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass
 
-from sqlalchemy import select, update, func, and_, or_
+from sqlalchemy import select, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.inventory import InventorySummary, StockItem
+from app.models.inventory import StockItem
 from app.models.channel import ChannelInventory, SalesChannel
 from app.services.cache_service import get_cache
+from app.services.inventory_ledger import InventoryLedgerService
 from app.config import settings
 
 
@@ -64,6 +65,7 @@ class StockReservationService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.cache = get_cache()
+        self.ledger = InventoryLedgerService(db)
 
     def _reservation_key(self, reservation_id: str) -> str:
         """Generate cache key for reservation."""
@@ -109,6 +111,7 @@ class StockReservationService:
 
         Now channel-aware: checks ChannelInventory for the specified channel first.
         Falls back to InventorySummary (shared pool) if channel inventory not configured.
+        Both include unfolded inventory ledger entries.
         """
         result = {}
 
@@ -117,37 +120,18 @@ class StockReservationService:
         use_channel_inventory = channel_obj and getattr(settings, 'CHANNEL_INVENTORY_ENABLED', True)
 
         for item in items:
+            product_id = uuid.UUID(str(item.product_id))
             if use_channel_inventory:
                 # Query channel-specific inventory
                 # Available = allocated - buffer - reserved
-                query = (
-                    select(
-                        func.sum(
-                            func.greatest(
-                                0,
-                                func.coalesce(ChannelInventory.allocated_quantity, 0) -
-                                func.coalesce(ChannelInventory.buffer_quantity, 0) -
-                                func.coalesce(ChannelInventory.reserved_quantity, 0)
-                            )
-                        ).label('total_available'),
-                        func.sum(func.coalesce(ChannelInventory.reserved_quantity, 0)).label('total_reserved'),
-                        func.sum(func.coalesce(ChannelInventory.allocated_quantity, 0)).label('total_allocated'),
-                    )
-                    .where(
-                        and_(
-                            ChannelInventory.channel_id == channel_obj.id,
-                            ChannelInventory.product_id == item.product_id,
-                            ChannelInventory.is_active == True,
-                        )
-                    )
-                )
+                levels = (await self.ledger.product_levels([product_id], channel_id=channel_obj.id)).values()
 
-                db_result = await self.db.execute(query)
-                row = db_result.first()
-
-                total_available = row.total_available or 0 if row else 0
-                total_reserved = row.total_reserved or 0 if row else 0
-                total_allocated = row.total_allocated or 0 if row else 0
+                total_available = sum(
+                    max(0, level["allocated_quantity"] - level["buffer_quantity"] - level["reserved_quantity"])
+                    for level in levels
+                )
+                total_reserved = sum(level["reserved_quantity"] for level in levels)
+                total_allocated = sum(level["allocated_quantity"] for level in levels)
 
                 # Get channel-specific soft reservations from cache
                 soft_reserved = await self._get_channel_soft_reserved(str(channel_obj.id), item.product_id)
@@ -168,19 +152,10 @@ class StockReservationService:
                 }
             else:
                 # Fallback to legacy shared pool (InventorySummary)
-                query = (
-                    select(
-                        func.sum(InventorySummary.available_quantity).label('total_available'),
-                        func.sum(InventorySummary.reserved_quantity).label('total_reserved'),
-                    )
-                    .where(InventorySummary.product_id == item.product_id)
-                )
+                levels = (await self.ledger.product_levels([product_id])).values()
 
-                db_result = await self.db.execute(query)
-                row = db_result.first()
-
-                total_available = row.total_available or 0 if row else 0
-                total_reserved = row.total_reserved or 0 if row else 0
+                total_available = sum(level["available_quantity"] for level in levels)
+                total_reserved = sum(level["reserved_quantity"] for level in levels)
 
                 # Get soft reservations from cache (legacy)
                 soft_reserved = await self._get_soft_reserved(item.product_id)
@@ -403,7 +378,10 @@ class StockReservationService:
             channel_inv = result.scalars().first()
 
             if channel_inv:
-                channel_inv.reserved_quantity = (channel_inv.reserved_quantity or 0) + quantity
+                self.ledger.record(
+                    channel_inv.warehouse_id, channel_inv.product_id, source="channel_reservation",
+                    variant_id=channel_inv.variant_id, channel_id=channel_inv.channel_id, reserved=quantity,
+                )
                 await self.db.commit()
                 return True
         except Exception:
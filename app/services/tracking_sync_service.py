@@ -0,0 +1,443 @@
+"""
+Courier Tracking Sync Service.
+
+Polls courier tracking for every in-transit order:
+1. In-transit orders are paged with a keyset cursor on orders.id (no OFFSET,
+   no LIMIT-and-stop)
+2. Each page is grouped by courier and split into batch tracking calls,
+   polled concurrently over the shared courier connection pools
+   (app.core.http_client), with a token-bucket rate limit per courier and a
+   global cap on requests in flight
+3. Status changes of a page are written with one bulk UPDATE and committed
+
+Couriers:
+- Shiprocket (orders with a Shiprocket order/shipment id): POST /courier/track/awbs
+- CJDQuick OMS (all other orders): GET /shipments filtered by AWB numbers
+
+Order status only moves forward along the delivery lifecycle, so a stale
+courier scan never rolls an order back.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import httpx
+from sqlalchemy import and_, bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.order import Order, OrderStatus
+from app.services.cjdquick_service import CJDQuickService
+from app.services.shiprocket_service import ShiprocketService
+
+logger = logging.getLogger(__name__)
+
+
+# Orders the poller follows
+IN_TRANSIT_STATUSES = [
+    OrderStatus.SHIPPED.value,
+    OrderStatus.IN_TRANSIT.value,
+    OrderStatus.OUT_FOR_DELIVERY.value,
+    OrderStatus.RTO_INITIATED.value,
+    OrderStatus.RTO_IN_TRANSIT.value,
+]
+
+# Lifecycle position; an update never moves an order to a lower rank
+STATUS_RANK = {
+    OrderStatus.SHIPPED.value: 1,
+    OrderStatus.IN_TRANSIT.value: 2,
+    OrderStatus.OUT_FOR_DELIVERY.value: 3,
+    OrderStatus.DELIVERED.value: 4,
+    OrderStatus.RTO_INITIATED.value: 5,
+    OrderStatus.RTO_IN_TRANSIT.value: 6,
+    OrderStatus.RTO_DELIVERED.value: 7,
+}
+
+# Shiprocket current_status_id -> OrderStatus (ids without a mapping only update tracking fields)
+SHIPROCKET_STATUS_MAP = {
+    6: OrderStatus.SHIPPED.value,             # Shipped - Picked Up
+    7: OrderStatus.IN_TRANSIT.value,          # In Transit
+    8: OrderStatus.IN_TRANSIT.value,          # Reached Destination Hub
+    38: OrderStatus.IN_TRANSIT.value,         # Reached At Destination Hub
+    9: OrderStatus.OUT_FOR_DELIVERY.value,    # Out For Delivery
+    10: OrderStatus.DELIVERED.value,          # Delivered
+    12: OrderStatus.RTO_INITIATED.value,      # RTO Initiated
+    21: OrderStatus.RTO_INITIATED.value,      # RTO Acknowledged
+    13: OrderStatus.RTO_IN_TRANSIT.value,     # RTO In-Transit
+    26: OrderStatus.RTO_IN_TRANSIT.value,     # RTO NDR
+    40: OrderStatus.RTO_IN_TRANSIT.value,     # RTO OFD
+    14: OrderStatus.RTO_DELIVERED.value,      # RTO Delivered
+}
+
+# CJDQuick statusBucket -> OrderStatus (as in the shipment.status_changed webhook)
+CJDQUICK_BUCKET_MAP = {
+    "shipped": OrderStatus.SHIPPED.value,
+    "in_transit": OrderStatus.IN_TRANSIT.value,
+    "out_for_delivery": OrderStatus.OUT_FOR_DELIVERY.value,
+    "delivered": OrderStatus.DELIVERED.value,
+    "rto_initiated": OrderStatus.RTO_INITIATED.value,
+    "rto_in_transit": OrderStatus.RTO_IN_TRANSIT.value,
+    "rto_delivered": OrderStatus.RTO_DELIVERED.value,
+}
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Courier timestamp string -> aware datetime (None if missing or unparseable)."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class TrackingResult:
+    """Normalized tracking state of one AWB."""
+    awb_code: str
+    tracking_status: str
+    tracking_status_id: Optional[int] = None
+    order_status: Optional[str] = None
+    location: Optional[str] = None
+    activity: Optional[str] = None
+    estimated_delivery: Optional[str] = None
+    shipped_at: Optional[datetime] = None
+    delivered_at: Optional[datetime] = None
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CourierTrackingAdapter(ABC):
+    """Batch tracking for one courier."""
+
+    name: str = ""
+
+    def __init__(self, rate: float, batch_size: int):
+        self.limiter = RateLimiter(rate)
+        self.batch_size = batch_size
+
+    @abstractmethod
+    async def track(self, awb_codes: List[str]) -> Dict[str, TrackingResult]:
+        """Tracking results keyed by AWB (AWBs the courier does not know are omitted)."""
+
+
+class ShiprocketTrackingAdapter(CourierTrackingAdapter):
+    name = "shiprocket"
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, base_url: Optional[str] = None,
+                 rate: Optional[float] = None, batch_size: Optional[int] = None):
+        super().__init__(
+            rate or settings.SHIPROCKET_TRACKING_RATE,
+            batch_size or settings.SHIPROCKET_TRACKING_BATCH_SIZE
+        )
+        self.service = ShiprocketService(base_url=base_url, client=client)
+
+    async def track(self, awb_codes: List[str]) -> Dict[str, TrackingResult]:
+        response = await self.service.track_multiple(awb_codes)
+
+        # Payloads keyed by AWB, either as one object or a list of single-key objects
+        payloads: Dict[str, Any] = {}
+        for item in (response if isinstance(response, list) else [response]):
+            if isinstance(item, dict):
+                payloads.update(item)
+
+        results = {}
+        for awb_code in awb_codes:
+            payload = payloads.get(awb_code)
+            if not isinstance(payload, dict) or not payload.get("tracking_data"):
+                continue
+            info = ShiprocketService.parse_tracking(awb_code, payload)
+            if not info.current_status:
+                continue
+            latest = info.activities[0] if info.activities else {}
+            results[awb_code] = TrackingResult(
+                awb_code=awb_code,
+                tracking_status=info.current_status.upper(),
+                tracking_status_id=info.current_status_id or None,
+                order_status=SHIPROCKET_STATUS_MAP.get(info.current_status_id),
+                location=latest.get("location") or None,
+                activity=latest.get("activity") or None,
+                estimated_delivery=info.etd or None,
+                shipped_at=_parse_timestamp(info.pickup_date),
+                delivered_at=_parse_timestamp(info.delivered_date),
+            )
+        return results
+
+
+class CJDQuickTrackingAdapter(CourierTrackingAdapter):
+    name = "cjdquick"
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, base_url: Optional[str] = None,
+                 rate: Optional[float] = None, batch_size: Optional[int] = None):
+        super().__init__(
+            rate or settings.CJDQUICK_TRACKING_RATE,
+            batch_size or settings.CJDQUICK_TRACKING_BATCH_SIZE
+        )
+        self.service = CJDQuickService(base_url=base_url, client=client)
+
+    async def track(self, awb_codes: List[str]) -> Dict[str, TrackingResult]:
+        response = await self.service.get_shipments(params={
+            "awbNos": ",".join(awb_codes),
+            "limit": len(awb_codes),
+        })
+        items = response.get("data") or response.get("items") or response.get("shipments") or []
+
+        wanted = set(awb_codes)
+        results = {}
+        for item in items:
+            awb_code = item.get("awbNo") or item.get("awbNumber") or item.get("awbCode")
+            if awb_code not in wanted:
+                continue
+            bucket = (item.get("statusBucket") or "").lower()
+            status = item.get("statusLabel") or item.get("status") or bucket
+            if not status:
+                continue
+            results[awb_code] = TrackingResult(
+                awb_code=awb_code,
+                tracking_status=str(status).upper(),
+                order_status=CJDQUICK_BUCKET_MAP.get(bucket),
+                location=item.get("location") or None,
+                activity=item.get("carrierRemark") or None,
+                estimated_delivery=item.get("expectedDeliveryDate") or None,
+                shipped_at=_parse_timestamp(item.get("shippedAt")),
+                delivered_at=_parse_timestamp(item.get("deliveredAt")),
+            )
+        return results
+
+
+def next_status(current: str, proposed: Optional[str]) -> Optional[str]:
+    """Proposed order status if it moves the order forward, else None."""
+    if not proposed or proposed == current:
+        return None
+    if STATUS_RANK.get(proposed, 0) <= STATUS_RANK.get(current, 0):
+        return None
+    return proposed
+
+
+class TrackingSyncService:
+    """
+    Polls courier tracking for all in-transit orders.
+
+    Usage:
+        async with get_db_session() as session:
+            summary = await TrackingSyncService(session).run()
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        client: Optional[httpx.AsyncClient] = None,
+        adapters: Optional[Dict[str, CourierTrackingAdapter]] = None,
+        page_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.db = db
+        self.client = client
+        self.adapters = adapters
+        self.page_size = page_size or settings.TRACKING_SYNC_PAGE_SIZE
+        self.concurrency = concurrency or settings.TRACKING_SYNC_CONCURRENCY
+
+    def _default_adapters(self, client: Optional[httpx.AsyncClient]) -> Dict[str, CourierTrackingAdapter]:
+        adapters: Dict[str, CourierTrackingAdapter] = {"shiprocket": ShiprocketTrackingAdapter(client=client)}
+        if settings.CJDQUICK_ENABLED:
+            adapters["cjdquick"] = CJDQuickTrackingAdapter(client=client)
+        return adapters
+
+    @staticmethod
+    def courier_for(shipment: Any) -> str:
+        """Which courier integration tracks an order."""
+        if shipment.shiprocket_order_id or shipment.shiprocket_shipment_id:
+            return "shiprocket"
+        return "cjdquick"
+
+    async def iter_shipments(self) -> AsyncIterator[List[Any]]:
+        """Pages of in-transit orders with an AWB, keyset-paginated on id."""
+        last_id: Optional[uuid.UUID] = None
+        while True:
+            query = (
+                select(
+                    Order.id,
+                    Order.order_number,
+                    Order.awb_code,
+                    Order.status,
+                    Order.tracking_status,
+                    Order.last_tracking_location,
+                    Order.shiprocket_order_id,
+                    Order.shiprocket_shipment_id,
+                )
+                .where(
+                    and_(
+                        Order.status.in_(IN_TRANSIT_STATUSES),
+                        Order.awb_code.isnot(None),
+                    )
+                )
+                .order_by(Order.id)
+                .limit(self.page_size)
+            )
+            if last_id is not None:
+                query = query.where(Order.id > last_id)
+
+            page = (await self.db.execute(query)).all()
+            if not page:
+                return
+            yield page
+            if len(page) < self.page_size:
+                return
+            last_id = page[-1].id
+
+    async def fetch(
+        self,
+        shipments: Sequence[Any],
+        adapters: Dict[str, CourierTrackingAdapter],
+        errors: Optional[List[str]] = None
+    ) -> Dict[str, TrackingResult]:
+        """Poll tracking for shipments concurrently; results keyed by AWB."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        by_courier: Dict[str, List[str]] = {}
+        for shipment in shipments:
+            if self.courier_for(shipment) in adapters:
+                by_courier.setdefault(self.courier_for(shipment), []).append(shipment.awb_code)
+
+        async def poll(adapter: CourierTrackingAdapter, awb_codes: List[str]) -> Dict[str, TrackingResult]:
+            async with semaphore:
+                await adapter.limiter.acquire()
+                try:
+                    return await adapter.track(awb_codes)
+                except Exception as e:
+                    message = f"{adapter.name} tracking failed for {len(awb_codes)} AWBs: {e}"
+                    logger.error(message)
+                    if errors is not None:
+                        errors.append(message)
+                    return {}
+
+        tasks = []
+        for courier, awb_codes in by_courier.items():
+            adapter = adapters[courier]
+            unique = list(dict.fromkeys(awb_codes))
+            for i in range(0, len(unique), adapter.batch_size):
+                tasks.append(poll(adapter, unique[i:i + adapter.batch_size]))
+
+        results: Dict[str, TrackingResult] = {}
+        for batch in await asyncio.gather(*tasks):
+            results.update(batch)
+        return results
+
+    @staticmethod
+    def build_updates(shipments: Sequence[Any], results: Dict[str, TrackingResult], now: datetime) -> List[Dict[str, Any]]:
+        """UPDATE parameters for shipments whose tracking changed."""
+        updates = []
+        for shipment in shipments:
+            result = results.get(shipment.awb_code)
+            if result is None:
+                continue
+            new_status = next_status(shipment.status, result.order_status)
+            if (
+                new_status is None
+                and result.tracking_status == shipment.tracking_status
+                and (result.location or shipment.last_tracking_location) == shipment.last_tracking_location
+            ):
+                continue
+
+            delivered_at = None
+            if new_status == OrderStatus.DELIVERED.value:
+                delivered_at = result.delivered_at or now
+            updates.append({
+                "order_id": shipment.id,
+                "new_status": new_status,
+                "tracking_status": result.tracking_status,
+                "tracking_status_id": result.tracking_status_id,
+                "location": result.location,
+                "activity": result.activity,
+                "estimated_delivery": result.estimated_delivery,
+                "shipped_at": result.shipped_at,
+                "delivered_at": delivered_at,
+                "update_time": now,
+            })
+        return updates
+
+    async def apply(self, updates: List[Dict[str, Any]]) -> None:
+        """Write a page of tracking updates with one bulk UPDATE and commit."""
+        if not updates:
+            return
+
+        orders = Order.__table__
+        stmt = (
+            update(orders)
+            .where(orders.c.id == bindparam("order_id"))
+            .values(
+                status=func.coalesce(bindparam("new_status", type_=orders.c.status.type), orders.c.status),
+                tracking_status=bindparam("tracking_status"),
+                tracking_status_id=func.coalesce(bindparam("tracking_status_id", type_=orders.c.tracking_status_id.type), orders.c.tracking_status_id),
+                last_tracking_location=func.coalesce(bindparam("location", type_=orders.c.last_tracking_location.type), orders.c.last_tracking_location),
+                last_tracking_activity=func.coalesce(bindparam("activity", type_=orders.c.last_tracking_activity.type), orders.c.last_tracking_activity),
+                estimated_delivery=func.coalesce(bindparam("estimated_delivery", type_=orders.c.estimated_delivery.type), orders.c.estimated_delivery),
+                shipped_at=func.coalesce(orders.c.shipped_at, bindparam("shipped_at", type_=orders.c.shipped_at.type)),
+                delivered_at=func.coalesce(orders.c.delivered_at, bindparam("delivered_at", type_=orders.c.delivered_at.type)),
+                last_tracking_update=bindparam("update_time"),
+                updated_at=bindparam("update_time"),
+            )
+        )
+        await self.db.execute(stmt, updates)
+        await self.db.commit()
+
+        # Core UPDATEs bypass the ORM listeners that keep demand facts current
+        status_changes = {u["order_id"]: set() for u in updates if u["new_status"]}
+        if status_changes:
+            from app.services.snop.demand_history import demand_fact_refresher
+            demand_fact_refresher.enqueue(status_changes)
+
+    async def run(self) -> Dict[str, Any]:
+        """Poll all in-transit orders; returns a summary."""
+        summary = {
+            "orders_checked": 0,
+            "orders_updated": 0,
+            "status_changes": 0,
+            "delivered": 0,
+            "errors": [],
+        }
+
+        adapters = self.adapters or self._default_adapters(self.client)
+        async for page in self.iter_shipments():
+            summary["orders_checked"] += len(page)
+            results = await self.fetch(page, adapters, summary["errors"])
+            updates = self.build_updates(page, results, datetime.now(timezone.utc))
+            try:
+                await self.apply(updates)
+            except Exception as e:
+                await self.db.rollback()
+                message = f"Tracking update failed for {len(updates)} orders: {e}"
+                logger.error(message)
+                summary["errors"].append(message)
+                continue
+
+            summary["orders_updated"] += len(updates)
+            summary["status_changes"] += sum(1 for u in updates if u["new_status"])
+            summary["delivered"] += sum(1 for u in updates if u["new_status"] == OrderStatus.DELIVERED.value)
+
+        return summary
@@ -293,6 +293,7 @@ class TransferService:
                 item.variant_id,
                 available_change=-dispatched_qty,
                 in_transit_change=dispatched_qty,
+                source="transfer",
             )
 
             # Create movement record
@@ -390,6 +391,7 @@ class TransferService:
                         item.variant_id,
                         quantity_change=received_qty,
                         damaged_change=damaged_qty,
+                        source="transfer",
                     )
 
                     # Update source warehouse (reduce in_transit)
@@ -398,6 +400,7 @@ class TransferService:
                         item.product_id,
                         item.variant_id,
                         in_transit_change=-(received_qty + damaged_qty),
+                        source="transfer",
                     )
 
                     # Create movement record at destination
@@ -0,0 +1,503 @@
+"""
+Wave planning: groups pending orders into pick waves and releases them as
+picklists.
+
+Pending (CONFIRMED / ALLOCATED) orders are grouped per warehouse and carrier
+cutoff, ordered by SLA (cutoff, expected delivery, then age) and cut into
+waves sized to picker capacity (WAVE_PICKERS x WAVE_LINES_PER_PICKER order
+lines). A group is split into equal-sized waves rather than full waves plus
+a remainder. Each wave is grown from its most urgent order by adding the
+orders whose pick zones overlap it most, looking only LOOKAHEAD_ORDERS ahead
+in SLA order so urgent orders are not starved. Orders that cannot be covered
+by unrestricted batch stock are held back. A released wave gets one
+picklist per zone it touches and reserves its picklist items' batch-managed
+quantities FEFO (pick_wave_allocations). Settling a picklist issues what was
+picked from those reservations and releases the rest; the wave completes
+once all its picklists are completed or cancelled.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta, timezone
+from math import ceil
+from typing import Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+import uuid
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import contains_eager, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.batch import BatchMaster
+from app.models.order import Order, OrderStatus
+from app.models.picklist import (
+    Picklist, PicklistItem, PicklistStatus, PicklistType, PickWave, PickWaveAllocation,
+    WaveAllocationStatus, WaveStatus,
+)
+from app.schemas.picklist import PicklistGenerateRequest
+from app.services.batch_picking_service import BatchAllocation, BatchPickingService
+from app.services.picklist_service import PicklistService
+
+CUTOFF_TIMEZONE = ZoneInfo("Asia/Kolkata")
+
+SETTLED_PICKLIST_STATUSES = (
+    PicklistStatus.COMPLETED.value,
+    PicklistStatus.PARTIALLY_PICKED.value,
+    PicklistStatus.CANCELLED.value,
+)
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _parse_cutoff(value: str) -> time:
+    hours, minutes = value.strip().split(":")
+    return time(int(hours), int(minutes))
+
+
+@dataclass
+class WavePlan:
+    """Orders planned to be picked together."""
+    warehouse_id: uuid.UUID
+    carrier: Optional[str]
+    cutoff_at: datetime
+    orders: List[Order] = field(default_factory=list)
+    zone_codes: Set[str] = field(default_factory=set)
+    lines: int = 0
+    quantity: int = 0
+    picker_count: int = 1
+    batch_demand: Dict[uuid.UUID, int] = field(default_factory=dict)
+
+    def add(self, order: Order, zones: Set[str]) -> None:
+        self.orders.append(order)
+        self.zone_codes |= zones
+        self.lines += len(order.items)
+        self.quantity += sum(item.quantity for item in order.items)
+
+
+class WavePlanningService:
+    """Service for planning and releasing pick waves."""
+
+    LOOKAHEAD_ORDERS = 200
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.picklists = PicklistService(db)
+        self.batches = BatchPickingService(db)
+
+    # ==================== WAVE NUMBER GENERATION ====================
+
+    async def generate_wave_number(self) -> str:
+        """Generate unique wave number: WV-YYYYMMDD-XXXX"""
+        today = datetime.now(timezone.utc).strftime("%Y%m%d")
+        prefix = f"WV-{today}-"
+
+        stmt = select(func.count(PickWave.id)).where(
+            PickWave.wave_number.like(f"{prefix}%")
+        )
+        count = (await self.db.execute(stmt)).scalar() or 0
+
+        return f"{prefix}{(count + 1):04d}"
+
+    # ==================== PLANNING ====================
+
+    async def plan_waves(
+        self,
+        warehouse_id: Optional[uuid.UUID] = None,
+        pickers: Optional[int] = None,
+        lines_per_picker: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> Tuple[List[WavePlan], List[uuid.UUID]]:
+        """
+        Group pending orders into waves.
+        Returns (waves in cutoff order, ids of orders held for batch stock).
+        """
+        now = now or datetime.now(timezone.utc)
+        lines_per_picker = lines_per_picker or settings.WAVE_LINES_PER_PICKER
+        capacity = (pickers or settings.WAVE_PICKERS) * lines_per_picker
+
+        by_warehouse: Dict[uuid.UUID, List[Order]] = defaultdict(list)
+        for order in await self._get_pending_orders(warehouse_id):
+            by_warehouse[order.warehouse_id].append(order)
+
+        cutoffs = self._carrier_cutoffs()
+        plans, held = [], []
+        for wh_id, orders in by_warehouse.items():
+            keys = {}
+            for order in orders:
+                carrier = (order.courier_name or "").strip().upper() or None
+                cutoff_at = self._next_cutoff(cutoffs.get(carrier, cutoffs[None]), now)
+                keys[order.id] = (carrier, cutoff_at)
+            orders.sort(key=lambda o: self._urgency(o, keys[o.id][1]))
+
+            short, managed = await self._batch_shortages(wh_id, orders)
+            held.extend(order.id for order in orders if order.id in short)
+            ready = [order for order in orders if order.id not in short]
+            zones = await self._order_zones(wh_id, ready)
+
+            groups: Dict[Tuple, List[Order]] = defaultdict(list)
+            for order in ready:
+                groups[keys[order.id]].append(order)
+            for (carrier, cutoff_at), group in groups.items():
+                for plan in self._cut_waves(wh_id, carrier, cutoff_at, group, zones, capacity):
+                    plan.picker_count = max(1, ceil(plan.lines / lines_per_picker))
+                    for order in plan.orders:
+                        for item in order.items:
+                            if item.product_id in managed:
+                                demand = plan.batch_demand.get(item.product_id, 0)
+                                plan.batch_demand[item.product_id] = demand + item.quantity
+                    plans.append(plan)
+
+        plans.sort(key=lambda p: (p.cutoff_at, str(p.warehouse_id)))
+        return plans, held
+
+    async def _get_pending_orders(self, warehouse_id: Optional[uuid.UUID]) -> List[Order]:
+        stmt = (
+            select(Order)
+            .options(selectinload(Order.items))
+            .where(
+                Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.ALLOCATED]),
+                Order.warehouse_id.isnot(None),
+            )
+            .order_by(Order.created_at)
+            .limit(settings.WAVE_MAX_ORDERS)
+            # Held until release_waves commits; a concurrent run plans the rest
+            .with_for_update(of=Order, skip_locked=True)
+        )
+        if warehouse_id:
+            stmt = stmt.where(Order.warehouse_id == warehouse_id)
+        result = await self.db.execute(stmt)
+        return [order for order in result.scalars().all() if order.items]
+
+    @staticmethod
+    def _carrier_cutoffs() -> Dict[Optional[str], time]:
+        """Courier name -> pickup cutoff; None holds the default."""
+        cutoffs = {None: _parse_cutoff(settings.WAVE_DEFAULT_CUTOFF)}
+        for entry in settings.WAVE_CARRIER_CUTOFFS.split(","):
+            if "=" in entry:
+                carrier, value = entry.split("=", 1)
+                cutoffs[carrier.strip().upper()] = _parse_cutoff(value)
+        return cutoffs
+
+    @staticmethod
+    def _next_cutoff(cutoff: time, now: datetime) -> datetime:
+        local_now = now.astimezone(CUTOFF_TIMEZONE)
+        cutoff_at = datetime.combine(local_now.date(), cutoff, tzinfo=CUTOFF_TIMEZONE)
+        if cutoff_at <= local_now:
+            cutoff_at += timedelta(days=1)
+        return cutoff_at.astimezone(timezone.utc)
+
+    @staticmethod
+    def _urgency(order: Order, cutoff_at: datetime) -> Tuple:
+        promised = _utc(order.expected_delivery_date)
+        placed = _utc(order.confirmed_at or order.created_at)
+        return (
+            cutoff_at,
+            promised is None,
+            promised or cutoff_at,
+            placed or cutoff_at,
+        )
+
+    async def _batch_shortages(
+        self,
+        warehouse_id: uuid.UUID,
+        orders: List[Order]
+    ) -> Tuple[Set[uuid.UUID], Set[uuid.UUID]]:
+        """
+        Orders (taken in SLA order) that unrestricted batch stock cannot cover,
+        and the batch-managed products among the orders' lines.
+        """
+        products = {item.product_id for order in orders for item in order.items}
+        if not products:
+            return set(), set()
+        managed = set((await self.db.execute(
+            select(BatchMaster.product_id)
+            .where(BatchMaster.warehouse_id == warehouse_id, BatchMaster.product_id.in_(products))
+            .distinct()
+        )).scalars().all())
+        if not managed:
+            return set(), managed
+
+        index = await self.batches.load_index(warehouse_id, managed, "FEFO")
+        available = {product_id: index.available(product_id) for product_id in managed}
+
+        short = set()
+        for order in orders:
+            need: Dict[uuid.UUID, int] = defaultdict(int)
+            for item in order.items:
+                if item.product_id in managed:
+                    need[item.product_id] += item.quantity
+            if all(available[p] >= q for p, q in need.items()):
+                for p, q in need.items():
+                    available[p] -= q
+            else:
+                short.add(order.id)
+        return short, managed
+
+    async def _order_zones(self, warehouse_id: uuid.UUID, orders: List[Order]) -> Dict[uuid.UUID, Set[str]]:
+        """Zones each order picks from, from the same bin resolution picklists use."""
+        zones: Dict[uuid.UUID, Set[str]] = defaultdict(set)
+        if not orders:
+            return zones
+        for stop in await self.picklists._plan_stops(warehouse_id, orders):
+            if stop.location.zone_code:
+                for order, _ in stop.lines:
+                    zones[order.id].add(stop.location.zone_code)
+        return zones
+
+    def _cut_waves(
+        self,
+        warehouse_id: uuid.UUID,
+        carrier: Optional[str],
+        cutoff_at: datetime,
+        orders: List[Order],
+        zones: Dict[uuid.UUID, Set[str]],
+        capacity: int,
+    ) -> List[WavePlan]:
+        """Split SLA-ordered orders into balanced waves with high zone overlap."""
+        total_lines = sum(len(order.items) for order in orders)
+        target = ceil(total_lines / max(1, ceil(total_lines / capacity)))
+
+        remaining = list(orders)
+        plans = []
+        while remaining:
+            seed = remaining.pop(0)
+            plan = WavePlan(warehouse_id=warehouse_id, carrier=carrier, cutoff_at=cutoff_at)
+            plan.add(seed, zones.get(seed.id, set()))
+
+            while plan.lines < target and remaining:
+                best = None
+                for index, order in enumerate(remaining[:self.LOOKAHEAD_ORDERS]):
+                    if plan.lines + len(order.items) > target:
+                        continue
+                    order_zones = zones.get(order.id, set())
+                    overlap = len(order_zones & plan.zone_codes) / len(order_zones) if order_zones else 1.0
+                    if best is None or overlap > best[0]:
+                        best = (overlap, index)
+                        if overlap == 1.0:
+                            break
+                if best is None:
+                    break
+                order = remaining.pop(best[1])
+                plan.add(order, zones.get(order.id, set()))
+            plans.append(plan)
+        return plans
+
+    # ==================== RELEASE ====================
+
+    async def release_waves(
+        self,
+        plans: List[WavePlan],
+        created_by: Optional[uuid.UUID] = None,
+    ) -> List[Tuple[PickWave, List[Picklist]]]:
+        """
+        Create a wave row for each plan, create its picklists (one per zone)
+        and reserve their batch-managed items FEFO, recording each reservation
+        as a PickWaveAllocation. Commits once, so the orders plan_waves locked
+        stay locked until every wave is released.
+        """
+        cutoff_rank = {cutoff: rank for rank, cutoff in enumerate(sorted({p.cutoff_at for p in plans}), start=1)}
+        # One batch index per warehouse: each wave allocates from what the earlier ones left
+        demand_by_warehouse: Dict[uuid.UUID, Set[uuid.UUID]] = defaultdict(set)
+        for plan in plans:
+            demand_by_warehouse[plan.warehouse_id] |= set(plan.batch_demand)
+        indexes = {
+            wh_id: await self.batches.load_index(wh_id, products, "FEFO")
+            for wh_id, products in demand_by_warehouse.items()
+            if products
+        }
+        released = []
+        for plan in plans:
+            wave = PickWave(
+                wave_number=await self.generate_wave_number(),
+                warehouse_id=plan.warehouse_id,
+                status=WaveStatus.RELEASED.value,
+                carrier=plan.carrier,
+                cutoff_at=plan.cutoff_at,
+                zone_codes=",".join(sorted(plan.zone_codes)) or None,
+                total_orders=len(plan.orders),
+                total_lines=plan.lines,
+                total_quantity=plan.quantity,
+                picker_count=plan.picker_count,
+                released_at=datetime.now(timezone.utc),
+            )
+            self.db.add(wave)
+            await self.db.flush()
+
+            request = PicklistGenerateRequest(
+                warehouse_id=plan.warehouse_id,
+                order_ids=[order.id for order in plan.orders],
+                picklist_type=PicklistType.WAVE,
+                priority=min(10, cutoff_rank[plan.cutoff_at]),
+                notes=f"Wave {wave.wave_number}",
+            )
+            picklists = await self.picklists._create_picklists(
+                request, created_by, wave.id, by_zone=len(plan.zone_codes) > 1
+            )
+            if plan.batch_demand:
+                await self._reserve_wave_batches(wave, picklists, indexes[plan.warehouse_id], plan.batch_demand)
+            released.append((wave, picklists))
+
+        await self.db.commit()
+        for wave, picklists in released:
+            await self.db.refresh(wave)
+            for picklist in picklists:
+                await self.db.refresh(picklist)
+        return released
+
+    async def _reserve_wave_batches(
+        self,
+        wave: PickWave,
+        picklists: List[Picklist],
+        index,
+        batch_demand: Dict[uuid.UUID, int],
+    ) -> None:
+        """Reserve the wave's batch-managed picklist items and record the allocations."""
+        allocations, _ = index.allocate_lines(
+            (item, item.product_id, item.quantity_required)
+            for picklist in picklists
+            for item in picklist.items
+            if item.product_id in batch_demand
+        )
+        await self.batches.reserve_allocations(allocations)
+        self.db.add_all(
+            PickWaveAllocation(
+                wave_id=wave.id,
+                picklist_id=allocation.line_id.picklist_id,
+                picklist_item_id=allocation.line_id.id,
+                batch_id=allocation.batch_id,
+                product_id=allocation.product_id,
+                quantity=allocation.quantity,
+                status=WaveAllocationStatus.RESERVED.value,
+            )
+            for allocation in allocations
+        )
+        await self.db.flush()
+
+    # ==================== SETTLEMENT ====================
+
+    async def settle_picklist(
+        self,
+        picklist: Picklist,
+        user_id: Optional[uuid.UUID] = None,
+    ) -> None:
+        """
+        Settle a completed or cancelled wave picklist's batch reservations:
+        each item's picked quantity is issued from its allocations in FEFO
+        order and the rest is released. Moves the wave to COMPLETED (or
+        CANCELLED when every picklist was cancelled) once all its picklists
+        are settled. Does not commit.
+        """
+        rows = (await self.db.execute(
+            select(PickWaveAllocation, PicklistItem.quantity_picked)
+            .join(PicklistItem, PickWaveAllocation.picklist_item_id == PicklistItem.id)
+            .join(PickWaveAllocation.batch)
+            .options(contains_eager(PickWaveAllocation.batch))
+            .where(
+                PickWaveAllocation.picklist_id == picklist.id,
+                PickWaveAllocation.status == WaveAllocationStatus.RESERVED.value,
+            )
+            .order_by(
+                PickWaveAllocation.picklist_item_id,
+                BatchMaster.expiry_date.asc().nullslast(),
+                BatchMaster.manufacturing_date.asc().nullslast(),
+                BatchMaster.created_at.asc(),
+            )
+        )).all()
+
+        cancelled = picklist.status == PicklistStatus.CANCELLED
+        picked_left: Dict[uuid.UUID, int] = {}
+        issue, release = [], []
+        now = datetime.now(timezone.utc)
+        for allocation, quantity_picked in rows:
+            item_id = allocation.picklist_item_id
+            if item_id not in picked_left:
+                picked_left[item_id] = 0 if cancelled else (quantity_picked or 0)
+            issued = min(allocation.quantity, picked_left[item_id])
+            picked_left[item_id] -= issued
+
+            batch = allocation.batch
+            if issued:
+                issue.append(BatchAllocation(item_id, allocation.product_id, batch, issued))
+            if allocation.quantity > issued:
+                release.append(BatchAllocation(item_id, allocation.product_id, batch, allocation.quantity - issued))
+
+            allocation.quantity_issued = issued
+            allocation.status = (
+                WaveAllocationStatus.ISSUED.value if issued else WaveAllocationStatus.RELEASED.value
+            )
+            allocation.settled_at = now
+
+        await self.batches.issue_allocations(
+            issue, user_id=user_id, reference_type="picklist", reference_id=picklist.id
+        )
+        await self.batches.release_allocations(release)
+
+        if picklist.wave_id:
+            await self._update_wave_status(picklist.wave_id)
+
+    async def _update_wave_status(self, wave_id: uuid.UUID) -> None:
+        statuses = (await self.db.execute(
+            select(Picklist.status).where(Picklist.wave_id == wave_id)
+        )).scalars().all()
+        if not statuses or any(s not in SETTLED_PICKLIST_STATUSES for s in statuses):
+            return
+
+        wave = await self.db.get(PickWave, wave_id)
+        if wave is None or wave.status != WaveStatus.RELEASED:
+            return
+        now = datetime.now(timezone.utc)
+        if all(s == PicklistStatus.CANCELLED for s in statuses):
+            wave.status = WaveStatus.CANCELLED.value
+            wave.cancelled_at = now
+        else:
+            wave.status = WaveStatus.COMPLETED.value
+            wave.completed_at = now
+
+    async def cancel_wave(
+        self,
+        wave_id: uuid.UUID,
+        reason: str,
+        user_id: Optional[uuid.UUID] = None,
+    ) -> PickWave:
+        """
+        Cancel a wave: its open picklists are cancelled (orders back to
+        CONFIRMED, batch reservations released) and the wave is CANCELLED.
+        Picklists already completed keep what they issued.
+        """
+        wave = await self.db.get(PickWave, wave_id)
+        if not wave:
+            raise ValueError("Pick wave not found")
+        if wave.status in [WaveStatus.COMPLETED, WaveStatus.CANCELLED]:
+            raise ValueError(f"Cannot cancel wave in {wave.status} status")
+
+        # Cancelled first, so settling the last picklist does not complete it
+        wave.status = WaveStatus.CANCELLED.value
+        wave.cancelled_at = datetime.now(timezone.utc)
+
+        open_picklists = (await self.db.execute(
+            select(Picklist)
+            .options(selectinload(Picklist.items))
+            .where(
+                Picklist.wave_id == wave_id,
+                Picklist.status.not_in(SETTLED_PICKLIST_STATUSES),
+            )
+        )).scalars().all()
+        for picklist in open_picklists:
+            await self.picklists._cancel(picklist, reason, user_id)
+
+        await self.db.commit()
+        await self.db.refresh(wave)
+        return wave
+
+    async def run(
+        self,
+        warehouse_id: Optional[uuid.UUID] = None,
+        created_by: Optional[uuid.UUID] = None,
+    ) -> List[Tuple[PickWave, List[Picklist]]]:
+        """Plan and release waves for all pending orders."""
+        plans, _ = await self.plan_waves(warehouse_id)
+        return await self.release_waves(plans, created_by)
@@ -1,16 +1,47 @@
 """Service for Warehouse Management System operations."""
-from typing import List, Optional, Tuple
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime, timezone
 import uuid
 
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, update, bindparam, text
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.wms import WarehouseZone, WarehouseBin, PutAwayRule, ZoneType, BinType
+from app import database
+from app.models.wms import (
+    WarehouseZone, WarehouseBin, PutAwayRule, PutAwayTask, PutAwayTaskStatus, ZoneType, BinType,
+)
 from app.models.inventory import StockItem, StockItemStatus
 from app.models.product import Product
+from app.models.purchase import GoodsReceiptNote, GRNItem
 from app.schemas.wms import ZoneCreate, ZoneUpdate, BinCreate, BinUpdate, PutAwayRuleCreate
+from app.services.putaway_planner import (
+    BinOccupancy,
+    PutAwayProduct,
+    candidate_bins,
+    match_rule,
+    plan_putaway,
+)
+
+
+# Stock item statuses that occupy a bin
+IN_BIN_STATUSES = [StockItemStatus.AVAILABLE, StockItemStatus.RESERVED, StockItemStatus.ALLOCATED]
+
+# Advisory lock name prefix (+ warehouse id) serializing putaway planning
+PUTAWAY_PLAN_LOCK_PREFIX = "putaway_plan:"
+
+
+@dataclass
+class GRNPutAwayPlan:
+    """Saved putaway tasks for a GRN and the quantity that found no bin."""
+    grn_id: uuid.UUID
+    grn_number: str
+    warehouse_id: uuid.UUID
+    tasks: List[PutAwayTask] = field(default_factory=list)
+    bin_codes: Dict[uuid.UUID, str] = field(default_factory=dict)
+    unassigned: Dict[uuid.UUID, int] = field(default_factory=dict)
 
 
 class WMSService:
@@ -303,76 +334,52 @@ class WMSService:
         await self.db.refresh(rule)
         return rule
 
-    async def suggest_bin(
+    async def suggest_putaway(
         self,
         warehouse_id: uuid.UUID,
         product_id: uuid.UUID,
-        quantity: int = 1
-    ) -> List[WarehouseBin]:
-        """Suggest bins for putaway based on rules."""
-        # Get product details
-        stmt = select(Product).where(Product.id == product_id)
-        result = await self.db.execute(stmt)
-        product = result.scalar_one_or_none()
-
+        quantity: int = 1,
+        limit: int = 5
+    ) -> Tuple[List[WarehouseBin], Optional[PutAwayRule]]:
+        """
+        Suggest bins that can take the whole quantity, with the rule that
+        chose them. Capacity held by planned putaway tasks counts as used.
+        """
+        products = await self._load_putaway_products([product_id])
+        product = products.get(product_id)
         if not product:
             raise ValueError("Product not found")
 
-        # Get matching putaway rules
-        rules = await self.get_putaway_rules(warehouse_id)
-
-        target_zone_id = None
-        bin_pattern = None
-
-        for rule in rules:
-            # Check if rule matches
-            if rule.product_id and rule.product_id == product_id:
-                target_zone_id = rule.target_zone_id
-                bin_pattern = rule.target_bin_pattern
-                break
-            if rule.category_id and rule.category_id == product.category_id:
-                target_zone_id = rule.target_zone_id
-                bin_pattern = rule.target_bin_pattern
-                break
-            if rule.brand_id and rule.brand_id == product.brand_id:
-                target_zone_id = rule.target_zone_id
-                bin_pattern = rule.target_bin_pattern
-                break
-            # Default rule (no criteria)
-            if not rule.product_id and not rule.category_id and not rule.brand_id:
-                target_zone_id = rule.target_zone_id
-                bin_pattern = rule.target_bin_pattern
-
-        # Find available bins
+        rule = match_rule(await self.get_putaway_rules(warehouse_id), product)
+        occupancy = await self._load_bin_occupancy(warehouse_id, [product_id])
+
+        bin_ids = []
+        for b in candidate_bins(occupancy, rule, product_id):
+            fit = b.units_that_fit(product.unit_weight_kg)
+            if fit is None or fit >= quantity:
+                bin_ids.append(b.bin_id)
+                if len(bin_ids) == limit:
+                    break
+        if not bin_ids:
+            return [], rule
+
         stmt = (
             select(WarehouseBin)
             .options(selectinload(WarehouseBin.zone))
-            .where(
-                WarehouseBin.warehouse_id == warehouse_id,
-                WarehouseBin.is_active == True,
-                WarehouseBin.is_reserved == False,
-                WarehouseBin.is_receivable == True
-            )
-            .order_by(WarehouseBin.pick_sequence)
-        )
-
-        if target_zone_id:
-            stmt = stmt.where(WarehouseBin.zone_id == target_zone_id)
-
-        if bin_pattern:
-            stmt = stmt.where(WarehouseBin.bin_code.like(bin_pattern.replace("*", "%")))
-
-        # Filter by available capacity
-        stmt = stmt.where(
-            or_(
-                WarehouseBin.max_capacity.is_(None),
-                WarehouseBin.current_items + quantity <= WarehouseBin.max_capacity
-            )
+            .where(WarehouseBin.id.in_(bin_ids))
         )
+        bins = {b.id: b for b in (await self.db.execute(stmt)).scalars()}
+        return [bins[bin_id] for bin_id in bin_ids], rule
 
-        stmt = stmt.limit(5)
-        result = await self.db.execute(stmt)
-        return list(result.scalars().all())
+    async def suggest_bin(
+        self,
+        warehouse_id: uuid.UUID,
+        product_id: uuid.UUID,
+        quantity: int = 1
+    ) -> List[WarehouseBin]:
+        """Suggest bins for putaway based on rules."""
+        bins, _ = await self.suggest_putaway(warehouse_id, product_id, quantity)
+        return bins
 
     async def execute_putaway(
         self,
@@ -465,3 +472,316 @@ class WMSService:
         await self.db.commit()
         await self.db.refresh(stock_item)
         return stock_item
+
+    # ==================== PUTAWAY PLANNING ====================
+
+    async def _load_putaway_products(
+        self,
+        product_ids: Iterable[uuid.UUID]
+    ) -> Dict[uuid.UUID, PutAwayProduct]:
+        """Rule-matching attributes and unit weight for products, in one query."""
+        stmt = select(
+            Product.id, Product.category_id, Product.brand_id, Product.dead_weight_kg
+        ).where(Product.id.in_(set(product_ids)))
+        return {
+            row.id: PutAwayProduct(
+                product_id=row.id,
+                category_id=row.category_id,
+                brand_id=row.brand_id,
+                unit_weight_kg=float(row.dead_weight_kg or 0),
+            )
+            for row in await self.db.execute(stmt)
+        }
+
+    async def _load_bin_occupancy(
+        self,
+        warehouse_id: uuid.UUID,
+        product_ids: Iterable[uuid.UUID]
+    ) -> List[BinOccupancy]:
+        """
+        Receivable bins of a warehouse with their occupancy: current counts
+        plus capacity held by planned putaway tasks, and which of the given
+        products each bin already holds.
+        """
+        bins_stmt = (
+            select(
+                WarehouseBin.id, WarehouseBin.bin_code, WarehouseBin.zone_id,
+                WarehouseBin.pick_sequence, WarehouseBin.max_capacity, WarehouseBin.max_weight_kg,
+                WarehouseBin.current_items, WarehouseBin.current_weight_kg,
+                WarehouseBin.is_reserved, WarehouseBin.reserved_product_id,
+            )
+            .where(
+                WarehouseBin.warehouse_id == warehouse_id,
+                WarehouseBin.is_active == True,
+                WarehouseBin.is_receivable == True
+            )
+        )
+        bins = {
+            row.id: BinOccupancy(
+                bin_id=row.id,
+                bin_code=row.bin_code,
+                zone_id=row.zone_id,
+                pick_sequence=row.pick_sequence or 0,
+                max_capacity=row.max_capacity,
+                max_weight_kg=row.max_weight_kg,
+                items=row.current_items or 0,
+                weight_kg=row.current_weight_kg or 0.0,
+                is_reserved=bool(row.is_reserved),
+                reserved_product_id=row.reserved_product_id,
+            )
+            for row in await self.db.execute(bins_stmt)
+        }
+
+        held_stmt = (
+            select(
+                PutAwayTask.bin_id,
+                PutAwayTask.product_id,
+                func.sum(PutAwayTask.quantity),
+                func.sum(PutAwayTask.weight_kg),
+            )
+            .where(
+                PutAwayTask.warehouse_id == warehouse_id,
+                PutAwayTask.status == PutAwayTaskStatus.PLANNED.value
+            )
+            .group_by(PutAwayTask.bin_id, PutAwayTask.product_id)
+        )
+        for bin_id, product_id, quantity, weight in await self.db.execute(held_stmt):
+            if bin_id in bins:
+                bins[bin_id].add(product_id, int(quantity or 0), float(weight or 0))
+
+        product_ids = set(product_ids)
+        if product_ids:
+            affinity_stmt = (
+                select(StockItem.bin_id, StockItem.product_id)
+                .where(
+                    StockItem.warehouse_id == warehouse_id,
+                    StockItem.product_id.in_(product_ids),
+                    StockItem.bin_id.is_not(None),
+                    StockItem.status.in_(IN_BIN_STATUSES)
+                )
+                .distinct()
+            )
+            for bin_id, product_id in await self.db.execute(affinity_stmt):
+                if bin_id in bins:
+                    bins[bin_id].product_ids.add(product_id)
+
+        return list(bins.values())
+
+    async def plan_grn_putaway(
+        self,
+        grn_id: uuid.UUID,
+        created_by: Optional[uuid.UUID] = None
+    ) -> GRNPutAwayPlan:
+        """
+        Assign bins for every accepted line of a GRN and save the plan.
+
+        Products, rules and bin occupancy are loaded once for the whole GRN
+        and bins are filled in memory, so two lines are never sent to the
+        same nearly-full bin. The saved tasks hold bin capacity until
+        execute_putaway_plan() applies them; planning again replaces the
+        GRN's open tasks.
+
+        The GRN row is locked and plans for one warehouse are serialized
+        (transaction advisory lock) before occupancy is read, so concurrent
+        plans neither fill the same bin twice nor duplicate a GRN's tasks.
+        """
+        stmt = (
+            select(GoodsReceiptNote)
+            .options(selectinload(GoodsReceiptNote.items))
+            .where(GoodsReceiptNote.id == grn_id)
+            .with_for_update(of=GoodsReceiptNote)
+            .execution_options(populate_existing=True)
+        )
+        grn = (await self.db.execute(stmt)).scalar_one_or_none()
+        if not grn:
+            raise ValueError("GRN not found")
+        if grn.put_away_complete:
+            raise ValueError(f"Put-away already completed for GRN {grn.grn_number}")
+        await self._lock_warehouse_putaway(grn.warehouse_id)
+
+        # Re-check under the locks: release capacity held by an earlier plan
+        # for this GRN (including one committed while we waited)
+        planned_ids = (await self.db.execute(
+            select(PutAwayTask.id)
+            .where(
+                PutAwayTask.grn_id == grn.id,
+                PutAwayTask.status == PutAwayTaskStatus.PLANNED.value
+            )
+            .with_for_update()
+        )).scalars().all()
+        if planned_ids:
+            await self.db.execute(
+                update(PutAwayTask)
+                .where(PutAwayTask.id.in_(planned_ids))
+                .values(status=PutAwayTaskStatus.CANCELLED.value)
+            )
+
+        items = [item for item in grn.items if (item.quantity_accepted or 0) > 0]
+        products = await self._load_putaway_products(item.product_id for item in items)
+        rules = await self.get_putaway_rules(grn.warehouse_id)
+        occupancy = await self._load_bin_occupancy(grn.warehouse_id, products)
+
+        lines = [
+            (item.id, products[item.product_id], item.quantity_accepted)
+            for item in items
+            if item.product_id in products
+        ]
+        assignments, unassigned = plan_putaway(lines, occupancy, rules)
+        for item in items:
+            if item.product_id not in products:
+                unassigned[item.id] = item.quantity_accepted
+
+        plan = GRNPutAwayPlan(
+            grn_id=grn.id,
+            grn_number=grn.grn_number,
+            warehouse_id=grn.warehouse_id,
+            unassigned=unassigned,
+        )
+        for assignment in assignments:
+            plan.tasks.append(PutAwayTask(
+                warehouse_id=grn.warehouse_id,
+                grn_id=grn.id,
+                grn_item_id=assignment.line_id,
+                product_id=assignment.product_id,
+                bin_id=assignment.bin.bin_id,
+                rule_id=assignment.rule.id if assignment.rule else None,
+                quantity=assignment.quantity,
+                weight_kg=assignment.weight_kg,
+                status=PutAwayTaskStatus.PLANNED.value,
+                created_by=created_by,
+            ))
+            plan.bin_codes[assignment.bin.bin_id] = assignment.bin.bin_code
+
+        self.db.add_all(plan.tasks)
+        await self.db.commit()
+        return plan
+
+    async def _lock_warehouse_putaway(self, warehouse_id: uuid.UUID) -> None:
+        """Serialize putaway planning per warehouse until the transaction ends."""
+        if database.is_sqlite:
+            return
+        await self.db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:name))"),
+            {"name": f"{PUTAWAY_PLAN_LOCK_PREFIX}{warehouse_id}"}
+        )
+
+    async def execute_putaway_plan(
+        self,
+        grn_id: uuid.UUID
+    ) -> Dict[str, Any]:
+        """
+        Apply a GRN's planned putaway tasks in bulk.
+
+        The GRN's stock items that have no bin yet are assigned to the
+        planned bins with one executemany update, bin counts and weights
+        are incremented in one more, and each GRN line gets the first bin
+        it was planned into. A task whose units are not in stock yet keeps
+        holding the rest of its quantity. Tasks are locked while they are
+        applied, so two executes of one GRN cannot move the same units.
+        """
+        grn = await self.db.get(GoodsReceiptNote, grn_id)
+        if not grn:
+            raise ValueError("GRN not found")
+
+        tasks_stmt = (
+            select(PutAwayTask)
+            .options(selectinload(PutAwayTask.bin))
+            .where(
+                PutAwayTask.grn_id == grn.id,
+                PutAwayTask.status == PutAwayTaskStatus.PLANNED.value
+            )
+            .order_by(PutAwayTask.created_at)
+            # Claim the tasks: a concurrent execute of the same GRN skips them
+            .with_for_update(of=PutAwayTask, skip_locked=True)
+        )
+        tasks = list((await self.db.execute(tasks_stmt)).scalars().all())
+        if not tasks:
+            raise ValueError(f"No planned putaway for GRN {grn.grn_number}")
+
+        units_stmt = (
+            select(StockItem.id, StockItem.product_id)
+            .where(
+                StockItem.warehouse_id == grn.warehouse_id,
+                StockItem.grn_number == grn.grn_number,
+                StockItem.bin_id.is_(None),
+                StockItem.status.in_(IN_BIN_STATUSES)
+            )
+            .order_by(StockItem.received_date, StockItem.id)
+        )
+        units = defaultdict(list)
+        for stock_item_id, product_id in await self.db.execute(units_stmt):
+            units[product_id].append(stock_item_id)
+
+        now = datetime.now(timezone.utc)
+        item_rows, bin_moves, line_bins = [], defaultdict(lambda: [0, 0.0]), {}
+        completed = 0
+        for task in tasks:
+            line_bins.setdefault(task.grn_item_id, task.bin)
+            available = units[task.product_id]
+            moved, units[task.product_id] = available[:task.quantity], available[task.quantity:]
+            if not moved:
+                continue
+
+            item_rows.extend(
+                {"b_id": stock_item_id, "b_bin": task.bin_id, "b_code": task.bin.bin_code}
+                for stock_item_id in moved
+            )
+            weight = (task.weight_kg or 0.0) * len(moved) / task.quantity
+            bin_moves[task.bin_id][0] += len(moved)
+            bin_moves[task.bin_id][1] += weight
+
+            if len(moved) == task.quantity:
+                task.status = PutAwayTaskStatus.COMPLETED.value
+                task.completed_at = now
+                completed += 1
+            else:
+                task.quantity -= len(moved)
+                task.weight_kg = (task.weight_kg or 0.0) - weight
+
+        stock_items = StockItem.__table__
+        if item_rows:
+            await self.db.execute(
+                update(stock_items)
+                .where(stock_items.c.id == bindparam("b_id"))
+                .values(bin_id=bindparam("b_bin"), rack_location=bindparam("b_code"), last_movement_date=now),
+                item_rows,
+            )
+
+        bins = WarehouseBin.__table__
+        if bin_moves:
+            await self.db.execute(
+                update(bins)
+                .where(bins.c.id == bindparam("b_id"))
+                .values(
+                    current_items=func.coalesce(bins.c.current_items, 0) + bindparam("b_items"),
+                    current_weight_kg=func.coalesce(bins.c.current_weight_kg, 0) + bindparam("b_weight"),
+                    last_activity_at=now,
+                ),
+                [
+                    {"b_id": bin_id, "b_items": count, "b_weight": weight}
+                    for bin_id, (count, weight) in bin_moves.items()
+                ],
+            )
+
+        grn_items = GRNItem.__table__
+        await self.db.execute(
+            update(grn_items)
+            .where(grn_items.c.id == bindparam("b_id"), grn_items.c.bin_id.is_(None))
+            .values(bin_id=bindparam("b_bin"), bin_location=bindparam("b_code")),
+            [
+                {"b_id": line_id, "b_bin": bin.id, "b_code": bin.bin_code}
+                for line_id, bin in line_bins.items()
+            ],
+        )
+
+        await self.db.commit()
+
+        return {
+            "grn_id": grn.id,
+            "grn_number": grn.grn_number,
+            "tasks_completed": completed,
+            "units_moved": len(item_rows),
+            "units_pending": sum(
+                task.quantity for task in tasks if task.status == PutAwayTaskStatus.PLANNED.value
+            ),
+        }
@@ -0,0 +1,38 @@
+"""
+Backfill the daily_demand_facts table from order history.
+
+Run once after the daily_demand_facts migration (the nightly job only
+recomputes the trailing DEMAND_FACT_BACKFILL_DAYS days).
+
+Usage:
+    python scripts/backfill_demand_facts.py [--days 730] [--chunk-days 31]
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import async_session_factory
+from app.services.snop.demand_history import DemandHistoryService
+
+
+async def main(days: int, chunk_days: int):
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
+
+    async with async_session_factory() as session:
+        written = await DemandHistoryService(session).backfill(start_date, end_date, chunk_days=chunk_days)
+
+    print(f"Wrote {written} demand facts for {start_date} to {end_date}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--chunk-days", type=int, default=31)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.days, args.chunk_days))
@@ -0,0 +1,160 @@
+"""
+Regression check and benchmark for the vectorized demand statistics.
+
+1. Parity: demand_statistics() / safety_stock_levels() are compared against
+   the per-series Python calculation previously used by
+   DemandPlannerService.calculate_demand_statistics() and
+   SNOPService.calculate_safety_stock() on random sparse daily demand.
+2. Benchmark: statistics + safety stock for an N SKU x warehouse matrix,
+   vectorized vs. the per-series loop.
+
+Usage:
+    python scripts/benchmark_demand_statistics.py [--series 20000] [--days 365]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.snop.demand_statistics import demand_statistics, safety_stock_levels
+
+RTOL = 1e-9
+ATOL = 1e-9
+
+
+def reference_statistics(series, dates):
+    """Per-series statistics over the days with demand (pre-vectorization code path)."""
+    quantities = [q for q in series if q != 0]
+    if not quantities:
+        return None
+
+    n = len(quantities)
+    mean_demand = sum(quantities) / n
+    variance = sum((q - mean_demand) ** 2 for q in quantities) / n
+    std_dev = math.sqrt(variance)
+    cv = std_dev / mean_demand if mean_demand > 0 else 0
+
+    if n > 1:
+        x_mean = (n - 1) / 2
+        numerator = sum((i - x_mean) * (quantities[i] - mean_demand) for i in range(n))
+        denominator = sum((i - x_mean) ** 2 for i in range(n))
+        slope = numerator / denominator if denominator > 0 else 0
+        if slope > mean_demand * 0.001:
+            trend = "increasing"
+        elif slope < -mean_demand * 0.001:
+            trend = "decreasing"
+        else:
+            trend = "stable"
+    else:
+        trend = "stable"
+
+    months = defaultdict(float)
+    for d, q in zip(dates, series):
+        months[(d.year, d.month)] += q
+    monthly_quantities = [q for q in months.values() if q != 0]
+    if len(monthly_quantities) >= 12:
+        monthly_mean = sum(monthly_quantities) / len(monthly_quantities)
+        monthly_variance = sum((q - monthly_mean) ** 2 for q in monthly_quantities) / len(monthly_quantities)
+        monthly_cv = math.sqrt(monthly_variance) / monthly_mean if monthly_mean > 0 else 0
+        seasonality_detected = monthly_cv > 0.3
+    else:
+        seasonality_detected = False
+
+    safety_stock = 1.65 * std_dev * math.sqrt(14)
+    return {
+        "avg_daily_demand": mean_demand,
+        "demand_std_dev": std_dev,
+        "coefficient_of_variation": cv,
+        "max_demand": max(quantities),
+        "min_demand": min(quantities),
+        "trend": trend,
+        "seasonality_detected": seasonality_detected,
+        "safety_stock": safety_stock,
+        "reorder_point": mean_demand * 14 + safety_stock,
+    }
+
+
+def make_matrix(rng: np.random.Generator, series: int, days: int) -> np.ndarray:
+    """Sparse daily demand with per-series density, level and trend."""
+    density = rng.uniform(0.02, 0.9, size=(series, 1))
+    level = rng.uniform(1, 40, size=(series, 1))
+    trend = rng.uniform(-0.05, 0.05, size=(series, 1)) * np.arange(days)
+    values = np.maximum(0, np.round(level + trend + rng.normal(0, 3, size=(series, days))))
+    return np.where(rng.random((series, days)) < density, values, 0.0)
+
+
+def run_parity(days: int) -> bool:
+    rng = np.random.default_rng(42)
+    dates = [date.today() - timedelta(days=days - i) for i in range(days + 1)]
+    matrix = make_matrix(rng, 500, len(dates))
+    matrix[:5] = 0  # series without demand
+    matrix[5] = 0
+    matrix[5, 10] = 3  # single data point
+
+    stats = demand_statistics(matrix, dates)
+    levels = safety_stock_levels(stats["avg_daily_demand"], stats["demand_std_dev"])
+
+    mismatches = 0
+    for row, series in enumerate(matrix.tolist()):
+        ref = reference_statistics(series, dates)
+        if ref is None:
+            ok = stats["data_points"][row] == 0
+        else:
+            ok = stats["trend"][row] == ref["trend"] and bool(stats["seasonality_detected"][row]) == ref["seasonality_detected"]
+            for key in ("avg_daily_demand", "demand_std_dev", "coefficient_of_variation", "max_demand", "min_demand"):
+                ok = ok and math.isclose(stats[key][row], ref[key], rel_tol=RTOL, abs_tol=ATOL)
+            for key in ("safety_stock", "reorder_point"):
+                ok = ok and math.isclose(levels[key][row], ref[key], rel_tol=RTOL, abs_tol=ATOL)
+        if not ok:
+            mismatches += 1
+
+    print(f"Parity: {matrix.shape[0] - mismatches}/{matrix.shape[0]} series match")
+    return mismatches == 0
+
+
+def run_benchmark(series: int, days: int) -> None:
+    rng = np.random.default_rng(7)
+    dates = [date.today() - timedelta(days=days - i) for i in range(days + 1)]
+    matrix = make_matrix(rng, series, len(dates))
+
+    start = time.perf_counter()
+    stats = demand_statistics(matrix, dates)
+    safety_stock_levels(stats["avg_daily_demand"], stats["demand_std_dev"])
+    vector_seconds = time.perf_counter() - start
+
+    sample = min(series, 500)
+    start = time.perf_counter()
+    for row in matrix[:sample].tolist():
+        reference_statistics(row, dates)
+    loop_seconds = (time.perf_counter() - start) / sample * series
+
+    print(f"\nBenchmark: {series} SKU x warehouse series x {len(dates)} days")
+    print(f"  vectorized:                            {vector_seconds:8.2f}s")
+    print(f"  per-series loop (extrapolated from {sample}): {loop_seconds:8.2f}s")
+    print(f"  speedup: {loop_seconds / vector_seconds:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    if not run_parity(args.days):
+        print("\nFAILED: vectorized statistics diverge from the per-series calculation")
+        sys.exit(1)
+    print("Parity OK")
+
+    run_benchmark(args.series, args.days)
+
+
+if __name__ == "__main__":
+    main()
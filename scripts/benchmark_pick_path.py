@@ -0,0 +1,196 @@
+"""
+Benchmark for picklist route planning on 500-order waves.
+
+PicklistService._plan_stops() resolves a bin for every SKU on a wave in one
+grouped query and merges the wave's order lines into one stop per bin;
+app.services.pick_path then sequences the stops along the aisles. This
+script builds a synthetic warehouse (zones, aisles, racks, shelves, stock in
+pickable bins) and, for each wave, compares:
+
+- previous: one bin query per order line, picks in order-then-line order
+- S_SHAPE / LARGEST_GAP / AUTO: one query, consolidated stops, walking-model
+  route
+- AUTO + zones: the same, routed zone by zone
+
+Route length is measured on the same walking model for every variant (in
+rack bays, depot at the front of the first aisle).
+
+Usage:
+    python scripts/benchmark_pick_path.py [--orders 500] [--waves 3] [--aisles 24] [--skus 3000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///benchmark.db")
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.models.inventory import StockItem, StockItemStatus
+from app.models.picklist import PickRouting
+from app.models.wms import WarehouseBin, WarehouseZone
+from app.services.pick_path import PickLocation, WalkingModel, sequence_stops
+from app.services.picklist_service import PicklistService
+
+RACKS_PER_AISLE = 30
+SHELVES = 4
+
+
+async def build_warehouse(session, aisles: int, skus: int, rng: random.Random):
+    warehouse_id = uuid.uuid4()
+    zones = [uuid.uuid4() for _ in range(3)]
+    await session.execute(insert(WarehouseZone.__table__), [
+        {"id": zone_id, "warehouse_id": warehouse_id, "zone_code": f"Z{n}", "zone_name": f"Zone {n}",
+         "zone_type": "PICKING", "sort_order": n, "is_active": True, "is_pickable": True}
+        for n, zone_id in enumerate(zones, start=1)
+    ])
+
+    bins, locations = [], {}
+    for aisle in range(1, aisles + 1):
+        zone_index = (aisle - 1) * len(zones) // aisles
+        for rack in range(1, RACKS_PER_AISLE + 1):
+            for shelf in range(1, SHELVES + 1):
+                bin_id = uuid.uuid4()
+                code = f"A{aisle:02d}-R{rack:02d}-S{shelf}"
+                bins.append({
+                    "id": bin_id, "warehouse_id": warehouse_id, "zone_id": zones[zone_index],
+                    "bin_code": code, "aisle": f"A{aisle:02d}", "rack": f"R{rack:02d}", "shelf": f"S{shelf}",
+                    "bin_type": "SHELF", "is_active": True, "is_pickable": True, "is_reserved": False,
+                    "pick_sequence": len(bins), "current_items": 0,
+                })
+                locations[code] = PickLocation(
+                    bin_id=bin_id, bin_code=code, aisle=f"A{aisle:02d}", rack=f"R{rack:02d}",
+                    shelf=f"S{shelf}", pick_sequence=len(bins) - 1,
+                    zone_code=f"Z{zone_index + 1}", zone_order=zone_index + 1,
+                )
+    await session.execute(insert(WarehouseBin.__table__), bins)
+
+    products = [uuid.uuid4() for _ in range(skus)]
+    stock = []
+    for product_id in products:
+        for bin_row in rng.sample(bins, rng.choice((1, 1, 2))):
+            stock.extend(
+                {"id": uuid.uuid4(), "product_id": product_id, "warehouse_id": warehouse_id,
+                 "bin_id": bin_row["id"], "status": StockItemStatus.AVAILABLE.value}
+                for _ in range(rng.randint(5, 15))
+            )
+    await session.execute(insert(StockItem.__table__), stock)
+    await session.commit()
+    return warehouse_id, products, locations
+
+
+def make_wave(products, orders: int, rng: random.Random):
+    # A skewed SKU mix: a fifth of the catalogue takes most of the lines.
+    popular = products[: max(1, len(products) // 5)]
+    wave = []
+    for _ in range(orders):
+        items = [
+            SimpleNamespace(
+                id=uuid.uuid4(),
+                product_id=rng.choice(popular if rng.random() < 0.7 else products),
+                variant_id=None,
+                product_sku=None,
+                quantity=rng.randint(1, 2),
+            )
+            for _ in range(rng.randint(1, 5))
+        ]
+        for item in items:
+            item.product_sku = str(item.product_id)
+        wave.append(SimpleNamespace(id=uuid.uuid4(), items=items))
+    return wave
+
+
+async def previous_route(session, warehouse_id, wave, locations):
+    """One bin lookup per order line, picks in order-then-line order (pre-optimizer path)."""
+    route = []
+    for order in wave:
+        for item in order.items:
+            row = (await session.execute(
+                select(StockItem.rack_location, WarehouseBin.bin_code)
+                .outerjoin(WarehouseBin, StockItem.bin_id == WarehouseBin.id)
+                .where(
+                    StockItem.warehouse_id == warehouse_id,
+                    StockItem.product_id == item.product_id,
+                    StockItem.status == StockItemStatus.AVAILABLE,
+                )
+                .limit(1)
+            )).first()
+            route.append(locations[row[1]])
+    return route
+
+
+async def run(database_url: str, orders: int, waves: int, aisles: int, skus: int):
+    engine = create_async_engine(database_url)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    database.is_sqlite = database_url.startswith("sqlite")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            StockItem.metadata.create_all,
+            tables=[WarehouseZone.__table__, WarehouseBin.__table__, StockItem.__table__],
+        )
+
+    rng = random.Random(47)
+    variants = ("previous", "S_SHAPE", "LARGEST_GAP", "AUTO", "AUTO + zones")
+    try:
+        async with factory() as session:
+            warehouse_id, products, locations = await build_warehouse(session, aisles, skus, rng)
+        model = WalkingModel(locations.values())
+
+        print(f"Warehouse: {aisles} aisles x {RACKS_PER_AISLE} racks x {SHELVES} shelves, {skus:,} SKUs")
+        print(f"Waves of {orders} orders:")
+        print(f"  {'wave':>4} {'lines':>6} {'variant':<20} {'stops':>6} {'route':>9} {'vs prev':>8} {'time':>9}")
+
+        for wave_number in range(1, waves + 1):
+            wave = make_wave(products, orders, rng)
+            lines = sum(len(order.items) for order in wave)
+            async with factory() as session:
+                start = time.perf_counter()
+                previous = await previous_route(session, warehouse_id, wave, locations)
+                results = [("previous", len(previous), model.route_length(previous), time.perf_counter() - start)]
+
+                for variant in variants[1:]:
+                    start = time.perf_counter()
+                    stops = await PicklistService(session)._plan_stops(warehouse_id, wave)
+                    route = sequence_stops(
+                        stops,
+                        PickRouting(variant.split()[0]),
+                        zone_batching=variant.endswith("zones"),
+                    )
+                    seconds = time.perf_counter() - start
+                    results.append((variant, len(route), model.route_length([s.location for s in route]), seconds))
+
+            baseline = results[0][2]
+            for variant, stops, length, seconds in results:
+                print(
+                    f"  {wave_number:>4} {lines:>6} {variant:<20} {stops:>6} {length:>9,.0f} "
+                    f"{length / baseline:>7.0%} {seconds * 1000:>7.0f}ms"
+                )
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--waves", type=int, default=3)
+    parser.add_argument("--aisles", type=int, default=24)
+    parser.add_argument("--skus", type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        asyncio.run(run(f"sqlite+aiosqlite:///{tmp_dir}/pick_path.db", args.orders, args.waves, args.aisles, args.skus))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark for bulk PO serial generation.
+
+SerializationService.generate_serials_for_po() reserves each item's serial
+range, builds row tuples in a tight loop and streams them into po_serials in
+chunks (COPY on PostgreSQL, executemany on SQLite). This script times it at
+10k / 100k / 1M serials against the previous per-unit path (one POSerial ORM
+object per serial, session.add + flush), which is timed on a sample and
+extrapolated.
+
+Range storage (SERIAL_RANGE_STORAGE, one po_serial_ranges row per item) is
+switched off here so the per-row insert path is what gets measured.
+
+By default a temporary SQLite database is used. Pass --database-url to run
+against a scratch PostgreSQL database that has the migrations applied (rows
+are written to po_serials and deleted again afterwards).
+
+Usage:
+    python scripts/benchmark_serial_generation.py [--sizes 10000 100000 1000000]
+    python scripts/benchmark_serial_generation.py --database-url postgresql+psycopg://.../scratch
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///benchmark.db")
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.config import settings
+from app.models.serialization import POSerial, ProductSerialSequence, SerialStatus
+from app.schemas.serialization import GenerateSerialItem, GenerateSerialsRequest
+from app.services.serialization import SerializationService
+
+PER_UNIT_SAMPLE = 20000
+
+
+async def per_unit_insert(session, service, po_id, quantity, model_code):
+    """One ORM object per serial (pre-bulk code path)."""
+    year_code = service.get_year_code()
+    month_code = service.get_month_code()
+    for serial_num in range(1, quantity + 1):
+        barcode = service.generate_barcode("FS", year_code, month_code, model_code, serial_num)
+        session.add(POSerial(
+            id=str(uuid.uuid4()),
+            po_id=po_id,
+            model_code=model_code,
+            item_type="FG",
+            brand_prefix=service.BRAND_PREFIX,
+            supplier_code="FS",
+            year_code=year_code,
+            month_code=month_code,
+            serial_number=serial_num,
+            barcode=barcode,
+            status=SerialStatus.GENERATED.value,
+        ))
+    await session.flush()
+
+
+async def run(database_url: str, sizes):
+    engine = create_async_engine(database_url)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    database.is_sqlite = database_url.startswith("sqlite")
+    settings.SERIAL_RANGE_STORAGE = False
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            POSerial.metadata.create_all,
+            tables=[POSerial.__table__, ProductSerialSequence.__table__],
+        )
+
+    backend = "SQLite executemany" if database.is_sqlite else "PostgreSQL COPY"
+    print(f"Bulk generation ({backend}, chunk {SerializationService.SERIAL_INSERT_CHUNK}):")
+    print(f"  {'serials':>10} {'bulk':>9} {'rows/s':>11} {'per-unit':>10} {'speedup':>8}")
+
+    per_unit_rate = None
+    try:
+        for size in [100, *sizes]:  # first run warms up mappers and statement caches
+            po_id = str(uuid.uuid4())
+            model_code = f"B{len(str(size)):02d}"[:3]
+            async with factory() as session:
+                service = SerializationService(session)
+                start = time.perf_counter()
+                response = await service.generate_serials_for_po(GenerateSerialsRequest(
+                    po_id=po_id, supplier_code="FS",
+                    items=[GenerateSerialItem(model_code=model_code, quantity=size)],
+                ))
+                bulk_seconds = time.perf_counter() - start
+                assert response.total_generated == size
+
+                if per_unit_rate is None:
+                    sample = min(size, PER_UNIT_SAMPLE)
+                    start = time.perf_counter()
+                    await per_unit_insert(session, service, str(uuid.uuid4()), sample, "ZZZ")
+                    per_unit_rate = sample / (time.perf_counter() - start)
+                    await session.rollback()
+
+                await session.execute(delete(POSerial).where(POSerial.po_id == po_id))
+                await session.execute(delete(ProductSerialSequence).where(ProductSerialSequence.model_code == model_code))
+                await session.commit()
+
+            if size == 100:
+                per_unit_rate = None
+                continue
+            per_unit_seconds = size / per_unit_rate
+            print(
+                f"  {size:>10,} {bulk_seconds:>8.2f}s {size / bulk_seconds:>11,.0f} "
+                f"{per_unit_seconds:>9.2f}s {per_unit_seconds / bulk_seconds:>7.1f}x"
+            )
+        print(f"  (per-unit timed on {PER_UNIT_SAMPLE:,} serials and extrapolated)")
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    if args.database_url:
+        asyncio.run(run(args.database_url, args.sizes))
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        asyncio.run(run(f"sqlite+aiosqlite:///{tmp_dir}/serials.db", args.sizes))
+
+
+if __name__ == "__main__":
+    main()
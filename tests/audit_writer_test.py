@@ -0,0 +1,95 @@
+"""
+Batched audit writer tests, on a throwaway SQLite database.
+
+Run:
+    pytest tests/audit_writer_test.py
+"""
+import os
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.models.audit_log import AuditLog
+from app.models.document_sequence import DocumentSequenceAudit
+from app.services import audit_writer as aw
+from app.services.audit_service import AuditService
+
+
+TABLES = [AuditLog.metadata.tables["users"], AuditLog.__table__, DocumentSequenceAudit.__table__]
+
+
+@pytest.fixture
+def run_with_writer(run_on_sqlite, tmp_path):
+    """Run scenario(factory, writer) with the module writer swapped for one on a temp database."""
+    def run(scenario):
+        async def with_writer(factory):
+            writer = aw.AuditWriter(session_factory=factory, spool_path=f"{tmp_path}/spool.jsonl")
+            original, aw.audit_writer = aw.audit_writer, writer
+            aw.start_audit_writer()
+            try:
+                await scenario(factory, writer)
+            finally:
+                await writer.stop()
+                aw.audit_writer = original
+
+        run_on_sqlite(with_writer, TABLES)
+
+    return run
+
+
+async def all_actions(factory):
+    async with factory() as session:
+        return sorted((await session.execute(select(AuditLog.action))).scalars().all())
+
+
+def test_rows_are_written_after_commit_and_dropped_on_rollback(run_with_writer):
+    async def scenario(factory, writer):
+        async with factory() as session:
+            log = await AuditService(session).log("CREATE", "ROLE", new_values={"name": "Ops"})
+            aw.record_audit_row(
+                session, DocumentSequenceAudit,
+                document_type="PO", financial_year="26-27", operation="GET_NEXT", new_number=7,
+            )
+            assert log.id and log.created_at
+            assert writer._buffer == []
+            await session.commit()
+
+        async with factory() as session:
+            await AuditService(session).log("DELETE", "ROLE")
+            await session.rollback()
+
+        assert len(writer._buffer) == 2
+        assert await writer.flush() == 2
+        assert await all_actions(factory) == ["CREATE"]
+        async with factory() as session:
+            numbers = (await session.execute(select(DocumentSequenceAudit.new_number))).scalars().all()
+        assert numbers == [7]
+
+    run_with_writer(scenario)
+
+
+def test_unwritable_rows_are_spooled_and_replayed(run_with_writer):
+    async def scenario(factory, writer):
+        entity_id = uuid.uuid4()
+        async with factory() as session:
+            await AuditService(session).log("LOGIN", "USER", entity_id=entity_id, new_values={"ip": "10.0.0.1"})
+            await session.commit()
+
+        def unavailable():
+            raise ConnectionError("database unavailable")
+
+        writer._session_factory = unavailable
+        await writer.stop()
+        assert os.path.exists(writer.spool_path)
+        assert await all_actions(factory) == []
+
+        writer._session_factory = factory
+        assert await writer.replay_spool() == 1
+        assert not os.path.exists(writer.spool_path)
+        async with factory() as session:
+            [log] = (await session.execute(select(AuditLog))).scalars().all()
+        assert log.entity_id == entity_id
+        assert log.new_values == {"ip": "10.0.0.1"}
+
+    run_with_writer(scenario)
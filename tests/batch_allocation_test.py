@@ -0,0 +1,125 @@
+"""
+Batch allocation tests (FEFO/FIFO availability index, many lines in one
+query, all-or-nothing bulk reserve and issue), on a throwaway SQLite
+database.
+
+Run:
+    pytest tests/batch_allocation_test.py
+"""
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import event, select
+
+from app.models.batch import BatchMaster
+from app.models.inventory import StockMovement
+from app.services.batch_picking_service import BatchPickingService
+
+
+def test_lines_are_allocated_from_one_index_and_applied_in_bulk(run_on_sqlite):
+    async def scenario(factory):
+        warehouse_id, other_warehouse = uuid.uuid4(), uuid.uuid4()
+        spare, filter_ = uuid.uuid4(), uuid.uuid4()
+        today = date.today()
+
+        async with factory() as session:
+            def batch(number, product_id, available, expires=None, made=None, status="UNRESTRICTED", wh=warehouse_id):
+                return BatchMaster(
+                    batch_number=number, product_id=product_id, warehouse_id=wh, batch_status=status,
+                    quantity_available=available, quantity_received=available, unit_cost=Decimal("10"),
+                    expiry_date=today + timedelta(days=expires) if expires is not None else None,
+                    manufacturing_date=today - timedelta(days=made) if made is not None else None,
+                )
+
+            session.add_all([
+                batch("S-LATE", spare, 5, expires=90, made=60),
+                batch("S-SOON", spare, 2, expires=10, made=5),
+                batch("S-NOEXP", spare, 4, made=200),
+                batch("S-GONE", spare, 9, expires=-1, made=400),
+                batch("S-HOLD", spare, 9, expires=1, status="BLOCKED"),
+                batch("S-ELSE", spare, 9, expires=1, wh=other_warehouse),
+                batch("F-1", filter_, 3, expires=30),
+            ])
+            await session.commit()
+
+        async with factory() as session:
+            service = BatchPickingService(session)
+
+            fifo = await service.pick_batches_fifo(spare, warehouse_id, 20)
+            assert [p["batch_number"] for p in fifo] == ["S-NOEXP", "S-LATE", "S-SOON"]
+
+            statements = []
+            sync_engine = session.bind.sync_engine
+            listener = lambda *args: statements.append(args[2])
+            event.listen(sync_engine, "before_cursor_execute", listener)
+            try:
+                allocations, short = await service.allocate_lines(warehouse_id, [
+                    ("o1", spare, 3),
+                    ("o2", filter_, 2),
+                    ("o3", spare, 6),
+                    ("o4", filter_, 2),
+                    ("o5", spare, 4),
+                ])
+            finally:
+                event.remove(sync_engine, "before_cursor_execute", listener)
+
+            assert len(statements) == 1
+            # Earliest expiry first, no-expiry batches last; each line draws down what the previous left.
+            assert [(a.line_id, a.batch.batch_number, a.quantity) for a in allocations] == [
+                ("o1", "S-SOON", 2), ("o1", "S-LATE", 1),
+                ("o2", "F-1", 2),
+                ("o3", "S-LATE", 4), ("o3", "S-NOEXP", 2),
+                ("o4", "F-1", 1),
+                ("o5", "S-NOEXP", 2),
+            ]
+            assert short == {"o4": 1, "o5": 2}
+
+            reserve = [a for a in allocations if a.line_id in ("o1", "o3")]
+            assert await service.reserve_allocations(reserve) == 3
+            await session.commit()
+
+        async with factory() as session:
+            rows = {
+                b.batch_number: (b.quantity_available, b.quantity_reserved)
+                for b in (await session.execute(select(BatchMaster))).scalars()
+            }
+            assert rows["S-SOON"] == (0, 2) and rows["S-LATE"] == (0, 5) and rows["S-NOEXP"] == (2, 2)
+
+            service = BatchPickingService(session)
+            check = await service.check_batch_availability(spare, warehouse_id, 3)
+            assert (check["total_available"], check["shortfall"]) == (2, 1)
+
+            # A stale allocation (3 from S-NOEXP, which has 2 left) reserves nothing, not even F-1's share.
+            stale = [a for a in allocations if a.line_id in ("o2", "o5")]
+            stale[1].quantity = 3
+            try:
+                await service.reserve_allocations(stale)
+                raise AssertionError("stale allocation was reserved")
+            except ValueError:
+                pass
+            f1 = (await session.execute(select(BatchMaster).where(BatchMaster.batch_number == "F-1"))).scalar_one()
+            await session.refresh(f1)
+            assert f1.quantity_reserved == 0
+
+            # Issuing takes the reserved quantity first, then available.
+            index = await service.load_index(warehouse_id, [spare])
+            assert index.available(spare) == 2
+            issue = [a for a in allocations if a.line_id == "o3"]  # S-LATE 4, S-NOEXP 2
+            issue[1].quantity = 3
+            reference = uuid.uuid4()
+            assert await service.issue_allocations(issue, reference_type="order", reference_id=reference) == 2
+            await session.commit()
+
+        async with factory() as session:
+            batches = {b.batch_number: b for b in (await session.execute(select(BatchMaster))).scalars()}
+            late, noexp = batches["S-LATE"], batches["S-NOEXP"]
+            assert (late.quantity_available, late.quantity_reserved, late.quantity_issued) == (0, 1, 4)
+            assert (noexp.quantity_available, noexp.quantity_reserved, noexp.quantity_issued) == (1, 0, 3)
+            assert float(noexp.total_value) == 10.0
+
+            movements = (await session.execute(select(StockMovement))).scalars().all()
+            assert sorted((m.batch_number, m.quantity) for m in movements) == [("S-LATE", -4), ("S-NOEXP", -3)]
+            assert {m.reference_id for m in movements} == {reference}
+
+    run_on_sqlite(scenario, [BatchMaster.__table__, StockMovement.__table__])
@@ -0,0 +1,323 @@
+"""
+Email outbox tests, driven by a local debugging SMTP server.
+
+The debug server (socketserver on 127.0.0.1) speaks enough SMTP for smtplib
+(EHLO, AUTH PLAIN, MAIL/RCPT/DATA, NOOP, RSET, QUIT) and records connections,
+logins and received messages. Recipients can be made to fail permanently
+(550) or transiently (451), and the server can drop a session after N
+messages.
+
+Run:
+    pytest tests/email_outbox_test.py
+"""
+import asyncio
+import email
+import socketserver
+import threading
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.models.email_outbox import EmailOutboxMessage
+from app.services import email_outbox as email_outbox_module
+from app.services.email_outbox import QUEUED_EMAIL_KEY, DeliveryResult, EmailOutbox, SMTPSender, encode_attachments
+from app.services.email_service import EmailService
+
+
+# ==================== Debugging SMTP server ====================
+
+class DebugSMTPState:
+    def __init__(self):
+        self.connections = 0
+        self.logins = 0
+        self.messages = []              # (mail_from, rcpt_to, raw message)
+        self.rejected = {}              # recipient -> (code, text)
+        self.drop_after = None          # close the session after this many messages
+        self.lock = threading.Lock()
+
+
+class DebugSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        state = self.server.state
+        with state.lock:
+            state.connections += 1
+        session_messages = 0
+        mail_from, rcpt_to = None, []
+
+        self.reply("220 debug ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-debug")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "AUTH":
+                with state.lock:
+                    state.logins += 1
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = command.split(":", 1)[1].strip(" <>"), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipient = command.split(":", 1)[1].strip(" <>")
+                if recipient in state.rejected:
+                    code, text = state.rejected[recipient]
+                    self.reply(f"{code} {text}")
+                else:
+                    rcpt_to.append(recipient)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b""):
+                        break
+                    data.append(data_line)
+                with state.lock:
+                    state.messages.append((mail_from, rcpt_to, b"".join(data)))
+                self.reply("250 Queued")
+                session_messages += 1
+                if state.drop_after and session_messages >= state.drop_after:
+                    return
+            elif verb in ("NOOP", "RSET"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), DebugSMTPHandler)
+        self.state = DebugSMTPState()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def make_sender(server: DebugSMTPServer) -> SMTPSender:
+    return SMTPSender("127.0.0.1", server.port, "erp@example.com", "secret", use_tls=False, timeout=5)
+
+
+def make_message(to_email: str, attachments=None) -> EmailOutboxMessage:
+    return EmailOutboxMessage(
+        id=uuid.uuid4(),
+        from_email="erp@example.com",
+        from_name="Aquapurite ERP",
+        to_email=to_email,
+        subject=f"Order update for {to_email}",
+        html_content="<p>Hello</p>",
+        text_content="Hello",
+        attachments=encode_attachments(attachments),
+        attempts=1,
+    )
+
+
+# ==================== Tests ====================
+
+def test_batch_reuses_one_authenticated_session():
+    with DebugSMTPServer() as server:
+        sender = make_sender(server)
+        messages = [make_message(f"customer{i}@example.com") for i in range(25)]
+        results = sender.send_batch(messages)
+        sender.close()
+
+        assert all(r.sent for r in results)
+        assert len(server.state.messages) == 25
+        assert server.state.connections == 1
+        assert server.state.logins == 1
+
+
+def test_attachments_survive_the_outbox_round_trip():
+    with DebugSMTPServer() as server:
+        sender = make_sender(server)
+        payload = b"%PDF-1.4 purchase order"
+        [result] = sender.send_batch([make_message("vendor@example.com", [("PO-1.pdf", payload, "application/pdf")])])
+        sender.close()
+
+        assert result.sent
+        parsed = email.message_from_bytes(server.state.messages[0][2])
+        parts = [p for p in parsed.walk() if p.get_filename() == "PO-1.pdf"]
+        assert parts and parts[0].get_payload(decode=True) == payload
+
+
+def test_dropped_session_reconnects():
+    with DebugSMTPServer() as server:
+        server.state.drop_after = 4
+        sender = make_sender(server)
+        results = sender.send_batch([make_message(f"c{i}@example.com") for i in range(10)])
+        sender.close()
+
+        assert all(r.sent for r in results)
+        assert len(server.state.messages) == 10
+        assert server.state.connections == 3
+
+
+def test_permanent_and_transient_rejections():
+    with DebugSMTPServer() as server:
+        server.state.rejected = {
+            "nobody@example.com": (550, "No such user"),
+            "busy@example.com": (451, "Try again later"),
+        }
+        sender = make_sender(server)
+        ok, permanent, transient = sender.send_batch([
+            make_message("ok@example.com"),
+            make_message("nobody@example.com"),
+            make_message("busy@example.com"),
+        ])
+        sender.close()
+
+        assert ok.sent
+        assert not permanent.sent and permanent.permanent
+        assert not transient.sent and not transient.permanent
+        assert server.state.connections == 1
+
+
+def test_unreachable_server_fails_whole_batch_as_transient():
+    with DebugSMTPServer() as server:
+        port = server.port
+    sender = SMTPSender("127.0.0.1", port, use_tls=False, timeout=2)
+    results = sender.send_batch([make_message(f"c{i}@example.com") for i in range(5)])
+
+    assert len(results) == 5
+    assert all(not r.sent and not r.permanent for r in results)
+
+
+class CapturingSession:
+    def __init__(self):
+        self.executed = []
+
+    async def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+
+    async def commit(self):
+        pass
+
+
+def test_record_schedules_retries_and_failures():
+    outbox = EmailOutbox()
+    messages = [make_message(f"c{i}@example.com") for i in range(4)]
+    messages[2].attempts = 2
+    messages[3].attempts = settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    results = [
+        DeliveryResult(messages[0].id),
+        DeliveryResult(messages[1].id, "SMTPRecipientsRefused", permanent=True),
+        DeliveryResult(messages[2].id, "SMTPServerDisconnected"),
+        DeliveryResult(messages[3].id, "SMTPServerDisconnected"),
+    ]
+    session = CapturingSession()
+    asyncio.run(outbox.record(session, messages, results))
+
+    [(statement, params)] = session.executed
+    by_id = {p["b_id"]: p for p in params}
+    assert by_id[messages[0].id]["b_status"] == "SENT" and by_id[messages[0].id]["b_sent_at"]
+    assert by_id[messages[1].id]["b_status"] == "FAILED"
+    assert by_id[messages[2].id]["b_status"] == "PENDING"
+    retry_delay = by_id[messages[2].id]["b_next_attempt_at"] - by_id[messages[0].id]["b_next_attempt_at"]
+    assert retry_delay.total_seconds() == settings.EMAIL_OUTBOX_RETRY_BACKOFF * 2
+    assert by_id[messages[3].id]["b_status"] == "FAILED"
+
+
+def test_claim_skips_rows_locked_by_other_workers():
+    captured = {}
+
+    class ClaimSession(CapturingSession):
+        async def execute(self, statement, params=None):
+            captured["sql"] = str(statement.compile(dialect=postgresql.dialect()))
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+
+    asyncio.run(EmailOutbox().claim(ClaimSession(), 50))
+    assert "FOR UPDATE SKIP LOCKED" in captured["sql"]
+    assert "RETURNING" in captured["sql"]
+
+
+def test_send_email_queues_on_the_callers_session_when_outbox_runs():
+    class QueueSession:
+        def __init__(self):
+            self.info = {}
+            self.added = []
+
+        def add(self, obj):
+            self.added.append(obj)
+
+    async def scenario():
+        outbox = EmailOutbox()
+        outbox._loop = asyncio.get_running_loop()
+        outbox._wake = asyncio.Event()
+        outbox._task = asyncio.get_running_loop().create_future()   # "running"
+        session = QueueSession()
+
+        service = EmailService(
+            smtp_host="127.0.0.1", smtp_port=1, smtp_user="erp@example.com", smtp_password="secret",
+            use_tls=False, outbox=outbox, session=session,
+        )
+        assert service.send_password_reset_email("user@example.com", "tok", "https://erp/reset?token=tok")
+        [queued] = session.added
+        assert isinstance(queued, EmailOutboxMessage)
+        assert (queued.status, queued.attempts) == ("PENDING", 0)
+        assert queued.email_type == "PASSWORD_RESET"
+        assert queued.to_email == "user@example.com"
+        assert "tok" in queued.html_content
+
+        # Nothing to deliver until the caller commits; the commit wakes the worker.
+        await asyncio.sleep(0)
+        assert not outbox._wake.is_set()
+        original, email_outbox_module.email_outbox = email_outbox_module.email_outbox, outbox
+        try:
+            email_outbox_module._wake_after_commit(session)
+        finally:
+            email_outbox_module.email_outbox = original
+        await asyncio.sleep(0)
+        assert outbox._wake.is_set() and QUEUED_EMAIL_KEY not in session.info
+        outbox._task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_send_async_keeps_inline_smtp_off_the_event_loop():
+    async def scenario():
+        threads = []
+
+        def send(**kwargs):
+            threads.append(threading.get_ident())
+            return True
+
+        inline = EmailService(smtp_user="erp@example.com", smtp_password="secret")
+        assert not inline.queues_to_outbox
+        assert await inline.send_async(send, to_email="user@example.com")
+
+        outbox = EmailOutbox()
+        outbox._task = asyncio.get_running_loop().create_future()   # "running"
+        queued = EmailService(smtp_user="erp@example.com", smtp_password="secret", outbox=outbox, session=object())
+        assert queued.queues_to_outbox
+        assert await queued.send_async(send, to_email="user@example.com")
+        outbox._task.cancel()
+
+        assert threads[0] != threading.get_ident() and threads[1] == threading.get_ident()
+
+    asyncio.run(scenario())
@@ -0,0 +1,93 @@
+"""
+Vectorized S&OP forecaster parity tests: every batch model and the
+ensemble must match the per-series reference implementation in
+EnsembleForecaster on a few synthetic series.
+
+Run:
+    pytest tests/ensemble_forecaster_test.py
+"""
+import asyncio
+import math
+import random
+
+import numpy as np
+
+from app.services.snop.ensemble_forecaster import EnsembleForecaster
+from app.services.snop.vectorized_forecaster import VectorizedForecaster
+
+TOLERANCE = 1e-9
+HORIZON = 14
+
+
+def make_series(rng: random.Random, days: int, kind: str) -> list:
+    base = rng.uniform(5, 50)
+    series = []
+    for i in range(days):
+        if kind == "seasonal":
+            value = base * (1 + 0.3 * math.sin(2 * math.pi * i / 7)) + 0.02 * i + rng.uniform(0, 3)
+        else:
+            value = base + rng.gauss(0, base * 0.2)
+        series.append(max(1.0, round(value, 2)))
+    return series
+
+
+def make_matrix(days: int) -> np.ndarray:
+    rng = random.Random(26)
+    return np.array([make_series(rng, days, kind) for kind in ("smooth", "seasonal", "smooth", "seasonal")])
+
+
+def assert_model_matches(scalar_fn, vector_fn, matrix):
+    vec_forecasts, vec_metrics = vector_fn(matrix)
+    for row, series in enumerate(matrix.tolist()):
+        ref_forecasts, ref_metrics = scalar_fn(series)
+        assert np.allclose(vec_forecasts[row], ref_forecasts, rtol=TOLERANCE, atol=TOLERANCE), row
+        for key, value in ref_metrics.items():
+            assert math.isclose(vec_metrics[key][row], value, rel_tol=TOLERANCE, abs_tol=TOLERANCE), (row, key)
+
+
+def test_batch_models_match_the_reference():
+    reference = EnsembleForecaster(db=None, use_vectorized=False)
+    backend = VectorizedForecaster()
+
+    for days in (90, 20):
+        matrix = make_matrix(days)
+        assert_model_matches(
+            lambda d: reference.holt_winters(d, 7, forecast_periods=HORIZON),
+            lambda m: backend.holt_winters(m, 7, forecast_periods=HORIZON),
+            matrix,
+        )
+        assert_model_matches(
+            lambda d: reference.arima_forecast(d, forecast_periods=HORIZON),
+            lambda m: backend.arima_forecast(m, forecast_periods=HORIZON),
+            matrix,
+        )
+        assert_model_matches(
+            lambda d: reference.prophet_forecast(d, forecast_periods=HORIZON),
+            lambda m: backend.prophet_forecast(m, forecast_periods=HORIZON),
+            matrix,
+        )
+        assert_model_matches(
+            lambda d: reference.gradient_boost_forecast(d, forecast_periods=HORIZON),
+            lambda m: backend.gradient_boost_forecast(m, forecast_periods=HORIZON),
+            matrix,
+        )
+
+
+def test_ensemble_forecast_matches_the_reference():
+    for series in make_matrix(60).tolist():
+        results = []
+        for use_vectorized in (False, True):
+            forecaster = EnsembleForecaster(db=None, use_vectorized=use_vectorized)
+
+            async def history(*args, _series=series, **kwargs):
+                return [{"quantity": q} for q in _series]
+
+            forecaster.demand_planner.get_historical_demand = history
+            results.append(asyncio.run(forecaster.ensemble_forecast(forecast_periods=HORIZON)))
+
+        ref, vec = results
+        assert len(ref["forecasts"]) == len(vec["forecasts"]) == HORIZON
+        for r, v in zip(ref["forecasts"], vec["forecasts"]):
+            for key in ("forecasted_qty", "lower_bound", "upper_bound"):
+                assert abs(r[key] - v[key]) <= 0.01, key
+        assert abs(ref["accuracy_metrics"]["mape"] - vec["accuracy_metrics"]["mape"]) <= 0.01
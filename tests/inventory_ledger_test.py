@@ -0,0 +1,168 @@
+"""
+Inventory ledger tests (append, fold, exact levels, levels by product,
+absolute writes, stock as of), on a throwaway SQLite database.
+
+Run:
+    pytest tests/inventory_ledger_test.py
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func, select
+
+from app.models.channel import ChannelInventory
+from app.models.inventory import InventorySummary
+from app.models.inventory_ledger import InventoryLedgerEntry
+from app.services.channel_inventory_service import ChannelInventoryService
+from app.services.inventory_ledger import InventoryLedgerService
+from app.services.inventory_service import InventoryService
+
+
+TABLES = [InventorySummary.__table__, ChannelInventory.__table__, InventoryLedgerEntry.__table__]
+
+
+def test_summary_changes_are_folded_from_the_ledger(run_on_sqlite):
+    async def scenario(factory):
+        warehouse_id, product_id = uuid.uuid4(), uuid.uuid4()
+        cell = (warehouse_id, product_id, None, None)
+
+        async with factory() as session:
+            service = InventoryService(session)
+            for _ in range(3):
+                await service._update_inventory_summary(warehouse_id, product_id, None, quantity_change=5)
+            await service._update_inventory_summary(
+                warehouse_id, product_id, None, available_change=-2, allocated_change=2,
+            )
+            await session.commit()
+
+            ledger = InventoryLedgerService(session)
+            assert await session.scalar(select(func.count()).select_from(InventorySummary)) == 0
+            levels = (await ledger.levels([cell]))[cell]
+            assert (levels["total_quantity"], levels["available_quantity"], levels["allocated_quantity"]) == (15, 13, 2)
+
+            assert await ledger.fold(batch_size=3) == 3
+            assert await ledger.fold_all() == 1
+            summary = (await session.execute(select(InventorySummary))).scalar_one()
+            assert (summary.total_quantity, summary.available_quantity, summary.allocated_quantity) == (15, 13, 2)
+            assert summary.last_stock_in_date is not None and summary.last_stock_out_date is None
+            assert (await ledger.levels([cell]))[cell] == levels
+
+            await service._update_inventory_summary(warehouse_id, product_id, None, quantity_change=-4)
+            await session.commit()
+            await ledger.fold()
+            await session.refresh(summary)
+            assert (summary.total_quantity, summary.available_quantity) == (11, 13)
+            assert summary.last_stock_out_date is not None
+
+    run_on_sqlite(scenario, TABLES)
+
+
+def test_stock_as_of_replays_later_entries(run_on_sqlite):
+    async def scenario(factory):
+        warehouse_id, product_id = uuid.uuid4(), uuid.uuid4()
+        now = datetime.now(timezone.utc)
+        async with factory() as session:
+            ledger = InventoryLedgerService(session)
+            for hours_ago, quantity in ((30, 10), (20, -3), (10, 5)):
+                entry = ledger.record(warehouse_id, product_id, source="test", total=quantity, available=quantity)
+                entry.occurred_at = now - timedelta(hours=hours_ago)
+            await session.commit()
+            await ledger.fold()
+            ledger.record(warehouse_id, product_id, source="test", total=-1, available=-1)
+            await session.commit()
+
+            async def total_at(hours_ago):
+                levels = await ledger.stock_as_of(warehouse_id, product_id, now - timedelta(hours=hours_ago))
+                return levels["total_quantity"]
+
+            assert [await total_at(h) for h in (40, 25, 15, 5)] == [0, 10, 7, 12]
+            assert (await ledger.stock_as_of(warehouse_id, product_id, now + timedelta(hours=1)))["total_quantity"] == 11
+
+    run_on_sqlite(scenario, TABLES)
+
+
+def test_channel_allocation_goes_through_the_ledger(run_on_sqlite):
+    async def scenario(factory):
+        channel_id, warehouse_id, product_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        async with factory() as session:
+            InventoryLedgerService(session).record(
+                warehouse_id, product_id, source="grn", total=20, available=20,
+            )
+            await session.commit()
+
+            service = ChannelInventoryService(session)
+            allocated = await service.allocate_to_channel(channel_id, warehouse_id, product_id, 12, buffer_quantity=2)
+            assert allocated["success"] and allocated["allocated_quantity"] == 12
+            assert allocated["available_quantity"] == 10
+            again = await service.allocate_to_channel(channel_id, warehouse_id, product_id, 10)
+            assert not again["success"] and again["available_in_main_pool"] == 8
+
+            row = (await session.execute(select(ChannelInventory))).scalar_one()
+            assert row.allocated_quantity == 0
+
+            await service._increment_channel_reserved(channel_id, product_id, 3)
+            too_much = await service.deallocate_from_channel(channel_id, warehouse_id, product_id, 8)
+            assert too_much["max_deallocatable"] == 7
+            done = await service.deallocate_from_channel(channel_id, warehouse_id, product_id, 7)
+            assert done["remaining_allocated"] == 5
+
+            assert await InventoryLedgerService(session).fold_all() == 4
+            await session.refresh(row)
+            assert (row.allocated_quantity, row.reserved_quantity, row.buffer_quantity) == (5, 3, 2)
+            assert await session.scalar(select(func.count()).select_from(ChannelInventory)) == 1
+
+    run_on_sqlite(scenario, TABLES)
+
+
+def test_product_levels_and_absolute_writes_include_pending_entries(run_on_sqlite):
+    async def scenario(factory):
+        channel_id, product_id = uuid.uuid4(), uuid.uuid4()
+        folded_wh, pending_wh = uuid.uuid4(), uuid.uuid4()
+        folded, pending = (folded_wh, product_id, None, None), (pending_wh, product_id, None, None)
+        async with factory() as session:
+            ledger = InventoryLedgerService(session)
+            ledger.record(folded_wh, product_id, source="grn", total=10, available=10)
+            await session.commit()
+            await ledger.fold()
+            ledger.record(folded_wh, product_id, source="order", available=-3, reserved=3)
+            ledger.record(pending_wh, product_id, source="grn", total=4, available=4)
+            await session.commit()
+
+            # Rows and pending entries are read in one statement (one snapshot).
+            statements = []
+            sync_engine = session.bind.sync_engine
+            listener = lambda *args: statements.append(args[2])
+            event.listen(sync_engine, "before_cursor_execute", listener)
+            try:
+                levels = await ledger.product_levels([product_id], flush=False)
+                exact = await ledger.levels([folded, pending], flush=False)
+            finally:
+                event.remove(sync_engine, "before_cursor_execute", listener)
+            assert len(statements) == 2
+            assert {cell: level["available_quantity"] for cell, level in levels.items()} == {folded: 7, pending: 4}
+            assert exact == levels
+            assert list(await ledger.product_levels([product_id], warehouse_id=pending_wh)) == [pending]
+
+            entry = await ledger.set_levels(
+                folded, source="sync", total_quantity=8, available_quantity=8, reserved_quantity=0,
+            )
+            assert (entry.total_delta, entry.available_delta, entry.reserved_delta) == (-2, 1, -3)
+            assert await ledger.set_levels(folded, source="sync", total_quantity=8, available_quantity=8) is None
+            await session.commit()
+
+            await ChannelInventoryService(session).allocate_to_channel(
+                channel_id, pending_wh, product_id, 3, buffer_quantity=1,
+            )
+            await session.commit()
+            channel = await ledger.product_levels([product_id], channel_id=channel_id)
+            cell = (pending_wh, product_id, None, channel_id)
+            assert list(channel) == [cell]
+            assert (channel[cell]["allocated_quantity"], channel[cell]["buffer_quantity"]) == (3, 1)
+
+            await ledger.fold_all()
+            summary = (await session.execute(
+                select(InventorySummary).where(InventorySummary.warehouse_id == folded_wh)
+            )).scalar_one()
+            assert (summary.total_quantity, summary.available_quantity, summary.reserved_quantity) == (8, 8, 0)
+
+    run_on_sqlite(scenario, TABLES)
@@ -0,0 +1,87 @@
+"""
+Bulk stock receipt tests, on a throwaway SQLite database.
+
+Run:
+    pytest tests/inventory_receipt_test.py
+"""
+import uuid
+
+from sqlalchemy import event, func, select
+
+from app.models.inventory import InventorySummary, StockItem, StockMovement
+from app.models.inventory_ledger import InventoryLedgerEntry
+from app.services.inventory_ledger import InventoryLedgerService
+from app.services.inventory_service import InventoryService
+
+
+TABLES = [
+    StockItem.__table__, InventorySummary.__table__, StockMovement.__table__, InventoryLedgerEntry.__table__,
+]
+
+
+def test_bulk_receipt_writes_in_fixed_statements(run_on_sqlite):
+    async def scenario(factory):
+        warehouse_id, plain, variant_product, variant = (uuid.uuid4() for _ in range(4))
+        async with factory() as session:
+            session.add(InventorySummary(
+                warehouse_id=warehouse_id, product_id=plain, variant_id=None,
+                total_quantity=10, available_quantity=8, reserved_quantity=2,
+            ))
+            await session.commit()
+
+        lines = [
+            {"product_id": plain, "quantity": 3, "purchase_price": 100},
+            {"product_id": plain, "quantity": 2, "serial_numbers": ["SN-1", "SN-2"]},
+            *({"product_id": variant_product, "variant_id": variant, "quantity": 1} for _ in range(300)),
+        ]
+        async with factory() as session:
+            statements = []
+            sync_engine = session.bind.sync_engine
+            listener = lambda *args: statements.append(args[2])
+            event.listen(sync_engine, "before_cursor_execute", listener)
+            try:
+                created = await InventoryService(session).bulk_receive_stock(
+                    warehouse_id=warehouse_id, grn_number="GRN-1", items=lines,
+                )
+            finally:
+                event.remove(sync_engine, "before_cursor_execute", listener)
+
+        assert created == 305
+        # stock items, current levels (summaries + pending, one statement), ledger entries, movement numbers, movements
+        assert len(statements) == 5
+
+        async with factory() as session:
+            assert await InventoryLedgerService(session).fold() == 302
+
+            summaries = {
+                (s.product_id, s.variant_id): s
+                for s in (await session.execute(select(InventorySummary))).scalars()
+            }
+            assert len(summaries) == 2
+            assert (summaries[(plain, None)].total_quantity, summaries[(plain, None)].available_quantity) == (15, 13)
+            assert summaries[(variant_product, variant)].total_quantity == 300
+            assert summaries[(variant_product, variant)].reorder_level == 10
+            assert (summaries[(plain, None)].total_value, summaries[(plain, None)].average_cost) == (300, 20)
+
+            serials = await session.scalars(select(StockItem.serial_number).where(StockItem.serial_number.isnot(None)))
+            assert sorted(serials) == ["SN-1", "SN-2"]
+
+            movements = (await session.execute(
+                select(StockMovement).order_by(StockMovement.movement_number)
+            )).scalars().all()
+            assert len({m.movement_number for m in movements}) == 302
+            assert [(m.balance_before, m.balance_after) for m in movements[:2]] == [(10, 13), (13, 15)]
+            assert (movements[-1].balance_before, movements[-1].balance_after) == (299, 300)
+            assert movements[0].total_cost == 300
+
+        async with factory() as session:
+            await InventoryService(session).bulk_receive_stock(
+                warehouse_id=warehouse_id, grn_number="GRN-2", items=[{"product_id": plain, "quantity": 4}],
+            )
+            await InventoryLedgerService(session).fold()
+            assert await session.scalar(
+                select(InventorySummary.total_quantity).where(InventorySummary.product_id == plain)
+            ) == 19
+            assert await session.scalar(select(func.count()).select_from(StockMovement)) == 303
+
+    run_on_sqlite(scenario, TABLES)
@@ -0,0 +1,122 @@
+"""
+Pick path tests (walking-model routing, zone batching, bin resolution and
+cross-order consolidation), on a throwaway SQLite database.
+
+Run:
+    pytest tests/pick_path_test.py
+"""
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import event
+
+from app.models.inventory import StockItem
+from app.models.picklist import PickRouting
+from app.models.wms import WarehouseBin, WarehouseZone
+from app.services.pick_path import PickLocation, PickStop, WalkingModel, sequence_locations, sequence_stops
+from app.services.picklist_service import PicklistService
+
+
+def bin_at(aisle, rack, zone="A", zone_order=0):
+    return PickLocation(
+        bin_id=uuid.uuid4(), bin_code=f"{aisle}-{rack}", aisle=str(aisle), rack=str(rack),
+        zone_code=zone, zone_order=zone_order,
+    )
+
+
+def test_routes_follow_the_aisles():
+    bins = [bin_at(1, 2), bin_at(1, 8), bin_at(2, 1), bin_at(2, 9), bin_at(3, 3), bin_at(3, 7)]
+    model = WalkingModel(bins)
+
+    s_shape = sequence_locations(reversed(bins), PickRouting.S_SHAPE)
+    assert [b.bin_code for b in s_shape] == ["1-2", "1-8", "2-9", "2-1", "3-3", "3-7"]
+
+    largest_gap = sequence_locations(reversed(bins), PickRouting.LARGEST_GAP)
+    # Aisle 2's largest gap is between racks 1 and 9: 9 from the back, 1 from the front.
+    assert [b.bin_code for b in largest_gap] == ["1-2", "1-8", "2-9", "3-7", "3-3", "2-1"]
+
+    naive = [bins[i] for i in (4, 0, 3, 2, 5, 1)]
+    assert model.route_length(largest_gap) <= model.route_length(s_shape) < model.route_length(naive)
+    assert model.route_length(sequence_locations(bins, PickRouting.AUTO)) == model.route_length(largest_gap)
+
+
+def test_unplaced_bins_are_picked_last_by_pick_sequence():
+    legacy = PickLocation(bin_id=None, bin_code="RACK-7")
+    numbered = PickLocation(bin_id=uuid.uuid4(), bin_code="FLOOR", pick_sequence=1)
+    placed = bin_at(4, 5)
+    route = sequence_locations([legacy, numbered, placed])
+    assert route == [placed, numbered, legacy]
+
+
+def test_zone_batching_routes_each_zone_in_sort_order():
+    stops = [
+        PickStop(bin_at(1, 1, zone="BULK", zone_order=2)),
+        PickStop(bin_at(2, 5, zone="FAST", zone_order=1)),
+        PickStop(bin_at(1, 3, zone="FAST", zone_order=1)),
+    ]
+    route = sequence_stops(stops, zone_batching=True)
+    assert [s.location.bin_code for s in route] == ["1-3", "2-5", "1-1"]
+
+
+def test_bins_are_resolved_in_one_query_and_skus_consolidated(run_on_sqlite):
+    async def scenario(factory):
+        warehouse_id, zone_id = uuid.uuid4(), uuid.uuid4()
+        filter_sku, pump_sku, unknown_sku = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        async with factory() as session:
+            session.add(WarehouseZone(
+                id=zone_id, warehouse_id=warehouse_id, zone_code="PICK", zone_name="Pick", zone_type="PICKING",
+            ))
+            bins = {
+                code: WarehouseBin(
+                    warehouse_id=warehouse_id, zone_id=zone_id, bin_code=code, aisle=aisle, rack=rack,
+                    is_pickable=pickable, pick_sequence=sequence, bin_type="SHELF",
+                )
+                for code, aisle, rack, pickable, sequence in (
+                    ("A-01", "A", "01", True, 1),
+                    ("A-02", "A", "02", True, 2),
+                    ("B-05", "B", "05", True, 3),
+                    ("RES-1", "Z", "01", False, 0),
+                )
+            }
+            session.add_all(bins.values())
+            await session.flush()
+
+            def stock(product_id, bin_code, units):
+                return [
+                    StockItem(product_id=product_id, warehouse_id=warehouse_id, bin_id=bins[bin_code].id)
+                    for _ in range(units)
+                ]
+
+            # A-01 is first in sequence but too small for both orders; reserve stock is never picked.
+            session.add_all(stock(filter_sku, "A-01", 1) + stock(filter_sku, "B-05", 5) + stock(filter_sku, "RES-1", 50))
+            session.add_all(stock(pump_sku, "A-02", 2))
+            await session.commit()
+
+            def order(*lines):
+                items = [
+                    SimpleNamespace(id=uuid.uuid4(), product_id=p, variant_id=None, product_sku=sku, quantity=q)
+                    for p, sku, q in lines
+                ]
+                return SimpleNamespace(id=uuid.uuid4(), items=items)
+
+            orders = [
+                order((filter_sku, "FLT", 2), (pump_sku, "PMP", 1)),
+                order((unknown_sku, "NEW", 1), (filter_sku, "FLT", 1)),
+            ]
+
+            statements = []
+            sync_engine = session.bind.sync_engine
+            listener = lambda *args: statements.append(args[2])
+            event.listen(sync_engine, "before_cursor_execute", listener)
+            try:
+                stops = await PicklistService(session)._plan_stops(warehouse_id, orders)
+            finally:
+                event.remove(sync_engine, "before_cursor_execute", listener)
+
+        assert len(statements) == 1
+        route = sequence_stops(stops)
+        assert [s.location.bin_code for s in route] == ["A-02", "B-05", None]
+        assert [len(s.lines) for s in route] == [1, 2, 1]
+        assert route[0].location.zone_code == "PICK"
+
+    run_on_sqlite(scenario, [WarehouseZone.__table__, WarehouseBin.__table__, StockItem.__table__])
@@ -0,0 +1,183 @@
+"""
+Putaway planning tests (rule matching, SKU affinity, capacity and weight
+limits shared across GRN lines, held capacity, bulk execution), on a
+throwaway SQLite database.
+
+Run:
+    pytest tests/putaway_planner_test.py
+"""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import event, select
+
+from app.models.inventory import StockItem
+from app.models.product import Product
+from app.models.purchase import GoodsReceiptNote, GRNItem
+from app.models.wms import PutAwayRule, PutAwayTask, PutAwayTaskStatus, WarehouseBin, WarehouseZone
+from app.services.putaway_planner import BinOccupancy, PutAwayProduct, match_rule
+from app.services.wms_service import WMSService
+
+TABLES = [
+    Product.__table__, GoodsReceiptNote.__table__, GRNItem.__table__, WarehouseZone.__table__,
+    WarehouseBin.__table__, PutAwayRule.__table__, PutAwayTask.__table__, StockItem.__table__,
+]
+
+
+def test_rules_match_specific_criteria_before_the_default():
+    category, brand = uuid.uuid4(), uuid.uuid4()
+
+    def rule(name, **criteria):
+        return PutAwayRule(rule_name=name, target_zone_id=uuid.uuid4(), **criteria)
+
+    rules = [rule("default"), rule("brand", brand_id=brand), rule("category", category_id=category)]
+    assert match_rule(rules, PutAwayProduct(uuid.uuid4(), category, brand)).rule_name == "brand"
+    assert match_rule(rules, PutAwayProduct(uuid.uuid4(), category)).rule_name == "category"
+    assert match_rule(rules, PutAwayProduct(uuid.uuid4())).rule_name == "default"
+    assert match_rule([], PutAwayProduct(uuid.uuid4())) is None
+
+
+def test_bin_room_is_limited_by_units_and_weight():
+    bin_ = BinOccupancy(bin_id=uuid.uuid4(), bin_code="A-1", max_capacity=10, max_weight_kg=20.0, items=4, weight_kg=8.0)
+    assert bin_.units_that_fit() == 6
+    assert bin_.units_that_fit(5.0) == 2
+    assert BinOccupancy(bin_id=uuid.uuid4(), bin_code="FLOOR").units_that_fit(5.0) is None
+
+
+def test_grn_is_planned_in_memory_and_executed_in_bulk(run_on_sqlite):
+    async def scenario(factory):
+        warehouse_id, category, other_category = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        grn_id = uuid.uuid4()
+
+        async with factory() as session:
+            fast = WarehouseZone(warehouse_id=warehouse_id, zone_code="FAST", zone_name="Fast", zone_type="STORAGE")
+            bulk = WarehouseZone(warehouse_id=warehouse_id, zone_code="BULK", zone_name="Bulk", zone_type="STORAGE")
+            session.add_all([fast, bulk])
+            await session.flush()
+
+            products = {}
+            for sku, category_id, weight in (("A", category, "2"), ("B", category, "5"), ("D", other_category, None)):
+                product = Product(
+                    name=sku, slug=sku.lower(), sku=sku, category_id=category_id, brand_id=uuid.uuid4(),
+                    mrp=Decimal("100"), dead_weight_kg=Decimal(weight) if weight else None,
+                )
+                session.add(product)
+                products[sku] = product
+            await session.flush()
+
+            bins = {
+                code: WarehouseBin(warehouse_id=warehouse_id, zone_id=zone.id, bin_code=code, pick_sequence=seq, **kwargs)
+                for code, zone, seq, kwargs in (
+                    ("F-1", fast, 1, {"max_capacity": 5, "current_items": 3}),
+                    ("F-2", fast, 2, {"max_capacity": 10, "max_weight_kg": 20.0}),
+                    ("F-3", fast, 0, {"is_reserved": True, "reserved_product_id": uuid.uuid4()}),
+                    ("X-1", fast, 0, {}),
+                    ("B-1", bulk, 1, {}),
+                )
+            }
+            session.add_all(bins.values())
+            await session.flush()
+
+            # F-1 already holds A, so A goes there first.
+            session.add_all(
+                StockItem(product_id=products["A"].id, warehouse_id=warehouse_id, bin_id=bins["F-1"].id)
+                for _ in range(3)
+            )
+            session.add_all([
+                PutAwayRule(
+                    warehouse_id=warehouse_id, rule_name="Default", target_zone_id=bulk.id, priority=100,
+                ),
+                PutAwayRule(
+                    warehouse_id=warehouse_id, rule_name="Fast movers", category_id=category,
+                    target_zone_id=fast.id, target_bin_pattern="F-*", priority=10,
+                ),
+            ])
+
+            session.add(GoodsReceiptNote(
+                id=grn_id, grn_number="GRN-49", grn_date=date.today(), status="ACCEPTED", grn_type="PO",
+                purchase_order_id=uuid.uuid4(), vendor_id=uuid.uuid4(), warehouse_id=warehouse_id,
+                received_by=uuid.uuid4(),
+            ))
+            lines = {}
+            for sku, quantity in (("A", 6), ("B", 5), ("D", 3)):
+                item = GRNItem(
+                    grn_id=grn_id, po_item_id=uuid.uuid4(), product_id=products[sku].id, product_name=sku,
+                    sku=sku, quantity_expected=quantity, quantity_received=quantity,
+                    quantity_accepted=quantity, unit_price=Decimal("10"),
+                )
+                session.add(item)
+                lines[sku] = item
+            await session.commit()
+
+        code_of = {b.id: code for code, b in bins.items()}
+
+        async with factory() as session:
+            service = WMSService(session)
+            await service.plan_grn_putaway(grn_id)
+
+            statements = []
+            sync_engine = session.bind.sync_engine
+            listener = lambda *args: statements.append(args[2])
+            event.listen(sync_engine, "before_cursor_execute", listener)
+            try:
+                # Re-planning releases the first plan's capacity instead of stacking on it.
+                plan = await service.plan_grn_putaway(grn_id)
+            finally:
+                event.remove(sync_engine, "before_cursor_execute", listener)
+
+            # The same handful of queries however many lines the GRN has.
+            assert len(statements) <= 11
+            planned = sorted(
+                (t.grn_item_id, code_of[t.bin_id], t.quantity, t.weight_kg) for t in plan.tasks
+            )
+            assert planned == sorted([
+                (lines["A"].id, "F-1", 2, 4.0),
+                (lines["A"].id, "F-2", 4, 8.0),
+                # F-2 has 6 units of room left but only 12 kg: two 5 kg units.
+                (lines["B"].id, "F-2", 2, 10.0),
+                (lines["D"].id, "B-1", 3, 0.0),
+            ])
+            assert plan.unassigned == {lines["B"].id: 3}
+
+            # Planned tasks hold their capacity: F-1 is full and F-2 has 2 kg left.
+            suggested, rule = await service.suggest_putaway(warehouse_id, products["A"].id, 1)
+            assert [b.bin_code for b in suggested] == ["F-2"] and rule.rule_name == "Fast movers"
+            suggested, _ = await service.suggest_putaway(warehouse_id, products["A"].id, 2)
+            assert suggested == []
+
+            statuses = (await session.execute(select(PutAwayTask.status))).scalars().all()
+            assert sorted(statuses) == [PutAwayTaskStatus.CANCELLED.value] * 4 + [PutAwayTaskStatus.PLANNED.value] * 4
+
+            # Received units arrive without a bin; the plan moves them in bulk.
+            for sku, quantity in (("A", 6), ("B", 5), ("D", 2)):
+                session.add_all(
+                    StockItem(product_id=products[sku].id, warehouse_id=warehouse_id, grn_number="GRN-49")
+                    for _ in range(quantity)
+                )
+            await session.commit()
+
+            result = await service.execute_putaway_plan(grn_id)
+            assert (result["tasks_completed"], result["units_moved"], result["units_pending"]) == (3, 10, 1)
+
+        async with factory() as session:
+            stored = {b.bin_code: b for b in (await session.execute(select(WarehouseBin))).scalars()}
+            assert (stored["F-1"].current_items, stored["F-2"].current_items, stored["B-1"].current_items) == (5, 6, 2)
+            assert stored["F-2"].current_weight_kg == 18.0
+
+            placed = (await session.execute(
+                select(StockItem.product_id, StockItem.rack_location)
+                .where(StockItem.grn_number == "GRN-49", StockItem.bin_id.is_not(None))
+            )).all()
+            assert sorted(code for _, code in placed) == ["B-1"] * 2 + ["F-1"] * 2 + ["F-2"] * 6
+
+            grn_bins = dict((await session.execute(select(GRNItem.sku, GRNItem.bin_location))).all())
+            assert grn_bins == {"A": "F-1", "B": "F-2", "D": "B-1"}
+
+            # D's third unit has not been received; its task keeps holding one unit.
+            open_task = (await session.execute(
+                select(PutAwayTask).where(PutAwayTask.status == PutAwayTaskStatus.PLANNED.value)
+            )).scalar_one()
+            assert (code_of[open_task.bin_id], open_task.quantity) == ("B-1", 1)
+
+    run_on_sqlite(scenario, TABLES)
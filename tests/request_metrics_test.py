@@ -0,0 +1,124 @@
+"""
+Request metrics middleware tests, on a throwaway SQLite engine.
+
+Run:
+    pytest tests/request_metrics_test.py
+"""
+import asyncio
+import logging
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import database
+from app.config import settings
+from app.core import metrics as metrics_module
+from app.core.metrics import MetricsMiddleware, MetricsRegistry, PoolMetrics
+
+
+def make_app(engine) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/orders/{order_id}")
+    async def get_order(order_id: int):
+        async with engine.connect() as conn:
+            for line in range(6):
+                await conn.execute(text("SELECT :line"), {"line": line})
+        return {"order_id": order_id}
+
+    return app
+
+
+def run_requests(tmp_path, paths):
+    registry = MetricsRegistry()
+    original, metrics_module.metrics = metrics_module.metrics, registry
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/metrics.db")
+    # The same hooks app.database installs on the application engine
+    event.listen(engine.sync_engine, "before_cursor_execute", database._before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", database._after_cursor_execute)
+
+    async def main():
+        transport = httpx.ASGITransport(app=make_app(engine))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = [await client.get(path) for path in paths]
+        await engine.dispose()
+        return responses
+
+    try:
+        return asyncio.run(main()), registry
+    finally:
+        metrics_module.metrics = original
+
+
+def test_requests_are_recorded_per_route_template(tmp_path):
+    responses, registry = run_requests(tmp_path, ["/orders/1", "/orders/2", "/missing"])
+
+    assert responses[0].headers["x-db-queries"] == "6"
+    assert responses[0].headers["x-response-time"].endswith("ms")
+    assert registry.requests[("GET", "/orders/{order_id}", "200")] == 2
+    assert registry.requests[("GET", "unmatched", "404")] == 1
+    assert registry.db_queries[("GET", "/orders/{order_id}")].sum == 12
+
+    rendered = registry.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/orders/{order_id}"} 2' in rendered
+    assert 'http_request_db_queries_bucket{method="GET",route="/orders/{order_id}",le="5"} 0' in rendered
+    assert 'http_request_db_queries_bucket{method="GET",route="/orders/{order_id}",le="10"} 2' in rendered
+
+
+def test_query_heavy_request_logs_repeated_statements(tmp_path):
+    threshold = settings.METRICS_QUERY_WARN_THRESHOLD
+    settings.METRICS_QUERY_WARN_THRESHOLD = 5
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logging.getLogger("app.core.metrics").addHandler(handler)
+    try:
+        run_requests(tmp_path, ["/orders/1"])
+    finally:
+        settings.METRICS_QUERY_WARN_THRESHOLD = threshold
+        logging.getLogger("app.core.metrics").removeHandler(handler)
+
+    [record] = records
+    message = record.getMessage()
+    assert "GET /orders/{order_id} ran 6 queries" in message
+    assert "6x SELECT ?" in message
+
+
+def test_pool_records_hold_time_holder_and_timeouts(tmp_path):
+    registry = PoolMetrics()
+    original, metrics_module.pool_metrics = metrics_module.pool_metrics, registry
+    original_db, database.pool_metrics = database.pool_metrics, registry
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/pool.db",
+        poolclass=database.InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.2,
+    )
+    registry.pool = engine.sync_engine.pool
+    event.listen(engine.sync_engine, "checkout", database._on_checkout)
+    event.listen(engine.sync_engine, "checkin", database._on_checkin)
+
+    async def main():
+        async with engine.connect() as held:
+            await held.execute(text("SELECT 1"))
+            assert registry.snapshot()["pool"]["checked_out"] == 1
+            assert registry.snapshot()["held_now"][0]["holder"] == "background"
+            try:
+                async with engine.connect():
+                    pass
+            except Exception as e:
+                assert "QueuePool limit" in str(e)
+        await engine.dispose()
+
+    try:
+        asyncio.run(main())
+    finally:
+        metrics_module.pool_metrics = original
+        database.pool_metrics = original_db
+
+    snapshot = registry.snapshot()
+    assert snapshot["timeouts"] == 1
+    assert snapshot["checkouts"] == 1
+    assert snapshot["pool"]["checked_out"] == 0
+    assert "db_pool_timeouts_total 1" in registry.render()
@@ -0,0 +1,263 @@
+"""
+PO serial generation and range storage tests, on a throwaway SQLite database.
+
+Run:
+    pytest tests/serial_generation_test.py
+"""
+import uuid
+from datetime import date
+
+from sqlalchemy import event, func, select
+
+from app.config import settings
+from app.models.purchase import GoodsReceiptNote
+from app.models.serialization import ItemType, POSerial, POSerialRange, ProductSerialSequence
+from app.schemas.serialization import GenerateSerialItem, GenerateSerialsRequest
+from app.services.serialization import SerializationService
+
+
+TABLES = [
+    POSerialRange.__table__, POSerial.__table__, ProductSerialSequence.__table__, GoodsReceiptNote.__table__,
+]
+
+
+def test_per_unit_rows_are_inserted_in_chunks_and_summarised(run_on_sqlite):
+    async def scenario(factory):
+        settings.SERIAL_RANGE_STORAGE = False
+        po_id = str(uuid.uuid4())
+        async with factory() as session:
+            service = SerializationService(session)
+            service.SERIAL_INSERT_CHUNK = 7
+            response = await service.generate_serials_for_po(GenerateSerialsRequest(
+                po_id=po_id,
+                supplier_code="fs",
+                items=[
+                    GenerateSerialItem(model_code="iel", quantity=20),
+                    GenerateSerialItem(model_code="prg", quantity=5, item_type=ItemType.SPARE_PART),
+                ],
+            ))
+            second = await service.generate_serials_for_po(GenerateSerialsRequest(
+                po_id=po_id, supplier_code="FS", include_barcodes=True,
+                items=[GenerateSerialItem(model_code="IEL", quantity=3)],
+            ))
+
+        assert response.total_generated == 25
+        assert response.barcodes == []
+        fg, sp = response.items
+        assert (fg.start_serial, fg.end_serial) == (1, 20)
+        year, month = service.get_year_code(), service.get_month_code()
+        assert fg.start_barcode == service.generate_barcode("FS", year, month, "IEL", 1)
+        assert sp.end_barcode == service.generate_barcode("FS", year, month, "PRG", 5, ItemType.SPARE_PART)
+        assert second.items[0].start_serial == 21
+        assert second.barcodes == [service.generate_barcode("FS", year, month, "IEL", n) for n in (21, 22, 23)]
+
+        async with factory() as session:
+            assert await session.scalar(select(func.count()).select_from(POSerial)) == 28
+            last = (await session.execute(
+                select(POSerial).where(POSerial.serial_number == 20, POSerial.model_code == "IEL")
+            )).scalar_one()
+            sequence = (await session.execute(
+                select(ProductSerialSequence).where(ProductSerialSequence.model_code == "IEL")
+            )).scalar_one()
+        assert last.barcode == fg.end_barcode
+        assert last.status == "GENERATED" and last.po_id == po_id
+        assert sequence.last_serial == 23
+
+        async with factory() as session:
+            service = SerializationService(session)
+            exported = [row async for batch in service.iter_po_serial_values(po_id, batch_size=10) for row in batch]
+            assert len(exported) == 28 and fg.start_barcode in {row[0] for row in exported[:2]}
+            assert await service.mark_serials_sent_to_vendor(po_id) == 28
+            assert await service.cancel_serials(po_id, reason="Vendor changed") == 28
+            assert await service.get_serials_count_by_po(po_id) == {"total": 28, "CANCELLED": 28}
+
+    try:
+        run_on_sqlite(scenario, TABLES)
+    finally:
+        settings.SERIAL_RANGE_STORAGE = True
+
+
+async def generate(session, po_id, quantity, model_code="IEL"):
+    return await SerializationService(session).generate_serials_for_po(GenerateSerialsRequest(
+        po_id=po_id, supplier_code="FS",
+        items=[GenerateSerialItem(model_code=model_code, quantity=quantity)],
+    ))
+
+
+def test_ranges_resolve_barcodes_and_keep_per_serial_semantics(run_on_sqlite):
+    async def scenario(factory):
+        po_a, po_b = str(uuid.uuid4()), str(uuid.uuid4())
+        async with factory() as session:
+            first = await generate(session, po_a, 1000)
+            second = await generate(session, po_b, 500)
+            await generate(session, po_b, 10, model_code="PRG")
+
+        async with factory() as session:
+            assert await session.scalar(select(func.count()).select_from(POSerial)) == 0
+            assert await session.scalar(select(func.count()).select_from(POSerialRange)) == 3
+
+            service = SerializationService(session)
+            barcode = second.items[0].start_barcode[:-8] + "00001200"
+            serial = await service.get_serial_by_barcode(barcode.lower())
+            assert (serial.po_id, serial.serial_number, serial.status) == (po_b, 1200, "GENERATED")
+            assert await service.get_serial_by_barcode(first.items[0].start_barcode[:-8] + "00001511") is None
+
+            scan = await service.scan_serial(barcode, grn_id=None, user_id="u-1")
+            assert scan.is_valid and str(scan.serial_details.id) == serial.id
+            again = await service.scan_serial(barcode, grn_id=None)
+            assert not again.is_valid and again.status == "RECEIVED"
+            sold = await service.mark_serial_sold(barcode, order_id="o-1")
+            assert sold.status == "SOLD" and sold.warranty_end_date
+
+            resolved = await service.get_serials_by_barcodes([
+                barcode, first.items[0].end_barcode, "APXX", first.items[0].end_barcode[:-8] + "00009999",
+            ])
+            assert set(resolved) == {barcode, first.items[0].end_barcode}
+            assert resolved[barcode].status == "SOLD"
+
+            assert await service.get_serials_count_by_po(po_b) == {"total": 510, "GENERATED": 509, "SOLD": 1}
+            page = await service.get_serials_by_po(po_b, limit=3, offset=208)
+            assert [s.serial_number for s in page] == [1199, 1200, 1201]
+            assert page[1].status == "SOLD"
+            sold_only = await service.get_serials_by_po(po_b, status="SOLD")
+            assert [s.barcode for s in sold_only] == [barcode]
+            assert len(await service.get_serials_by_po(po_b, status="GENERATED", limit=1000)) == 509
+
+            exported = [
+                row async for batch in service.iter_po_serial_values(po_b, batch_size=64) for row in batch
+            ]
+            assert [row[2] for row in exported] == [*range(1, 11), *range(1001, 1501)]
+            assert exported[209] == (barcode, "IEL", 1200, "SOLD")
+            assert [row[0] for row in exported] == [s.barcode for s in await service.get_serials_by_po(po_b)]
+
+            assert await service.mark_serials_sent_to_vendor(po_b) == 509
+            assert await service.cancel_serials(po_a, reason="PO cancelled") == 1000
+            assert await service.count_serials_by_status() == {
+                "total": 1510, "CANCELLED": 1000, "SENT_TO_VENDOR": 509, "SOLD": 1,
+            }
+
+            total, listed = await service.list_serials(status="SENT_TO_VENDOR", offset=505, limit=10)
+            assert total == 509 and len(listed) == 4
+            total, listed = await service.list_serials(search=first.items[0].end_barcode)
+            assert total == 1 and listed[0].serial_number == 1000
+            total, listed = await service.list_serials(offset=0, limit=1510)
+            assert total == 1510 and len({s.barcode for s in listed}) == 1510
+
+    run_on_sqlite(scenario, TABLES)
+
+
+def test_bulk_scan_receives_a_batch_in_one_pass(run_on_sqlite):
+    async def scenario(factory):
+        po_a, po_b = uuid.uuid4(), uuid.uuid4()
+        grn_id = uuid.uuid4()
+        async with factory() as session:
+            session.add(GoodsReceiptNote(
+                id=grn_id, grn_number="GRN-1", grn_date=date.today(), status="DRAFT", grn_type="PO",
+                purchase_order_id=po_a, vendor_id=uuid.uuid4(), warehouse_id=uuid.uuid4(), received_by=uuid.uuid4(),
+            ))
+            await session.commit()
+            a = (await generate(session, str(po_a), 5)).items[0]
+            b = (await generate(session, str(po_b), 3)).items[0]
+
+        def code(item, serial_number):
+            return f"{item.start_barcode[:-8]}{serial_number:08d}"
+
+        async with factory() as session:
+            service = SerializationService(session)
+            await service.scan_serial(code(a, 3), grn_id=str(grn_id))
+            statements = []
+            sync_engine = session.bind.sync_engine
+            listener = lambda *args: statements.append(args[2])
+            event.listen(sync_engine, "before_cursor_execute", listener)
+            try:
+                results = await service.bulk_scan_serials(
+                    [code(a, 1), code(a, 1), code(b, 6), "APXX", code(a, 3), code(a, 2).lower()],
+                    grn_id=str(grn_id), user_id="u-1",
+                )
+            finally:
+                event.remove(sync_engine, "before_cursor_execute", listener)
+
+        assert [r.is_valid for r in results] == [True, False, False, False, False, True]
+        assert "more than once" in results[1].message
+        assert "different purchase order" in results[2].message
+        assert "not found" in results[3].message
+        assert results[4].status == "RECEIVED"
+        assert results[5].serial_details.status == "RECEIVED"
+        writes = [sql for sql in statements if not sql.lstrip().upper().startswith("SELECT")]
+        assert len(writes) == 1 and writes[0].startswith("INSERT INTO po_serials")
+
+        async with factory() as session:
+            service = SerializationService(session)
+            assert await service.get_serials_count_by_po(po_a) == {"total": 5, "GENERATED": 2, "RECEIVED": 3}
+            unknown = await service.bulk_scan_serials([code(a, 4)], grn_id=str(uuid.uuid4()))
+            assert not unknown[0].is_valid and "GRN" in unknown[0].message
+
+    run_on_sqlite(scenario, TABLES)
+
+
+def test_bulk_scan_reports_serials_a_concurrent_scan_received_first(run_on_sqlite):
+    async def scenario(factory):
+        po_id, grn_id = uuid.uuid4(), uuid.uuid4()
+        async with factory() as session:
+            session.add(GoodsReceiptNote(
+                id=grn_id, grn_number="GRN-2", grn_date=date.today(), status="DRAFT", grn_type="PO",
+                purchase_order_id=po_id, vendor_id=uuid.uuid4(), warehouse_id=uuid.uuid4(), received_by=uuid.uuid4(),
+            ))
+            await session.commit()
+            item = (await generate(session, str(po_id), 4)).items[0]
+            codes = [f"{item.start_barcode[:-8]}{n:08d}" for n in (1, 2, 3)]
+
+            # Unit 2 has a stored row (printed), units 1 and 3 are still range units
+            service = SerializationService(session)
+            printed = service.persist_serial(await service.get_serial_by_barcode(codes[1]))
+            printed.status = "PRINTED"
+            await session.commit()
+
+        async with factory() as session:
+            service = SerializationService(session)
+            resolve = service.get_serials_by_barcodes
+
+            async def resolve_then_race(barcodes):
+                resolved = await resolve(barcodes)
+                async with factory() as other:
+                    await SerializationService(other).bulk_scan_serials(codes[:2], grn_id=str(grn_id))
+                return resolved
+
+            service.get_serials_by_barcodes = resolve_then_race
+            results = await service.bulk_scan_serials(codes, grn_id=str(grn_id))
+
+        assert [r.is_valid for r in results] == [False, False, True]
+        assert all("already processed" in r.message for r in results[:2])
+        assert [r.status for r in results] == ["RECEIVED"] * 3
+
+        async with factory() as session:
+            counts = await SerializationService(session).get_serials_count_by_po(po_id)
+            assert counts == {"total": 4, "GENERATED": 1, "RECEIVED": 3}
+
+    run_on_sqlite(scenario, TABLES)
+
+
+def test_single_scan_reports_a_unit_a_concurrent_scan_received_first(run_on_sqlite):
+    async def scenario(factory):
+        po_id = str(uuid.uuid4())
+        async with factory() as session:
+            item = (await generate(session, po_id, 2)).items[0]
+
+        async with factory() as session:
+            service = SerializationService(session)
+            resolve = service.get_serial_by_barcode
+
+            async def resolve_then_race(barcode):
+                resolved = await resolve(barcode)
+                async with factory() as other:
+                    await SerializationService(other).scan_serial(barcode, grn_id=None)
+                service.get_serial_by_barcode = resolve
+                return resolved
+
+            service.get_serial_by_barcode = resolve_then_race
+            result = await service.scan_serial(item.start_barcode, grn_id=None)
+
+        assert not result.is_valid and result.message == "Barcode already scanned"
+        assert result.status == "RECEIVED" and result.serial_details.status == "RECEIVED"
+
+    run_on_sqlite(scenario, TABLES)
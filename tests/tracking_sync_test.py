@@ -0,0 +1,366 @@
+"""
+Courier tracking sync tests, driven by a local fake courier server.
+
+The fake server (FastAPI + uvicorn on 127.0.0.1) implements the Shiprocket
+and CJDQuick auth and batch tracking endpoints used by the poller and records
+request counts, timing, peak concurrency and client connections.
+
+Run:
+    pytest tests/tracking_sync_test.py
+"""
+import asyncio
+import socket
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.dialects import postgresql
+
+from app.models.order import OrderStatus
+from app.services.tracking_sync_service import (
+    CJDQuickTrackingAdapter,
+    ShiprocketTrackingAdapter,
+    TrackingSyncService,
+)
+
+
+# ==================== Fake courier server ====================
+
+class FakeCourierState:
+    def __init__(self):
+        self.shiprocket = {}   # awb -> (status_id, status, location)
+        self.cjdquick = {}     # awb -> (bucket, label, location)
+        self.failing_awbs = set()
+        self.requests = {"shiprocket": [], "cjdquick": []}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.client_ports = set()
+        self.latency = 0.02
+
+
+def create_fake_courier_app(state: FakeCourierState) -> FastAPI:
+    app = FastAPI()
+
+    async def track_request(courier: str, request: Request, awbs):
+        state.client_ports.add(request.client.port)
+        state.requests[courier].append((time.monotonic(), list(awbs)))
+        state.in_flight += 1
+        state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+        try:
+            await asyncio.sleep(state.latency)
+        finally:
+            state.in_flight -= 1
+        return not state.failing_awbs.intersection(awbs)
+
+    @app.post("/shiprocket/auth/login")
+    async def shiprocket_login():
+        return {"token": "shiprocket-token"}
+
+    @app.post("/shiprocket/courier/track/awbs")
+    async def shiprocket_track(request: Request):
+        awbs = (await request.json())["awbs"]
+        if not await track_request("shiprocket", request, awbs):
+            return _error()
+        response = {}
+        for awb in awbs:
+            if awb not in state.shiprocket:
+                continue
+            status_id, status, location = state.shiprocket[awb]
+            response[awb] = {
+                "tracking_data": {
+                    "track_status": 1,
+                    "shipment_track": [{
+                        "awb_code": awb,
+                        "courier_name": "Delhivery",
+                        "current_status": status,
+                        "current_status_id": status_id,
+                        "delivered_date": "2026-10-17 14:30:00" if status_id == 10 else None,
+                        "pickup_date": "2026-10-14 10:00:00",
+                        "etd": "2026-10-18",
+                    }],
+                    "shipment_track_activities": [
+                        {"date": "2026-10-17 09:00:00", "activity": status, "location": location},
+                    ],
+                }
+            }
+        return response
+
+    @app.post("/cjdquick/auth/login")
+    async def cjdquick_login():
+        return {"token": "cjdquick-token", "expiresIn": 3600}
+
+    @app.get("/cjdquick/shipments")
+    async def cjdquick_shipments(request: Request, awbNos: str = "", limit: int = 100):
+        awbs = [a for a in awbNos.split(",") if a]
+        if not await track_request("cjdquick", request, awbs):
+            return _error()
+        return {"data": [
+            {"awbNo": awb, "statusBucket": bucket, "statusLabel": label, "location": location}
+            for awb in awbs if awb in state.cjdquick
+            for bucket, label, location in [state.cjdquick[awb]]
+        ]}
+
+    return app
+
+
+def _error():
+    return JSONResponse(status_code=500, content={"message": "courier unavailable"})
+
+
+class FakeCourierServer:
+    """Runs the fake courier app on a free local port for the duration of a test."""
+
+    def __init__(self, state: FakeCourierState):
+        self.state = state
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.base_url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        config = uvicorn.Config(create_fake_courier_app(state), log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+
+    async def __aenter__(self):
+        self.task = asyncio.create_task(self.server.serve(sockets=[self.sock]))
+        while not self.server.started:
+            await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.should_exit = True
+        await self.task
+
+
+# ==================== Helpers ====================
+
+def make_shipment(awb, courier="shiprocket", status=OrderStatus.IN_TRANSIT.value, tracking_status=None, location=None):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        order_number=f"ORD-{awb}",
+        awb_code=awb,
+        status=status,
+        tracking_status=tracking_status,
+        last_tracking_location=location,
+        shiprocket_order_id=1001 if courier == "shiprocket" else None,
+        shiprocket_shipment_id=None,
+    )
+
+
+def make_adapters(client, base_url, rate=1000.0, shiprocket_batch=50, cjdquick_batch=100):
+    return {
+        "shiprocket": ShiprocketTrackingAdapter(client=client, base_url=f"{base_url}/shiprocket", rate=rate, batch_size=shiprocket_batch),
+        "cjdquick": CJDQuickTrackingAdapter(client=client, base_url=f"{base_url}/cjdquick", rate=rate, batch_size=cjdquick_batch),
+    }
+
+
+class RecordingSession:
+    """Records statements executed by TrackingSyncService.apply()."""
+
+    def __init__(self):
+        self.executions = []
+        self.commits = 0
+
+    async def execute(self, stmt, params=None):
+        self.executions.append((stmt, params))
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+class PagedSyncService(TrackingSyncService):
+    """Serves in-transit pages from memory instead of the orders table."""
+
+    def __init__(self, db, pages, **kwargs):
+        super().__init__(db, **kwargs)
+        self.pages = pages
+
+    async def iter_shipments(self):
+        for page in self.pages:
+            yield page
+
+
+# ==================== Tests ====================
+
+async def _test_batches_both_couriers():
+    state = FakeCourierState()
+    shipments = []
+    for i in range(120):
+        awb = f"SR{i:05d}"
+        state.shiprocket[awb] = (7, "In Transit", "Delhi Hub")
+        shipments.append(make_shipment(awb))
+    for i in range(150):
+        awb = f"CJ{i:05d}"
+        state.cjdquick[awb] = ("out_for_delivery", "Out for Delivery", "Gurgaon")
+        shipments.append(make_shipment(awb, courier="cjdquick"))
+
+    async with FakeCourierServer(state) as server:
+        async with httpx.AsyncClient() as client:
+            service = TrackingSyncService(None, client=client)
+            results = await service.fetch(shipments, make_adapters(client, server.base_url))
+
+    assert len(results) == 270
+    assert len(state.requests["shiprocket"]) == 3  # 120 AWBs / batches of 50
+    assert len(state.requests["cjdquick"]) == 2    # 150 AWBs / batches of 100
+    assert results["SR00000"].order_status == OrderStatus.IN_TRANSIT.value
+    assert results["SR00000"].tracking_status == "IN TRANSIT"
+    assert results["CJ00000"].order_status == OrderStatus.OUT_FOR_DELIVERY.value
+    assert results["CJ00000"].location == "Gurgaon"
+
+
+async def _test_per_courier_rate_limit():
+    state = FakeCourierState()
+    state.latency = 0
+    shipments = []
+    for i in range(100):
+        awb = f"SR{i:05d}"
+        state.shiprocket[awb] = (7, "In Transit", "Delhi Hub")
+        shipments.append(make_shipment(awb))
+    for i in range(100):
+        awb = f"CJ{i:05d}"
+        state.cjdquick[awb] = ("in_transit", "In Transit", "Delhi")
+        shipments.append(make_shipment(awb, courier="cjdquick"))
+
+    async with FakeCourierServer(state) as server:
+        async with httpx.AsyncClient() as client:
+            adapters = make_adapters(client, server.base_url, shiprocket_batch=10, cjdquick_batch=100)
+            adapters["shiprocket"].limiter.rate = 20.0  # 10 calls at 20/s: >= 0.45s
+            service = TrackingSyncService(None, client=client, concurrency=16)
+            await service.fetch(shipments, adapters)
+
+    shiprocket_times = [t for t, _ in state.requests["shiprocket"]]
+    assert len(shiprocket_times) == 10
+    assert shiprocket_times[-1] - shiprocket_times[0] >= 0.4
+    # The other courier is not held back by Shiprocket's limit
+    assert state.requests["cjdquick"][0][0] - shiprocket_times[0] < 0.2
+
+
+async def _test_concurrency_cap_and_pooled_connections():
+    state = FakeCourierState()
+    state.latency = 0.05
+    shipments = []
+    for i in range(200):
+        awb = f"SR{i:05d}"
+        state.shiprocket[awb] = (7, "In Transit", "Delhi Hub")
+        shipments.append(make_shipment(awb))
+
+    limits = httpx.Limits(max_connections=3, max_keepalive_connections=3)
+    async with FakeCourierServer(state) as server:
+        async with httpx.AsyncClient(limits=limits) as client:
+            service = TrackingSyncService(None, client=client, concurrency=3)
+            results = await service.fetch(shipments, make_adapters(client, server.base_url, shiprocket_batch=10))
+
+    assert len(results) == 200
+    assert len(state.requests["shiprocket"]) == 20
+    assert state.peak_in_flight <= 3
+    assert len(state.client_ports) <= 3  # connections reused, not one per request
+
+
+async def _test_failed_batch_is_isolated():
+    state = FakeCourierState()
+    shipments = []
+    for i in range(30):
+        awb = f"SR{i:05d}"
+        state.shiprocket[awb] = (7, "In Transit", "Delhi Hub")
+        shipments.append(make_shipment(awb))
+    state.failing_awbs.add("SR00015")
+
+    errors = []
+    async with FakeCourierServer(state) as server:
+        async with httpx.AsyncClient() as client:
+            service = TrackingSyncService(None, client=client)
+            results = await service.fetch(shipments, make_adapters(client, server.base_url, shiprocket_batch=10), errors)
+
+    assert len(results) == 20
+    assert "SR00015" not in results
+    assert len(errors) == 1
+
+
+async def _test_run_applies_one_bulk_update_per_page():
+    state = FakeCourierState()
+    delivered = make_shipment("SR-DELIVERED", status=OrderStatus.OUT_FOR_DELIVERY.value)
+    stale = make_shipment("SR-STALE", status=OrderStatus.OUT_FOR_DELIVERY.value, tracking_status="OUT FOR DELIVERY")
+    unchanged = make_shipment("SR-SAME", tracking_status="IN TRANSIT", location="Delhi Hub")
+    rto = make_shipment("CJ-RTO", courier="cjdquick")
+    state.shiprocket["SR-DELIVERED"] = (10, "Delivered", "Noida")
+    state.shiprocket["SR-STALE"] = (7, "In Transit", "Delhi Hub")
+    state.shiprocket["SR-SAME"] = (7, "In Transit", "Delhi Hub")
+    state.cjdquick["CJ-RTO"] = ("rto_initiated", "RTO Initiated", "Pune")
+
+    session = RecordingSession()
+    async with FakeCourierServer(state) as server:
+        async with httpx.AsyncClient() as client:
+            service = PagedSyncService(
+                session,
+                pages=[[delivered, stale], [unchanged, rto]],
+                client=client,
+                adapters=make_adapters(client, server.base_url),
+            )
+            summary = await service.run()
+
+    assert summary["orders_checked"] == 4
+    assert summary["orders_updated"] == 3
+    assert summary["status_changes"] == 2
+    assert summary["delivered"] == 1
+    assert summary["errors"] == []
+    assert len(session.executions) == 2 and session.commits == 2
+
+    first_page = {p["order_id"]: p for p in session.executions[0][1]}
+    assert first_page[delivered.id]["new_status"] == OrderStatus.DELIVERED.value
+    assert first_page[delivered.id]["delivered_at"] == datetime(2026, 10, 17, 14, 30, tzinfo=timezone.utc)
+    # An older "in transit" scan never moves an out-for-delivery order back
+    assert first_page[stale.id]["new_status"] is None
+    assert first_page[stale.id]["tracking_status"] == "IN TRANSIT"
+
+    second_page = session.executions[1][1]
+    assert [p["order_id"] for p in second_page] == [rto.id]
+    assert second_page[0]["new_status"] == OrderStatus.RTO_INITIATED.value
+
+    sql = str(session.executions[0][0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE orders SET") and "WHERE orders.id = " in sql
+
+
+async def _test_keyset_page_query():
+    captured = []
+
+    class CapturingSession:
+        async def execute(self, stmt, params=None):
+            captured.append(stmt)
+            return SimpleNamespace(all=lambda: [])
+
+    service = TrackingSyncService(CapturingSession(), page_size=250)
+    pages = [page async for page in service.iter_shipments()]
+
+    assert pages == []
+    sql = str(captured[0].compile(dialect=postgresql.dialect()))
+    assert "ORDER BY orders.id" in sql and "LIMIT" in sql and "OFFSET" not in sql
+
+
+def test_batches_both_couriers():
+    asyncio.run(_test_batches_both_couriers())
+
+
+def test_per_courier_rate_limit():
+    asyncio.run(_test_per_courier_rate_limit())
+
+
+def test_concurrency_cap_and_pooled_connections():
+    asyncio.run(_test_concurrency_cap_and_pooled_connections())
+
+
+def test_failed_batch_is_isolated():
+    asyncio.run(_test_failed_batch_is_isolated())
+
+
+def test_run_applies_one_bulk_update_per_page():
+    asyncio.run(_test_run_applies_one_bulk_update_per_page())
+
+
+def test_keyset_page_query():
+    asyncio.run(_test_keyset_page_query())
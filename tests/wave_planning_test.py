@@ -0,0 +1,190 @@
+"""
+Wave planning tests (carrier cutoff grouping, zone-overlap waves sized to
+picker capacity, batch stock holds, release as wave picklists, batch
+reservations issued on pick and released on cancel), on a throwaway SQLite
+database.
+
+Run:
+    pytest tests/wave_planning_test.py
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.batch import BatchMaster
+from app.models.inventory import StockItem, StockMovement
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.picklist import (
+    Picklist, PicklistItem, PicklistStatus, PicklistType, PickWave, PickWaveAllocation, WaveStatus,
+)
+from app.models.user import User
+from app.models.warehouse import Warehouse
+from app.models.wms import WarehouseBin, WarehouseZone
+from app.services.picklist_service import PicklistService
+from app.services.wave_planning_service import WavePlanningService
+
+TABLES = [
+    Order.__table__, OrderItem.__table__, BatchMaster.__table__, StockItem.__table__, StockMovement.__table__,
+    WarehouseZone.__table__, WarehouseBin.__table__, Warehouse.__table__, User.__table__, PickWave.__table__,
+    Picklist.__table__, PicklistItem.__table__, PickWaveAllocation.__table__,
+]
+
+
+def test_orders_are_waved_by_cutoff_zone_and_capacity(run_on_sqlite):
+    async def scenario(factory):
+        warehouse_id = uuid.uuid4()
+        now = datetime(2026, 10, 18, 4, 0, tzinfo=timezone.utc)  # 09:30 IST
+        products = {name: uuid.uuid4() for name in ("P1", "P2", "P3", "P4", "PB")}
+
+        async with factory() as session:
+            for code, order_rank, names in (("FAST", 1, ("P1", "P2", "PB")), ("BULK", 2, ("P3", "P4"))):
+                zone = WarehouseZone(
+                    warehouse_id=warehouse_id, zone_code=code, zone_name=code, zone_type="PICKING",
+                    sort_order=order_rank,
+                )
+                session.add(zone)
+                await session.flush()
+                for rack, name in enumerate(names, start=1):
+                    bin_ = WarehouseBin(
+                        warehouse_id=warehouse_id, zone_id=zone.id, bin_code=f"{code}-{rack}",
+                        aisle=code, rack=str(rack), bin_type="SHELF",
+                    )
+                    session.add(bin_)
+                    await session.flush()
+                    session.add_all(
+                        StockItem(product_id=products[name], warehouse_id=warehouse_id, bin_id=bin_.id)
+                        for _ in range(10)
+                    )
+            session.add(BatchMaster(
+                batch_number="B-1", product_id=products["PB"], warehouse_id=warehouse_id, quantity_available=3,
+            ))
+
+            orders = {}
+            for n, (lines, courier, promised) in enumerate((
+                (("P1",), "Delhivery", None),
+                (("P3",), None, None),
+                (("P1", "P2"), None, None),
+                (("P3", "P4"), None, None),
+                (("PB",), None, now + timedelta(days=1)),
+                (("PB",), None, now + timedelta(days=2)),
+            ), start=1):
+                order = Order(
+                    order_number=f"ORD-{n}", customer_id=uuid.uuid4(), status=OrderStatus.CONFIRMED.value,
+                    warehouse_id=warehouse_id, subtotal=Decimal("100"), total_amount=Decimal("100"),
+                    shipping_address={}, courier_name=courier, expected_delivery_date=promised,
+                    created_at=now - timedelta(hours=10 - n),
+                )
+                session.add(order)
+                await session.flush()
+                for name in lines:
+                    session.add(OrderItem(
+                        order_id=order.id, product_id=products[name], product_name=name, product_sku=name,
+                        quantity=2 if name == "PB" else 1,
+                        unit_price=Decimal("100"), unit_mrp=Decimal("100"), total_amount=Decimal("100"),
+                    ))
+                orders[n] = order.id
+            await session.commit()
+
+        original = settings.WAVE_CARRIER_CUTOFFS
+        settings.WAVE_CARRIER_CUTOFFS = "DELHIVERY=15:00"
+        try:
+            async with factory() as session:
+                service = WavePlanningService(session)
+                plans, held = await service.plan_waves(warehouse_id, pickers=1, lines_per_picker=3, now=now)
+
+                # Delhivery's 15:00 IST cutoff comes first; the rest split into two balanced
+                # 3-line waves, the urgent batch order pulling in the other FAST-zone order.
+                assert [[o.id for o in p.orders] for p in plans] == [
+                    [orders[1]], [orders[5], orders[3]], [orders[2], orders[4]],
+                ]
+                assert held == [orders[6]]
+                assert plans[0].carrier == "DELHIVERY"
+                assert plans[0].cutoff_at == datetime(2026, 10, 18, 9, 30, tzinfo=timezone.utc)
+                assert [sorted(p.zone_codes) for p in plans] == [["FAST"], ["FAST"], ["BULK"]]
+                assert [(p.lines, p.quantity, p.picker_count) for p in plans] == [(1, 1, 1), (3, 4, 1), (3, 3, 1)]
+
+                released = await service.release_waves(plans)
+
+            async with factory() as session:
+                picklists = (await session.execute(select(Picklist).order_by(Picklist.priority))).scalars().all()
+                waves = {w.id: w for w in (await session.execute(select(PickWave))).scalars()}
+                assert len(waves) == 3 and len(picklists) == 3
+                assert {p.wave_id for p in picklists} == set(waves)
+                assert all(p.picklist_type == PicklistType.WAVE.value for p in picklists)
+                assert [p.priority for p in picklists] == [1, 2, 2]
+                assert waves[released[0][0].id].carrier == "DELHIVERY"
+
+                statuses = dict((await session.execute(select(Order.id, Order.status))).all())
+                assert statuses[orders[6]] == OrderStatus.CONFIRMED.value
+                assert sum(s == OrderStatus.PICKLIST_CREATED.value for s in statuses.values()) == 5
+
+                batch = (await session.execute(select(BatchMaster))).scalar_one()
+                assert (batch.quantity_available, batch.quantity_reserved) == (1, 2)
+
+                # The reservation is recorded against the picklist item that picks it.
+                allocation = (await session.execute(select(PickWaveAllocation))).scalar_one()
+                batch_wave = waves[released[1][0].id]
+                batch_item = (await session.execute(
+                    select(PicklistItem).where(PicklistItem.id == allocation.picklist_item_id)
+                )).scalar_one()
+                assert (allocation.wave_id, allocation.batch_id, allocation.quantity) == (batch_wave.id, batch.id, 2)
+                assert (batch_item.order_id, batch_item.quantity_required) == (orders[5], 2)
+
+                # Nothing left to wave except the held order.
+                plans, held = await WavePlanningService(session).plan_waves(warehouse_id, now=now)
+                assert plans == [] and held == [orders[6]]
+
+            # Picking one of the two batch units issues it and releases the other.
+            async with factory() as session:
+                items = (await session.execute(
+                    select(PicklistItem).where(PicklistItem.picklist_id == allocation.picklist_id)
+                )).scalars().all()
+                for item in items:
+                    item.is_picked = True
+                    item.quantity_picked = 1 if item.id == batch_item.id else item.quantity_required
+                    item.quantity_short = item.quantity_required - item.quantity_picked
+                picklist = await session.get(Picklist, allocation.picklist_id)
+                picklist.status = PicklistStatus.IN_PROGRESS.value
+                await session.commit()
+
+                await PicklistService(session).complete_picking(allocation.picklist_id)
+
+            async with factory() as session:
+                batch = (await session.execute(select(BatchMaster))).scalar_one()
+                assert (batch.quantity_available, batch.quantity_reserved, batch.quantity_issued) == (2, 0, 1)
+                allocation = (await session.execute(select(PickWaveAllocation))).scalar_one()
+                assert (allocation.status, allocation.quantity_issued) == ("ISSUED", 1)
+                movement = (await session.execute(select(StockMovement))).scalar_one()
+                assert (movement.quantity, movement.reference_id) == (-1, allocation.picklist_id)
+                wave = await session.get(PickWave, allocation.wave_id)
+                assert wave.status == WaveStatus.COMPLETED.value and wave.completed_at is not None
+
+                # Cancelling a wave cancels its picklists and puts its orders back in the pool.
+                bulk_wave = released[2][0]
+                wave = await WavePlanningService(session).cancel_wave(bulk_wave.id, "Short staffed")
+                assert wave.status == WaveStatus.CANCELLED.value and wave.cancelled_at is not None
+                try:
+                    await WavePlanningService(session).cancel_wave(bulk_wave.id, "Again")
+                    raise AssertionError("cancelled wave was cancelled again")
+                except ValueError:
+                    pass
+
+                # Cancelling a wave's only picklist cancels the wave.
+                await PicklistService(session).cancel_picklist(released[0][1][0].id, "Carrier missed")
+
+            async with factory() as session:
+                waves = {w.id: w.status for w in (await session.execute(select(PickWave))).scalars()}
+                assert waves[released[0][0].id] == WaveStatus.CANCELLED.value
+                statuses = dict((await session.execute(select(Order.id, Order.status))).all())
+                assert [statuses[orders[n]] for n in (1, 2, 4)] == [OrderStatus.CONFIRMED.value] * 3
+                cancelled = (await session.execute(
+                    select(Picklist.status).where(Picklist.wave_id == bulk_wave.id)
+                )).scalars().all()
+                assert cancelled == [PicklistStatus.CANCELLED.value]
+        finally:
+            settings.WAVE_CARRIER_CUTOFFS = original
+
+    run_on_sqlite(scenario, TABLES)